@@ -3,9 +3,13 @@ Tests core caching facilities.
 """
 
 from django.test import TestCase
+from mock import patch
 
 from opaque_keys.edx.locations import Location
-from openedx.core.djangoapps.contentserver.caching import get_cached_content, set_cached_content, del_cached_content
+from openedx.core.djangoapps.contentserver.caching import (
+    ASSET_NOT_FOUND, CONTENT_CACHE, METADATA_CACHE_TIMEOUT, CachedAssetMetadata, get_cached_content,
+    set_cached_content, del_cached_content, get_cached_metadata, set_cached_metadata, set_cached_metadata_not_found
+)
 
 
 class Content(object):
@@ -15,6 +19,11 @@ class Content(object):
     def __init__(self, location, content):
         self.location = location
         self.content = content
+        self.locked = True
+        self.content_digest = 'ffffffffffffffffffffffffffffffff'
+        self.length = len(content)
+        self.last_modified_at = None
+        self.content_type = 'image/jpeg'
 
     def get_id(self):
         return self.location.to_deprecated_son()
@@ -29,6 +38,10 @@ class CachingTestCase(TestCase):
     nonUnicodeLocation = Location('c4x', u'mitX', u'800', u'run', 'thumbnail', 'monsters.jpg')
     mockAsset = Content(unicodeLocation, 'my content')
 
+    def setUp(self):
+        super(CachingTestCase, self).setUp()
+        CONTENT_CACHE.clear()
+
     def test_put_and_get(self):
         set_cached_content(self.mockAsset)
         self.assertEqual(self.mockAsset.content, get_cached_content(self.unicodeLocation).content,
@@ -43,3 +56,28 @@ class CachingTestCase(TestCase):
                          'should not be stored in cache with unicodeLocation')
         self.assertEqual(None, get_cached_content(self.nonUnicodeLocation),
                          'should not be stored in cache with nonUnicodeLocation')
+
+    def test_put_and_get_metadata(self):
+        set_cached_metadata(self.mockAsset)
+        self.assertEqual(
+            get_cached_metadata(self.nonUnicodeLocation),
+            CachedAssetMetadata(True, 'ffffffffffffffffffffffffffffffff', 10, None, 'image/jpeg'),
+        )
+        self.assertIsNone(get_cached_content(self.unicodeLocation))
+
+    def test_metadata_timeout(self):
+        with patch.object(CONTENT_CACHE, 'set') as mock_set:
+            set_cached_metadata(self.mockAsset)
+        self.assertEqual(mock_set.call_args[1]['timeout'], METADATA_CACHE_TIMEOUT)
+
+    def test_delete_metadata(self):
+        set_cached_content(self.mockAsset)
+        set_cached_metadata(self.mockAsset)
+        del_cached_content(self.nonUnicodeLocation)
+        self.assertIsNone(get_cached_metadata(self.unicodeLocation))
+
+    def test_delete_not_found(self):
+        set_cached_metadata_not_found(self.unicodeLocation)
+        self.assertEqual(get_cached_metadata(self.unicodeLocation), ASSET_NOT_FOUND)
+        del_cached_content(self.unicodeLocation)
+        self.assertIsNone(get_cached_metadata(self.unicodeLocation))
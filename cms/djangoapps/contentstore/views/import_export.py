@@ -7,16 +7,17 @@ import logging
 import os
 import re
 import shutil
+import sys
 import tarfile
+import threading
 from path import Path as path
-from tempfile import mkdtemp
+from Queue import Queue, Full
 
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core.exceptions import SuspiciousOperation, PermissionDenied
-from django.core.files.temp import NamedTemporaryFile
-from django.core.servers.basehttp import FileWrapper
-from django.http import HttpResponse, HttpResponseNotFound, Http404
+from django.db import connection
+from django.http import HttpResponse, HttpResponseNotFound, Http404, StreamingHttpResponse
 from django.utils.translation import ugettext as _
 from django.views.decorators.csrf import ensure_csrf_cookie
 from django.views.decorators.http import require_http_methods, require_GET
@@ -26,10 +27,10 @@ from edxmako.shortcuts import render_to_response
 from xmodule.contentstore.django import contentstore
 from xmodule.exceptions import SerializationError
 from xmodule.modulestore.django import modulestore
-from opaque_keys.edx.keys import CourseKey
+from opaque_keys.edx.keys import CourseKey, UsageKey
 from opaque_keys.edx.locator import LibraryLocator
 from xmodule.modulestore.xml_importer import import_course_from_xml, import_library_from_xml
-from xmodule.modulestore.xml_exporter import export_course_to_xml, export_library_to_xml
+from xmodule.modulestore.xml_exporter import export_course_to_tarball, export_library_to_tarball
 from xmodule.modulestore import COURSE_ROOT, LIBRARY_ROOT
 
 from student.auth import has_course_author_access
@@ -58,6 +59,10 @@ log = logging.getLogger(__name__)
 # Regex to capture Content-Range header ranges.
 CONTENT_RE = re.compile(r"(?P<start>\d{1,11})-(?P<stop>\d{1,11})/(?P<end>\d{1,11})")
 
+# Maximum number of chunks of an export tarball waiting to be sent to the client, before the export
+# waits for the client. tarfile writes its stream by chunks of about 10KB.
+EXPORT_STREAM_MAX_CHUNKS = 64
+
 
 @login_required
 @ensure_csrf_cookie
@@ -285,7 +290,8 @@ def _import_handler(request, courselike_key, root_name, successful_url, context_
                         settings.GITHUB_REPO_ROOT, [dirpath],
                         load_error_modules=False,
                         static_content_store=contentstore(),
-                        target_id=courselike_key
+                        target_id=courselike_key,
+                        asset_upload_threads=settings.COURSE_IMPORT_ASSET_UPLOAD_THREADS,
                     )
 
                 new_location = courselike_items[0].location
@@ -387,33 +393,82 @@ def import_status_handler(request, course_key_string, filename=None):
     return JsonResponse({"ImportStatus": status})
 
 
-def create_export_tarball(course_module, course_key, context):
+class ExportStreamClosed(Exception):
     """
-    Generates the export tarball, or returns None if there was an error.
-
-    Updates the context with any error information if applicable.
+    Raised in the export thread when the client stopped reading the export tarball.
     """
-    name = course_module.url_name
-    export_file = NamedTemporaryFile(prefix=name + '.', suffix=".tar.gz")
-    root_dir = path(mkdtemp())
+    pass
 
-    try:
-        if isinstance(course_key, LibraryLocator):
-            export_library_to_xml(modulestore(), contentstore(), course_key, root_dir, name)
-        else:
-            export_course_to_xml(modulestore(), contentstore(), course_module.id, root_dir, name)
 
-        logging.debug(u'tar file being generated at %s', export_file.name)
-        with tarfile.open(name=export_file.name, mode='w:gz') as tar_file:
-            tar_file.add(root_dir / name, arcname=name)
+class ExportTarballStream(object):
+    """
+    The stream of an export tarball, written to as a file by the export thread,
+    and read as an iterator over its chunks by the response.
 
-    except SerializationError as exc:
-        log.exception(u'There was an error exporting %s', course_key)
-        unit = None
-        failed_item = None
-        parent = None
+    At most EXPORT_STREAM_MAX_CHUNKS chunks are kept in memory, waiting for the
+    client: the export waits for them to be sent.
+    """
+    def __init__(self):
+        self.chunks = Queue(maxsize=EXPORT_STREAM_MAX_CHUNKS)
+        self.closed = False
+
+    def write(self, data):
+        """
+        Adds the chunk `data` to the stream, once there's room for it.
+        """
+        if data:
+            self._put(data)
+
+    def flush(self):
+        """
+        Does nothing, as the chunks are sent as they are written.
+        """
+
+    def finish(self, exc_info=None):
+        """
+        Ends the stream, with the `exc_info` of the error that ended the export if any.
+        """
+        self._put(exc_info)
+
+    def _put(self, item):
+        """
+        Adds `item` to the chunks, or raises ExportStreamClosed if the response is closed first.
+        """
+        while not self.closed:
+            try:
+                self.chunks.put(item, timeout=1)
+                return
+            except Full:
+                pass
+        raise ExportStreamClosed()
+
+    def __iter__(self):
+        """
+        Yields the chunks of the tarball, and raises the error of the export if any.
+        """
+        try:
+            while True:
+                item = self.chunks.get()
+                if not isinstance(item, str):
+                    if item is not None:
+                        raise item[0], item[1], item[2]
+                    return
+                yield item
+        finally:
+            self.closed = True
+
+
+def _update_export_error_context(context, raw_err_msg, failed_location=None):
+    """
+    Updates the context of the export page with the information about the
+    export error `raw_err_msg`, raised by the module at `failed_location` if any.
+    """
+    unit = None
+    failed_item = None
+    parent = None
+    if failed_location is not None:
         try:
-            failed_item = modulestore().get_item(exc.location)
+            failed_item = modulestore().get_item(failed_location)
             parent_loc = modulestore().get_parent_location(failed_item.location)
 
             if parent_loc is not None:
@@ -424,35 +479,133 @@ def create_export_tarball(course_module, course_key, context):
             # if we have a nested exception, then we'll show the more generic error message
             pass
 
-        context.update({
-            'in_err': True,
-            'raw_err_msg': str(exc),
-            'failed_module': failed_item,
-            'unit': unit,
-            'edit_unit_url': reverse_usage_url("container_handler", parent.location) if parent else "",
-        })
-        raise
+    context.update({
+        'in_err': True,
+        'raw_err_msg': raw_err_msg,
+        'failed_module': failed_item,
+        'unit': unit,
+        'edit_unit_url': reverse_usage_url("container_handler", parent.location) if parent else "",
+    })
+
+
+def _failed_export_location(exc):
+    """
+    Returns the location of the module which failed to export with `exc`, or None.
+    """
+    return exc.location if isinstance(exc, SerializationError) else None
+
+
+def _save_export_error(request, course_key, exc):
+    """
+    Save the error of an export which failed after its tarball started to be
+    sent in the request session, for the export page to report it.
+    """
+    location = _failed_export_location(exc)
+    export_errors = request.session.setdefault('export_errors', {})
+    export_errors[unicode(course_key)] = {
+        'raw_err_msg': str(exc),
+        'failed_location': unicode(location) if location is not None else None,
+    }
+    request.session.modified = True
+    request.session.save()
+
+
+def _pop_export_error(request, course_key, context):
+    """
+    Updates the context of the export page with the error saved by the last
+    export of the course or library, if it failed while being sent.
+    """
+    export_errors = request.session.get('export_errors')
+    if not export_errors or unicode(course_key) not in export_errors:
+        return
+    export_error = export_errors.pop(unicode(course_key))
+    request.session.modified = True
+    failed_location = export_error['failed_location']
+    _update_export_error_context(
+        context,
+        export_error['raw_err_msg'],
+        UsageKey.from_string(failed_location).map_into_course(course_key) if failed_location else None,
+    )
+
+
+def create_export_tarball_stream(request, course_module, course_key, context):
+    """
+    Starts exporting the course or library as a tar.gz stream, written straight
+    from the modulestore and contentstore without staging the export on disk,
+    and returns an iterator over the chunks of the tarball.
+
+    The export runs in a thread, and this waits for its first chunk: if the
+    export fails before, the error is raised, and the context is updated with
+    the error information. If it fails later, the error is saved in the session
+    for the export page to report it, and raised while iterating, which aborts
+    the connection instead of ending the response, so that the client doesn't
+    take the truncated tarball for a complete one.
+    """
+    name = course_module.url_name
+    stream = ExportTarballStream()
+    if isinstance(course_key, LibraryLocator):
+        export_func = export_library_to_tarball
+    else:
+        export_func = export_course_to_tarball
+        course_key = course_module.id
+
+    def export():
+        """
+        Exports the courselike to the stream.
+        """
+        try:
+            export_func(modulestore(), contentstore(), course_key, name, stream)
+        except ExportStreamClosed:
+            log.info(u'Export of %s stopped, as the client stopped reading it', course_key)
+        except Exception:  # pylint: disable=broad-except
+            try:
+                stream.finish(sys.exc_info())
+            except ExportStreamClosed:
+                pass
+        else:
+            try:
+                stream.finish()
+            except ExportStreamClosed:
+                pass
+        finally:
+            connection.close()
+
+    export_thread = threading.Thread(target=export, name=u'export {}'.format(course_key))
+    export_thread.daemon = True
+    export_thread.start()
+
+    chunks = iter(stream)
+    try:
+        first_chunk = next(chunks, '')
     except Exception as exc:
-        log.exception('There was an error exporting %s', course_key)
-        context.update({
-            'in_err': True,
-            'unit': None,
-            'raw_err_msg': str(exc)})
+        log.exception(u'There was an error exporting %s', course_key)
+        _update_export_error_context(context, str(exc), _failed_export_location(exc))
         raise
-    finally:
-        shutil.rmtree(root_dir / name)
 
-    return export_file
+    def stream_chunks():
+        """
+        Yields all the chunks of the tarball, and logs and saves the error of the export if any.
+        """
+        try:
+            yield first_chunk
+            for chunk in chunks:
+                yield chunk
+        except Exception as exc:
+            log.exception(u'There was an error exporting %s, after starting to send it', course_key)
+            _save_export_error(request, course_key, exc)
+            raise
+        finally:
+            stream.closed = True
+
+    return stream_chunks()
 
 
-def send_tarball(tarball):
+def send_tarball_stream(tarball_stream, name):
     """
-    Renders a tarball to response, for use when sending a tar.gz file to the user.
+    Renders a tarball stream to a streaming response, for use when sending a tar.gz file to the user.
     """
-    wrapper = FileWrapper(tarball)
-    response = HttpResponse(wrapper, content_type='application/x-tgz')
-    response['Content-Disposition'] = 'attachment; filename=%s' % os.path.basename(tarball.name.encode('utf-8'))
-    response['Content-Length'] = os.path.getsize(tarball.name)
+    response = StreamingHttpResponse(tarball_stream, content_type='application/x-tgz')
+    response['Content-Disposition'] = 'attachment; filename=%s.tar.gz' % name.encode('utf-8')
     return response
 
 
@@ -504,12 +657,13 @@ def export_handler(request, course_key_string):
 
     if 'application/x-tgz' in requested_format:
         try:
-            tarball = create_export_tarball(courselike_module, course_key, context)
+            tarball_stream = create_export_tarball_stream(request, courselike_module, course_key, context)
         except SerializationError:
             return render_to_response('export.html', context)
-        return send_tarball(tarball)
+        return send_tarball_stream(tarball_stream, courselike_module.url_name)
 
     elif 'text/html' in requested_format:
+        _pop_export_error(request, course_key, context)
         return render_to_response('export.html', context)
 
     else:
@@ -10,7 +10,9 @@ import os
 import shutil
 import tarfile
 import tempfile
+from mock import patch
 from path import Path as path
+from StringIO import StringIO
 from uuid import uuid4
 
 from django.test.utils import override_settings
@@ -18,6 +20,7 @@ from django.conf import settings
 
 from contentstore.tests.test_libraries import LibraryTestCase
 from xmodule.contentstore.django import contentstore
+from xmodule.exceptions import SerializationError
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.xml_exporter import export_library_to_xml, export_course_to_xml
 from xmodule.modulestore.xml_importer import import_library_from_xml, import_course_from_xml
@@ -557,6 +560,10 @@ class ExportTestCase(CourseTestCase):
         """ Export success helper method. """
         self.assertEquals(resp.status_code, 200)
         self.assertTrue(resp.get('Content-Disposition').startswith('attachment'))
+        tarball = tarfile.open(fileobj=StringIO(''.join(resp.streaming_content)))
+        course_dir = self.course.url_name
+        self.assertIn(course_dir + '/course.xml', tarball.getnames())
+        self.assertIn(course_dir + '/policies/assets.json', tarball.getnames())
 
     def test_export_failure_top_level(self):
         """
@@ -586,6 +593,34 @@ class ExportTestCase(CourseTestCase):
         self.assertContains(resp, 'Unable to create xml for module')
         self.assertContains(resp, expected_text)
 
+    def test_export_failure_while_sending(self):
+        """
+        Export failure after the tarball started to be sent.
+        """
+        vertical = ItemFactory.create(parent_location=self.course.location, category='vertical', display_name='foo')
+        problem = ItemFactory.create(parent_location=vertical.location, category='problem')
+
+        def export_with_late_failure(*args):
+            """ Sends a first chunk of the tarball, then fails to export the problem. """
+            fileobj = args[-1]
+            fileobj.write('first chunk')
+            raise SerializationError(problem.location, 'Unable to create xml for module')
+
+        with patch('contentstore.views.import_export.export_course_to_tarball', export_with_late_failure):
+            resp = self.client.get(self.url, HTTP_ACCEPT='application/x-tgz')
+            self.assertEquals(resp.status_code, 200)
+            chunks = iter(resp.streaming_content)
+            self.assertEquals(next(chunks), 'first chunk')
+            with self.assertRaises(SerializationError):
+                next(chunks)
+
+        # The export page reports the failure once.
+        resp = self.client.get_html(self.url)
+        self.assertContains(resp, 'Unable to create xml for module')
+        self.assertContains(resp, u'/container/{}'.format(vertical.location))
+        resp = self.client.get_html(self.url)
+        self.assertNotContains(resp, 'Unable to create xml for module')
+
     def test_library_export(self):
         """
         Verify that useable library data can be exported.
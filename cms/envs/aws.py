@@ -476,3 +476,15 @@ AFFILIATE_COOKIE_NAME = ENV_TOKENS.get('AFFILIATE_COOKIE_NAME', AFFILIATE_COOKIE
 ############## Settings for Studio Context Sensitive Help ##############
 
 DOC_LINK_BASE_URL = ENV_TOKENS.get('DOC_LINK_BASE_URL', DOC_LINK_BASE_URL)
+
+COURSE_IMPORT_ASSET_UPLOAD_THREADS = ENV_TOKENS.get(
+    'COURSE_IMPORT_ASSET_UPLOAD_THREADS', COURSE_IMPORT_ASSET_UPLOAD_THREADS
+)
+
+CONTENTSERVER_SPOOL_ROOT = ENV_TOKENS.get('CONTENTSERVER_SPOOL_ROOT', CONTENTSERVER_SPOOL_ROOT)
+CONTENTSERVER_SPOOL_SENDFILE_HEADER = ENV_TOKENS.get(
+    'CONTENTSERVER_SPOOL_SENDFILE_HEADER', CONTENTSERVER_SPOOL_SENDFILE_HEADER
+)
+CONTENTSERVER_SPOOL_ACCEL_REDIRECT_LOCATION = ENV_TOKENS.get(
+    'CONTENTSERVER_SPOOL_ACCEL_REDIRECT_LOCATION', CONTENTSERVER_SPOOL_ACCEL_REDIRECT_LOCATION
+)
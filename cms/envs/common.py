@@ -1101,6 +1101,20 @@ MAX_ASSET_UPLOAD_FILE_SIZE_IN_MB = 10
 # a file that exceeds the above size
 MAX_ASSET_UPLOAD_FILE_SIZE_URL = ""
 
+### Number of threads uploading the static files of an imported course to the contentstore,
+### while its modules are written to the modulestore. 1 imports them serially.
+COURSE_IMPORT_ASSET_UPLOAD_THREADS = 4
+
+### The directory of the on-disk spool of the course assets served by the contentserver,
+### from which they are sent by the OS rather than through Python. None disables the spool.
+CONTENTSERVER_SPOOL_ROOT = None
+### The header having the front end server send the spooled assets: 'X-Accel-Redirect' (nginx,
+### with an internal location aliasing CONTENTSERVER_SPOOL_ROOT at
+### CONTENTSERVER_SPOOL_ACCEL_REDIRECT_LOCATION) or 'X-Sendfile' (Apache); None sends them
+### with a FileResponse, which the WSGI server may send with sendfile.
+CONTENTSERVER_SPOOL_SENDFILE_HEADER = None
+CONTENTSERVER_SPOOL_ACCEL_REDIRECT_LOCATION = '/spooled_assets/'
+
 ### Default value for entrance exam minimum score
 ENTRANCE_EXAM_MIN_SCORE_PCT = 50
 
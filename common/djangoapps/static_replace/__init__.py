@@ -1,5 +1,8 @@
 import logging
 import re
+import time
+from collections import OrderedDict
+from threading import RLock
 
 from django.contrib.staticfiles.storage import staticfiles_storage
 from django.contrib.staticfiles import finders
@@ -15,6 +18,150 @@ from opaque_keys.edx.locator import AssetLocator
 log = logging.getLogger(__name__)
 XBLOCK_STATIC_RESOURCE_PREFIX = '/static/xblock'
 
+# The maximum number of paths whose staticfiles_storage lookups are memoized in the process
+STATICFILES_LOOKUP_CACHE_MAX_ENTRIES = 10000
+
+
+class LRUCache(object):
+    """
+    Thread-safe per-process LRU cache, bounded by the total size of its entries.
+    """
+    def __init__(self, max_size, timeout=None, sizeof=lambda key, value: 1):
+        """
+        Arguments:
+            max_size (int): The maximum total size of the entries.
+            timeout (int): The number of seconds an entry is kept, or None to keep it until evicted.
+            sizeof (function): Returns the size of an entry, given its key and value.
+        """
+        self._max_size = max_size
+        self._timeout = timeout
+        self.sizeof = sizeof
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = RLock()
+
+    @property
+    def max_size(self):
+        """
+        The maximum total size of the entries, or 0 if the cache is disabled.
+        """
+        return self._max_size
+
+    @property
+    def timeout(self):
+        """
+        The number of seconds an entry is kept, or None to keep it until evicted.
+        """
+        return self._timeout
+
+    def get(self, key, default=None):
+        """
+        Return the value of the key, or default if it isn't cached or has expired.
+        """
+        if not self.max_size:
+            return default
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return default
+            value, size, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                self._size -= size
+                return default
+            self._entries[key] = entry
+            return value
+
+    def set(self, key, value):
+        """
+        Cache the value of the key, evicting the least recently used entries if needed.
+        """
+        max_size = self.max_size
+        size = self.sizeof(key, value)
+        if size > max_size:
+            return
+        timeout = self.timeout
+        expires_at = time.time() + timeout if timeout is not None else None
+        with self._lock:
+            previous_entry = self._entries.pop(key, None)
+            if previous_entry is not None:
+                self._size -= previous_entry[1]
+            self._entries[key] = (value, size, expires_at)
+            self._size += size
+            while self._size > max_size:
+                __, (__, evicted_size, __) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+
+    def clear(self):
+        """
+        Remove all the entries.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+# path -> whether it exists in staticfiles_storage, and path -> its url there.  The
+# static files don't change while the process runs, so these are never invalidated.
+STATICFILES_EXISTS_CACHE = LRUCache(STATICFILES_LOOKUP_CACHE_MAX_ENTRIES)
+STATICFILES_URL_CACHE = LRUCache(STATICFILES_LOOKUP_CACHE_MAX_ENTRIES)
+
+
+class FragmentRewriteCache(LRUCache):
+    """
+    Per-process cache of the rewritten urls of fragments, keyed by the course
+    version and the text of the fragment, among the rewrite arguments.
+
+    Bounded by the total length of the texts and rewritten texts it holds,
+    STATIC_REPLACE_REWRITE_CACHE_MAX_SIZE, which disables the cache if 0 or
+    not set. The urls of course assets include the digest of the assets,
+    which may change without a new course version, so the rewrites are only
+    kept for STATIC_REPLACE_REWRITE_CACHE_TIMEOUT seconds.
+    """
+    def __init__(self):
+        super(FragmentRewriteCache, self).__init__(0, sizeof=lambda key, value: len(key[-1]) + len(value))
+
+    @property
+    def max_size(self):
+        """
+        The maximum total length of the cached texts, or 0 if the cache is disabled.
+        """
+        return getattr(settings, 'STATIC_REPLACE_REWRITE_CACHE_MAX_SIZE', 0)
+
+    @property
+    def timeout(self):
+        """
+        The number of seconds a rewrite is kept.
+        """
+        return getattr(settings, 'STATIC_REPLACE_REWRITE_CACHE_TIMEOUT', 300)
+
+
+REWRITE_CACHE = FragmentRewriteCache()
+
+# (STATIC_URL, data_dir) -> the compiled regex of replace_urls
+URL_REGEX_CACHE = LRUCache(100)
+
+
+def cached_staticfiles_exists(path):
+    """
+    Memoized staticfiles_storage.exists; exceptions aren't memoized.
+    """
+    exists = STATICFILES_EXISTS_CACHE.get(path)
+    if exists is None:
+        exists = staticfiles_storage.exists(path)
+        STATICFILES_EXISTS_CACHE.set(path, exists)
+    return exists
+
+
+def cached_staticfiles_url(path):
+    """
+    Memoized staticfiles_storage.url; exceptions aren't memoized.
+    """
+    url = STATICFILES_URL_CACHE.get(path)
+    if url is None:
+        url = staticfiles_storage.url(path)
+        STATICFILES_URL_CACHE.set(path, url)
+    return url
+
 
 def _url_replace_regex(prefix):
     """
@@ -111,28 +258,40 @@ def process_static_urls(text, replacement_function, data_dir=None):
         quote = match.group('quote')
         rest = match.group('rest')
 
-        # Don't rewrite XBlock resource links.  Probably wasn't a good idea that /static
-        # works for actual static assets and for magical course asset URLs....
-        full_url = prefix + rest
-
-        starts_with_static_url = full_url.startswith(unicode(settings.STATIC_URL))
-        starts_with_prefix = full_url.startswith(XBLOCK_STATIC_RESOURCE_PREFIX)
-        contains_prefix = XBLOCK_STATIC_RESOURCE_PREFIX in full_url
-        if starts_with_prefix or (starts_with_static_url and contains_prefix):
+        # Don't rewrite XBlock resource links.
+        if _is_xblock_resource_url(prefix + rest):
             return original
 
         return replacement_function(original, prefix, quote, rest)
 
     return re.sub(
-        _url_replace_regex(u'(?:{static_url}|/static/)(?!{data_dir})'.format(
-            static_url=settings.STATIC_URL,
-            data_dir=data_dir
-        )),
+        _url_replace_regex(_static_prefix_pattern(data_dir)),
         wrap_part_extraction,
         text
     )
 
 
+def _static_prefix_pattern(data_dir):
+    """
+    The pattern of the prefix of static urls, except those of the files in data_dir.
+    """
+    return u'(?:{static_url}|/static/)(?!{data_dir})'.format(
+        static_url=settings.STATIC_URL,
+        data_dir=data_dir
+    )
+
+
+def _is_xblock_resource_url(full_url):
+    """
+    Whether the static url links to an XBlock resource.  Probably wasn't a good idea
+    that /static works for actual static assets and for magical course asset URLs....
+    """
+    starts_with_static_url = full_url.startswith(unicode(settings.STATIC_URL))
+    starts_with_prefix = full_url.startswith(XBLOCK_STATIC_RESOURCE_PREFIX)
+    contains_prefix = XBLOCK_STATIC_RESOURCE_PREFIX in full_url
+    return starts_with_prefix or (starts_with_static_url and contains_prefix)
+
+
 def make_static_urls_absolute(request, html):
     """
     Converts relative URLs referencing static assets to absolute URLs
@@ -163,6 +322,19 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
     static_asset_path: Path for static assets, which overrides data_directory and course_namespace, if nonempty
     """
 
+    replace_static_url = _static_url_replacer(
+        data_directory, course_id, static_asset_path, staticfiles_storage.exists, staticfiles_storage.url
+    )
+
+    return process_static_urls(text, replace_static_url, data_dir=static_asset_path or data_directory)
+
+
+def _static_url_replacer(data_directory, course_id, static_asset_path, storage_exists, storage_url):
+    """
+    Return the function replacing a single matched static url, as described in
+    replace_static_urls, looking paths up in staticfiles_storage with
+    storage_exists and storage_url.
+    """
     def replace_static_url(original, prefix, quote, rest):
         """
         Replace a single matched url.
@@ -181,13 +353,13 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
 
             exists_in_staticfiles_storage = False
             try:
-                exists_in_staticfiles_storage = staticfiles_storage.exists(rest)
+                exists_in_staticfiles_storage = storage_exists(rest)
             except Exception as err:
                 log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
                     rest, str(err)))
 
             if exists_in_staticfiles_storage:
-                url = staticfiles_storage.url(rest)
+                url = storage_url(rest)
             else:
                 # if not, then assume it's courseware specific content and then look in the
                 # Mongo-backed database
@@ -203,10 +375,10 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
             course_path = "/".join((static_asset_path or data_directory, rest))
 
             try:
-                if staticfiles_storage.exists(rest):
-                    url = staticfiles_storage.url(rest)
+                if storage_exists(rest):
+                    url = storage_url(rest)
                 else:
-                    url = staticfiles_storage.url(course_path)
+                    url = storage_url(course_path)
             # And if that fails, assume that it's course content, and add manually data directory
             except Exception as err:
                 log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
@@ -215,4 +387,116 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
 
         return "".join([quote, url, quote])
 
-    return process_static_urls(text, replace_static_url, data_dir=static_asset_path or data_directory)
+    return replace_static_url
+
+
+def _urls_regex(data_dir):
+    """
+    Return the compiled regex matching the static, course and jump_to_id urls
+    in quotes, in a single pass.
+    """
+    key = (settings.STATIC_URL, data_dir)
+    regex = URL_REGEX_CACHE.get(key)
+    if regex is None:
+        regex = re.compile(ur"""
+            (?x)                                  # flags=re.VERBOSE
+            (?P<quote>\\?['"])                    # the opening quotes
+            (?:
+                (?P<static>{static_prefix})       # the prefix of a static url,
+                | (?P<course>/course/)            # of a course url,
+                | (?P<jump>/jump_to_id/)          # or of a jump_to_id url
+            )
+            (?P<rest>.*?)                         # everything else in the url
+            (?P=quote)                            # the first matching closing quote
+            """.format(static_prefix=_static_prefix_pattern(data_dir)))
+        URL_REGEX_CACHE.set(key, regex)
+    return regex
+
+
+def _any_url_prefix_regex():
+    """
+    Return the regex matching the prefix of any url rewritten by replace_urls.
+    """
+    return re.compile(u'{static_url}|/static/|/course/|/jump_to_id/'.format(static_url=settings.STATIC_URL))
+
+
+def replace_urls(text, course_id, jump_to_id_base_url, data_directory=None, static_asset_path='', course_version=None):
+    """
+    Replace the static, course and jump_to_id urls of the text, as
+    replace_static_urls, replace_course_urls and replace_jump_to_id_urls do in
+    turn, but in a single pass, with memoized staticfiles_storage lookups.
+
+    If course_version is given, the rewritten text is memoized in
+    REWRITE_CACHE, so that identical texts of the course version, e.g. the
+    same fragment rendered for many students, are only rewritten once.
+
+    text: The source text to do the substitution in
+    course_id: The course identifier
+    jump_to_id_base_url: The app-tier path of the jump_to_id handler, as for replace_jump_to_id_urls
+    data_directory: The directory in which course data is stored
+    static_asset_path: Path for static assets, which overrides data_directory and course_id, if nonempty
+    course_version: The version of the course the text belongs to, if known
+    """
+    if course_version is None:
+        return _replace_urls(text, course_id, jump_to_id_base_url, data_directory, static_asset_path)
+
+    key = (unicode(course_version), unicode(course_id), data_directory, static_asset_path, jump_to_id_base_url, text)
+    rewritten_text = REWRITE_CACHE.get(key)
+    if rewritten_text is None:
+        rewritten_text = _replace_urls(text, course_id, jump_to_id_base_url, data_directory, static_asset_path)
+        REWRITE_CACHE.set(key, rewritten_text)
+    return rewritten_text
+
+
+def _replace_urls(text, course_id, jump_to_id_base_url, data_directory, static_asset_path):
+    """
+    The single pass of replace_urls.
+
+    The urls matched by the separate passes may overlap: the closing quote of
+    a url may open the next one, and a url may contain the quote of another
+    one.  The single pass would then rewrite them differently, so the text
+    falls back to the separate passes.
+    """
+    regex = _urls_regex(static_asset_path or data_directory)
+    matches = list(regex.finditer(text))
+    if not matches:
+        return text
+
+    prefix_regex = _any_url_prefix_regex()
+    for match in matches:
+        if "'" in match.group('rest') or '"' in match.group('rest') or prefix_regex.match(text, match.end()):
+            return replace_jump_to_id_urls(
+                replace_course_urls(
+                    replace_static_urls(text, data_directory, course_id, static_asset_path=static_asset_path),
+                    course_id
+                ),
+                course_id,
+                jump_to_id_base_url
+            )
+
+    replace_static_url = _static_url_replacer(
+        data_directory, course_id, static_asset_path, cached_staticfiles_exists, cached_staticfiles_url
+    )
+    deprecated_course_id = course_id.to_deprecated_string()
+
+    parts = []
+    end = 0
+    for match in matches:
+        parts.append(text[end:match.start()])
+        end = match.end()
+        original = match.group(0)
+        quote = match.group('quote')
+        rest = match.group('rest')
+        prefix = match.group('static')
+        if prefix is not None:
+            # Don't rewrite XBlock resource links.
+            if _is_xblock_resource_url(prefix + rest):
+                parts.append(original)
+            else:
+                parts.append(replace_static_url(original, prefix, quote, rest))
+        elif match.group('course') is not None:
+            parts.append("".join([quote, '/courses/' + deprecated_course_id + '/', rest, quote]))
+        else:
+            parts.append("".join([quote, jump_to_id_base_url + rest, quote]))
+    parts.append(text[end:])
+    return "".join(parts)
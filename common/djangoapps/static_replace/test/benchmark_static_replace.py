@@ -0,0 +1,111 @@
+"""
+Benchmark of the url rewriting of the fragments of a sequential of HTML blocks.
+
+Compares the separate replace_static_urls, replace_course_urls and
+replace_jump_to_id_urls passes over each fragment, as the LMS used to apply
+them, with the single pass of replace_urls, without and with the memoized
+rewrites of the course version.
+
+Run from an LMS shell, so that the course assets are canonicalized against
+the contentstore, as when rendering:
+
+    from static_replace.test.benchmark_static_replace import main
+    main(course_key)
+"""
+import timeit
+
+from django.test.utils import override_settings
+
+from static_replace import (
+    REWRITE_CACHE,
+    STATICFILES_EXISTS_CACHE,
+    STATICFILES_URL_CACHE,
+    replace_course_urls,
+    replace_jump_to_id_urls,
+    replace_static_urls,
+    replace_urls,
+)
+
+FRAGMENT_TEMPLATE = u"""
+<div class="xblock xblock-student_view" data-block-type="html">
+  <h3>Unit {index}</h3>
+  <p>{lorem}</p>
+  <img src="/static/images/figure_{index}_a.png" alt="Figure {index}a"/>
+  <img src="/static/images/figure_{index}_b.png" alt="Figure {index}b"/>
+  <p>{lorem}</p>
+  <a href="/static/handouts/unit_{index}.pdf">Handout</a>
+  <a href="/static/handouts/syllabus.pdf">Syllabus</a>
+  <script type="text/javascript" src="/static/js/vendor/jquery.min.js"></script>
+  <a href="/course/about">About this course</a>
+  <a href="/course/info">Course info</a>
+  <a href="/jump_to_id/problem_{index}">Problem {index}</a>
+  <a href="/jump_to_id/discussion_{index}">Discussion</a>
+  <p>{lorem}</p>
+</div>
+"""
+
+LOREM = u"Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor. " * 8
+
+
+def build_fragments(num_blocks):
+    """
+    Returns the texts of `num_blocks` HTML fragments, each linking to course
+    assets, static files, course pages and other blocks.
+    """
+    return [FRAGMENT_TEMPLATE.format(index=index, lorem=LOREM) for index in xrange(num_blocks)]
+
+
+def clear_caches():
+    """
+    Empties the per-process caches of static_replace.
+    """
+    for cache in (REWRITE_CACHE, STATICFILES_EXISTS_CACHE, STATICFILES_URL_CACHE):
+        cache.clear()
+
+
+def main(course_key, num_blocks=50, number=20):
+    """
+    Prints the mean time to rewrite the urls of the fragments of a sequential
+    of `num_blocks` HTML blocks of the course.
+    """
+    fragments = build_fragments(num_blocks)
+    jump_to_id_base_url = u'/courses/{}/jump_to_id/'.format(course_key)
+
+    def rewrite_in_passes():
+        """
+        Rewrites the fragments with the separate passes.
+        """
+        return [
+            replace_jump_to_id_urls(
+                replace_course_urls(replace_static_urls(text, course_id=course_key), course_key),
+                course_key,
+                jump_to_id_base_url
+            )
+            for text in fragments
+        ]
+
+    def rewrite_in_single_pass(course_version=None):
+        """
+        Rewrites the fragments with replace_urls.
+        """
+        return [
+            replace_urls(text, course_key, jump_to_id_base_url, course_version=course_version)
+            for text in fragments
+        ]
+
+    with override_settings(STATIC_REPLACE_REWRITE_CACHE_MAX_SIZE=16 * 1024 * 1024):
+        clear_caches()
+        assert rewrite_in_passes() == rewrite_in_single_pass() == rewrite_in_single_pass('version')
+        print 'Sequential of {} HTML blocks'.format(num_blocks)
+
+        timings = [
+            ('separate passes', rewrite_in_passes),
+            ('single pass (cold)', lambda: (clear_caches(), rewrite_in_single_pass())),
+            ('single pass', rewrite_in_single_pass),
+            ('single pass (memoized)', lambda: rewrite_in_single_pass('version')),
+        ]
+        for label, rewrite in timings:
+            rewrite()
+            seconds = timeit.timeit(rewrite, number=number)
+            print '{:>24}: {:.3f} ms per sequential'.format(label, seconds * 1000 / number)
+        clear_caches()
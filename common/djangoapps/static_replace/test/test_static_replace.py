@@ -3,6 +3,7 @@
 
 import ddt
 import re
+from unittest import TestCase
 
 from django.test import override_settings
 from django.utils.http import urlquote, urlencode
@@ -11,8 +12,14 @@ from PIL import Image
 from cStringIO import StringIO
 from nose.tools import assert_equals, assert_true, assert_false  # pylint: disable=no-name-in-module
 from static_replace import (
+    LRUCache,
+    REWRITE_CACHE,
+    STATICFILES_EXISTS_CACHE,
+    STATICFILES_URL_CACHE,
     replace_static_urls,
     replace_course_urls,
+    replace_jump_to_id_urls,
+    replace_urls,
     _url_replace_regex,
     process_static_urls,
     make_static_urls_absolute
@@ -228,6 +235,122 @@ def test_static_url_with_xblock_resource_on_cdn(mock_modulestore, mock_storage):
     assert_equals(post_text, replace_static_urls(pre_text, DATA_DIRECTORY, COURSE_KEY))
 
 
+JUMP_TO_ID_BASE_URL = '/courses/org/course/run/jump_to_id/'
+
+
+def canonicalized_asset_path(course_key, path, base_url, excluded_exts):  # pylint: disable=unused-argument
+    """
+    Stands for StaticContent.get_canonicalized_asset_path of an asset without digest.
+    """
+    return '/c4x/org/course/asset/' + path.replace('/', '_')
+
+
+@ddt.ddt
+class ReplaceUrlsTest(TestCase):
+    """
+    Tests of the single pass replace_urls.
+    """
+    def setUp(self):
+        super(ReplaceUrlsTest, self).setUp()
+        patchers = [
+            patch('static_replace.AssetExcludedExtensionsConfig.get_excluded_extensions', return_value=[]),
+            patch('static_replace.AssetBaseUrlConfig.get_base_url', return_value=u''),
+            patch('static_replace.StaticContent.get_canonicalized_asset_path', side_effect=canonicalized_asset_path),
+            patch('static_replace.staticfiles_storage', autospec=True),
+        ]
+        mocks = []
+        for patcher in patchers:
+            mocks.append(patcher.start())
+            self.addCleanup(patcher.stop)
+        __, __, self.mock_canonicalized_asset_path, self.mock_storage = mocks
+        self.mock_storage.exists.side_effect = lambda path: path.startswith('js/')
+        self.mock_storage.url.side_effect = lambda path: '/static/hashed/' + path
+
+        for cache in (REWRITE_CACHE, STATICFILES_EXISTS_CACHE, STATICFILES_URL_CACHE):
+            cache.clear()
+            self.addCleanup(cache.clear)
+
+    def replace_urls_in_passes(self, text, **kwargs):
+        """
+        Returns the text with its urls replaced by the separate passes.
+        """
+        return replace_jump_to_id_urls(
+            replace_course_urls(replace_static_urls(text, course_id=COURSE_KEY, **kwargs), COURSE_KEY),
+            COURSE_KEY,
+            JUMP_TO_ID_BASE_URL
+        )
+
+    @ddt.data(
+        'no urls',
+        '<img src="/static/images/file.png"/><script src=\'/static/js/file.js\'></script>',
+        '<a href="/course/about">About</a> <a href="/jump_to_id/block_id">Next</a>',
+        '<a href="/static/file.pdf?raw">raw</a> <a href=\\"/static/handouts/file.pdf\\">escaped</a>',
+        '<img src="/static/xblock/resources/some.xblock/public/image.png"/>',
+        '<a href="/static/file.png"/course/about">overlapping</a>',
+        '<a href=\'/static/file.png"/jump_to_id/block_id"\'>nested</a>',
+        '<a href="/jump_to_id/block_id\'/static/file.png\'">nested</a>',
+    )
+    def test_same_as_passes(self, text):
+        self.assertEqual(replace_urls(text, COURSE_KEY, JUMP_TO_ID_BASE_URL), self.replace_urls_in_passes(text))
+
+    def test_static_asset_path(self):
+        text = '<img src="/static/file.png"/><img src="/static/data_dir/file.png"/><a href="/course/about">'
+        self.assertEqual(
+            replace_urls(text, COURSE_KEY, JUMP_TO_ID_BASE_URL, static_asset_path=DATA_DIRECTORY),
+            self.replace_urls_in_passes(text, static_asset_path=DATA_DIRECTORY)
+        )
+
+    def test_memoized_staticfiles_lookups(self):
+        text = '<script src="/static/js/file.js"></script>'
+        for __ in range(2):
+            self.assertEqual(
+                replace_urls(text, COURSE_KEY, JUMP_TO_ID_BASE_URL),
+                '<script src="/static/hashed/js/file.js"></script>'
+            )
+        self.mock_storage.exists.assert_called_once_with('js/file.js')
+        self.mock_storage.url.assert_called_once_with('js/file.js')
+
+    @ddt.data((0, 2), (1024, 1))
+    @ddt.unpack
+    def test_memoized_rewrites(self, max_size, num_rewrites):
+        text = '<img src="/static/images/file.png"/>'
+        with override_settings(STATIC_REPLACE_REWRITE_CACHE_MAX_SIZE=max_size):
+            for __ in range(2):
+                self.assertEqual(
+                    replace_urls(text, COURSE_KEY, JUMP_TO_ID_BASE_URL, course_version='version'),
+                    '<img src="/c4x/org/course/asset/images_file.png"/>'
+                )
+            self.assertEqual(self.mock_canonicalized_asset_path.call_count, num_rewrites)
+
+            # Neither texts of other course versions, nor texts without one, reuse the rewrite
+            replace_urls(text, COURSE_KEY, JUMP_TO_ID_BASE_URL, course_version='other_version')
+            replace_urls(text, COURSE_KEY, JUMP_TO_ID_BASE_URL)
+            self.assertEqual(self.mock_canonicalized_asset_path.call_count, num_rewrites + 2)
+
+
+@patch('static_replace.time.time')
+def test_lru_cache(mock_time):
+    mock_time.return_value = 1000
+    cache = LRUCache(3, timeout=60, sizeof=lambda key, value: len(value))
+    cache.set('a', 'x')
+    cache.set('b', 'yy')
+    assert_equals(cache.get('a'), 'x')
+
+    # 'b' is the least recently used entry
+    cache.set('c', 'z')
+    assert_equals(cache.get('b'), None)
+    assert_equals(cache.get('a'), 'x')
+    assert_equals(cache.get('c'), 'z')
+
+    # Entries larger than the cache aren't cached
+    cache.set('d', 'long')
+    assert_equals(cache.get('d'), None)
+
+    mock_time.return_value = 1060
+    assert_equals(cache.get('a'), None)
+    assert_equals(LRUCache(0).get('a', 'default'), 'default')
+
+
 @ddt.ddt
 class CanonicalContentTest(SharedModuleStoreTestCase):
     """
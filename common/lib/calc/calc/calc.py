@@ -1,13 +1,16 @@
 """
 Parser and evaluator for FormulaResponse and NumericalResponse
 
-Uses pyparsing to parse. Main function as of now is evaluator().
+Uses pyparsing to parse. Main function as of now is evaluator(); expressions
+that are evaluated many times may be compiled once with compile_expression().
 """
 
+from collections import OrderedDict
 import math
 import operator
 import numbers
 import numpy
+from threading import RLock
 import scipy.constants
 import functions
 
@@ -216,6 +219,64 @@ def add_defaults(variables, functions, case_sensitive):
     return (all_variables, all_functions)
 
 
+def eval_atom_samples(parse_result):
+    """
+    Like eval_atom, for values that may be arrays of samples.
+    """
+    return next(k for k in parse_result if not isinstance(k, basestring))
+
+
+def eval_power_samples(parse_result):
+    """
+    Like eval_power, for values that may be arrays of samples.
+    """
+    parse_result = reversed([k for k in parse_result if not isinstance(k, basestring)])
+    return reduce(lambda a, b: b ** a, parse_result)
+
+
+def eval_parallel_samples(parse_result):
+    """
+    Like eval_parallel, for values that may be arrays of samples.
+
+    Raise ZeroDivisionError if there is a zero among the inputs, rather
+    than returning NaN for the samples concerned.
+    """
+    values = [k for k in parse_result if not isinstance(k, basestring)]
+    if len(values) == 1:
+        return values[0]
+    if any(numpy.any(numpy.asarray(value) == 0) for value in values):
+        raise ZeroDivisionError("parallel resistor with a zero")
+    return 1. / sum(1. / value for value in values)
+
+
+def eval_sum_samples(parse_result):
+    """
+    Like eval_sum, for values that may be arrays of samples.
+    """
+    total = 0.0
+    current_op = operator.add
+    for token in parse_result:
+        if isinstance(token, basestring):
+            current_op = operator.sub if token == '-' else operator.add
+        else:
+            total = current_op(total, token)
+    return total
+
+
+def eval_product_samples(parse_result):
+    """
+    Like eval_product, for values that may be arrays of samples.
+    """
+    prod = 1.0
+    current_op = operator.mul
+    for token in parse_result:
+        if isinstance(token, basestring):
+            current_op = operator.truediv if token == '/' else operator.mul
+        else:
+            prod = current_op(prod, token)
+    return prod
+
+
 def evaluator(variables, functions, math_expr, case_sensitive=False):
     """
     Evaluate an expression; that is, take a string of math and return a float.
@@ -228,34 +289,135 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
     if math_expr.strip() == "":
         return float('nan')
 
-    # Parse the tree.
-    math_interpreter = ParseAugmenter(math_expr, case_sensitive)
-    math_interpreter.parse_algebra()
+    return compile_expression(math_expr, case_sensitive).evaluate(variables, functions)
 
-    # Get our variables together.
-    all_variables, all_functions = add_defaults(variables, functions, case_sensitive)
 
-    # ...and check them
-    math_interpreter.check_variables(all_variables, all_functions)
+# The maximum number of CompiledExpressions kept by compile_expression.
+COMPILED_EXPRESSION_CACHE_SIZE = 1000
 
-    # Create a recursion to evaluate the tree.
-    if case_sensitive:
-        casify = lambda x: x
-    else:
-        casify = lambda x: x.lower()  # Lowercase for case insens.
-
-    evaluate_actions = {
-        'number': eval_number,
-        'variable': lambda x: all_variables[casify(x[0])],
-        'function': lambda x: all_functions[casify(x[0])](x[1]),
-        'atom': eval_atom,
-        'power': eval_power,
-        'parallel': eval_parallel,
-        'product': eval_product,
-        'sum': eval_sum
-    }
-
-    return math_interpreter.reduce_tree(evaluate_actions)
+_compiled_expressions = OrderedDict()
+_compiled_expressions_lock = RLock()
+
+
+def compile_expression(math_expr, case_sensitive=False):
+    """
+    Return the CompiledExpression of `math_expr`.
+
+    The most recently used CompiledExpressions are cached by expression
+    and case sensitivity, so that the expressions that are evaluated
+    repeatedly are only parsed once.
+    """
+    key = (math_expr, case_sensitive)
+    with _compiled_expressions_lock:
+        compiled = _compiled_expressions.pop(key, None)
+        if compiled is not None:
+            _compiled_expressions[key] = compiled
+            return compiled
+
+    compiled = CompiledExpression(math_expr, case_sensitive)
+    with _compiled_expressions_lock:
+        _compiled_expressions[key] = compiled
+        while len(_compiled_expressions) > COMPILED_EXPRESSION_CACHE_SIZE:
+            _compiled_expressions.popitem(last=False)
+    return compiled
+
+
+class CompiledExpression(object):
+    """
+    A parsed math expression, that may be evaluated many times.
+
+    Evaluate it for one set of variables with `evaluate`, or for many sets
+    of variables at once with `evaluate_samples`.
+    """
+    def __init__(self, math_expr, case_sensitive=False):
+        """
+        Parse `math_expr`, raising a pyparsing.ParseException if it is invalid.
+        """
+        self.math_expr = math_expr
+        self.case_sensitive = case_sensitive
+        self.parsed = ParseAugmenter(math_expr, case_sensitive)
+        if math_expr.strip() != "":
+            self.parsed.parse_algebra()
+
+    def casify(self, name):
+        """
+        Return `name` as it is looked up among the variables and functions.
+        """
+        return name if self.case_sensitive else name.lower()
+
+    def evaluate(self, variables, functions):
+        """
+        Evaluate the expression; that is, return its float value, as `evaluator` does.
+        """
+        if self.parsed.tree is None:
+            return float('nan')
+
+        # Get our variables together, and check them.
+        all_variables, all_functions = add_defaults(variables, functions, self.case_sensitive)
+        self.parsed.check_variables(all_variables, all_functions)
+
+        return self._reduce(all_variables, all_functions, {
+            'atom': eval_atom,
+            'power': eval_power,
+            'parallel': eval_parallel,
+            'product': eval_product,
+            'sum': eval_sum,
+        })
+
+    def evaluate_samples(self, samples, functions):
+        """
+        Evaluate the expression for each of the dictionaries of variables
+        of the list `samples`, and return the list of the values.
+
+        When every sample defines the same variables, the expression is
+        evaluated once over NumPy arrays of all the samples' values. Should
+        that raise an ArithmeticError, TypeError or ValueError, as for a
+        division by zero, a function that doesn't support arrays or a
+        floating point error other than an underflow, every sample is
+        evaluated on its own instead, so that the values, and the errors
+        that are raised, are the same as those of calling `evaluate` for
+        each sample. Other errors are raised as they are.
+        """
+        if self.parsed.tree is None:
+            return [float('nan')] * len(samples)
+
+        names = set(samples[0]) if samples else set()
+        if len(samples) > 1 and all(set(sample) == names for sample in samples):
+            variables = {name: numpy.array([sample[name] for sample in samples]) for name in names}
+            all_variables, all_functions = add_defaults(variables, functions, self.case_sensitive)
+            self.parsed.check_variables(all_variables, all_functions)
+            try:
+                with numpy.errstate(divide='raise', over='raise', invalid='raise'):
+                    values = numpy.asarray(self._reduce(all_variables, all_functions, {
+                        'atom': eval_atom_samples,
+                        'power': eval_power_samples,
+                        'parallel': eval_parallel_samples,
+                        'product': eval_product_samples,
+                        'sum': eval_sum_samples,
+                    }))
+            except (ArithmeticError, TypeError, ValueError):
+                pass
+            else:
+                if values.shape == ():
+                    values = numpy.repeat(values, len(samples))
+                if values.shape == (len(samples),):
+                    return values.tolist()
+
+        return [self.evaluate(sample, functions) for sample in samples]
+
+    def _reduce(self, all_variables, all_functions, actions):
+        """
+        Evaluate the parse tree with the given variables and functions, and
+        the given actions for atoms, powers, parallel terms, products and sums.
+        """
+        casify = self.casify
+        evaluate_actions = {
+            'number': eval_number,
+            'variable': lambda x: all_variables[casify(x[0])],
+            'function': lambda x: all_functions[casify(x[0])](x[1]),
+        }
+        evaluate_actions.update(actions)
+        return self.parsed.reduce_tree(evaluate_actions)
 
 
 class ParseAugmenter(object):
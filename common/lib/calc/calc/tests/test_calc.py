@@ -559,3 +559,85 @@ class EvaluatorTest(unittest.TestCase):
             calc.evaluator({'r1': 5}, {}, "r1+r2")
         with self.assertRaisesRegexp(calc.UndefinedVariable, 'r1 r3'):
             calc.evaluator(variables, {}, "r1*r3", case_sensitive=True)
+
+
+class CompiledExpressionTest(unittest.TestCase):
+    """
+    Run tests for calc.compile_expression and CompiledExpression
+    """
+    def assert_samples(self, math_expr, samples, functions=None, case_sensitive=False):
+        """
+        Check that evaluating the samples at once gives the same values as
+        evaluating each of them with `evaluator`.
+        """
+        functions = functions or {}
+        compiled = calc.compile_expression(math_expr, case_sensitive)
+        values = compiled.evaluate_samples(samples, functions)
+        expected = [calc.evaluator(sample, functions, math_expr, case_sensitive) for sample in samples]
+        self.assertEqual(len(values), len(expected))
+        for value, expected_value in zip(values, expected):
+            if numpy.isnan(expected_value):
+                self.assertTrue(numpy.isnan(value))
+            else:
+                self.assertAlmostEqual(value, expected_value)
+
+    def test_cached(self):
+        self.assertIs(calc.compile_expression('x^2'), calc.compile_expression('x^2'))
+        self.assertIsNot(calc.compile_expression('x^2'), calc.compile_expression('x^2', case_sensitive=True))
+        self.assertIsNot(calc.compile_expression('x^2'), calc.compile_expression('x^3'))
+
+    def test_parse_error(self):
+        with self.assertRaises(ParseException):
+            calc.compile_expression('5+(3')
+
+    def test_evaluate(self):
+        compiled = calc.compile_expression('x^2 + 3*y')
+        self.assertEqual(compiled.evaluate({'x': 2.0, 'y': 1.0}, {}), 7.0)
+        self.assertEqual(compiled.evaluate({'x': 3.0, 'y': 2.0}, {}), 15.0)
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'y'):
+            compiled.evaluate({'x': 3.0}, {})
+
+    def test_evaluate_samples(self):
+        samples = [{'x': x, 'y': y} for x, y in zip(numpy.linspace(1, 5, 20), numpy.linspace(-3, 3, 20))]
+        self.assert_samples('x^2 + 3*y - 5k', samples)
+        self.assert_samples('sin(x)/x + sec(y) * exp(-y) || x', samples)
+        self.assert_samples('(x + i*y)^2', samples)
+        self.assert_samples('2^3^x', samples)
+        self.assert_samples('7', samples)
+        self.assert_samples('X*Y', samples)
+        self.assert_samples('f(x) + y', samples, functions={'f': lambda x: x * 2})
+
+    def test_evaluate_samples_fallback(self):
+        # Functions that don't accept arrays and domain errors fall back to
+        # the evaluation of each sample.
+        self.assert_samples('fact(x)', [{'x': 1.0}, {'x': 4.0}])
+        self.assert_samples('arccot(x)', [{'x': -2.0}, {'x': 3.0}])
+        self.assert_samples('x || 1', [{'x': 0.0}, {'x': 1.0}])
+        self.assert_samples('sqrt(x)', [{'x': 4.0}, {'x': -1.0}])
+        self.assert_samples('x + y', [{'x': 1.0, 'y': 2.0}, {'x': 3.0, 'y': 4.0, 'z': 5.0}])
+
+        with self.assertRaises(ZeroDivisionError):
+            calc.compile_expression('1/x').evaluate_samples([{'x': 1.0}, {'x': 0.0}], {})
+        with self.assertRaises(ValueError):
+            calc.compile_expression('(-x)^0.5').evaluate_samples([{'x': 1.0}, {'x': 2.0}], {})
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'z'):
+            calc.compile_expression('x*z').evaluate_samples([{'x': 1.0}, {'x': 2.0}], {})
+
+    def test_evaluate_samples_unexpected_error(self):
+        # Errors other than those of evaluating arrays aren't retried for
+        # each sample.
+        calls = []
+
+        def func(x):
+            """Fails on every call."""
+            calls.append(x)
+            raise RuntimeError('boom')
+
+        with self.assertRaisesRegexp(RuntimeError, 'boom'):
+            calc.compile_expression('f(x)').evaluate_samples([{'x': 1.0}, {'x': 2.0}], {'f': func})
+        self.assertEqual(len(calls), 1)
+
+    def test_empty_expression(self):
+        values = calc.compile_expression(' ').evaluate_samples([{'x': 1.0}, {'x': 2.0}], {})
+        self.assertEqual(len(values), 2)
+        self.assertTrue(all(numpy.isnan(value) for value in values))
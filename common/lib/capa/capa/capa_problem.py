@@ -16,9 +16,11 @@ This is used by capa_module.
 from collections import OrderedDict
 from copy import deepcopy
 from datetime import datetime
+import hashlib
 import logging
 import os.path
 import re
+from threading import RLock
 
 from lxml import etree
 from pytz import UTC
@@ -72,6 +74,105 @@ html_problem_semantics = [
 
 log = logging.getLogger(__name__)
 
+# Version of the seed-independent preprocessing of problems that is cached
+# by ParsedProblemCache: bump it whenever that preprocessing changes.
+PARSED_PROBLEM_VERSION = 1
+
+# The maximum number of parsed problems kept by each process.
+PARSED_PROBLEM_CACHE_MAX_ENTRIES = 1000
+
+
+class ParsedProblem(object):
+    """
+    The seed-independent result of preprocessing a problem's XML: the
+    parsed tree, with the ids of its responses and inputs assigned and
+    its a11y data extracted, and the layout of its responses.
+
+    A ParsedProblem is never modified: each LoncapaProblem gets a copy of
+    it with `instantiate`.
+    """
+    def __init__(self, tree, problem_data, response_layout):
+        """
+        Arguments:
+            tree (etree.Element): the preprocessed XML tree.
+            problem_data (dict): the a11y data of the problem's inputs.
+            response_layout (list): (response element, list of input
+                elements) pairs, for the responses of `tree` in order.
+        """
+        self.tree = tree
+        self.problem_data = problem_data
+
+        # The layout is kept as the positions of the elements in the
+        # tree, so that it can be found again in the copies of the tree.
+        positions = {element: position for position, element in enumerate(tree.iter())}
+        self.response_layout = [
+            (positions[response], [positions[inputfield] for inputfield in inputfields])
+            for response, inputfields in response_layout
+        ]
+
+    def instantiate(self):
+        """
+        Returns a copy of the tree, problem data and response layout
+        of the parsed problem.
+        """
+        tree = deepcopy(self.tree)
+        elements = list(tree.iter())
+        response_layout = [
+            (elements[response], [elements[inputfield] for inputfield in inputfields])
+            for response, inputfields in self.response_layout
+        ]
+        return tree, deepcopy(self.problem_data), response_layout
+
+
+class ParsedProblemCache(object):
+    """
+    A process-local, size-bounded LRU cache of ParsedProblems.
+    """
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = RLock()
+
+    @staticmethod
+    def key(problem_text, problem_id):
+        """
+        Returns the key of the ParsedProblem of the given problem text and id.
+        """
+        if isinstance(problem_text, unicode):
+            problem_text = problem_text.encode('utf-8')
+        return (PARSED_PROBLEM_VERSION, hashlib.md5(problem_text).hexdigest(), problem_id)
+
+    def get(self, key):
+        """
+        Returns the ParsedProblem cached for `key`, or None.
+        """
+        with self._lock:
+            parsed_problem = self._entries.pop(key, None)
+            if parsed_problem is not None:
+                self._entries[key] = parsed_problem
+            return parsed_problem
+
+    def set(self, key, parsed_problem):
+        """
+        Caches `parsed_problem`, evicting the least recently used entries
+        as needed.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+            while self._entries and len(self._entries) >= self.max_entries:
+                self._entries.popitem(last=False)
+            self._entries[key] = parsed_problem
+
+    def clear(self):
+        """
+        Removes all the cached ParsedProblems.
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+PARSED_PROBLEM_CACHE = ParsedProblemCache(PARSED_PROBLEM_CACHE_MAX_ENTRIES)
+
 #-----------------------------------------------------------------------------
 # main class for this module
 
@@ -177,13 +278,9 @@ class LoncapaProblem(object):
         problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
         self.problem_text = problem_text
 
-        # parse problem XML file into an element tree
-        self.tree = etree.XML(problem_text)
-
-        self.make_xml_compatible(self.tree)
-
-        # handle any <include file="foo"> tags
-        self._process_includes()
+        # parse problem XML file into an element tree, add ID's to its responses
+        # and inputs, and extract their a11y data.
+        self.tree, self.problem_data, response_layout = self._parse_problem(problem_text)
 
         # construct script processor context (eg for customresponse problems)
         if minimal_init:
@@ -191,11 +288,10 @@ class LoncapaProblem(object):
         else:
             self.context = self._extract_context(self.tree)
 
-        # Pre-parse the XML tree: modifies it to add ID's and perform some in-place
-        # transformations.  This also creates the dict (self.responders) of Response
-        # instances for each question in the problem. The dict has keys = xml subtree of
-        # Response, values = Response instance
-        self.problem_data = self._preprocess_problem(self.tree, minimal_init)
+        # Create the dict (self.responders) of Response instances for each question
+        # in the problem. The dict has keys = xml subtree of Response, values = Response
+        # instance
+        self._preprocess_problem(self.tree, minimal_init, response_layout)
 
         if not minimal_init:
             if not self.student_answers:  # True when student_answers is an empty dict
@@ -215,6 +311,36 @@ class LoncapaProblem(object):
 
             self.extracted_tree = self._extract_html(self.tree)
 
+    def _parse_problem(self, problem_text):
+        """
+        Parses the problem's XML and preprocesses it, independently of the seed.
+
+        The preprocessed problem is cached in PARSED_PROBLEM_CACHE, so that it is
+        only copied when the same problem is constructed again, unless the problem
+        includes files, whose contents may change.
+
+        Returns:
+            The preprocessed tree, the a11y data of its inputs, and the list of
+            (response element, list of input elements) pairs of its responses.
+        """
+        key = PARSED_PROBLEM_CACHE.key(problem_text, self.problem_id)
+        parsed_problem = PARSED_PROBLEM_CACHE.get(key)
+        if parsed_problem is None:
+            tree = etree.XML(problem_text)
+            self.make_xml_compatible(tree)
+            if tree.find('.//include') is not None:
+                # handle any <include file="foo"> tags
+                self.tree = tree
+                self._process_includes()
+                problem_data = {}
+                return tree, problem_data, self._layout_responses(tree, problem_data)
+
+            problem_data = {}
+            response_layout = self._layout_responses(tree, problem_data)
+            parsed_problem = ParsedProblem(tree, problem_data, response_layout)
+            PARSED_PROBLEM_CACHE.set(key, parsed_problem)
+        return parsed_problem.instantiate()
+
     def make_xml_compatible(self, tree):
         """
         Adjust tree xml in-place for compatibility before creating
@@ -869,20 +995,18 @@ class LoncapaProblem(object):
 
         return tree
 
-    def _preprocess_problem(self, tree, minimal_init):  # private
+    def _layout_responses(self, tree, problem_data):
         """
         Assign IDs to all the responses
         Assign sub-IDs to all entries (textline, schematic, etc.)
-        Annoted correctness and value
         In-place transformation
 
-        Also create capa Response instances for each responsetype and save as self.responders
+        Also fills `problem_data` with the a11y data of the entries.
 
-        Obtain all responder answers and save as self.responder_answers dict (key = response)
+        Returns a list of (response, entries) pairs, one for each response in order.
         """
         response_id = 1
-        problem_data = {}
-        self.responders = {}
+        response_layout = []
         for response in tree.xpath('//' + "|//".join(responsetypes.registry.registered_tags())):
             responsetype_id = self.problem_id + "_" + str(response_id)
             # create and save ID for this response
@@ -904,7 +1028,22 @@ class LoncapaProblem(object):
                 answer_id = answer_id + 1
 
             self.response_a11y_data(response, inputfields, responsetype_id, problem_data)
+            response_layout.append((response, inputfields))
+
+        return response_layout
 
+    def _preprocess_problem(self, tree, minimal_init, response_layout):  # private
+        """
+        Annoted correctness and value
+        In-place transformation
+
+        Create capa Response instances for each responsetype of `response_layout`,
+        as returned by `_layout_responses`, and save as self.responders
+
+        Obtain all responder answers and save as self.responder_answers dict (key = response)
+        """
+        self.responders = {}
+        for response, inputfields in response_layout:
             # instantiate capa Response
             responsetype_cls = responsetypes.registry.get_class_for_tag(response.tag)
             responder = responsetype_cls(
@@ -933,8 +1072,6 @@ class LoncapaProblem(object):
                 solution.attrib['id'] = "%s_solution_%i" % (self.problem_id, solution_id)
                 solution_id += 1
 
-        return problem_data
-
     def response_a11y_data(self, response, inputfields, responsetype_id, problem_data):
         """
         Construct data to be used for a11y.
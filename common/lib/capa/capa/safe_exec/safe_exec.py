@@ -6,7 +6,10 @@ from codejail.safe_exec import json_safe, SafeExecException
 from . import lazymod
 from dogapi import dog_stats_api
 
+from collections import OrderedDict, defaultdict
+from threading import RLock
 import hashlib
+import json
 
 # Establish the Python environment for Capa.
 # Capa assumes float-friendly division always.
@@ -70,6 +73,187 @@ def update_hash(hasher, obj):
         hasher.update(repr(obj))
 
 
+def cache_key(code, safe_globals, random_seed):
+    """
+    Returns the key under which the result of executing `code` with the
+    globals `safe_globals` and the random seed `random_seed` is cached.
+
+    `safe_globals` must be JSON-safe, as returned by `json_safe`.  It is
+    serialized canonically, with its keys sorted, by the C JSON encoder,
+    which is much faster than walking it with `update_hash`.
+
+    """
+    md5er = hashlib.md5()
+    md5er.update(repr(code))
+    md5er.update(json.dumps(safe_globals, sort_keys=True, separators=(',', ':')))
+    return "safe_exec.%r.%s" % (random_seed, md5er.hexdigest())
+
+
+# The maximum number of results held by the process-local tier of the
+# SafeExecCaches.
+LOCAL_CACHE_MAX_ENTRIES = 2000
+
+
+class LocalResultCache(object):
+    """
+    A process-local, size-bounded LRU cache of safe_exec results.
+
+    The results are kept serialized, so that callers which modify the
+    globals dict they are copied into never modify the cached results.
+    """
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = RLock()
+
+    def get(self, key):
+        """
+        Returns the result cached for `key`, or None if there is none.
+        """
+        with self._lock:
+            serialized = self._entries.pop(key, None)
+            if serialized is None:
+                return None
+            self._entries[key] = serialized
+        return tuple(json.loads(serialized))
+
+    def set(self, key, value):
+        """
+        Caches the result `value`, evicting the least recently used results
+        as needed.
+        """
+        serialized = json.dumps(value)
+        with self._lock:
+            self._entries.pop(key, None)
+            while self._entries and len(self._entries) >= self.max_entries:
+                self._entries.popitem(last=False)
+            self._entries[key] = serialized
+
+    def clear(self):
+        """
+        Removes all the cached results.
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+LOCAL_RESULT_CACHE = LocalResultCache(LOCAL_CACHE_MAX_ENTRIES)
+
+# The maximum number of courses whose lookups are counted in CACHE_STATS.
+CACHE_STATS_MAX_COURSES = 500
+
+
+class CacheStats(object):
+    """
+    Process-local counts of the lookups in the SafeExecCaches, by course
+    and by result: 'local_hit', 'hit' or 'miss'.
+
+    The counts of up to `max_courses` courses are kept, dropping those of
+    the courses whose lookups are least recent as needed. The complete
+    counts are reported to datadog.
+    """
+    def __init__(self, max_courses):
+        self.max_courses = max_courses
+        self._counts = OrderedDict()
+        self._lock = RLock()
+
+    def record(self, course_id, result):
+        """
+        Counts a lookup in the course `course_id` with the given result.
+        """
+        with self._lock:
+            counts = self._counts.pop(course_id, None)
+            if counts is None:
+                counts = defaultdict(int)
+                while self._counts and len(self._counts) >= self.max_courses:
+                    self._counts.popitem(last=False)
+            counts[result] += 1
+            self._counts[course_id] = counts
+
+    def get(self, course_id):
+        """
+        Returns a dict of the counts of the lookups in the course `course_id`,
+        by result.
+        """
+        with self._lock:
+            return dict(self._counts.get(course_id, {}))
+
+    def clear(self):
+        """
+        Removes all the counts.
+        """
+        with self._lock:
+            self._counts.clear()
+
+
+CACHE_STATS = CacheStats(CACHE_STATS_MAX_COURSES)
+
+
+def get_cache_stats(course_id):
+    """
+    Returns the lookups in the SafeExecCaches of the given course, as a
+    dict of the numbers of hits in the local tier ('local_hit') and in the
+    shared tier ('hit'), the number of misses ('miss'), and the
+    'hit_rate', the fraction of the lookups that were hits in either tier.
+    """
+    stats = CACHE_STATS.get(unicode(course_id))
+    lookups = sum(stats.get(result, 0) for result in ('local_hit', 'hit', 'miss'))
+    stats['hit_rate'] = float(lookups - stats.get('miss', 0)) / lookups if lookups else 0.0
+    return stats
+
+
+class SafeExecCache(object):
+    """
+    A two-tier cache of safe_exec results, to be passed as the `cache` of
+    `safe_exec`.
+
+    Results are looked up first in the process-local LOCAL_RESULT_CACHE,
+    and then in `shared_cache`, an object with .get(key) and .set(key,
+    value) methods shared by all processes, such as a Django cache.
+    Results are stored in both tiers.
+
+    The lookups are counted by course in CACHE_STATS, and reported to
+    datadog as the 'capa.safe_exec.cache' metric.
+    """
+    def __init__(self, shared_cache, course_id):
+        self.shared_cache = shared_cache
+        self.course_id = unicode(course_id)
+
+    def get(self, key):
+        """
+        Returns the result cached for `key` in either tier, or None.
+        """
+        value = LOCAL_RESULT_CACHE.get(key)
+        if value is not None:
+            self._record('local_hit')
+            return value
+
+        value = self.shared_cache.get(key)
+        if value is not None:
+            self._record('hit')
+            LOCAL_RESULT_CACHE.set(key, value)
+        else:
+            self._record('miss')
+        return value
+
+    def set(self, key, value):
+        """
+        Caches the result `value` in both tiers.
+        """
+        LOCAL_RESULT_CACHE.set(key, value)
+        self.shared_cache.set(key, value)
+
+    def _record(self, result):
+        """
+        Counts a lookup with the given result.
+        """
+        CACHE_STATS.record(self.course_id, result)
+        dog_stats_api.increment(
+            'capa.safe_exec.cache',
+            tags=[u'result:{}'.format(result), u'course_id:{}'.format(self.course_id)],
+        )
+
+
 @dog_stats_api.timed('capa.safe_exec.time')
 def safe_exec(
     code,
@@ -97,9 +281,9 @@ def safe_exec(
     `extra_files` is a list of (filename, contents) pairs.  These files are
     created in the sandbox.
 
-    `cache` is an object with .get(key) and .set(key, value) methods.  It will be used
-    to cache the execution, taking into account the code, the values of the globals,
-    and the random seed.
+    `cache` is an object with .get(key) and .set(key, value) methods, such as a
+    SafeExecCache.  It will be used to cache the execution, taking into account the
+    code, the values of the globals, and the random seed.
 
     `slug` is an arbitrary string, a description that's meaningful to the
     caller, that will be used in log messages.
@@ -109,11 +293,7 @@ def safe_exec(
     """
     # Check the cache for a previous result.
     if cache:
-        safe_globals = json_safe(globals_dict)
-        md5er = hashlib.md5()
-        md5er.update(repr(code))
-        update_hash(md5er, safe_globals)
-        key = "safe_exec.%r.%s" % (random_seed, md5er.hexdigest())
+        key = cache_key(code, json_safe(globals_dict), random_seed)
         cached = cache.get(key)
         if cached is not None:
             # We have a cached result.  The result is a pair: the exception
@@ -9,7 +9,8 @@ import unittest
 
 from nose.plugins.skip import SkipTest
 
-from capa.safe_exec import safe_exec, update_hash
+from capa.safe_exec import safe_exec, update_hash, SafeExecCache, get_cache_stats
+from capa.safe_exec.safe_exec import CACHE_STATS, LOCAL_RESULT_CACHE, CacheStats, cache_key
 from codejail.safe_exec import SafeExecException
 from codejail.jail_code import is_configured
 
@@ -177,6 +178,82 @@ class TestSafeExecCaching(unittest.TestCase):
                 self.fail("Tried executing code with non-ASCII unicode: {0}".format(code))
 
 
+class TestSafeExecCache(unittest.TestCase):
+    """Test the two-tier SafeExecCache."""
+
+    def setUp(self):
+        super(TestSafeExecCache, self).setUp()
+        LOCAL_RESULT_CACHE.clear()
+        self.addCleanup(LOCAL_RESULT_CACHE.clear)
+        CACHE_STATS.clear()
+        self.addCleanup(CACHE_STATS.clear)
+
+    def test_local_tier(self):
+        shared = {}
+        course_id = 'course-v1:edX+SafeExec+local'
+        g = {}
+        safe_exec("a = int(math.pi)", g, cache=SafeExecCache(DictCache(shared), course_id))
+        self.assertEqual(g['a'], 3)
+        self.assertEqual(shared.values()[0], (None, {'a': 3}))
+
+        # The result is now found in this process, without asking the
+        # shared cache.
+        shared.clear()
+        g = {}
+        safe_exec("a = int(math.pi)", g, cache=SafeExecCache(DictCache(shared), course_id))
+        self.assertEqual(g['a'], 3)
+        self.assertEqual(shared, {})
+
+        stats = get_cache_stats(course_id)
+        self.assertEqual(stats['miss'], 1)
+        self.assertEqual(stats['local_hit'], 1)
+        self.assertEqual(stats['hit_rate'], 0.5)
+
+    def test_shared_tier(self):
+        shared = {}
+        course_id = 'course-v1:edX+SafeExec+shared'
+        safe_exec("a = int(math.pi)", {}, cache=SafeExecCache(DictCache(shared), course_id))
+
+        # Results found in the shared cache are also kept in this process.
+        LOCAL_RESULT_CACHE.clear()
+        shared[shared.keys()[0]] = (None, {'a': 17})
+        for __ in xrange(2):
+            g = {}
+            safe_exec("a = int(math.pi)", g, cache=SafeExecCache(DictCache(shared), course_id))
+            self.assertEqual(g['a'], 17)
+
+        stats = get_cache_stats(course_id)
+        self.assertEqual((stats['miss'], stats['hit'], stats['local_hit']), (1, 1, 1))
+
+    def test_stats_are_bounded(self):
+        stats = CacheStats(2)
+        stats.record('course-v1:edX+SafeExec+1', 'miss')
+        stats.record('course-v1:edX+SafeExec+2', 'hit')
+        stats.record('course-v1:edX+SafeExec+1', 'hit')
+
+        # The counts of the course with the least recent lookups are dropped.
+        stats.record('course-v1:edX+SafeExec+3', 'miss')
+        self.assertEqual(stats.get('course-v1:edX+SafeExec+1'), {'miss': 1, 'hit': 1})
+        self.assertEqual(stats.get('course-v1:edX+SafeExec+2'), {})
+        self.assertEqual(stats.get('course-v1:edX+SafeExec+3'), {'miss': 1})
+
+    def test_local_results_are_copies(self):
+        cache = SafeExecCache(DictCache({}), 'course-v1:edX+SafeExec+copies')
+        g = {}
+        safe_exec("a = [1, 2]", g, cache=cache)
+        g['a'].append(3)
+
+        g = {}
+        safe_exec("a = [1, 2]", g, cache=cache)
+        self.assertEqual(g['a'], [1, 2])
+
+    def test_cache_key_is_canonical(self):
+        d1, d2 = TestUpdateHash('test_dict_ordering').equal_but_different_dicts()
+        self.assertEqual(cache_key("a = 1", {'a': [d1]}, 1), cache_key("a = 1", {'a': [d2]}, 1))
+        self.assertNotEqual(cache_key("a = 1", {'a': [d1]}, 1), cache_key("a = 1", {'a': [d1]}, 2))
+        self.assertNotEqual(cache_key("a = 1", {'a': [1, 2]}, 1), cache_key("a = 1", {'a': [2, 1]}, 1))
+
+
 class TestUpdateHash(unittest.TestCase):
     """Test the safe_exec.update_hash function to be sure it canonicalizes properly."""
 
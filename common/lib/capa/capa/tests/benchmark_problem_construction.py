@@ -0,0 +1,70 @@
+"""
+Microbenchmark of the construction of LoncapaProblems with many responses.
+
+Compares the construction of problems whose XML has to be parsed and
+preprocessed each time, as before PARSED_PROBLEM_CACHE, with the
+construction of problems whose preprocessed XML is found in the cache.
+
+Run with:
+
+    python -m capa.tests.benchmark_problem_construction [num_responses] [repeat]
+"""
+import sys
+import timeit
+
+from lxml import etree
+
+from capa.capa_problem import PARSED_PROBLEM_CACHE
+from capa.tests.helpers import new_loncapa_problem
+from capa.tests.response_xml_factory import (
+    ChoiceResponseXMLFactory,
+    MultipleChoiceResponseXMLFactory,
+    NumericalResponseXMLFactory,
+    OptionResponseXMLFactory,
+    StringResponseXMLFactory,
+)
+
+
+def multi_response_problem_xml(num_responses):
+    """
+    Returns the XML of a problem with `num_responses` responses of
+    various types.
+    """
+    factory_xmls = [
+        OptionResponseXMLFactory().build_xml(options=['red', 'green', 'blue'], correct_option='green'),
+        MultipleChoiceResponseXMLFactory().build_xml(choices=[False, True, False]),
+        ChoiceResponseXMLFactory().build_xml(choice_type='checkbox', choices=[True, False, True]),
+        StringResponseXMLFactory().build_xml(answer='Michigan'),
+        NumericalResponseXMLFactory().build_xml(answer=5, tolerance=0.1),
+    ]
+    # Each factory builds a whole <problem>; keep only its response.
+    responses = [etree.tostring(etree.XML(factory_xml)[0]) for factory_xml in factory_xmls]
+    return '<problem>{}</problem>'.format(
+        ''.join(responses[index % len(responses)] for index in xrange(num_responses))
+    )
+
+
+def construct_problem(xml, clear_cache):
+    """
+    Constructs a problem from `xml`, after clearing the cache of parsed
+    problems if `clear_cache`.
+    """
+    if clear_cache:
+        PARSED_PROBLEM_CACHE.clear()
+    new_loncapa_problem(xml)
+
+
+def main(num_responses=50, repeat=100):
+    """
+    Prints the mean construction time of a problem with `num_responses`
+    responses, without and with the cache of parsed problems.
+    """
+    xml = multi_response_problem_xml(num_responses)
+    for label, clear_cache in (('uncached', True), ('cached', False)):
+        construct_problem(xml, clear_cache)
+        seconds = timeit.timeit(lambda: construct_problem(xml, clear_cache), number=repeat)
+        print '{:>8}: {:.2f} ms per problem of {} responses'.format(label, seconds * 1000 / repeat, num_responses)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -4,8 +4,10 @@ Test capa problem.
 import ddt
 import textwrap
 from lxml import etree
+from mock import patch
 import unittest
 
+from capa.capa_problem import LoncapaProblem, PARSED_PROBLEM_CACHE
 from capa.tests.helpers import new_loncapa_problem
 
 
@@ -590,3 +592,79 @@ class CAPAMultiInputProblemTest(unittest.TestCase):
             description_element = multi_inputs_group.xpath('//p[@id="{}"]'.format(description_id))
             self.assertEqual(len(description_element), 1)
             self.assertEqual(description_element[0].text, descriptions[index])
+
+
+class ParsedProblemCacheTest(unittest.TestCase):
+    """
+    Tests the caching of the seed-independent preprocessing of problems.
+    """
+    xml = textwrap.dedent("""
+        <problem>
+            <optionresponse>
+                <label>Which color is the sky?</label>
+                <optioninput options="('yellow','blue','green')" correct="blue"/>
+            </optionresponse>
+            <multiplechoiceresponse>
+                <label>Which is a fruit?</label>
+                <choicegroup type="MultipleChoice" shuffle="true">
+                    <choice correct="false">carrot</choice>
+                    <choice correct="true">apple</choice>
+                    <choice correct="false">potato</choice>
+                </choicegroup>
+            </multiplechoiceresponse>
+            <solution><p>Blue, and apple.</p></solution>
+        </problem>
+    """)
+
+    def setUp(self):
+        super(ParsedProblemCacheTest, self).setUp()
+        PARSED_PROBLEM_CACHE.clear()
+        self.addCleanup(PARSED_PROBLEM_CACHE.clear)
+
+    def test_problem_parsed_once(self):
+        with patch.object(LoncapaProblem, 'make_xml_compatible') as mock_make_xml_compatible:
+            new_loncapa_problem(self.xml, seed=1)
+            new_loncapa_problem(self.xml, seed=2)
+        self.assertEqual(mock_make_xml_compatible.call_count, 1)
+
+    def test_same_problem(self):
+        uncached_problem = new_loncapa_problem(self.xml, seed=7)
+        cached_problem = new_loncapa_problem(self.xml, seed=7)
+        PARSED_PROBLEM_CACHE.clear()
+
+        self.assertEqual(cached_problem.problem_data, uncached_problem.problem_data)
+        self.assertEqual(cached_problem.get_question_answers(), uncached_problem.get_question_answers())
+        self.assertEqual(cached_problem.get_html(), uncached_problem.get_html())
+
+    def test_problems_are_independent(self):
+        problem = new_loncapa_problem(self.xml, seed=1)
+        other_problem = new_loncapa_problem(self.xml, seed=2)
+
+        self.assertIsNot(problem.tree, other_problem.tree)
+        self.assertTrue(set(problem.responders).isdisjoint(other_problem.responders))
+        for response in problem.responders:
+            self.assertIs(response.getroottree().getroot(), problem.tree)
+
+        problem.problem_data['1_2_1']['label'] = 'changed'
+        self.assertNotEqual(other_problem.problem_data['1_2_1']['label'], 'changed')
+        self.assertEqual(new_loncapa_problem(self.xml).problem_data, other_problem.problem_data)
+
+    def test_problem_ids(self):
+        problem = new_loncapa_problem(self.xml, problem_id='1')
+        other_problem = new_loncapa_problem(self.xml, problem_id='2')
+        self.assertEqual(sorted(problem.problem_data), ['1_2_1', '1_3_1'])
+        self.assertEqual(sorted(other_problem.problem_data), ['2_2_1', '2_3_1'])
+
+    def test_includes_not_cached(self):
+        xml = textwrap.dedent("""
+            <problem>
+                <include file="missing.xml"/>
+                <optionresponse>
+                    <optioninput options="('yellow','blue','green')" correct="blue"/>
+                </optionresponse>
+            </problem>
+        """)
+        with patch.object(LoncapaProblem, 'make_xml_compatible') as mock_make_xml_compatible:
+            new_loncapa_problem(xml)
+            new_loncapa_problem(xml)
+        self.assertEqual(mock_make_xml_compatible.call_count, 2)
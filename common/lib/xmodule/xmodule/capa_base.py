@@ -21,10 +21,12 @@ from pytz import utc
 
 from capa.capa_problem import LoncapaProblem, LoncapaSystem
 from capa.responsetypes import StudentInputError, ResponseError, LoncapaProblemError
+from capa.safe_exec import SafeExecCache
 from capa.util import convert_files_to_filenames, get_inner_html_from_xpath
 from xblock.fields import Boolean, Dict, Float, Integer, Scope, String, XMLString
 from xmodule.capa_base_constants import RANDOMIZATION, SHOWANSWER
 from xmodule.exceptions import NotFoundError
+from xmodule.x_module import DoNothingCache
 from .fields import Date, Timedelta
 from .progress import Progress
 
@@ -295,6 +297,16 @@ class CapaMixin(CapaFields):
             # number of possibilities, cap the number of different random seeds.
             self.seed %= MAX_RANDOMIZATION_BINS
 
+    def _safe_exec_cache(self):
+        """
+        Returns the cache of the results of the problem's sandboxed code,
+        which keeps the results in this process as well as in the runtime's
+        cache, or None if the runtime doesn't cache.
+        """
+        if self.runtime.cache is None or isinstance(self.runtime.cache, DoNothingCache):
+            return None
+        return SafeExecCache(self.runtime.cache, self.location.course_key)
+
     def new_lcp(self, state, text=None):
         """
         Generate a new Loncapa Problem
@@ -305,7 +317,7 @@ class CapaMixin(CapaFields):
         capa_system = LoncapaSystem(
             ajax_url=self.runtime.ajax_url,
             anonymous_student_id=self.runtime.anonymous_student_id,
-            cache=self.runtime.cache,
+            cache=self._safe_exec_cache(),
             can_execute_unsafe_code=self.runtime.can_execute_unsafe_code,
             get_python_lib_zip=self.runtime.get_python_lib_zip,
             DEBUG=self.runtime.DEBUG,
@@ -3,6 +3,7 @@ MongoDB/GridFS-level code for the contentstore.
 """
 import os
 import json
+from multiprocessing.pool import ThreadPool
 import pymongo
 import gridfs
 from gridfs.errors import NoFile
@@ -14,11 +15,19 @@ from opaque_keys.edx.keys import AssetKey
 from xmodule.contentstore.content import XASSET_LOCATION_TAG
 from xmodule.exceptions import NotFoundError
 from xmodule.modulestore.django import ASSET_IGNORE_REGEX
+from openedx.core.djangoapps.contentserver.caching import del_cached_content
 from xmodule.util.misc import escape_invalid_characters
 from xmodule.mongo_utils import connect_to_mongodb, create_collection_index
 from .content import StaticContent, ContentStore, StaticContentStream
 
 
+# Default number of threads exporting the assets of a course concurrently.
+DEFAULT_EXPORT_THREADS = 4
+
+# Size of the reads of an asset being exported, the default size of the GridFS chunks.
+EXPORT_CHUNK_SIZE = 255 * 1024
+
+
 class MongoContentStore(ContentStore):
     """
     MongoDB-backed ContentStore.
@@ -26,12 +35,14 @@ class MongoContentStore(ContentStore):
     # pylint: disable=unused-argument, bad-continuation
     def __init__(
         self, host, db,
-        port=27017, tz_aware=True, user=None, password=None, bucket='fs', collection=None, **kwargs
+        port=27017, tz_aware=True, user=None, password=None, bucket='fs', collection=None,
+        export_threads=DEFAULT_EXPORT_THREADS, **kwargs
     ):
         """
         Establish the connection with the mongo backend and connect to the collections
 
         :param collection: ignores but provided for consistency w/ other doc_store_config patterns
+        :param export_threads: the number of threads exporting the assets of a course concurrently
         """
         # GridFS will throw an exception if the Database is wrapped in a MongoProxy. So don't wrap it.
         # The appropriate methods below are marked as autoretry_read - those methods will handle
@@ -47,6 +58,8 @@ class MongoContentStore(ContentStore):
         self.fs_files = mongo_db[bucket + ".files"]  # the underlying collection GridFS uses
         self.chunks = mongo_db[bucket + ".chunks"]
 
+        self.export_threads = export_threads
+
     def close_connections(self):
         """
         Closes any open connections to the underlying databases
@@ -100,16 +113,26 @@ class MongoContentStore(ContentStore):
             else:
                 fp.write(content.data)
 
+        # The contentserver caches assets and their metadata, which would otherwise
+        # be served until they expire, e.g. after a course import re-saves the assets.
+        del_cached_content(content.location)
         return content
 
     def delete(self, location_or_id):
         """
         Delete an asset.
+
+        The contentserver's cached copy is only dropped when given the location of the
+        asset; callers deleting by id have to call `del_cached_content` themselves.
         """
+        location = None
         if isinstance(location_or_id, AssetKey):
+            location = location_or_id
             location_or_id, _ = self.asset_db_key(location_or_id)
         # Deletes of non-existent files are considered successful
         self.fs.delete(location_or_id)
+        if location is not None:
+            del_cached_content(location)
 
     @autoretry_read()
     def find(self, location, throw_on_not_found=True, as_stream=False):
@@ -153,22 +176,35 @@ class MongoContentStore(ContentStore):
                 return None
 
     def export(self, location, output_directory):
-        content = self.find(location)
-
-        filename = content.name
-        if content.import_path is not None:
-            output_directory = output_directory + '/' + os.path.dirname(content.import_path)
-
         if not os.path.exists(output_directory):
             os.makedirs(output_directory)
 
-        # Escape invalid char from filename.
-        export_name = escape_invalid_characters(name=filename, invalid_char_list=['/', '\\'])
+        self.export_to_fs(location, OSFS(output_directory))
 
-        disk_fs = OSFS(output_directory)
+    def export_to_fs(self, location, output_fs):
+        """
+        Export the asset at `location` into the pyfilesystem `output_fs`, under
+        the directory of its import path if any.
 
-        with disk_fs.open(export_name, 'wb') as asset_file:
-            asset_file.write(content.data)
+        The asset is streamed from GridFS, chunk by chunk.
+        """
+        content = self.find(location, as_stream=True)
+        try:
+            filename = content.name
+            output_dir = ''
+            if content.import_path is not None:
+                output_dir = os.path.dirname(content.import_path)
+                if output_dir:
+                    output_fs.makedir(output_dir, recursive=True, allow_recreate=True)
+
+            # Escape invalid char from filename.
+            export_name = escape_invalid_characters(name=filename, invalid_char_list=['/', '\\'])
+
+            with output_fs.open(os.path.join(output_dir, export_name), 'wb') as asset_file:
+                for chunk in content.stream_data(chunk_size=EXPORT_CHUNK_SIZE):
+                    asset_file.write(chunk)
+        finally:
+            content.close()
 
     def export_all_for_course(self, course_key, output_directory, assets_policy_file):
         """
@@ -181,10 +217,49 @@ class MongoContentStore(ContentStore):
             assets_policy_file: the filename for the policy file which should be in the same
                 directory as the other policy files.
         """
+        if not os.path.exists(output_directory):
+            os.makedirs(output_directory)
+
+        policy = self._export_all_assets(course_key, OSFS(output_directory))
+
+        with open(assets_policy_file, 'w') as f:
+            json.dump(policy, f, sort_keys=True, indent=4)
+
+    def export_all_for_course_to_fs(self, course_key, output_fs, policies_fs):
+        """
+        Export all of this course's assets to the pyfilesystem `output_fs`. Export all of the
+        assets' attributes to the assets.json policy file of the pyfilesystem `policies_fs`.
+
+        Args:
+            course_key (CourseKey): the :class:`CourseKey` identifying the course
+            output_fs (FS): the filesystem under which to put all the asset files
+            policies_fs (FS): the filesystem of the other policy files
+        """
+        policy = self._export_all_assets(course_key, output_fs)
+
+        with policies_fs.open('assets.json', 'w') as f:
+            f.write(json.dumps(policy, sort_keys=True, indent=4))
+
+    def _export_all_assets(self, course_key, output_fs):
+        """
+        Export all of this course's assets to the pyfilesystem `output_fs`, and return
+        their attributes, keyed by asset name.
+
+        If export_threads is more than 1, the assets are fetched from GridFS and
+        written by that many threads concurrently.
+        """
         policy = {}
         assets, __ = self.get_all_content_for_course(course_key)
 
         for asset in assets:
+            for attr, value in asset.iteritems():
+                if attr not in ['_id', 'md5', 'uploadDate', 'length', 'chunkSize', 'asset_key']:
+                    policy.setdefault(asset['asset_key'].name, {})[attr] = value
+
+        def export_asset(asset):
+            """
+            Export the asset to output_fs.
+            """
             # TODO: On 6/19/14, I had to put a try/except around this
             # to export a course. The course failed on JSON files in
             # the /static/ directory placed in it with an import.
@@ -193,13 +268,21 @@ class MongoContentStore(ContentStore):
             #
             # When debugging course exports, this might be a good place
             # to look. -- pmitros
-            self.export(asset['asset_key'], output_directory)
-            for attr, value in asset.iteritems():
-                if attr not in ['_id', 'md5', 'uploadDate', 'length', 'chunkSize', 'asset_key']:
-                    policy.setdefault(asset['asset_key'].name, {})[attr] = value
+            self.export_to_fs(asset['asset_key'], output_fs)
+
+        if self.export_threads > 1 and len(assets) > 1:
+            pool = ThreadPool(min(self.export_threads, len(assets)))
+            try:
+                # iterate over the results to raise the first export error, if any
+                for __ in pool.imap_unordered(export_asset, assets):
+                    pass
+            finally:
+                pool.terminate()
+        else:
+            for asset in assets:
+                export_asset(asset)
 
-        with open(assets_policy_file, 'w') as f:
-            json.dump(policy, f, sort_keys=True, indent=4)
+        return policy
 
     def get_all_content_thumbnails_for_course(self, course_key):
         return self._get_all_content_for_course(course_key, get_thumbnails=True)[0]
@@ -68,6 +68,13 @@ class HtmlBlock(object):
         scope=Scope.settings
     )
 
+    @property
+    def has_user_independent_student_view(self):
+        """
+        The html is the same for all the users, unless it includes their anonymous id.
+        """
+        return "%%USER_ID%%" not in self.data
+
     @XBlock.supports("multi_device")
     def student_view(self, _context):
         """
@@ -2002,6 +2002,9 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         # Because lms calls get_parent_locations frequently (for path generation):
         create_collection_index(self.collection, 'definition.children', sparse=True, background=True)
 
+        # Because the discussion code calls get_items for the blocks with a given discussion_id:
+        create_collection_index(self.collection, 'metadata.discussion_id', sparse=True, background=True)
+
         # To allow prioritizing draft vs published material
         create_collection_index(self.collection, '_id.revision', background=True)
 
@@ -93,6 +93,14 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
                 parent_map[child] = block_key
         return parent_map
 
+    @lazy
+    def _inheritance_index(self):
+        """
+        The :class:`StructureInheritanceIndex` of the structure, or None if the
+        blocks have to inherit their settings by walking their ancestors.
+        """
+        return self.modulestore.get_inheritance_index(self.course_entry.course_key, self.course_entry.structure)
+
     @contract(usage_key="BlockUsageLocator | BlockKey", course_entry_override="CourseEnvelope | None")
     def _load_item(self, usage_key, course_entry_override=None, **kwargs):
         """
@@ -232,6 +240,11 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
         except AttributeError:
             pass
 
+        inheriting = InheritanceMixin in self.modulestore.xblock_mixins
+        inherited_settings = None
+        if inheriting and self._inheritance_index is not None:
+            inherited_settings = self._inheritance_index.inherited_settings(block_key)
+
         try:
             kvs = SplitMongoKVS(
                 definition_loader,
@@ -239,10 +252,12 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
                 converted_defaults,
                 parent=parent,
                 aside_fields=aside_fields,
-                field_decorator=kwargs.get('field_decorator')
+                field_decorator=kwargs.get('field_decorator'),
+                inherited_settings=inherited_settings,
             )
 
-            if InheritanceMixin in self.modulestore.xblock_mixins:
+            if inheriting and inherited_settings is None:
+                # The block isn't in a saved structure, so it inherits from its ancestors as loaded.
                 field_data = inheriting_field_data(kvs)
             else:
                 field_data = KvsFieldData(kvs)
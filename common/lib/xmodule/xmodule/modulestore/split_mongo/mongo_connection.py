@@ -1,6 +1,7 @@
 """
 Segregation of pymongo functions from the data modeling mechanisms for split modulestore.
 """
+import copy
 import datetime
 import cPickle as pickle
 import math
@@ -8,13 +9,16 @@ import zlib
 import pymongo
 import pytz
 import re
+from collections import OrderedDict
 from contextlib import contextmanager
+from threading import RLock
 from time import time
 
 # Import this just to export it
 from pymongo.errors import DuplicateKeyError  # pylint: disable=unused-import
 
 try:
+    from django.conf import settings
     from django.core.cache import caches, InvalidCacheBackendError
     DJANGO_AVAILABLE = True
 except ImportError:
@@ -26,7 +30,7 @@ import logging
 from contracts import check, new_contract
 from mongodb_proxy import autoretry_read
 from xmodule.exceptions import HeartbeatFailure
-from xmodule.modulestore import BlockData
+from xmodule.modulestore import BlockData, EditInfo
 from xmodule.modulestore.split_mongo import BlockKey
 from xmodule.mongo_utils import connect_to_mongodb, create_collection_index
 
@@ -279,6 +283,220 @@ class CourseStructureCache(object):
             self.cache.set(key, compressed_pickled_data, None)
 
 
+class FrozenDict(dict):
+    """
+    A dict which can't be modified, so that it can be shared between requests
+    and threads. Copies of it are plain, modifiable dicts.
+    """
+    def _read_only(self, *args, **kwargs):
+        """
+        Refuse to modify the dict.
+        """
+        raise TypeError("{} is read-only".format(self.__class__.__name__))
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _read_only
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        result = {}
+        memo[id(self)] = result
+        for key, value in self.iteritems():
+            result[copy.deepcopy(key, memo)] = copy.deepcopy(value, memo)
+        return result
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+
+class FrozenEditInfo(EditInfo):
+    """
+    An EditInfo which can't be modified, except for the subtree edit info that
+    the runtime computes from the (immutable) structure and caches on it.
+    Copies of it are plain EditInfos.
+    """
+    MUTABLE_ATTRIBUTES = ('_subtree_edited_on', '_subtree_edited_by')
+
+    def __init__(self, edit_info):  # pylint: disable=super-init-not-called
+        self.__dict__.update(edit_info.__dict__)
+
+    def __setattr__(self, name, value):
+        if name not in self.MUTABLE_ATTRIBUTES:
+            raise TypeError("{} is read-only".format(self.__class__.__name__))
+        super(FrozenEditInfo, self).__setattr__(name, value)
+
+    def __copy__(self):
+        edit_info = EditInfo.__new__(EditInfo)
+        edit_info.__dict__.update(self.__dict__)
+        return edit_info
+
+    def __deepcopy__(self, memo):
+        edit_info = EditInfo.__new__(EditInfo)
+        memo[id(self)] = edit_info
+        edit_info.__dict__.update(copy.deepcopy(self.__dict__, memo))
+        return edit_info
+
+    def __reduce__(self):
+        # Unpickled as a plain copy
+        return (copy.copy, (self.__copy__(),))
+
+
+class FrozenBlockData(BlockData):
+    """
+    A BlockData which can't be modified, so that it can be shared between
+    requests and threads. Copies of it are plain BlockDatas.
+
+    Only the block data itself and its dicts of fields and defaults are
+    read-only; the values of the fields (e.g. the lists of children) and the
+    asides must not be modified in place either.
+    """
+    def __init__(self, block_data):  # pylint: disable=super-init-not-called
+        attributes = self.__dict__
+        attributes.update(block_data.__dict__)
+        attributes['fields'] = FrozenDict(block_data.fields)
+        attributes['defaults'] = FrozenDict(block_data.defaults)
+        attributes['asides'] = block_data.get_asides()
+        attributes['edit_info'] = FrozenEditInfo(block_data.edit_info)
+
+    def __setattr__(self, name, value):
+        raise TypeError("{} is read-only".format(self.__class__.__name__))
+
+    def __copy__(self):
+        block_data = BlockData.__new__(BlockData)
+        block_data.__dict__.update(self.__dict__)
+        return block_data
+
+    def __deepcopy__(self, memo):
+        block_data = BlockData.__new__(BlockData)
+        memo[id(self)] = block_data
+        block_data.__dict__.update(copy.deepcopy(self.__dict__, memo))
+        return block_data
+
+    def __reduce__(self):
+        # Unpickled as a plain copy
+        return (copy.copy, (self.__copy__(),))
+
+
+def freeze_structure(structure):
+    """
+    Return a read-only copy of the structure (as returned by
+    :func:`structure_from_mongo`), which shares the field values of the
+    original one. Deep copies of the returned structure, as made when
+    versioning it, are plain, modifiable structures.
+    """
+    frozen_structure = dict(structure)
+    frozen_structure['blocks'] = FrozenDict(
+        (block_key, FrozenBlockData(block_data))
+        for block_key, block_data in structure['blocks'].iteritems()
+    )
+    return FrozenDict(frozen_structure)
+
+
+class SharedStructureCache(object):
+    """
+    Per-process cache of frozen course structures, keyed by structure id.
+
+    Structures are immutable, so they can be kept forever, and as they are
+    frozen they can be shared by all the requests and threads of the
+    process, saving the unpickling and decompressing of the structures
+    cached by :class:`CourseStructureCache`. The cache is bounded by the
+    approximate size in bytes of the structures it holds (the size of their
+    pickles), evicting the least recently used structures beyond
+    SPLIT_SHARED_STRUCTURE_CACHE_MAX_BYTES. The cache is disabled if that
+    setting is 0 or not set.
+    """
+    def __init__(self, max_bytes=None):
+        """
+        Arguments:
+            max_bytes (int): The maximum size of the cache; if None, the
+                SPLIT_SHARED_STRUCTURE_CACHE_MAX_BYTES setting is used.
+        """
+        self._max_bytes = max_bytes
+        self._structures = OrderedDict()
+        self._bytes_held = 0
+        self._lock = RLock()
+
+    @property
+    def max_bytes(self):
+        """
+        The maximum size of the cache in bytes, or 0 if it's disabled.
+        """
+        if self._max_bytes is not None:
+            return self._max_bytes
+        if DJANGO_AVAILABLE:
+            return getattr(settings, 'SPLIT_SHARED_STRUCTURE_CACHE_MAX_BYTES', 0)
+        return 0
+
+    @property
+    def bytes_held(self):
+        """
+        The approximate size in bytes of the structures in the cache.
+        """
+        return self._bytes_held
+
+    def get(self, key, course_context=None):
+        """
+        Return the frozen structure with the id `key`, or None if it's not cached.
+        """
+        if not self.max_bytes:
+            return None
+
+        with TIMER.timer("SharedStructureCache.get", course_context) as tagger:
+            with self._lock:
+                entry = self._structures.pop(key, None)
+                if entry is not None:
+                    self._structures[key] = entry
+                bytes_held = self._bytes_held
+            tagger.tag(from_cache=str(entry is not None).lower())
+            tagger.measure('bytes_held', bytes_held)
+            return entry[0] if entry is not None else None
+
+    def set(self, key, structure, course_context=None):
+        """
+        Cache a frozen copy of the structure with the id `key`, and return the
+        frozen copy. If the cache is disabled, return the structure itself.
+        """
+        max_bytes = self.max_bytes
+        if not max_bytes:
+            return structure
+
+        with TIMER.timer("SharedStructureCache.set", course_context) as tagger:
+            size = len(pickle.dumps(structure, pickle.HIGHEST_PROTOCOL))
+            tagger.measure('structure_size', size)
+            if size > max_bytes:
+                tagger.tag(too_large='true')
+                return structure
+
+            frozen_structure = freeze_structure(structure)
+            evictions = 0
+            with self._lock:
+                previous_entry = self._structures.pop(key, None)
+                if previous_entry is not None:
+                    self._bytes_held -= previous_entry[1]
+                self._structures[key] = (frozen_structure, size)
+                self._bytes_held += size
+                while self._bytes_held > max_bytes:
+                    __, (__, evicted_size) = self._structures.popitem(last=False)
+                    self._bytes_held -= evicted_size
+                    evictions += 1
+                bytes_held = self._bytes_held
+            tagger.measure('bytes_held', bytes_held)
+            tagger.measure('evictions', evictions)
+            return frozen_structure
+
+    def clear(self):
+        """
+        Remove all the structures from the cache.
+        """
+        with self._lock:
+            self._structures.clear()
+            self._bytes_held = 0
+
+
+SHARED_STRUCTURE_CACHE = SharedStructureCache()
+
+
 class MongoConnection(object):
     """
     Segregation of pymongo functions from the data modeling mechanisms for split modulestore.
@@ -318,8 +536,15 @@ class MongoConnection(object):
         Get the structure from the persistence mechanism whose id is the given key.
 
         This method will use a cached version of the structure if it is available.
+        If the :class:`SharedStructureCache` is enabled, the returned structure is
+        frozen, and must be versioned (deep copied) before being modified.
         """
         with TIMER.timer("get_structure", course_context) as tagger_get_structure:
+            structure = SHARED_STRUCTURE_CACHE.get(key, course_context)
+            tagger_get_structure.tag(from_shared_cache=str(bool(structure)).lower())
+            if structure:
+                return structure
+
             cache = CourseStructureCache()
 
             structure = cache.get(key, course_context)
@@ -342,7 +567,7 @@ class MongoConnection(object):
 
                 cache.set(key, structure, course_context)
 
-            return structure
+            return SHARED_STRUCTURE_CACHE.set(key, structure, course_context)
 
     @autoretry_read()
     def find_structures_by_id(self, ids, course_context=None):
@@ -63,6 +63,7 @@ from mongodb_proxy import autoretry_read
 from path import Path as path
 from pytz import UTC
 from bson.objectid import ObjectId
+import dogstats_wrapper as dog_stats_api
 
 from xblock.core import XBlock
 from xblock.fields import Scope, Reference, ReferenceList, ReferenceValueDict
@@ -86,7 +87,8 @@ from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection, Du
 from xmodule.modulestore.split_mongo import BlockKey, CourseEnvelope
 from xmodule.modulestore.store_utilities import DETACHED_XBLOCK_TYPES
 from xmodule.error_module import ErrorDescriptor
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
+from threading import RLock
 from types import NoneType
 from xmodule.assetstore import AssetMetadata
 
@@ -114,6 +116,247 @@ log = logging.getLogger(__name__)
 # When blacklists are this, all children should be excluded
 EXCLUDE_ALL = '*'
 
+# The maximum number of definitions fetched from the db in a single query
+DEFINITION_BATCH_SIZE = 250
+
+# The request cache key of the number of definition queries made during the request
+DEFINITION_ROUND_TRIPS_KEY = 'split_definition_round_trips'
+
+
+# The maximum number of structures whose indexes of each kind are cached in the process
+STRUCTURE_INDEX_CACHE_MAX_ENTRIES = 100
+
+# The settings fields, besides the block type, by which get_items looks up blocks in an index
+INDEXED_SETTINGS_FIELDS = ('discussion_id', 'user_partitions')
+
+
+class StructureParentIndex(object):
+    """
+    Inverted index from the blocks of a saved (so immutable) structure to
+    their parents, along with the memoized results of has_path_to_root.
+
+    Built once per structure version, so that parent lookups and orphan
+    detection don't have to scan all the blocks of the structure.
+    """
+    def __init__(self, structure):
+        self.parents = dict(SplitMongoModuleStore.build_block_key_to_parents_mapping(structure))
+        # The blocks without any parent, including the root.
+        self.unparented = frozenset(
+            block_key for block_key in structure['blocks'] if block_key not in self.parents
+        )
+        # BlockKey -> whether the block has a path to the root
+        self.path_cache = {}
+
+    def get_parents(self, block_key):
+        """
+        Return the list of the parents of the block; the list must not be modified.
+        """
+        return self.parents.get(block_key, [])
+
+
+def _is_scalar_criteria(criteria):
+    """
+    Whether the get_items criteria is a plain value, matched by equality.
+    """
+    return isinstance(criteria, (basestring, int, long, float))
+
+
+class StructureQueryIndex(object):
+    """
+    Secondary indexes of the blocks of a saved (so immutable) structure, by
+    block type and by the values of the INDEXED_SETTINGS_FIELDS.
+
+    Used by get_items to plan which blocks may match its qualifiers, so that
+    only those, rather than all the blocks of the structure, are matched.
+    """
+    def __init__(self, structure):
+        by_block_type = defaultdict(set)
+        by_field_value = {field_name: defaultdict(set) for field_name in INDEXED_SETTINGS_FIELDS}
+        by_field_set = {field_name: set() for field_name in INDEXED_SETTINGS_FIELDS}
+        # BlockKey -> the position of the block in the structure's blocks
+        positions = {}
+        for position, (block_key, block_data) in enumerate(structure['blocks'].iteritems()):
+            positions[block_key] = position
+            by_block_type[block_data.block_type].add(block_key)
+            for field_name in INDEXED_SETTINGS_FIELDS:
+                if field_name not in block_data.fields:
+                    continue
+                by_field_set[field_name].add(block_key)
+                value = block_data.fields[field_name]
+                # As in _value_matches, a list field matches any of its elements.
+                for element in value if isinstance(value, list) else [value]:
+                    if _is_scalar_criteria(element):
+                        by_field_value[field_name][element].add(block_key)
+
+        self.by_block_type = dict(by_block_type)
+        self.by_field_value = {field_name: dict(values) for field_name, values in by_field_value.iteritems()}
+        self.by_field_set = by_field_set
+        self.positions = positions
+
+    def candidates(self, qualifiers, settings):
+        """
+        Return the set of the keys of the blocks which may match the qualifiers
+        and settings of get_items, or None if no index applies, and so all the
+        blocks have to be matched.
+        """
+        candidates = self._value_candidates(self.by_block_type, qualifiers.get('block_type'))
+        for field_name in INDEXED_SETTINGS_FIELDS:
+            if field_name not in settings:
+                continue
+            criteria = settings[field_name]
+            if isinstance(criteria, dict) and '$exists' in criteria:
+                field_candidates = self.by_field_set[field_name] if criteria['$exists'] is True else None
+            else:
+                field_candidates = self._value_candidates(self.by_field_value[field_name], criteria)
+                if field_candidates is None:
+                    # Any other criteria only matches the blocks on which the field is set.
+                    field_candidates = self.by_field_set[field_name]
+            if field_candidates is not None:
+                candidates = field_candidates if candidates is None else candidates & field_candidates
+        return candidates
+
+    def in_structure_order(self, block_keys):
+        """
+        Return the list of the block keys in the order of the structure's blocks,
+        in which get_items returns the blocks it matches against all the blocks.
+        """
+        return sorted(block_keys, key=self.positions.__getitem__)
+
+    @staticmethod
+    def _value_candidates(index, criteria):
+        """
+        Return the set of the keys of the blocks of the index which may match
+        the criteria, or None if the criteria isn't a value or a list of
+        values to look up.
+        """
+        if _is_scalar_criteria(criteria):
+            return index.get(criteria, frozenset())
+        if isinstance(criteria, dict) and '$in' in criteria and all(
+                _is_scalar_criteria(value) for value in criteria['$in']
+        ):
+            return set().union(*[index.get(value, frozenset()) for value in criteria['$in']])
+        return None
+
+
+class StructureInheritanceIndex(object):
+    """
+    The settings each block of a saved (so immutable) structure inherits from
+    its ancestors: for each block, the json values of the inheritable settings
+    set by its nearest ancestors.
+
+    Built once per structure version, so that the blocks loaded from the
+    structure can look up their inherited settings rather than walking their
+    ancestors for each inheritable field read.
+    """
+    def __init__(self, structure):
+        blocks = structure['blocks']
+        # As in CachingDescriptorSystem._parent_map, the parent of a block is the last block listing it as a child.
+        parents = {}
+        for parent_key, block_data in blocks.iteritems():
+            for child_key in block_data.fields.get('children', []):
+                parents[child_key] = parent_key
+
+        inheritable_names = [
+            name for name, field in inheritance.InheritanceMixin.fields.iteritems() if field.scope == Scope.settings
+        ]
+        no_settings = {}
+        # BlockKey -> the dict of the settings the block inherits, shared by siblings
+        self.settings = {}
+        # BlockKey -> the dict of the settings the children of the block inherit
+        bequeathed = {}
+        for block_key in blocks:
+            lineage = []
+            ancestor = block_key
+            # Walk up to the first ancestor whose settings are known, or past the root.
+            while ancestor in blocks and ancestor not in bequeathed and ancestor not in lineage:
+                lineage.append(ancestor)
+                ancestor = parents.get(ancestor)
+            # A root, like the top of a cycle of blocks, inherits no settings.
+            inherited = bequeathed.get(ancestor, no_settings)
+            for lineage_key in reversed(lineage):
+                self.settings[lineage_key] = inherited
+                fields = blocks[lineage_key].fields
+                set_names = [name for name in inheritable_names if name in fields]
+                if set_names:
+                    inherited = dict(inherited)
+                    inherited.update((name, fields[name]) for name in set_names)
+                bequeathed[lineage_key] = inherited
+
+    def inherited_settings(self, block_key):
+        """
+        Return the dict of the settings the block inherits, or None if the block
+        isn't in the structure; the dict must not be modified.
+        """
+        return self.settings.get(block_key)
+
+
+class StructureIndexCache(object):
+    """
+    Per-process LRU cache of one kind of structure indexes, keyed by structure id.
+    """
+    def __init__(self, index_class, max_entries=STRUCTURE_INDEX_CACHE_MAX_ENTRIES):
+        """
+        Arguments:
+            index_class: The class of the indexes, built from a structure.
+            max_entries (int): The maximum number of indexes to keep.
+        """
+        self.index_class = index_class
+        self.max_entries = max_entries
+        self._indexes = OrderedDict()
+        self._lock = RLock()
+
+    def get(self, structure):
+        """
+        Return the index of the structure, building it if it isn't cached.
+        """
+        structure_id = structure['_id']
+        with self._lock:
+            index = self._indexes.pop(structure_id, None)
+            if index is not None:
+                self._indexes[structure_id] = index
+                return index
+
+        index = self.index_class(structure)
+        with self._lock:
+            self._indexes[structure_id] = index
+            while len(self._indexes) > self.max_entries:
+                self._indexes.popitem(last=False)
+        return index
+
+    def discard(self, structure_id):
+        """
+        Remove the index of the structure with the given id, if cached.
+        """
+        with self._lock:
+            self._indexes.pop(structure_id, None)
+
+    def clear(self):
+        """
+        Remove all the indexes.
+        """
+        with self._lock:
+            self._indexes.clear()
+
+
+PARENT_INDEX_CACHE = StructureIndexCache(StructureParentIndex)
+QUERY_INDEX_CACHE = StructureIndexCache(StructureQueryIndex)
+INHERITANCE_INDEX_CACHE = StructureIndexCache(StructureInheritanceIndex)
+
+# The number of get_items calls whose blocks were looked up in a StructureQueryIndex
+# ('hit') or had to be all matched ('miss')
+QUERY_PLANNER_STATS = defaultdict(int)
+
+
+def get_query_planner_stats():
+    """
+    Return the numbers of get_items calls which used the query indexes
+    ('hit') and which scanned all the blocks ('miss'), and the 'hit_rate'.
+    """
+    stats = dict(QUERY_PLANNER_STATS)
+    lookups = stats.get('hit', 0) + stats.get('miss', 0)
+    stats['hit_rate'] = float(stats.get('hit', 0)) / lookups if lookups else 0.0
+    return stats
+
 
 new_contract('BlockUsageLocator', BlockUsageLocator)
 new_contract('BlockKey', BlockKey)
@@ -342,6 +585,9 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
         (no data will be written to the database if a bulk operation is active.)
         """
         self._clear_cache(structure['_id'])
+        PARENT_INDEX_CACHE.discard(structure['_id'])
+        QUERY_INDEX_CACHE.discard(structure['_id'])
+        INHERITANCE_INDEX_CACHE.discard(structure['_id'])
         bulk_write_record = self._get_bulk_ops_record(course_key)
         if bulk_write_record.active:
             bulk_write_record.structures[structure['_id']] = structure
@@ -395,6 +641,7 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
 
             # The definition hasn't been loaded from the db yet, so load it
             if definition is None:
+                self._record_definition_round_trips(1)
                 definition = self.db_connection.get_definition(definition_guid, course_key)
                 bulk_write_record.definitions[definition_guid] = definition
                 if definition is not None:
@@ -404,6 +651,7 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
         else:
             # cast string to ObjectId if necessary
             definition_guid = course_key.as_object_id(definition_guid)
+            self._record_definition_round_trips(1)
             return self.db_connection.get_definition(definition_guid, course_key)
 
     def get_definitions(self, course_key, ids):
@@ -432,7 +680,7 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
 
         if len(ids):
             # Query the db for the definitions.
-            defs_from_db = list(self.db_connection.get_definitions(list(ids), course_key))
+            defs_from_db = self._get_definitions_from_db(list(ids), course_key)
             defs_dict = {d.get('_id'): d for d in defs_from_db}
             # Add the retrieved definitions to the cache.
             bulk_write_record.definitions_in_db.update(defs_dict.iterkeys())
@@ -440,6 +688,87 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
             definitions.extend(defs_from_db)
         return definitions
 
+    def _get_definitions_from_db(self, ids, course_key):
+        """
+        Query the db for the definitions specified in ``ids``, in batches of
+        at most DEFINITION_BATCH_SIZE ids so that no single query grows
+        unbounded with the size of the course.
+
+        Arguments:
+            ids (list): A list of definition ids
+            course_key (:class:`.CourseKey`): The course that these definitions are being loaded for
+        """
+        definitions = []
+        batches = [ids[start:start + DEFINITION_BATCH_SIZE] for start in xrange(0, len(ids), DEFINITION_BATCH_SIZE)]
+        self._record_definition_round_trips(len(batches))
+        for batch in batches:
+            definitions.extend(self.db_connection.get_definitions(batch, course_key))
+        return definitions
+
+    def _record_definition_round_trips(self, count):
+        """
+        Add ``count`` to the number of definition queries made during the current request.
+        """
+        request_cache = getattr(self, 'request_cache', None)
+        if request_cache is not None:
+            round_trips = request_cache.data.get(DEFINITION_ROUND_TRIPS_KEY, 0)
+            request_cache.data[DEFINITION_ROUND_TRIPS_KEY] = round_trips + count
+
+    def get_definition_round_trips(self):
+        """
+        Return the number of definition queries made to the db during the current request,
+        or None if this modulestore has no request cache.
+        """
+        request_cache = getattr(self, 'request_cache', None)
+        if request_cache is None:
+            return None
+        return request_cache.data.get(DEFINITION_ROUND_TRIPS_KEY, 0)
+
+    def get_parent_index(self, course_key, structure):
+        """
+        Return the :class:`StructureParentIndex` of the structure.
+        """
+        return self._get_structure_index(PARENT_INDEX_CACHE, course_key, structure)
+
+    def get_query_index(self, course_key, structure):
+        """
+        Return the :class:`StructureQueryIndex` of the structure.
+        """
+        return self._get_structure_index(QUERY_INDEX_CACHE, course_key, structure)
+
+    def get_inheritance_index(self, course_key, structure):
+        """
+        Return the :class:`StructureInheritanceIndex` of the structure, or None
+        if the structure is being edited in the active bulk operation, as the
+        settings its blocks inherit may then change while they are loaded.
+        """
+        if self._is_structure_edited(course_key, structure):
+            return None
+        return INHERITANCE_INDEX_CACHE.get(structure)
+
+    def _get_structure_index(self, index_cache, course_key, structure):
+        """
+        Return the index of the structure of the kind cached in index_cache.
+        The index of a structure saved in the db is cached in the process;
+        the structures being edited in the active bulk operation are indexed
+        anew on each call.
+        """
+        if self._is_structure_edited(course_key, structure):
+            return index_cache.index_class(structure)
+        return index_cache.get(structure)
+
+    def _is_structure_edited(self, course_key, structure):
+        """
+        Whether the structure is being edited in the active bulk operation, so
+        isn't saved in the db yet.
+        """
+        bulk_write_record = self._get_bulk_ops_record(course_key)
+        return (
+            bulk_write_record.active and
+            structure['_id'] in bulk_write_record.structures and
+            structure['_id'] not in bulk_write_record.structures_in_db
+        )
+
     def update_definition(self, course_key, definition):
         """
         Update a definition, respecting the current bulk operation status
@@ -719,7 +1048,7 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
 
         self.db_connection._drop_database(database, collections, connections)  # pylint: disable=protected-access
 
-    def cache_items(self, system, base_block_ids, course_key, depth=0, lazy=True):
+    def cache_items(self, system, base_block_ids, course_key, depth=0, lazy=True, prefetch_block_types=None):
         """
         Handles caching of items once inheritance and any other one time
         per course per fetch operations are done.
@@ -730,6 +1059,8 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             course_key: the destination course providing the context
             depth: how deep below these to prefetch
             lazy: whether to load definitions now or later
+            prefetch_block_types: if lazy, the block types whose definitions
+                are nonetheless loaded now, in bounded batches
         """
         with self.bulk_operations(course_key, emit_signals=False):
             new_module_data = {}
@@ -740,32 +1071,62 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                     depth,
                     new_module_data
                 )
+            # Keep the copies of the blocks whose definitions were already loaded.
+            for block_key in new_module_data:
+                cached_block = system.module_data.get(block_key)
+                if cached_block is not None and cached_block.definition_loaded:
+                    new_module_data[block_key] = cached_block
 
             # This method supports lazy loading, where the descendent definitions aren't loaded
             # until they're actually needed.
             if not lazy:
                 # Non-lazy loading: Load all descendants by id.
-                descendent_definitions = self.get_definitions(
-                    course_key,
-                    [
-                        block.definition
-                        for block in new_module_data.itervalues()
-                    ]
-                )
-                # Turn definitions into a map.
-                definitions = {definition['_id']: definition
-                               for definition in descendent_definitions}
-
-                for block in new_module_data.itervalues():
-                    if block.definition in definitions:
-                        definition = definitions[block.definition]
-                        # convert_fields gets done later in the runtime's xblock_from_json
-                        block.fields.update(definition.get('fields'))
-                        block.definition_loaded = True
+                self._load_definitions(course_key, new_module_data)
+            elif prefetch_block_types:
+                # Lazy loading, except for the descendants of the requested types.
+                prefetched_module_data = {
+                    block_key: block
+                    for block_key, block in new_module_data.iteritems()
+                    if block_key.type in prefetch_block_types
+                }
+                self._load_definitions(course_key, prefetched_module_data)
+                new_module_data.update(prefetched_module_data)
 
             system.module_data.update(new_module_data)
             return system.module_data
 
+    def _load_definitions(self, course_key, module_data):
+        """
+        Load the definitions of the given blocks, which haven't been loaded
+        yet, and replace the blocks' data in module_data by copies with the
+        definitions' fields merged in (the structure's blocks may be frozen).
+
+        Arguments:
+            course_key: the course providing the context
+            module_data: dict of the BlockData of the blocks, keyed by BlockKey
+        """
+        block_keys = [block_key for block_key, block in module_data.iteritems() if not block.definition_loaded]
+        if not block_keys:
+            return
+        descendent_definitions = self.get_definitions(
+            course_key,
+            [module_data[block_key].definition for block_key in block_keys]
+        )
+        # Turn definitions into a map.
+        definitions = {definition['_id']: definition
+                       for definition in descendent_definitions}
+
+        for block_key in block_keys:
+            block = module_data[block_key]
+            if block.definition in definitions:
+                definition = definitions[block.definition]
+                loaded_block = copy.copy(block)
+                # convert_fields gets done later in the runtime's xblock_from_json
+                loaded_block.fields = dict(block.fields)
+                loaded_block.fields.update(definition.get('fields'))
+                loaded_block.definition_loaded = True
+                module_data[block_key] = loaded_block
+
     @contract(course_entry=CourseEnvelope, block_keys="list(BlockKey)", depth="int | None")
     def _load_items(self, course_entry, block_keys, depth=0, **kwargs):
         """
@@ -773,9 +1134,13 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
 
         Load the definitions into each block if lazy is in kwargs and is False;
         otherwise, do not load the definitions - they'll be loaded later when needed.
+        If prefetch_definitions is in kwargs, the definitions of the blocks of those
+        types are loaded now even if lazy, so that rendering them doesn't query the
+        db for each definition.
         """
         lazy = kwargs.pop('lazy', True)
-        should_cache_items = not lazy
+        prefetch_block_types = kwargs.pop('prefetch_definitions', None)
+        should_cache_items = not lazy or bool(prefetch_block_types)
 
         runtime = self._get_cache(course_entry.structure['_id'])
         if runtime is None:
@@ -784,7 +1149,7 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             should_cache_items = True
 
         if should_cache_items:
-            self.cache_items(runtime, block_keys, course_entry.course_key, depth, lazy)
+            self.cache_items(runtime, block_keys, course_entry.course_key, depth, lazy, prefetch_block_types)
 
         return [runtime.load_item(block_key, course_entry, **kwargs) for block_key in block_keys]
 
@@ -1131,6 +1496,9 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             in the request. The depth is counted in the number of
             calls to get_children() to cache. None indicates to cache all
             descendants.
+        prefetch_definitions (set): The block types whose definitions are loaded
+            along with the cached descendants, in a bounded number of queries,
+            rather than lazily one at a time.
         raises InsufficientSpecificationError or ItemNotFoundError
         """
         if not isinstance(usage_key, BlockUsageLocator) or usage_key.deprecated:
@@ -1221,10 +1589,29 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         parents_cache = None
 
         if not include_orphans:
-            path_cache = {}
-            parents_cache = self.build_block_key_to_parents_mapping(course.structure)
+            parent_index = self.get_parent_index(course.course_key, course.structure)
+            path_cache = parent_index.path_cache
+            parents_cache = parent_index.parents
 
-        for block_id, value in course.structure['blocks'].iteritems():
+        # Only match the blocks which the query indexes find may match, if any index applies.
+        blocks = course.structure['blocks']
+        query_index = self.get_query_index(course.course_key, course.structure)
+        candidates = query_index.candidates(qualifiers, settings)
+        if candidates is None:
+            planner_result = 'miss'
+            blocks_to_match = blocks.iteritems()
+        else:
+            planner_result = 'hit'
+            blocks_to_match = (
+                (block_id, blocks[block_id]) for block_id in query_index.in_structure_order(candidates)
+            )
+        QUERY_PLANNER_STATS[planner_result] += 1
+        dog_stats_api.increment(
+            'xmodule.modulestore.split.get_items.planner',
+            tags=[u'result:{}'.format(planner_result)],
+        )
+
+        for block_id, value in blocks_to_match:
             if _block_matches_all(value):
                 if not include_orphans:
                     if (  # pylint: disable=bad-continuation
@@ -1240,7 +1627,8 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         else:
             return []
 
-    def build_block_key_to_parents_mapping(self, structure):
+    @staticmethod
+    def build_block_key_to_parents_mapping(structure):
         """
         Given a structure, builds block_key to parents mapping for all block keys in structure
         and returns it
@@ -1266,9 +1654,14 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         double count modules if we're computing this for a list of modules in a course.
         :param parents_cache: a dictionary containing mapping of block_key to list of its parents. Optionally, this
         should be built for course structure to make this method faster.
+        If neither cache is given, those of the structure's :class:`StructureParentIndex` are used.
 
         :return Bool: whether or not component has path to the root
         """
+        if path_cache is None and parents_cache is None:
+            parent_index = self.get_parent_index(course.course_key, course.structure)
+            path_cache = parent_index.path_cache
+            parents_cache = parent_index.parents
 
         if path_cache and block_key in path_cache:
             return path_cache[block_key]
@@ -1276,7 +1669,7 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         if parents_cache is None:
             xblock_parents = self._get_parents_from_structure(block_key, course.structure)
         else:
-            xblock_parents = parents_cache[block_key]
+            xblock_parents = parents_cache.get(block_key, [])
 
         if len(xblock_parents) == 0 and block_key.type in ["course", "library"]:
             # Found, xblock has the path to the root
@@ -1308,14 +1701,15 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             raise ItemNotFoundError(locator)
 
         course = self._lookup_course(locator.course_key)
-        all_parent_ids = self._get_parents_from_structure(BlockKey.from_usage_key(locator), course.structure)
+        parent_index = self.get_parent_index(course.course_key, course.structure)
+        all_parent_ids = parent_index.get_parents(BlockKey.from_usage_key(locator))
 
         # Check and verify the found parent_ids are not orphans; Remove parent which has no valid path
         # to the course root
         parent_ids = [
             valid_parent
             for valid_parent in all_parent_ids
-            if self.has_path_to_root(valid_parent, course)
+            if self.has_path_to_root(valid_parent, course, parent_index.path_cache, parent_index.parents)
         ]
 
         if len(parent_ids) == 0:
@@ -1339,16 +1733,11 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
 
         detached_categories = [name for name, __ in XBlock.load_tagged_classes("detached")]
         course = self._lookup_course(course_key)
-        items = set(course.structure['blocks'].keys())
-        items.remove(course.structure['root'])
-        blocks = course.structure['blocks']
-        for block_id, block_data in blocks.iteritems():
-            items.difference_update(BlockKey(*child) for child in block_data.fields.get('children', []))
-            if block_data.block_type in detached_categories:
-                items.discard(block_id)
+        parent_index = self.get_parent_index(course.course_key, course.structure)
         return [
             course_key.make_usage_key(block_type=block_id.type, block_id=block_id.id)
-            for block_id in items
+            for block_id in parent_index.unparented
+            if block_id != course.structure['root'] and block_id.type not in detached_categories
         ]
 
     def get_course_index_info(self, course_key):
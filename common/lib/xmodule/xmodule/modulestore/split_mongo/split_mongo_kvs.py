@@ -22,16 +22,21 @@ class SplitMongoKVS(InheritanceKeyValueStore):
     VALID_SCOPES = (Scope.parent, Scope.children, Scope.settings, Scope.content)
 
     @contract(parent="BlockUsageLocator | None")
-    def __init__(self, definition, initial_values, default_values, parent, aside_fields=None, field_decorator=None):
+    def __init__(
+            self, definition, initial_values, default_values, parent, aside_fields=None, field_decorator=None,
+            inherited_settings=None
+    ):
         """
 
         :param definition: either a lazyloader or definition id for the definition
         :param initial_values: a dictionary of the locally set values
         :param default_values: any Scope.settings field defaults that are set locally
             (copied from a template block with copy_from_template)
+        :param inherited_settings: the json values of the settings inherited from the ancestors
+            of the block, if looked up in advance rather than on its ancestors
         """
         # deepcopy so that manipulations of fields does not pollute the source
-        super(SplitMongoKVS, self).__init__(copy.deepcopy(initial_values))
+        super(SplitMongoKVS, self).__init__(copy.deepcopy(initial_values), inherited_settings)
         self._definition = definition  # either a DefinitionLazyLoader or the db id of the definition.
         # if the db id, then the definition is presumed to be loaded into _fields
 
@@ -169,7 +174,12 @@ class SplitMongoKVS(InheritanceKeyValueStore):
         Check to see if the default should be from the template's defaults (if any)
         rather than the global default or inheritance.
         """
-        if self._defaults and key.field_name in self._defaults:
+        # As in InheritingFieldData, the defaults copied from a library's block take precedence
+        # over the settings inherited from a library_content parent.
+        if self._defaults and key.field_name in self._defaults and (
+                key.field_name not in self.inherited_settings or
+                (self.parent is not None and self.parent.block_type == 'library_content')
+        ):
             return self._defaults[key.field_name]
         # If not, try inheriting from a parent, then use the XBlock type's normal default value:
         return super(SplitMongoKVS, self).default(key)
@@ -0,0 +1,132 @@
+"""
+Microbenchmark of the lookups of inherited settings in a large split structure.
+
+Compares walking the ancestors of each block for each inheritable setting, as
+InheritingFieldData does for the blocks loaded from split, with the lookups in
+the cached StructureInheritanceIndex of the structure.
+
+Run with:
+
+    python -m xmodule.modulestore.tests.benchmark_inheritance [num_blocks]
+
+To time get_course(depth=None) of a course in a split modulestore, with and
+without the index of its structure cached, run from a Studio or LMS shell:
+
+    from xmodule.modulestore.tests.benchmark_inheritance import benchmark_get_course
+    benchmark_get_course(course_key)
+"""
+import sys
+import timeit
+
+from xmodule.modulestore.inheritance import InheritanceMixin
+from xmodule.modulestore.split_mongo.split import INHERITANCE_INDEX_CACHE
+from xmodule.modulestore.tests.benchmark_parent_index import build_structure
+
+
+def add_settings(structure):
+    """
+    Sets inheritable settings on the course, its chapters and its sequentials,
+    as a course usually does.
+    """
+    for block_key, block_data in structure['blocks'].iteritems():
+        if block_key.type == 'course':
+            block_data.fields.update({'start': '2015-01-01T00:00:00Z', 'showanswer': 'finished'})
+        elif block_key.type == 'chapter':
+            block_data.fields['start'] = '2015-02-01T00:00:00Z'
+        elif block_key.type == 'sequential':
+            block_data.fields.update({'due': '2015-03-01T00:00:00Z', 'graded': True, 'format': 'Homework'})
+
+
+def walk_ancestors(structure):
+    """
+    Returns the inherited settings of all the blocks of the structure, found
+    by walking the ancestors of each block for each inheritable setting.
+    """
+    parents = {}
+    for parent_key, block_data in structure['blocks'].iteritems():
+        for child_key in block_data.fields.get('children', []):
+            parents[child_key] = parent_key
+
+    inherited_settings = {}
+    for block_key in structure['blocks']:
+        settings = inherited_settings[block_key] = {}
+        for name in InheritanceMixin.fields:
+            ancestor = parents.get(block_key)
+            while ancestor is not None:
+                fields = structure['blocks'][ancestor].fields
+                if name in fields:
+                    settings[name] = fields[name]
+                    break
+                ancestor = parents.get(ancestor)
+    return inherited_settings
+
+
+def look_up_index(structure):
+    """
+    Returns the inherited settings of all the blocks of the structure, looked
+    up in the cached index of the structure.
+    """
+    index = INHERITANCE_INDEX_CACHE.get(structure)
+    return {block_key: index.inherited_settings(block_key) for block_key in structure['blocks']}
+
+
+def benchmark_get_course(course_key, number=5):
+    """
+    Prints the mean time of get_course(depth=None) of the course, with the
+    inheritance index of its structure built anew and cached.
+    """
+    from xmodule.modulestore.django import modulestore
+
+    store = modulestore()
+
+    def get_course():
+        """
+        Loads all the blocks of the course, and reads their inheritable settings.
+        """
+        with store.bulk_operations(course_key):
+            course = store.get_course(course_key, depth=None)
+            blocks = [course]
+            while blocks:
+                block = blocks.pop()
+                for name in InheritanceMixin.fields:
+                    getattr(block, name)
+                blocks.extend(block.get_children())
+
+    timings = [
+        ('uncached', lambda: (INHERITANCE_INDEX_CACHE.clear(), get_course())),
+        ('cached', get_course),
+    ]
+    for label, load in timings:
+        get_course()
+        seconds = timeit.timeit(load, number=number)
+        print '{:>24}: {:.3f} ms per call'.format('get_course ({})'.format(label), seconds * 1000 / number)
+
+
+def main(num_blocks=20000):
+    """
+    Prints the time to resolve the inherited settings of all the blocks of a
+    structure of `num_blocks` blocks, without and with the inheritance index.
+    """
+    structure = build_structure(num_blocks)
+    add_settings(structure)
+    print 'Structure of {} blocks'.format(len(structure['blocks']))
+
+    assert walk_ancestors(structure) == look_up_index(structure)
+    INHERITANCE_INDEX_CACHE.clear()
+
+    seconds = timeit.timeit(
+        lambda: INHERITANCE_INDEX_CACHE.get(structure), setup=INHERITANCE_INDEX_CACHE.clear, number=1
+    )
+    print '{:>24}: {:.3f} ms'.format('index build', seconds * 1000)
+
+    timings = [
+        ('ancestor walk', lambda: walk_ancestors(structure)),
+        ('index lookup', lambda: look_up_index(structure)),
+    ]
+    for label, resolve in timings:
+        seconds = timeit.timeit(resolve, number=1)
+        print '{:>24}: {:.3f} ms'.format(label, seconds * 1000)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
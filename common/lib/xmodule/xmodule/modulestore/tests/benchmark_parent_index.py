@@ -0,0 +1,109 @@
+"""
+Microbenchmark of parent lookups and orphan detection in a large split structure.
+
+Compares scanning all the blocks of the structure for each lookup, as
+_get_parents_from_structure and get_orphans did before StructureParentIndex,
+with the lookups in the cached index of the structure.
+
+Run with:
+
+    python -m xmodule.modulestore.tests.benchmark_parent_index [num_blocks] [num_lookups]
+"""
+import random
+import sys
+import timeit
+
+from bson.objectid import ObjectId
+
+from xmodule.modulestore import BlockData
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.split import PARENT_INDEX_CACHE
+
+
+def build_structure(num_blocks):
+    """
+    Returns a structure of a course with about `num_blocks` blocks, with
+    10 chapters of 10 sequentials of 10 verticals each, and the remaining
+    blocks spread over the verticals as problems.
+    """
+    root = BlockKey('course', 'course')
+    blocks = {root: BlockData(block_type='course', fields={'children': []})}
+
+    def add_block(parent_key, block_type, block_id):
+        """
+        Adds a block to the structure as the last child of the parent.
+        """
+        block_key = BlockKey(block_type, block_id)
+        blocks[block_key] = BlockData(block_type=block_type, fields={'children': []})
+        blocks[parent_key].fields['children'].append(block_key)
+        return block_key
+
+    verticals = []
+    for chapter_index in xrange(10):
+        chapter = add_block(root, 'chapter', 'chapter_{}'.format(chapter_index))
+        for sequential_index in xrange(10):
+            sequential = add_block(chapter, 'sequential', 'sequential_{}_{}'.format(chapter_index, sequential_index))
+            for vertical_index in xrange(10):
+                verticals.append(add_block(
+                    sequential, 'vertical', 'vertical_{}_{}_{}'.format(chapter_index, sequential_index, vertical_index)
+                ))
+
+    problem_index = 0
+    while len(blocks) < num_blocks:
+        add_block(verticals[problem_index % len(verticals)], 'problem', 'problem_{}'.format(problem_index))
+        problem_index += 1
+
+    return {'_id': ObjectId(), 'root': root, 'blocks': blocks}
+
+
+def scan_parents(block_key, structure):
+    """
+    Returns the parents of the block by scanning the structure.
+    """
+    return [
+        parent_key
+        for parent_key, value in structure['blocks'].iteritems()
+        if block_key in value.fields.get('children', [])
+    ]
+
+
+def scan_orphans(structure):
+    """
+    Returns the orphans of the structure by scanning the structure.
+    """
+    items = set(structure['blocks'].keys())
+    items.remove(structure['root'])
+    for block_data in structure['blocks'].itervalues():
+        items.difference_update(block_data.fields.get('children', []))
+    return items
+
+
+def main(num_blocks=20000, num_lookups=100):
+    """
+    Prints the mean time of a parent lookup and of an orphan detection in a
+    structure of `num_blocks` blocks, without and with the parent index.
+    """
+    structure = build_structure(num_blocks)
+    block_keys = random.sample(structure['blocks'].keys(), num_lookups)
+    print 'Structure of {} blocks'.format(len(structure['blocks']))
+
+    seconds = timeit.timeit(lambda: PARENT_INDEX_CACHE.get(structure), setup=PARENT_INDEX_CACHE.clear, number=1)
+    print '{:>24}: {:.3f} ms'.format('index build', seconds * 1000)
+
+    timings = [
+        ('parent lookup (scan)', lambda: [scan_parents(block_key, structure) for block_key in block_keys]),
+        ('parent lookup (index)', lambda: [
+            PARENT_INDEX_CACHE.get(structure).get_parents(block_key) for block_key in block_keys
+        ]),
+        ('orphans (scan)', lambda: [scan_orphans(structure) for __ in block_keys]),
+        ('orphans (index)', lambda: [
+            PARENT_INDEX_CACHE.get(structure).unparented - {structure['root']} for __ in block_keys
+        ]),
+    ]
+    for label, lookups in timings:
+        seconds = timeit.timeit(lookups, number=1)
+        print '{:>24}: {:.3f} ms per call'.format(label, seconds * 1000 / num_lookups)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
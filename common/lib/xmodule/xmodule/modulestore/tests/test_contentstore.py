@@ -1,6 +1,8 @@
 """
  Test contentstore.mongo functionality
 """
+import itertools
+import json
 import logging
 from uuid import uuid4
 import unittest
@@ -123,21 +125,26 @@ class TestContentstore(unittest.TestCase):
             "Found unknown asset {}".format(unknown_asset)
         )
 
-    @ddt.data(True, False)
-    def test_export_for_course(self, deprecated):
+    @ddt.data(*itertools.product((True, False), (1, 4)))
+    @ddt.unpack
+    def test_export_for_course(self, deprecated, export_threads):
         """
         Test export
         """
         self.set_up_assets(deprecated)
+        self.contentstore.export_threads = export_threads
         root_dir = path.Path(mkdtemp())
         try:
             self.contentstore.export_all_for_course(
                 self.course1_key, root_dir,
                 path.Path(root_dir / "policy.json"),
             )
+            with open(root_dir / "policy.json") as policy_file:
+                self.assertEqual(sorted(json.load(policy_file)), sorted(self.course1_files))
             for filename in self.course1_files:
                 filepath = path.Path(root_dir / filename)
                 self.assertTrue(filepath.isfile(), "{} is not a file".format(filepath))
+                self.assertEqual(filepath.bytes(), path.Path(DATA_DIR / 'static' / filename).bytes())
             for filename in self.course2_files:
                 if filename not in self.course1_files:
                     filepath = path.Path(root_dir / filename)
@@ -8,6 +8,7 @@ from shutil import rmtree
 from unittest import TestCase, skip
 import ddt
 
+from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.xml_importer import import_course_from_xml
 from xmodule.modulestore.xml_exporter import export_course_to_xml
 from xmodule.modulestore.tests.factories import check_mongo_calls
@@ -190,3 +191,22 @@ class CountMongoCallsCourseTraversal(TestCase):
                     # and then subsequently retrieved with the lazy and depth=None values
                     course = modulestore.get_item(course.location, depth=None, lazy=False)
                     self._traverse_blocks_in_course(course, access_all_block_fields=True)
+
+    def test_prefetch_definitions_when_lazy(self):
+        request_cache = MemoryCache()
+        with MIXED_SPLIT_MODULESTORE_BUILDER.build(request_cache=request_cache) as (content_store, modulestore):
+            course_key = self._import_course(content_store, modulestore)
+            block_types = {block.location.block_type for block in modulestore.get_items(course_key)}
+            request_cache.data.clear()
+
+            # Prefetching the definitions of all the block types loads them in a single
+            # query, just as when the course is loaded with lazy=False.
+            with check_mongo_calls(4):
+                with modulestore.bulk_operations(course_key):
+                    course = modulestore.get_course(course_key, depth=None, prefetch_definitions=block_types)
+                    self._traverse_blocks_in_course(course, access_all_block_fields=True)
+
+            split_store = modulestore._get_modulestore_by_type(  # pylint: disable=protected-access
+                ModuleStoreEnum.Type.split
+            )
+            self.assertEqual(split_store.get_definition_round_trips(), 1)
@@ -4,11 +4,22 @@ Tests for bulk operations in Split Modulestore.
 # pylint: disable=protected-access
 import copy
 import ddt
+import re
 import unittest
 from bson.objectid import ObjectId
-from mock import MagicMock, Mock, call
-from xmodule.modulestore.split_mongo.split import SplitBulkWriteMixin
+from mock import MagicMock, Mock, call, patch
+from xmodule.modulestore import BlockData
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.split import (
+    INHERITANCE_INDEX_CACHE,
+    PARENT_INDEX_CACHE,
+    SplitBulkWriteMixin,
+    StructureInheritanceIndex,
+    StructureParentIndex,
+    StructureQueryIndex,
+)
 from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection
+from xmodule.modulestore.tests.utils import MemoryCache
 
 from opaque_keys.edx.locator import CourseLocator
 
@@ -448,6 +459,21 @@ class TestBulkWriteMixinFindMethods(TestBulkWriteMixin):
             else:
                 self.assertNotIn(db_definition(_id), results)
 
+    @patch('xmodule.modulestore.split_mongo.split.DEFINITION_BATCH_SIZE', 2)
+    def test_get_definitions_in_batches(self):
+        search_ids = [1, 2, 3, 4, 5]
+        db_definition = lambda _id: {'db': 'definition', '_id': _id}
+
+        self.bulk.request_cache = MemoryCache()
+        self.conn.get_definitions.side_effect = lambda ids, course_key: [db_definition(_id) for _id in ids]
+        results = self.bulk.get_definitions(self.course_key, search_ids)
+
+        self.assertEqual(self.conn.get_definitions.call_count, 3)
+        for batch_call in self.conn.get_definitions.call_args_list:
+            self.assertLessEqual(len(batch_call[0][0]), 2)
+        self.assertItemsEqual([db_definition(_id) for _id in search_ids], results)
+        self.assertEqual(self.bulk.get_definition_round_trips(), 3)
+
     def test_get_definitions_doesnt_update_db(self):
         test_ids = [1, 2]
         db_definition = lambda _id: {'db': 'definition', '_id': _id}
@@ -727,3 +753,165 @@ class TestBulkWriteMixinOpenAfterPrevTransaction(TestBulkWriteMixinOpen, TestBul
     Test that operations on with an open transaction aren't affected by a previously executed transaction
     """
     pass
+
+
+class TestParentIndex(TestBulkWriteMixin):
+    """
+    Tests of the parent indexes of structures.
+    """
+    def setUp(self):
+        super(TestParentIndex, self).setUp()
+        self.addCleanup(PARENT_INDEX_CACHE.clear)
+        self.course = BlockKey('course', 'course')
+        self.chapter = BlockKey('chapter', 'chapter')
+        self.sequential = BlockKey('sequential', 'sequential')
+        self.orphan = BlockKey('html', 'orphan')
+        self.structure['root'] = self.course
+        self.structure['blocks'] = {
+            self.course: BlockData(block_type='course', fields={'children': [self.chapter]}),
+            self.chapter: BlockData(block_type='chapter', fields={'children': [self.sequential]}),
+            self.sequential: BlockData(block_type='sequential', fields={}),
+            self.orphan: BlockData(block_type='html', fields={}),
+        }
+
+    def test_index(self):
+        index = StructureParentIndex(self.structure)
+        self.assertEqual(index.get_parents(self.sequential), [self.chapter])
+        self.assertEqual(index.get_parents(self.chapter), [self.course])
+        self.assertEqual(index.get_parents(self.course), [])
+        self.assertEqual(index.unparented, {self.course, self.orphan})
+
+    def test_index_cached_for_saved_structure(self):
+        index = self.bulk.get_parent_index(self.course_key, self.structure)
+        self.assertIs(self.bulk.get_parent_index(self.course_key, self.structure), index)
+
+        self.bulk._begin_bulk_operation(self.course_key)
+        self.conn.get_structure.return_value = self.structure
+        structure = self.bulk.get_structure(self.course_key, self.structure['_id'])
+        self.assertIs(self.bulk.get_parent_index(self.course_key, structure), index)
+
+    def test_index_not_cached_for_edited_structure(self):
+        self.bulk._begin_bulk_operation(self.course_key)
+        self.bulk.update_structure(self.course_key, self.structure)
+        index = self.bulk.get_parent_index(self.course_key, self.structure)
+
+        self.structure['blocks'][self.chapter].fields['children'].append(self.orphan)
+        edited_index = self.bulk.get_parent_index(self.course_key, self.structure)
+        self.assertIsNot(edited_index, index)
+        self.assertEqual(edited_index.get_parents(self.orphan), [self.chapter])
+
+
+class TestInheritanceIndex(TestBulkWriteMixin):
+    """
+    Tests of the inheritance indexes of structures.
+    """
+    def setUp(self):
+        super(TestInheritanceIndex, self).setUp()
+        self.addCleanup(INHERITANCE_INDEX_CACHE.clear)
+        self.course = BlockKey('course', 'course')
+        self.chapter = BlockKey('chapter', 'chapter')
+        self.sequential = BlockKey('sequential', 'sequential')
+        self.problem = BlockKey('problem', 'problem')
+        self.cycle_a = BlockKey('vertical', 'cycle_a')
+        self.cycle_b = BlockKey('vertical', 'cycle_b')
+        self.structure['root'] = self.course
+        self.structure['blocks'] = {
+            self.course: BlockData(block_type='course', fields={
+                'children': [self.chapter], 'start': '2015-01-01T00:00:00Z', 'graded': False,
+            }),
+            self.chapter: BlockData(block_type='chapter', fields={
+                'children': [self.sequential], 'display_name': 'Chapter',
+            }),
+            self.sequential: BlockData(block_type='sequential', fields={
+                'children': [self.problem], 'graded': True, 'due': '2015-02-01T00:00:00Z',
+            }),
+            self.problem: BlockData(block_type='problem', fields={'due': '2015-03-01T00:00:00Z'}),
+            self.cycle_a: BlockData(block_type='vertical', fields={'children': [self.cycle_b], 'graded': True}),
+            self.cycle_b: BlockData(block_type='vertical', fields={'children': [self.cycle_a]}),
+        }
+
+    def test_index(self):
+        index = StructureInheritanceIndex(self.structure)
+        self.assertEqual(index.inherited_settings(self.course), {})
+        course_settings = {'start': '2015-01-01T00:00:00Z', 'graded': False}
+        self.assertEqual(index.inherited_settings(self.chapter), course_settings)
+        # The chapter sets no inheritable setting, so its children inherit the same settings.
+        self.assertIs(index.inherited_settings(self.sequential), index.inherited_settings(self.chapter))
+        self.assertEqual(
+            index.inherited_settings(self.problem),
+            {'start': '2015-01-01T00:00:00Z', 'graded': True, 'due': '2015-02-01T00:00:00Z'},
+        )
+        self.assertIsNone(index.inherited_settings(BlockKey('html', 'missing')))
+
+    def test_cycle(self):
+        index = StructureInheritanceIndex(self.structure)
+        # One of the blocks of the cycle is taken as its root.
+        self.assertIn({}, [index.inherited_settings(self.cycle_a), index.inherited_settings(self.cycle_b)])
+
+    def test_index_cached_for_saved_structure(self):
+        index = self.bulk.get_inheritance_index(self.course_key, self.structure)
+        self.assertIs(self.bulk.get_inheritance_index(self.course_key, self.structure), index)
+
+        self.bulk.update_structure(self.course_key, self.structure)
+        self.assertIsNot(self.bulk.get_inheritance_index(self.course_key, self.structure), index)
+
+    def test_no_index_for_edited_structure(self):
+        self.bulk._begin_bulk_operation(self.course_key)
+        self.bulk.update_structure(self.course_key, self.structure)
+        self.assertIsNone(self.bulk.get_inheritance_index(self.course_key, self.structure))
+
+
+@ddt.ddt
+class TestQueryIndex(unittest.TestCase):
+    """
+    Tests of the query indexes of structures used by get_items.
+    """
+    def setUp(self):
+        super(TestQueryIndex, self).setUp()
+        self.course = BlockKey('course', 'course')
+        self.discussion_a = BlockKey('discussion', 'a')
+        self.discussion_b = BlockKey('discussion', 'b')
+        self.html = BlockKey('html', 'html')
+        self.structure = {
+            '_id': ObjectId(),
+            'root': self.course,
+            'blocks': {
+                self.course: BlockData(block_type='course', fields={'user_partitions': [{'id': 0}]}),
+                self.discussion_a: BlockData(block_type='discussion', fields={'discussion_id': 'id_a'}),
+                self.discussion_b: BlockData(block_type='discussion', fields={'discussion_id': 'id_b'}),
+                self.html: BlockData(block_type='html', fields={}),
+            },
+        }
+        self.index = StructureQueryIndex(self.structure)
+
+    @ddt.data(
+        ({'block_type': 'discussion'}, {}, {'discussion_a', 'discussion_b'}),
+        ({'block_type': 'problem'}, {}, set()),
+        ({'block_type': {'$in': ['course', 'html']}}, {}, {'course', 'html'}),
+        ({}, {'discussion_id': 'id_a'}, {'discussion_a'}),
+        ({'block_type': 'discussion'}, {'discussion_id': 'id_b'}, {'discussion_b'}),
+        ({'block_type': 'html'}, {'discussion_id': 'id_b'}, set()),
+        ({}, {'discussion_id': {'$exists': True}}, {'discussion_a', 'discussion_b'}),
+        ({}, {'discussion_id': re.compile('id_')}, {'discussion_a', 'discussion_b'}),
+        ({}, {'user_partitions': {'id': 0}}, {'course'}),
+    )
+    @ddt.unpack
+    def test_candidates(self, qualifiers, settings, expected_candidates):
+        self.assertEqual(
+            self.index.candidates(qualifiers, settings),
+            {getattr(self, block_name) for block_name in expected_candidates},
+        )
+
+    def test_in_structure_order(self):
+        blocks = self.index.in_structure_order({self.html, self.discussion_a, self.course, self.discussion_b})
+        self.assertEqual(blocks, list(self.structure['blocks']))
+
+    @ddt.data(
+        ({}, {}),
+        ({'block_type': re.compile('discussion')}, {}),
+        ({}, {'discussion_id': {'$exists': False}}),
+        ({'edited_by': 'user'}, {'display_name': 'Name'}),
+    )
+    @ddt.unpack
+    def test_no_index_applies(self, qualifiers, settings):
+        self.assertIsNone(self.index.candidates(qualifiers, settings))
@@ -1,7 +1,17 @@
 """ Test the behavior of split_mongo/MongoConnection """
+import copy
+import cPickle as pickle
 import unittest
 from mock import patch
-from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.mongo_connection import (
+    FrozenBlockData,
+    FrozenDict,
+    MongoConnection,
+    SharedStructureCache,
+    freeze_structure,
+    structure_from_mongo,
+)
 from xmodule.exceptions import HeartbeatFailure
 
 
@@ -17,3 +27,118 @@ class TestHeartbeatFailureException(unittest.TestCase):
 
             with self.assertRaises(HeartbeatFailure):
                 useless_conn.heartbeat()
+
+
+class TestSharedStructureCache(unittest.TestCase):
+    """ Test the per-process cache of frozen structures """
+    def setUp(self):
+        super(TestSharedStructureCache, self).setUp()
+        self.structure = structure_from_mongo({
+            '_id': 'structure_id',
+            'root': ['course', 'course'],
+            'blocks': [
+                {
+                    'block_type': 'course',
+                    'block_id': 'course',
+                    'definition': 'definition_id',
+                    'fields': {'children': [['chapter', 'chapter']], 'display_name': 'Course'},
+                    'edit_info': {'edited_by': 'user'},
+                },
+                {
+                    'block_type': 'chapter',
+                    'block_id': 'chapter',
+                    'definition': 'definition_id',
+                    'fields': {},
+                    'edit_info': {},
+                },
+            ],
+        })
+        self.structure_size = len(pickle.dumps(self.structure, pickle.HIGHEST_PROTOCOL))
+
+    def max_bytes(self, num_structures):
+        """
+        Return a cache size with room for `num_structures` structures, but not
+        one more (the size of a structure's pickle varies by a few bytes).
+        """
+        return num_structures * self.structure_size + self.structure_size / 2
+
+    def test_frozen_structure(self):
+        frozen_structure = freeze_structure(self.structure)
+        block = frozen_structure['blocks'][BlockKey('course', 'course')]
+        self.assertEqual(frozen_structure, self.structure)
+
+        with self.assertRaises(TypeError):
+            frozen_structure['_id'] = 'other_id'
+        with self.assertRaises(TypeError):
+            del frozen_structure['blocks'][BlockKey('chapter', 'chapter')]
+        with self.assertRaises(TypeError):
+            block.fields['display_name'] = 'Other'
+        with self.assertRaises(TypeError):
+            block.definition_loaded = True
+        with self.assertRaises(TypeError):
+            block.edit_info.edited_by = 'other_user'
+
+        # The subtree edit info is computed from the structure and cached on it
+        block.edit_info._subtree_edited_by = 'user'  # pylint: disable=protected-access
+
+    def test_copied_structure_is_modifiable(self):
+        frozen_structure = freeze_structure(self.structure)
+        new_structure = copy.deepcopy(frozen_structure)
+        self.assertEqual(new_structure, self.structure)
+
+        new_structure['_id'] = 'new_id'
+        block = new_structure['blocks'][BlockKey('course', 'course')]
+        self.assertNotIsInstance(block, FrozenBlockData)
+        block.fields['children'].append(BlockKey('chapter', 'other_chapter'))
+        block.edit_info.edited_by = 'other_user'
+        self.assertEqual(
+            frozen_structure['blocks'][BlockKey('course', 'course')].fields['children'],
+            [BlockKey('chapter', 'chapter')],
+        )
+
+    def test_pickled_structure_is_modifiable(self):
+        structure = pickle.loads(pickle.dumps(freeze_structure(self.structure), pickle.HIGHEST_PROTOCOL))
+        self.assertEqual(structure, self.structure)
+        structure['blocks'][BlockKey('course', 'course')].fields['display_name'] = 'Other'
+
+    def test_disabled(self):
+        cache = SharedStructureCache(max_bytes=0)
+        self.assertIs(cache.set('structure_id', self.structure), self.structure)
+        self.assertIsNone(cache.get('structure_id'))
+
+    def test_get_shared_structure(self):
+        cache = SharedStructureCache(max_bytes=self.max_bytes(1))
+        self.assertIsNone(cache.get('structure_id'))
+        frozen_structure = cache.set('structure_id', self.structure)
+        self.assertIsInstance(frozen_structure, FrozenDict)
+        self.assertIs(cache.get('structure_id'), frozen_structure)
+        self.assertGreater(cache.bytes_held, 0)
+
+    def test_evictions(self):
+        cache = SharedStructureCache(max_bytes=self.max_bytes(2))
+        for structure_id in ('first', 'second'):
+            cache.set(structure_id, self.structure)
+        # Use the first structure, so that the second one is evicted
+        cache.get('first')
+        cache.set('third', self.structure)
+
+        self.assertIsNone(cache.get('second'))
+        self.assertIsNotNone(cache.get('first'))
+        self.assertIsNotNone(cache.get('third'))
+        self.assertLessEqual(cache.bytes_held, self.max_bytes(2))
+
+    def test_too_large(self):
+        cache = SharedStructureCache(max_bytes=self.structure_size / 2)
+        self.assertIs(cache.set('structure_id', self.structure), self.structure)
+        self.assertIsNone(cache.get('structure_id'))
+        self.assertEqual(cache.bytes_held, 0)
+
+    @patch('xmodule.modulestore.split_mongo.mongo_connection.TIMER')
+    def test_metrics(self, mock_timer):
+        cache = SharedStructureCache(max_bytes=self.max_bytes(1))
+        cache.set('first', self.structure)
+        cache.set('second', self.structure)
+
+        tagger = mock_timer.timer.return_value.__enter__.return_value
+        tagger.measure.assert_any_call('bytes_held', cache.bytes_held)
+        tagger.measure.assert_any_call('evictions', 1)
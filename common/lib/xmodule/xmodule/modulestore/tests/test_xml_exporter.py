@@ -0,0 +1,83 @@
+"""
+Tests for XML exporter.
+"""
+import tarfile
+import unittest
+from contextlib import closing
+from StringIO import StringIO
+
+import mock
+from fs.errors import DestinationExistsError, ParentDirectoryMissingError, UnsupportedError
+
+from xmodule.modulestore.xml_exporter import TarStreamFS
+
+
+class TarStreamFSTest(unittest.TestCase):
+    """
+    Tests of the filesystem writing an export to a tar stream.
+    """
+    def setUp(self):
+        super(TarStreamFSTest, self).setUp()
+        self.stream = StringIO()
+        self.tar_file = tarfile.open(fileobj=self.stream, mode='w|gz')
+        self.addCleanup(self.tar_file.close)
+        self.export_fs = TarStreamFS(self.tar_file).makeopendir('course')
+
+    def read_tarball(self):
+        """
+        Closes the tar stream, and returns the name and contents of its members.
+        """
+        self.tar_file.close()
+        with closing(tarfile.open(fileobj=StringIO(self.stream.getvalue()))) as tarball:
+            return [
+                (member.name, tarball.extractfile(member).read() if member.isfile() else None)
+                for member in tarball.getmembers()
+            ]
+
+    def test_write_files(self):
+        with self.export_fs.open('course.xml', 'w') as course_xml:
+            course_xml.write('<course/>')
+        policies_dir = self.export_fs.makeopendir('policies/2012_Fall', recursive=True)
+        with policies_dir.open('policy.json', 'w') as policy:
+            policy.write(u'{"display_name": "caf\xe9"}')
+
+        self.assertTrue(self.export_fs.isfile('course.xml'))
+        self.assertTrue(self.export_fs.isdir('policies/2012_Fall'))
+        self.assertEqual(self.read_tarball(), [
+            ('course', None),
+            ('course/course.xml', '<course/>'),
+            ('course/policies', None),
+            ('course/policies/2012_Fall', None),
+            ('course/policies/2012_Fall/policy.json', '{"display_name": "caf\xc3\xa9"}'),
+        ])
+
+    def test_file_added_when_closed(self):
+        course_xml = self.export_fs.open('course.xml', 'w')
+        course_xml.write('<course/>')
+        self.assertEqual(self.read_tarball(), [('course', None)])
+
+    @mock.patch('xmodule.modulestore.xml_exporter.TAR_MEMBER_MAX_MEMORY_SIZE', 1024)
+    def test_spooled_file(self):
+        data = ''.join(chr(index % 256) for index in xrange(10000))
+        with self.export_fs.open('video.mp4', 'wb') as video:
+            for index in xrange(0, len(data), 1000):
+                video.write(data[index:index + 1000])
+            self.assertTrue(video._buffer._rolled)  # pylint: disable=protected-access
+        self.assertEqual(self.read_tarball(), [('course', None), ('course/video.mp4', data)])
+
+    def test_missing_parent_directory(self):
+        with self.assertRaises(ParentDirectoryMissingError):
+            self.export_fs.open('static/images/logo.png', 'wb')
+        with self.assertRaises(ParentDirectoryMissingError):
+            self.export_fs.makedir('static/images')
+
+    def test_existing_directory(self):
+        self.export_fs.makedir('static')
+        self.export_fs.makedir('static', allow_recreate=True)
+        with self.assertRaises(DestinationExistsError):
+            self.export_fs.makedir('static')
+        self.assertEqual(self.read_tarball(), [('course', None), ('course/static', None)])
+
+    def test_write_only(self):
+        with self.assertRaises(UnsupportedError):
+            self.export_fs.open('course.xml')
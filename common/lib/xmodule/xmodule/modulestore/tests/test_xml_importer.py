@@ -9,7 +9,9 @@ from xmodule.x_module import XModuleMixin
 from opaque_keys.edx.locations import Location
 from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.inheritance import InheritanceMixin
-from xmodule.modulestore.xml_importer import _update_and_import_module, _update_module_location
+from xmodule.modulestore.xml_importer import (
+    _update_and_import_module, _update_module_location, import_static_content
+)
 from xmodule.modulestore.tests.mongo_connection import MONGO_PORT_NUM, MONGO_HOST
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 from xmodule.tests import DATA_DIR
@@ -333,3 +335,31 @@ class UpdateLocationTest(ModuleStoreNoSettings):
         # Expect these fields pass "is_set_on" test
         for field in self.CONTENT_FIELDS + self.SETTINGS_FIELDS + self.CHILDREN_FIELDS:
             self.assertTrue(new_version.fields[field].is_set_on(new_version))
+
+
+class StaticContentImportTest(unittest.TestCase):
+    """
+    Tests of the import of the static files of a course.
+    """
+    def import_toy_static_content(self, num_threads):
+        """
+        Imports the static files of the toy course into a mock contentstore,
+        and returns the remap dict and the imported asset keys.
+        """
+        content_store = mock.Mock()
+        content_store.generate_thumbnail.return_value = (None, None)
+        remap_dict = import_static_content(
+            DATA_DIR / 'toy', content_store, SlashSeparatedCourseKey('edX', 'toy', '2012_Fall'),
+            num_threads=num_threads,
+        )
+        saved_keys = set(call[0][0].location for call in content_store.save.call_args_list)
+        return remap_dict, saved_keys
+
+    def test_concurrent_import(self):
+        serial_remap_dict, serial_saved_keys = self.import_toy_static_content(num_threads=1)
+        concurrent_remap_dict, concurrent_saved_keys = self.import_toy_static_content(num_threads=4)
+
+        self.assertEqual(len(serial_remap_dict), 5)
+        self.assertEqual(serial_remap_dict, concurrent_remap_dict)
+        self.assertEqual(set(serial_remap_dict.values()), serial_saved_keys)
+        self.assertEqual(serial_saved_keys, concurrent_saved_keys)
@@ -3,7 +3,11 @@ Methods for exporting course data to XML
 """
 
 import logging
+import tarfile
+import time
 from abc import abstractmethod
+from contextlib import closing
+from tempfile import SpooledTemporaryFile
 import lxml.etree
 from xblock.fields import Scope, Reference, ReferenceList, ReferenceValueDict
 from xmodule.contentstore.content import StaticContent
@@ -13,9 +17,13 @@ from xmodule.modulestore import EdxJSONEncoder, ModuleStoreEnum
 from xmodule.modulestore.inheritance import own_metadata
 from xmodule.modulestore.store_utilities import draft_node_constructor, get_draft_subtree_roots
 from xmodule.modulestore import LIBRARY_ROOT
+from fs.base import FS
+from fs.errors import (
+    DestinationExistsError, ParentDirectoryMissingError, ResourceInvalidError, UnsupportedError
+)
 from fs.osfs import OSFS
+from fs.path import abspath, dirname, normpath, relpath
 from json import dumps
-import os
 
 from xmodule.modulestore.draft_and_published import DIRECT_ONLY_CATEGORIES
 from opaque_keys.edx.locator import CourseLocator, LibraryLocator
@@ -25,6 +33,9 @@ PUBLISHED_DIR = "published"
 
 DEFAULT_CONTENT_FIELDS = ['metadata', 'data']
 
+# Size above which a file written to a tar stream is spooled to a temporary file, until it's closed.
+TAR_MEMBER_MAX_MEMORY_SIZE = 1024 * 1024
+
 
 def _export_drafts(modulestore, course_key, export_fs, xml_centric_course_key):
     """
@@ -111,7 +122,7 @@ class ExportManager(object):
         `modulestore`: A `ModuleStore` object that is the source of the modules to export
         `contentstore`: A `ContentStore` object that is the source of the content to export, can be None
         `courselike_key`: The Locator of the Descriptor to export
-        `root_dir`: The directory to write the exported xml to
+        `root_dir`: The directory to write the exported xml to, either a path or a pyfilesystem `FS` object
         `target_dir`: The name of the directory inside `root_dir` to write the content to
         """
         self.modulestore = modulestore
@@ -132,7 +143,7 @@ class ExportManager(object):
         Perform any additional tasks to the root XML node.
         """
 
-    def process_extra(self, root, courselike, root_courselike_dir, xml_centric_courselike_key, export_fs):
+    def process_extra(self, root, courselike, xml_centric_courselike_key, export_fs):
         """
         Process additional content, like static assets.
         """
@@ -154,7 +165,7 @@ class ExportManager(object):
         """
         with self.modulestore.bulk_operations(self.courselike_key):
 
-            fsm = OSFS(self.root_dir)
+            fsm = self.root_dir if isinstance(self.root_dir, FS) else OSFS(self.root_dir)
             root = lxml.etree.Element('unknown')
 
             # export only the published content
@@ -171,8 +182,7 @@ class ExportManager(object):
             self.process_root(root, export_fs)
 
             # Process extra items-- drafts, assets, etc
-            root_courselike_dir = self.root_dir + '/' + self.target_dir
-            self.process_extra(root, courselike, root_courselike_dir, xml_centric_courselike_key, export_fs)
+            self.process_extra(root, courselike, xml_centric_courselike_key, export_fs)
 
             # Any last pass adjustments
             self.post_process(root, export_fs)
@@ -199,27 +209,25 @@ class CourseExportManager(ExportManager):
         with export_fs.open('course.xml', 'w') as course_xml:
             lxml.etree.ElementTree(root).write(course_xml)
 
-    def process_extra(self, root, courselike, root_courselike_dir, xml_centric_courselike_key, export_fs):
+    def process_extra(self, root, courselike, xml_centric_courselike_key, export_fs):
         # Export the modulestore's asset metadata.
-        asset_dir = root_courselike_dir + '/' + AssetMetadata.EXPORTED_ASSET_DIR + '/'
-        if not os.path.isdir(asset_dir):
-            os.makedirs(asset_dir)
+        asset_dir = export_fs.makeopendir(AssetMetadata.EXPORTED_ASSET_DIR)
         asset_root = lxml.etree.Element(AssetMetadata.ALL_ASSETS_XML_TAG)
         course_assets = self.modulestore.get_all_asset_metadata(self.courselike_key, None)
         for asset_md in course_assets:
             # All asset types are exported using the "asset" tag - but their asset type is specified in each asset key.
             asset = lxml.etree.SubElement(asset_root, AssetMetadata.ASSET_XML_TAG)
             asset_md.to_xml(asset)
-        with OSFS(asset_dir).open(AssetMetadata.EXPORTED_ASSET_FILENAME, 'w') as asset_xml_file:
+        with asset_dir.open(AssetMetadata.EXPORTED_ASSET_FILENAME, 'w') as asset_xml_file:
             lxml.etree.ElementTree(asset_root).write(asset_xml_file)
 
         # export the static assets
         policies_dir = export_fs.makeopendir('policies')
         if self.contentstore:
-            self.contentstore.export_all_for_course(
+            self.contentstore.export_all_for_course_to_fs(
                 self.courselike_key,
-                root_courselike_dir + '/static/',
-                root_courselike_dir + '/policies/assets.json',
+                export_fs.makeopendir('static'),
+                policies_dir,
             )
 
             # If we are using the default course image, export it to the
@@ -235,10 +243,8 @@ class CourseExportManager(ExportManager):
                 except NotFoundError:
                     pass
                 else:
-                    output_dir = root_courselike_dir + '/static/images/'
-                    if not os.path.isdir(output_dir):
-                        os.makedirs(output_dir)
-                    with OSFS(output_dir).open('course_image.jpg', 'wb') as course_image_file:
+                    output_dir = export_fs.makeopendir('static/images', recursive=True)
+                    with output_dir.open('course_image.jpg', 'wb') as course_image_file:
                         course_image_file.write(course_image.data)
 
         # export the static tabs
@@ -309,19 +315,19 @@ class LibraryExportManager(ExportManager):
         root.set('org', self.courselike_key.org)
         root.set('library', self.courselike_key.library)
 
-    def process_extra(self, root, courselike, root_courselike_dir, xml_centric_courselike_key, export_fs):
+    def process_extra(self, root, courselike, xml_centric_courselike_key, export_fs):
         """
         Notionally, libraries may have assets. This is currently unsupported, but the structure is here
         to ease in duck typing during import. This may be expanded as a useful feature eventually.
         """
         # export the static assets
-        export_fs.makeopendir('policies')
+        policies_dir = export_fs.makeopendir('policies')
 
         if self.contentstore:
-            self.contentstore.export_all_for_course(
+            self.contentstore.export_all_for_course_to_fs(
                 self.courselike_key,
-                self.root_dir + '/' + self.target_dir + '/static/',
-                self.root_dir + '/' + self.target_dir + '/policies/assets.json',
+                export_fs.makeopendir('static'),
+                policies_dir,
             )
 
     def post_process(self, root, export_fs):
@@ -351,6 +357,155 @@ def export_library_to_xml(modulestore, contentstore, library_key, root_dir, libr
     LibraryExportManager(modulestore, contentstore, library_key, root_dir, library_dir).export()
 
 
+def export_course_to_tarball(modulestore, contentstore, course_key, course_dir, fileobj):
+    """
+    Export the course as a gzipped tarball of the `course_dir` directory, written
+    as a stream to the file-like object `fileobj`, without staging it on disk.
+    See ExportManager for details.
+    """
+    with closing(tarfile.open(fileobj=fileobj, mode='w|gz')) as tar_file:
+        CourseExportManager(modulestore, contentstore, course_key, TarStreamFS(tar_file), course_dir).export()
+
+
+def export_library_to_tarball(modulestore, contentstore, library_key, library_dir, fileobj):
+    """
+    Export the library as a gzipped tarball of the `library_dir` directory, written
+    as a stream to the file-like object `fileobj`, without staging it on disk.
+    See ExportManager for details.
+    """
+    with closing(tarfile.open(fileobj=fileobj, mode='w|gz')) as tar_file:
+        LibraryExportManager(modulestore, contentstore, library_key, TarStreamFS(tar_file), library_dir).export()
+
+
+class TarStreamFS(FS):
+    """
+    A write-only pyfilesystem, which adds the directories and files written to
+    it to the tarfile `tar_file`, so that an export can be written to a tar
+    stream (e.g. opened with mode 'w|gz') instead of a directory on disk.
+
+    A file is kept until it's closed, as a tar member header needs the size
+    of the file; it's then added to the tar stream. Files larger than
+    TAR_MEMBER_MAX_MEMORY_SIZE are spooled to a temporary file meanwhile.
+    """
+    _meta = {
+        'thread_safe': True,
+        'virtual': False,
+        'read_only': False,
+        'unicode_paths': True,
+        'case_insensitive_paths': False,
+        'network': False,
+        'atomic.setcontents': False,
+    }
+
+    def __init__(self, tar_file):
+        super(TarStreamFS, self).__init__(thread_synchronize=True)
+        self.tar_file = tar_file
+        self._dirs = {'/'}
+        self._files = set()
+
+    def __unicode__(self):
+        return u'<TarStreamFS: {}>'.format(self.tar_file)
+
+    def isdir(self, path):
+        return abspath(normpath(path)) in self._dirs
+
+    def isfile(self, path):
+        return abspath(normpath(path)) in self._files
+
+    def makedir(self, path, recursive=False, allow_recreate=False):
+        path = abspath(normpath(path))
+        with self._lock:
+            if path in self._files:
+                raise ResourceInvalidError(
+                    path, msg="Cannot create directory, there's already a file of that name: %(path)s"
+                )
+            if path in self._dirs:
+                if not allow_recreate:
+                    raise DestinationExistsError(path)
+                return
+            if dirname(path) not in self._dirs:
+                if not recursive:
+                    raise ParentDirectoryMissingError(path)
+                self.makedir(dirname(path), recursive=True, allow_recreate=True)
+            self._dirs.add(path)
+            self.add_member(path, tarfile.DIRTYPE)
+
+    def open(self, path, mode='r', **kwargs):
+        if 'w' not in mode or '+' in mode:
+            raise UnsupportedError('open file for reading', path=path)
+        path = abspath(normpath(path))
+        with self._lock:
+            if path in self._dirs:
+                raise ResourceInvalidError(path)
+            if dirname(path) not in self._dirs:
+                raise ParentDirectoryMissingError(path)
+            # A file written twice is added twice to the tarball, and the last one wins on extraction.
+            self._files.add(path)
+        return TarMemberFile(self, path)
+
+    def add_member(self, path, member_type, fileobj=None, size=0):
+        """
+        Adds the directory or file at `path` to the tarball, with the `size` bytes of `fileobj` if it's a file.
+        """
+        member = tarfile.TarInfo(relpath(path))
+        member.type = member_type
+        member.mode = 0755 if member_type == tarfile.DIRTYPE else 0644
+        member.mtime = time.time()
+        member.size = size
+        with self._lock:
+            self.tar_file.addfile(member, fileobj)
+
+
+class TarMemberFile(object):
+    """
+    A file opened for writing in a TarStreamFS, added to the tarball when it's closed.
+    """
+    def __init__(self, tar_fs, path):
+        self.tar_fs = tar_fs
+        self.path = path
+        self.closed = False
+        self._buffer = SpooledTemporaryFile(max_size=TAR_MEMBER_MAX_MEMORY_SIZE)
+
+    def write(self, data):
+        """
+        Writes `data`, encoded in utf-8 if it's unicode, to the file.
+        """
+        if isinstance(data, unicode):
+            data = data.encode('utf-8')
+        self._buffer.write(data)
+
+    def writelines(self, lines):
+        """
+        Writes each of `lines` to the file.
+        """
+        for line in lines:
+            self.write(line)
+
+    def flush(self):
+        """
+        Does nothing, as the file is only written to the tarball when it's closed.
+        """
+
+    def close(self):
+        """
+        Adds the file to the tarball.
+        """
+        if not self.closed:
+            self.closed = True
+            size = self._buffer.tell()
+            self._buffer.seek(0)
+            try:
+                self.tar_fs.add_member(self.path, tarfile.REGTYPE, self._buffer, size)
+            finally:
+                self._buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
 def adapt_references(subtree, destination_course_key, export_fs):
     """
     Map every reference in the subtree into destination_course_key and set it back into the xblock fields
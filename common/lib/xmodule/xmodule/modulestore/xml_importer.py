@@ -22,6 +22,10 @@ Modulestore virtual   |          XML physical (draft, published)
 """
 import logging
 from abc import abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from multiprocessing.pool import ThreadPool
+from time import time
 from opaque_keys.edx.locator import LibraryLocator
 import os
 import mimetypes
@@ -57,10 +61,17 @@ log = logging.getLogger(__name__)
 
 def import_static_content(
         course_data_path, static_content_store,
-        target_id, subpath='static', verbose=False):
+        target_id, subpath='static', verbose=False, num_threads=1):
+    """
+    Import the files in the `subpath` directory of `course_data_path` into
+    `static_content_store`, as assets of the course `target_id`.
 
-    remap_dict = {}
+    If `num_threads` is more than 1, the files are read, thumbnailed and
+    saved by that many threads concurrently.
 
+    Returns a dict of the imported files' asset keys, keyed by their paths
+    relative to `subpath`.
+    """
     # now import all static assets
     static_dir = course_data_path / subpath
     try:
@@ -77,6 +88,7 @@ def import_static_content(
     mimetypes.add_type('application/octet-stream', '.srt')
     mimetypes_list = mimetypes.types_map.values()
 
+    content_paths = []
     for dirname, _, filenames in os.walk(static_dir):
         for filename in filenames:
 
@@ -87,63 +99,81 @@ def import_static_content(
                     log.debug('skipping static content %s...', content_path)
                 continue
 
-            if verbose:
-                log.debug('importing static content %s...', content_path)
-
-            try:
-                with open(content_path, 'rb') as f:
-                    data = f.read()
-            except IOError:
-                if filename.startswith('._'):
-                    # OS X "companion files". See
-                    # http://www.diigo.com/annotated/0c936fda5da4aa1159c189cea227e174
-                    continue
-                # Not a 'hidden file', then re-raise exception
-                raise
+            content_paths.append(content_path)
 
-            # strip away leading path from the name
-            fullname_with_subpath = content_path.replace(static_dir, '')
-            if fullname_with_subpath.startswith('/'):
-                fullname_with_subpath = fullname_with_subpath[1:]
-            asset_key = StaticContent.compute_location(target_id, fullname_with_subpath)
+    def import_file(content_path):
+        """
+        Import the file at `content_path`, and return its path relative to
+        `subpath` and its asset key, or None if it's skipped.
+        """
+        filename = os.path.basename(content_path)
+        if verbose:
+            log.debug('importing static content %s...', content_path)
 
-            policy_ele = policy.get(asset_key.path, {})
+        try:
+            with open(content_path, 'rb') as f:
+                data = f.read()
+        except IOError:
+            if filename.startswith('._'):
+                # OS X "companion files". See
+                # http://www.diigo.com/annotated/0c936fda5da4aa1159c189cea227e174
+                return None
+            # Not a 'hidden file', then re-raise exception
+            raise
+
+        # strip away leading path from the name
+        fullname_with_subpath = content_path.replace(static_dir, '')
+        if fullname_with_subpath.startswith('/'):
+            fullname_with_subpath = fullname_with_subpath[1:]
+        asset_key = StaticContent.compute_location(target_id, fullname_with_subpath)
+
+        policy_ele = policy.get(asset_key.path, {})
+
+        # During export display name is used to create files, strip away slashes from name
+        displayname = escape_invalid_characters(
+            name=policy_ele.get('displayname', filename),
+            invalid_char_list=['/', '\\']
+        )
+        locked = policy_ele.get('locked', False)
+        mime_type = policy_ele.get('contentType')
+
+        # Check extracted contentType in list of all valid mimetypes
+        if not mime_type or mime_type not in mimetypes_list:
+            mime_type = mimetypes.guess_type(filename)[0]   # Assign guessed mimetype
+        content = StaticContent(
+            asset_key, displayname, mime_type, data,
+            import_path=fullname_with_subpath, locked=locked
+        )
 
-            # During export display name is used to create files, strip away slashes from name
-            displayname = escape_invalid_characters(
-                name=policy_ele.get('displayname', filename),
-                invalid_char_list=['/', '\\']
-            )
-            locked = policy_ele.get('locked', False)
-            mime_type = policy_ele.get('contentType')
-
-            # Check extracted contentType in list of all valid mimetypes
-            if not mime_type or mime_type not in mimetypes_list:
-                mime_type = mimetypes.guess_type(filename)[0]   # Assign guessed mimetype
-            content = StaticContent(
-                asset_key, displayname, mime_type, data,
-                import_path=fullname_with_subpath, locked=locked
-            )
+        # first let's save a thumbnail so we can get back a thumbnail location
+        thumbnail_content, thumbnail_location = static_content_store.generate_thumbnail(content)
 
-            # first let's save a thumbnail so we can get back a thumbnail location
-            thumbnail_content, thumbnail_location = static_content_store.generate_thumbnail(content)
+        if thumbnail_content is not None:
+            content.thumbnail_location = thumbnail_location
 
-            if thumbnail_content is not None:
-                content.thumbnail_location = thumbnail_location
+        # then commit the content
+        try:
+            static_content_store.save(content)
+        except Exception as err:
+            log.exception(u'Error importing {0}, error={1}'.format(
+                fullname_with_subpath, err
+            ))
 
-            # then commit the content
-            try:
-                static_content_store.save(content)
-            except Exception as err:
-                log.exception(u'Error importing {0}, error={1}'.format(
-                    fullname_with_subpath, err
-                ))
+        return fullname_with_subpath, asset_key
 
-            # store the remapping information which will be needed
-            # to subsitute in the module data
-            remap_dict[fullname_with_subpath] = asset_key
+    if num_threads > 1 and len(content_paths) > 1:
+        pool = ThreadPool(min(num_threads, len(content_paths)))
+        try:
+            # map returns the results in the order of content_paths
+            imported_files = pool.map(import_file, content_paths)
+        finally:
+            pool.terminate()
+    else:
+        imported_files = [import_file(content_path) for content_path in content_paths]
 
-    return remap_dict
+    # store the remapping information which will be needed
+    # to subsitute in the module data
+    return dict(imported_file for imported_file in imported_files if imported_file is not None)
 
 
 class ImportManager(object):
@@ -178,6 +208,12 @@ class ImportManager(object):
             Otherwise, it throws an InvalidLocationError if the courselike does not exist.
 
         default_class, load_error_modules: are arguments for constructing the XMLModuleStore (see its doc)
+
+        asset_upload_threads: the number of threads uploading the static files to static_content_store.
+            If more than 1, the files are uploaded concurrently, while the modules are written to
+            the modulestore.
+
+    The time taken by each stage of the import is logged and recorded in stage_timings.
     """
     store_class = XMLModuleStore
 
@@ -187,7 +223,7 @@ class ImportManager(object):
             load_error_modules=True, static_content_store=None,
             target_id=None, verbose=False,
             do_import_static=True, create_if_not_present=False,
-            raise_on_failure=False
+            raise_on_failure=False, asset_upload_threads=1
     ):
         self.store = store
         self.user_id = user_id
@@ -200,17 +236,34 @@ class ImportManager(object):
         self.do_import_static = do_import_static
         self.create_if_not_present = create_if_not_present
         self.raise_on_failure = raise_on_failure
-        self.xml_module_store = self.store_class(
-            data_dir,
-            default_class=default_class,
-            source_dirs=source_dirs,
-            load_error_modules=load_error_modules,
-            xblock_mixins=store.xblock_mixins,
-            xblock_select=store.xblock_select,
-            target_course_id=target_id,
-        )
+        self.asset_upload_threads = asset_upload_threads
+        # stage name -> seconds spent in the stage, for all the imported courselikes
+        self.stage_timings = OrderedDict()
+        with self.timed_stage('parse', data_dir):
+            self.xml_module_store = self.store_class(
+                data_dir,
+                default_class=default_class,
+                source_dirs=source_dirs,
+                load_error_modules=load_error_modules,
+                xblock_mixins=store.xblock_mixins,
+                xblock_select=store.xblock_select,
+                target_course_id=target_id,
+            )
         self.logger, self.errors = make_error_tracker()
 
+    @contextmanager
+    def timed_stage(self, stage, context):
+        """
+        Records and logs the time taken by the `stage` of the import of `context`.
+        """
+        start = time()
+        try:
+            yield
+        finally:
+            duration = time() - start
+            self.stage_timings[stage] = self.stage_timings.get(stage, 0) + duration
+            log.info(u'Import of %s: %s stage took %.3f seconds', context, stage, duration)
+
     def preflight(self):
         """
         Perform any pre-import sanity checks.
@@ -228,7 +281,8 @@ class ImportManager(object):
             # first pass to find everything in /static/
             import_static_content(
                 data_path, self.static_content_store,
-                dest_id, subpath='static', verbose=self.verbose
+                dest_id, subpath='static', verbose=self.verbose,
+                num_threads=self.asset_upload_threads,
             )
 
         elif self.verbose and not self.do_import_static:
@@ -251,9 +305,45 @@ class ImportManager(object):
         if os.path.exists(data_path / simport):
             import_static_content(
                 data_path, self.static_content_store,
-                dest_id, subpath=simport, verbose=self.verbose
+                dest_id, subpath=simport, verbose=self.verbose,
+                num_threads=self.asset_upload_threads,
             )
 
+    @contextmanager
+    def static_import_stage(self, data_path, dest_id):
+        """
+        Import all static items into the content store, as a timed stage.
+
+        If asset_upload_threads is more than 1, the import runs in the
+        background while the body of the with statement runs, as it doesn't
+        depend on the modules written to the modulestore meanwhile, and is
+        waited for on exit, which raises its error if any. Otherwise, the
+        import is done before running the body.
+        """
+        def import_static():
+            """
+            Import all static items as a timed stage.
+            """
+            with self.timed_stage('static', dest_id):
+                self.import_static(data_path, dest_id)
+
+        if self.asset_upload_threads <= 1:
+            import_static()
+            yield
+            return
+
+        stage_pool = ThreadPool(1)
+        static_import = stage_pool.apply_async(import_static)
+        stage_pool.close()
+        try:
+            yield
+        except Exception:
+            stage_pool.terminate()
+            raise
+        finally:
+            stage_pool.join()
+        static_import.get()
+
     def import_asset_metadata(self, data_dir, course_id):
         """
         Read in assets XML file, parse it, and add all asset metadata to the modulestore.
@@ -438,16 +528,18 @@ class ImportManager(object):
             # This bulk operation wraps all the operations to populate the published branch.
             with self.store.bulk_operations(dest_id):
                 # Retrieve the course itself.
-                source_courselike, courselike, data_path = self.get_courselike(courselike_key, runtime, dest_id)
-
-                # Import all static pieces.
-                self.import_static(data_path, dest_id)
+                with self.timed_stage('courselike', dest_id):
+                    source_courselike, courselike, data_path = self.get_courselike(courselike_key, runtime, dest_id)
 
-                # Import asset metadata stored in XML.
-                self.import_asset_metadata(data_path, dest_id)
+                # Import all static pieces, possibly while the modules are imported.
+                with self.static_import_stage(data_path, dest_id):
+                    # Import asset metadata stored in XML.
+                    with self.timed_stage('asset_metadata', dest_id):
+                        self.import_asset_metadata(data_path, dest_id)
 
-                # Import all children
-                self.import_children(source_courselike, courselike, courselike_key, dest_id)
+                    # Import all children
+                    with self.timed_stage('children', dest_id):
+                        self.import_children(source_courselike, courselike, courselike_key, dest_id)
 
             # This bulk operation wraps all the operations to populate the draft branch with any items
             # from the /drafts subdirectory.
@@ -456,7 +548,8 @@ class ImportManager(object):
             # and then publishing it.
             with self.store.bulk_operations(dest_id):
                 # Import all draft items into the courselike.
-                courselike = self.import_drafts(courselike, courselike_key, data_path, dest_id)
+                with self.timed_stage('drafts', dest_id):
+                    courselike = self.import_drafts(courselike, courselike_key, data_path, dest_id)
 
             yield courselike
 
@@ -53,6 +53,13 @@ class HtmlModuleSubstitutionTestCase(unittest.TestCase):
         module = HtmlModule(self.descriptor, module_system, field_data, Mock())
         self.assertEqual(module.get_html(), sample_xml)
 
+    def test_user_independent_student_view(self):
+        module_system = get_test_system()
+        module = HtmlModule(self.descriptor, module_system, DictFieldData({'data': '<p>Hi!</p>'}), Mock())
+        self.assertTrue(module.has_user_independent_student_view)
+        module = HtmlModule(self.descriptor, module_system, DictFieldData({'data': '<p>%%USER_ID%%</p>'}), Mock())
+        self.assertFalse(module.has_user_independent_student_view)
+
 
 class HtmlDescriptorIndexingTestCase(unittest.TestCase):
     """
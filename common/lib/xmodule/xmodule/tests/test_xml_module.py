@@ -222,6 +222,40 @@ class InheritingFieldDataTest(unittest.TestCase):
         child.parent = parent_block.location
         self.assertEqual(child.inherited, "child's default")
 
+    def get_block_with_inherited_settings(self, parent_type, defaults):
+        """
+        Construct an XBlock with split mongo kvs, whose inherited settings are
+        looked up in advance, as for the blocks of a saved structure.
+        """
+        kvs = SplitMongoKVS(
+            definition=Mock(),
+            initial_values={},
+            default_values=defaults,
+            parent=self.get_usage_id(parent_type, "parent"),
+            inherited_settings={'inherited': "parent's value"},
+        )
+        self.field_data = KvsFieldData(kvs)
+        return self.get_a_block(usage_id=self.get_usage_id("problem", "child"))
+
+    def test_inherited_settings(self):
+        """
+        Test that a block with inherited settings looked up in advance inherits
+        them rather than its defaults, as when walking its ancestors.
+        """
+        child = self.get_block_with_inherited_settings("vertical", defaults=dict(inherited="child's default"))
+        self.assertEqual(child.inherited, "parent's value")
+        self.assertEqual(child.not_inherited, "nothing")
+
+    def test_inherited_settings_across_lib(self):
+        """
+        Test that a child of a library_content block with inherited settings
+        looked up in advance keeps the fields in its defaults.
+        """
+        child = self.get_block_with_inherited_settings("library_content", defaults=dict(inherited="child's default"))
+        self.assertEqual(child.inherited, "child's default")
+        child = self.get_block_with_inherited_settings("library_content", defaults={})
+        self.assertEqual(child.inherited, "parent's value")
+
 
 class EditableMetadataFieldsTest(unittest.TestCase):
     def test_display_name_field(self):
@@ -282,6 +282,11 @@ class XModuleMixin(XModuleFields, XBlock):
     # all user state is handled through the FieldData API.
     show_in_read_only_mode = False
 
+    # Whether the student_view of this module renders the same fragment for all the users, so that
+    # the LMS may cache it per course version.  It is only safe to set this to True if the view
+    # reads no user state, nor anything else specific to the user, such as the anonymous_student_id.
+    has_user_independent_student_view = False
+
     # Class level variable
 
     # True if this descriptor always requires recalculation of grades, for
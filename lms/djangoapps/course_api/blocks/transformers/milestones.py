@@ -14,6 +14,7 @@ class MilestonesTransformer(FilteringTransformerMixin, BlockStructureTransformer
     Excludes all blocks with unfulfilled milestones from the student view.
     """
     VERSION = 1
+    COLLECT_IS_SUBTREE_LOCAL = True
 
     @classmethod
     def name(cls):
@@ -26,6 +26,7 @@ class HiddenContentTransformer(FilteringTransformerMixin, BlockStructureTransfor
     Staff users are exempted from hidden content rules.
     """
     VERSION = 1
+    COLLECT_IS_SUBTREE_LOCAL = True
     MERGED_DUE_DATE = 'merged_due_date'
     MERGED_HIDE_AFTER_DUE = 'merged_hide_after_due'
 
@@ -18,6 +18,7 @@ class ContentLibraryTransformer(FilteringTransformerMixin, BlockStructureTransfo
     Staff users are *not* exempted from library content pathways.
     """
     VERSION = 1
+    COLLECT_IS_SUBTREE_LOCAL = True
 
     @classmethod
     def name(cls):
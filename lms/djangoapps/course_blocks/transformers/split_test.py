@@ -20,6 +20,7 @@ class SplitTestTransformer(FilteringTransformerMixin, BlockStructureTransformer)
     'group_access' fields.
     """
     VERSION = 1
+    COLLECT_IS_SUBTREE_LOCAL = True
 
     @classmethod
     def name(cls):
@@ -63,7 +64,9 @@ class SplitTestTransformer(FilteringTransformerMixin, BlockStructureTransformer)
 
             # Set group access for each child using its group_access
             # field so the user partitions transformer enforces it.
-            for child_location in xblock.children:
+            # The children are those in the block structure, which may
+            # be a partial one when it is collected incrementally.
+            for child_location in block_structure.get_children(block_key):
                 child = block_structure.get_xblock(child_location)
                 group = child_to_group.get(child_location, None)
                 child.group_access[partition_for_this_block.id] = [group] if group is not None else []
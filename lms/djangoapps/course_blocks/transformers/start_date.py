@@ -25,6 +25,7 @@ class StartDateTransformer(FilteringTransformerMixin, BlockStructureTransformer)
     Staff users are exempted from visibility rules.
     """
     VERSION = 1
+    COLLECT_IS_SUBTREE_LOCAL = True
     MERGED_START_DATE = 'merged_start_date'
 
     @classmethod
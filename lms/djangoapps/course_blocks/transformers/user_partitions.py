@@ -17,6 +17,7 @@ class UserPartitionTransformer(FilteringTransformerMixin, BlockStructureTransfor
     Staff users are *not* exempted from user partition pathways.
     """
     VERSION = 1
+    COLLECT_IS_SUBTREE_LOCAL = True
 
     @classmethod
     def name(cls):
@@ -26,8 +26,14 @@ from xmodule.modulestore.inheritance import InheritanceMixin
 
 
 NOTSET = object()
+UNRESOLVED = object()
 ENABLED_OVERRIDE_PROVIDERS_KEY = u'courseware.field_overrides.enabled_providers.{course_id}'
 ENABLED_MODULESTORE_OVERRIDE_PROVIDERS_KEY = u'courseware.modulestore_field_overrides.enabled_providers.{course_id}'
+OVERRIDE_RESOLUTION_TABLES_KEY = u'courseware.field_overrides.resolution_tables'
+
+# The maximum number of override resolution tables kept by a request, which bounds their
+# memory in the tasks reading the blocks of many users in turn, such as grade reports.
+MAX_OVERRIDE_RESOLUTION_TABLES = 10
 
 
 def resolve_dotted(name):
@@ -49,15 +55,33 @@ def resolve_dotted(name):
     return target
 
 
-def _lineage(block):
+def _block_key(block):
+    """
+    Returns the key of the block in the override resolution tables: its usage
+    key, or the block itself if it has none.
+    """
+    scope_ids = getattr(block, 'scope_ids', None)
+    return block if scope_ids is None else scope_ids.usage_id
+
+
+def _strip_key(usage_key, course_key):
     """
-    Returns an iterator over all ancestors of the given block, starting with
-    its immediate parent and ending at the root of the block tree.
+    Maps the usage key into the course, as the keys of old Mongo courses
+    stored by the override providers lack their run, and strips its branch
+    and version, as the stored keys do.
     """
-    parent = block.get_parent()
-    while parent:
-        yield parent
-        parent = parent.get_parent()
+    usage_key = usage_key.map_into_course(course_key)
+    if hasattr(usage_key, 'version_agnostic') and hasattr(usage_key, 'for_branch'):
+        return usage_key.for_branch(None).version_agnostic()
+    return usage_key
+
+
+def clear_override_resolution_tables():
+    """
+    Discards the override resolution tables of the request, so that the
+    overrides are looked up anew after some are set or cleared.
+    """
+    RequestCache.get_request_cache().data.pop(OVERRIDE_RESOLUTION_TABLES_KEY, None)
 
 
 class _OverridesDisabled(threading.local):
@@ -130,6 +154,97 @@ class FieldOverrideProvider(object):
         """
         return False
 
+    def get_overridden_fields(self, course_key):
+        """
+        Look up at once which fields of which blocks of the course this
+        provider overrides, so that it is only asked for the overrides it has
+        rather than for every field of every block.
+
+        Returns a dict mapping the usage key of each block with overrides,
+        stripped of its branch and version, to the names of its overridden
+        fields; or None if the provider can't list them.  The overrides set or
+        cleared later on must call `clear_override_resolution_tables`.
+
+        Arguments:
+          course_key (CourseKey)
+        """
+        return None
+
+
+class OverrideResolutionTable(object):
+    """
+    The overrides of some providers for a user in a course, resolved once per
+    request: the providers are asked for the override of a field of a block
+    on its first lookup, and the lookups which follow are dict lookups.
+    """
+    def __init__(self, providers, course_key):
+        self.providers = providers
+        self.course_key = course_key
+        self._overridden_fields = None
+        self._overrides = {}
+        self._inherited_overrides = {}
+
+    def get_override(self, block, name):
+        """
+        Returns the override of the field named `name` in `block`, or NOTSET.
+        """
+        key = (_block_key(block), name)
+        value = self._overrides.get(key, UNRESOLVED)
+        if value is UNRESOLVED:
+            value = self._overrides[key] = self._resolve(block, name)
+        return value
+
+    def get_inherited_override(self, block, name):
+        """
+        Returns the override of the field named `name` in the nearest ancestor
+        of `block` which has one, or NOTSET.
+        """
+        key = (_block_key(block), name)
+        value = self._inherited_overrides.get(key, UNRESOLVED)
+        if value is UNRESOLVED:
+            value = NOTSET
+            parent = block.get_parent()
+            if parent:
+                value = self.get_override(parent, name)
+                if value is NOTSET:
+                    value = self.get_inherited_override(parent, name)
+            self._inherited_overrides[key] = value
+        return value
+
+    def _resolve(self, block, name):
+        """
+        Asks the providers for the override, in order, skipping those which
+        listed their overridden fields without this one.
+        """
+        if self._overridden_fields is None:
+            self._overridden_fields = tuple(
+                self._get_overridden_fields(provider) for provider in self.providers
+            )
+
+        block_key = NOTSET
+        for provider, overridden_fields in zip(self.providers, self._overridden_fields):
+            if overridden_fields is not None:
+                if block_key is NOTSET:
+                    block_key = _strip_key(block.location, self.course_key)
+                if name not in overridden_fields.get(block_key, ()):
+                    continue
+            value = provider.get(block, name, NOTSET)
+            if value is not NOTSET:
+                return value
+        return NOTSET
+
+    def _get_overridden_fields(self, provider):
+        """
+        Returns the overridden fields listed by the provider, keyed by their
+        stripped usage keys, or None if it can't list them.
+        """
+        if self.course_key is None:
+            return None
+        overridden_fields = provider.get_overridden_fields(self.course_key)
+        if overridden_fields is None:
+            return None
+        return {_strip_key(usage_key, self.course_key): fields for usage_key, fields in overridden_fields.iteritems()}
+
 
 class OverrideFieldData(FieldData):
     """
@@ -143,6 +258,9 @@ class OverrideFieldData(FieldData):
     is important for this setting.  Override providers will tried in the order
     configured in the setting.  The first provider to find an override 'wins'
     for a particular field lookup.
+
+    The overrides are resolved in the `OverrideResolutionTable` of the
+    request shared by the blocks of the user in the course.
     """
     provider_classes = None
 
@@ -167,7 +285,7 @@ class OverrideFieldData(FieldData):
             # to check for instance.providers after the instance is built. This
             # would allow for the case where we have registered providers but
             # none are enabled for the provided course
-            return cls(user, wrapped, enabled_providers)
+            return cls(user, wrapped, enabled_providers, course_key=course.id if course is not None else None)
 
         return wrapped
 
@@ -195,9 +313,25 @@ class OverrideFieldData(FieldData):
 
         return enabled_providers
 
-    def __init__(self, user, fallback, providers):
+    def __init__(self, user, fallback, providers, course_key=None):
         self.fallback = fallback
         self.providers = tuple(provider(user) for provider in providers)
+        self._resolution_table_key = (getattr(user, 'id', user), course_key, tuple(providers))
+
+    def _resolution_table(self):
+        """
+        Returns the override resolution table of the request for the user and
+        course of this field data.
+        """
+        tables = RequestCache.get_request_cache().data.setdefault(OVERRIDE_RESOLUTION_TABLES_KEY, {})
+        table = tables.get(self._resolution_table_key)
+        if table is None:
+            if len(tables) >= MAX_OVERRIDE_RESOLUTION_TABLES:
+                tables.clear()
+            table = tables[self._resolution_table_key] = OverrideResolutionTable(
+                self.providers, self._resolution_table_key[1]
+            )
+        return table
 
     def get_override(self, block, name):
         """
@@ -205,10 +339,7 @@ class OverrideFieldData(FieldData):
         Returns the overridden value or `NOTSET` if no override is found.
         """
         if not overrides_disabled():
-            for provider in self.providers:
-                value = provider.get(block, name, NOTSET)
-                if value is not NOTSET:
-                    return value
+            return self._resolution_table().get_override(block, name)
         return NOTSET
 
     def get(self, block, name):
@@ -228,15 +359,12 @@ class OverrideFieldData(FieldData):
             return self.fallback.has(block, name)
 
         has = self.get_override(block, name)
-        if has is NOTSET:
+        if has is NOTSET and name in InheritanceMixin.fields and not overrides_disabled():
             # If this is an inheritable field and an override is set above,
             # then we want to return False here, so the field_data uses the
             # override and not the original value for this block.
-            inheritable = InheritanceMixin.fields.keys()
-            if name in inheritable:
-                for ancestor in _lineage(block):
-                    if self.get_override(ancestor, name) is not NOTSET:
-                        return False
+            if self._resolution_table().get_inherited_override(block, name) is not NOTSET:
+                return False
 
         return has is not NOTSET or self.fallback.has(block, name)
 
@@ -246,13 +374,10 @@ class OverrideFieldData(FieldData):
     def default(self, block, name):
         # The `default` method is overloaded by the field storage system to
         # also handle inheritance.
-        if self.providers and not overrides_disabled():
-            inheritable = InheritanceMixin.fields.keys()
-            if name in inheritable:
-                for ancestor in _lineage(block):
-                    value = self.get_override(ancestor, name)
-                    if value is not NOTSET:
-                        return value
+        if self.providers and not overrides_disabled() and name in InheritanceMixin.fields:
+            value = self._resolution_table().get_inherited_override(block, name)
+            if value is not NOTSET:
+                return value
         return self.fallback.default(block, name)
 
 
@@ -277,7 +402,7 @@ class OverrideModulestoreFieldData(OverrideFieldData):
 
         enabled_providers = cls._providers_for_block(block)
         if enabled_providers:
-            return cls(field_data, enabled_providers)
+            return cls(field_data, enabled_providers, course_key=block.location.course_key)
 
         return field_data
 
@@ -305,5 +430,5 @@ class OverrideModulestoreFieldData(OverrideFieldData):
 
         return enabled_providers
 
-    def __init__(self, fallback, providers):
-        super(OverrideModulestoreFieldData, self).__init__(None, fallback, providers)
+    def __init__(self, fallback, providers, course_key=None):
+        super(OverrideModulestoreFieldData, self).__init__(None, fallback, providers, course_key=course_key)
@@ -21,10 +21,13 @@ UserInfoCache: A cache for Scope.user_info
 DjangoOrmFieldCache: A base-class for single-row-per-field caches.
 """
 
+import itertools
 import json
 from abc import abstractmethod, ABCMeta
 from collections import defaultdict, namedtuple
+from contextlib import contextmanager
 from .models import (
+    chunks,
     StudentModule,
     XModuleUserStateSummaryField,
     XModuleStudentPrefsField,
@@ -37,6 +40,7 @@ from opaque_keys.edx.asides import AsideUsageKeyV1, AsideUsageKeyV2
 from contracts import contract, new_contract
 
 from django.db import DatabaseError
+from request_cache.middleware import RequestCache
 
 from xblock.runtime import KeyValueStore
 from xblock.exceptions import KeyValueMultiSaveError, InvalidScopeError
@@ -48,6 +52,10 @@ from courseware.user_state_client import DjangoXBlockUserStateClient
 
 log = logging.getLogger(__name__)
 
+# The name of the RequestCache of the score writes deferred by
+# FieldDataCache.deferred_writes.
+DEFERRED_WRITES_CACHE_NAME = 'courseware.model_data.deferred_writes'
+
 
 class InvalidWriteError(Exception):
     """
@@ -87,6 +95,30 @@ def _all_block_types(descriptors, aside_types):
     return block_types
 
 
+def _get_descriptor_descendents(descriptor, depth, descriptor_filter):
+    """
+    Return a list of all child descriptors down to the specified depth
+    that match the descriptor filter. Includes `descriptor`
+
+    descriptor: The parent to search inside
+    depth: The number of levels to descend, or None for infinite depth
+    descriptor_filter(descriptor): A function that returns True
+        if descriptor should be included in the results
+    """
+    if descriptor_filter(descriptor):
+        descriptors = [descriptor]
+    else:
+        descriptors = []
+
+    if depth is None or depth > 0:
+        new_depth = depth - 1 if depth is not None else depth
+
+        for child in descriptor.get_children() + descriptor.get_required_module_descriptors():
+            descriptors.extend(_get_descriptor_descendents(child, new_depth, descriptor_filter))
+
+    return descriptors
+
+
 class DjangoKeyValueStore(KeyValueStore):
     """
     This KeyValueStore will read and write data in the following scopes to django models
@@ -355,6 +387,8 @@ class UserStateCache(object):
         self.course_id = course_id
         self.user = user
         self._client = DjangoXBlockUserStateClient(self.user)
+        # The writes deferred by deferred_writes_for_users, if any.
+        self._deferred_updates = None
 
     def cache_fields(self, fields, xblocks, aside_types):  # pylint: disable=unused-argument
         """
@@ -373,6 +407,75 @@ class UserStateCache(object):
         for user_state in block_field_state:
             self._cache[user_state.block_key] = user_state.state
 
+    @classmethod
+    def cache_fields_for_users(cls, caches, fields, xblocks, aside_types):  # pylint: disable=unused-argument
+        """
+        Load all fields specified by ``fields`` for the supplied ``xblocks``
+        and ``aside_types`` into each of the supplied caches, which each
+        belong to a different user, with queries shared by all of the users.
+
+        Arguments:
+            caches (list of :class:`UserStateCache`): Caches to load fields into.
+            fields (list of str): Field names to cache.
+            xblocks (list of :class:`XBlock`): XBlocks to cache fields for.
+            aside_types (list of str): Aside types to cache fields for.
+        """
+        if not caches:
+            return
+        caches_by_username = {cache.user.username: cache for cache in caches}
+        block_field_state = caches[0]._client.get_many_for_users(  # pylint: disable=protected-access
+            [cache.user for cache in caches],
+            _all_usage_keys(xblocks, aside_types),
+        )
+        for user_state in block_field_state:
+            cache = caches_by_username[user_state.username]
+            cache._cache[user_state.block_key] = user_state.state  # pylint: disable=protected-access
+
+    @classmethod
+    @contextmanager
+    def deferred_writes_for_users(cls, caches):
+        """
+        Defers the writes to each of the supplied caches, and those of the
+        scores passed to `set_score`, until the end of the context. When it
+        exits without an error, the state of all of their users is written
+        back in one pass, along with the scores, and the callbacks of the
+        scores are called. Otherwise, the deferred writes are discarded.
+
+        Arguments:
+            caches (list of :class:`UserStateCache`): Caches to defer the writes of.
+        """
+        deferred_writes = RequestCache.get_request_cache(DEFERRED_WRITES_CACHE_NAME)
+        deferred_writes['scores'] = {}
+        for cache in caches:
+            cache._deferred_updates = defaultdict(dict)  # pylint: disable=protected-access
+        try:
+            yield
+            # Every user is listed, so that the StudentModules of those with
+            # only a deferred score are loaded along with the others.
+            users_block_keys_to_state = defaultdict(dict)
+            for cache in caches:
+                deferred_updates = cache._deferred_updates  # pylint: disable=protected-access
+                users_block_keys_to_state[cache.user].update(deferred_updates)
+            deferred_scores = deferred_writes['scores']
+        finally:
+            deferred_writes.pop('scores', None)
+            for cache in caches:
+                cache._deferred_updates = None  # pylint: disable=protected-access
+
+        if not any(users_block_keys_to_state.itervalues()) and not deferred_scores:
+            return
+        try:
+            modified_times = caches[0]._client.set_many_for_users(  # pylint: disable=protected-access
+                users_block_keys_to_state,
+                scores={key: (score, max_score) for key, (score, max_score, __) in deferred_scores.iteritems()},
+            )
+        except DatabaseError:
+            log.exception("Saving user state and scores failed for %d users", len(users_block_keys_to_state))
+            raise KeyValueMultiSaveError([])
+        for key, (__, __, on_written) in deferred_scores.iteritems():
+            if on_written is not None:
+                on_written(modified_times[key])
+
     @contract(kvs_key=DjangoKeyValueStore.Key)
     def set(self, kvs_key, value):
         """
@@ -418,6 +521,12 @@ class UserStateCache(object):
 
             pending_updates[cache_key][kvs_key.field_name] = value
 
+        if self._deferred_updates is not None:
+            for cache_key, state in pending_updates.iteritems():
+                self._deferred_updates[cache_key].update(state)
+            self._cache.update(pending_updates)
+            return
+
         try:
             self._client.set_many(
                 self.user.username,
@@ -559,14 +668,61 @@ class UserStateSummaryCache(DjangoOrmFieldCache):
         return (key.block_scope_id, key.field_name)
 
 
-class PreferencesCache(DjangoOrmFieldCache):
+class UserDjangoOrmFieldCache(DjangoOrmFieldCache):
     """
-    Cache for Scope.preferences xblock field data.
+    Baseclass for the caches of user-scoped fields based on
+    single-row-per-field Django ORM objects, whose fields can be loaded
+    for many users at once.
     """
     def __init__(self, user):
-        super(PreferencesCache, self).__init__()
+        super(UserDjangoOrmFieldCache, self).__init__()
         self.user = user
 
+    @classmethod
+    def cache_fields_for_users(cls, caches, fields, xblocks, aside_types):
+        """
+        Load all fields specified by ``fields`` for the supplied ``xblocks``
+        and ``aside_types`` into each of the supplied caches, which each
+        belong to a different user, with queries shared by all of the users.
+
+        Arguments:
+            caches (list of :class:`UserDjangoOrmFieldCache`): Caches of this class to load fields into.
+            fields (list of str): Field names to cache.
+            xblocks (list of :class:`XBlock`): XBlocks to cache fields for.
+            aside_types (list of str): Aside types to cache fields for.
+        """
+        if not caches:
+            return
+        caches_by_user_id = {cache.user.id: cache for cache in caches}
+        field_objects = caches[0]._read_objects_for_users(  # pylint: disable=protected-access
+            caches_by_user_id.keys(), fields, xblocks, aside_types
+        )
+        for field_object in field_objects:
+            cache = caches_by_user_id[field_object.student_id]
+            cache_key = cache._cache_key_for_field_object(field_object)  # pylint: disable=protected-access
+            cache._cache[cache_key] = field_object  # pylint: disable=protected-access
+
+    @abstractmethod
+    def _read_objects_for_users(self, user_ids, fields, xblocks, aside_types):
+        """
+        Return an iterator for all objects stored in the underlying datastore
+        for the ``fields`` on the ``xblocks`` and the ``aside_types`` associated
+        with them, for all of the users identified by ``user_ids``.
+
+        Arguments:
+            user_ids (list of int): Ids of the users to return values for
+            fields (list of str): Field names to return values for
+            xblocks (list of :class:`~XBlock`): XBlocks to load fields for
+            aside_types (list of str): Asides to load field for (which annotate the supplied
+                xblocks).
+        """
+        raise NotImplementedError()
+
+
+class PreferencesCache(UserDjangoOrmFieldCache):
+    """
+    Cache for Scope.preferences xblock field data.
+    """
     def _create_object(self, kvs_key, value):
         """
         Create a new object to add to the cache (which should record
@@ -603,6 +759,23 @@ class PreferencesCache(DjangoOrmFieldCache):
             field_name__in=set(field.name for field in fields),
         )
 
+    def _read_objects_for_users(self, user_ids, fields, xblocks, aside_types):
+        """
+        Return an iterator for all objects stored in the underlying datastore
+        for the ``fields`` on the ``xblocks`` and the ``aside_types`` associated
+        with them, for all of the users identified by ``user_ids``.
+        """
+        block_types = _all_block_types(xblocks, aside_types)
+        return itertools.chain.from_iterable(
+            XModuleStudentPrefsField.objects.chunked_filter(
+                'module_type__in',
+                block_types,
+                student__in=user_ids_chunk,
+                field_name__in=set(field.name for field in fields),
+            )
+            for user_ids_chunk in chunks(user_ids, DjangoXBlockUserStateClient.USERS_PER_QUERY)
+        )
+
     def _cache_key_for_field_object(self, field_object):
         """
         Return the key used in this DjangoOrmFieldCache to store the specified field_object.
@@ -622,14 +795,10 @@ class PreferencesCache(DjangoOrmFieldCache):
         return (BlockTypeKeyV1(key.block_family, key.block_scope_id), key.field_name)
 
 
-class UserInfoCache(DjangoOrmFieldCache):
+class UserInfoCache(UserDjangoOrmFieldCache):
     """
     Cache for Scope.user_info xblock field data
     """
-    def __init__(self, user):
-        super(UserInfoCache, self).__init__()
-        self.user = user
-
     def _create_object(self, kvs_key, value):
         """
         Create a new object to add to the cache (which should record
@@ -663,6 +832,18 @@ class UserInfoCache(DjangoOrmFieldCache):
             field_name__in=set(field.name for field in fields),
         )
 
+    def _read_objects_for_users(self, user_ids, fields, xblocks, aside_types):
+        """
+        Return an iterator for all objects stored in the underlying datastore
+        for the ``fields`` on the ``xblocks`` and the ``aside_types`` associated
+        with them, for all of the users identified by ``user_ids``.
+        """
+        return XModuleStudentInfoField.objects.chunked_filter(
+            'student__in',
+            user_ids,
+            field_name__in=set(field.name for field in fields),
+        )
+
     def _cache_key_for_field_object(self, field_object):
         """
         Return the key used in this DjangoOrmFieldCache to store the specified field_object.
@@ -752,31 +933,8 @@ class FieldDataCache(object):
                 should be cached
         """
 
-        def get_child_descriptors(descriptor, depth, descriptor_filter):
-            """
-            Return a list of all child descriptors down to the specified depth
-            that match the descriptor filter. Includes `descriptor`
-
-            descriptor: The parent to search inside
-            depth: The number of levels to descend, or None for infinite depth
-            descriptor_filter(descriptor): A function that returns True
-                if descriptor should be included in the results
-            """
-            if descriptor_filter(descriptor):
-                descriptors = [descriptor]
-            else:
-                descriptors = []
-
-            if depth is None or depth > 0:
-                new_depth = depth - 1 if depth is not None else depth
-
-                for child in descriptor.get_children() + descriptor.get_required_module_descriptors():
-                    descriptors.extend(get_child_descriptors(child, new_depth, descriptor_filter))
-
-            return descriptors
-
         with modulestore().bulk_operations(descriptor.location.course_key):
-            descriptors = get_child_descriptors(descriptor, depth, descriptor_filter)
+            descriptors = _get_descriptor_descendents(descriptor, depth, descriptor_filter)
 
         self.add_descriptors_to_cache(descriptors)
 
@@ -798,6 +956,78 @@ class FieldDataCache(object):
         cache.add_descriptor_descendents(descriptor, depth, descriptor_filter)
         return cache
 
+    @classmethod
+    def cache_for_users(cls, descriptors, course_id, users, asides=None):
+        """
+        Return a dict, keyed by user id, of FieldDataCaches of `descriptors` for
+        each of `users`.
+
+        The user-scoped field data of all of the users is loaded with queries
+        that are each shared by many users, rather than with separate queries
+        for each user, and the course-wide field data is loaded only once and
+        shared by all of the returned caches. Reading the cached fields from
+        the returned caches then doesn't need any further queries.
+
+        Arguments:
+            descriptors: A list of XModuleDescriptors.
+            course_id: The id of the current course
+            users: The authenticated users for which to cache data
+            asides: The list of aside types to load, or None to prefetch no asides.
+        """
+        field_data_caches = {user.id: cls([], course_id, user, asides=asides) for user in users}
+        if not field_data_caches:
+            return field_data_caches
+
+        first_cache = next(field_data_caches.itervalues())
+        scorable_locations = set(desc.location for desc in descriptors if desc.has_score)
+        for field_data_cache in field_data_caches.itervalues():
+            field_data_cache.scorable_locations.update(scorable_locations)
+            field_data_cache.cache[Scope.user_state_summary] = first_cache.cache[Scope.user_state_summary]
+
+        for scope, fields in first_cache._fields_to_cache(descriptors).items():
+            if scope not in first_cache.cache:
+                continue
+
+            if scope.user == UserScope.ONE:
+                # The caches of the user-scoped fields load them for all of
+                # the users at once.
+                type(first_cache.cache[scope]).cache_fields_for_users(
+                    [field_data_cache.cache[scope] for field_data_cache in field_data_caches.itervalues()],
+                    fields,
+                    descriptors,
+                    first_cache.asides,
+                )
+            else:
+                first_cache.cache[scope].cache_fields(fields, descriptors, first_cache.asides)
+        return field_data_caches
+
+    @classmethod
+    def deferred_writes(cls, field_data_caches):
+        """
+        Returns a context manager deferring the writes of the Scope.user_state
+        fields of the supplied FieldDataCaches, and those of the scores passed
+        to `set_score`, until the end of the context. If it exits without an
+        error, the state of all of their users and the scores are written back
+        in one pass, within a single transaction.
+
+        Arguments:
+            field_data_caches: FieldDataCaches, as returned by cache_for_users.
+        """
+        return UserStateCache.deferred_writes_for_users(
+            [field_data_cache.cache[Scope.user_state] for field_data_cache in field_data_caches]
+        )
+
+    @classmethod
+    def cache_for_descriptor_descendents_for_users(cls, course_id, users, descriptor, depth=None,
+                                                   descriptor_filter=lambda descriptor: True, asides=None):
+        """
+        Like cache_for_descriptor_descendents, but returns a dict, keyed by user
+        id, of the FieldDataCaches of each of `users`, loaded as by cache_for_users.
+        """
+        with modulestore().bulk_operations(descriptor.location.course_key):
+            descriptors = _get_descriptor_descendents(descriptor, depth, descriptor_filter)
+        return cls.cache_for_users(descriptors, course_id, users, asides=asides)
+
     def _fields_to_cache(self, descriptors):
         """
         Returns a map of scopes to fields in that scope that should be cached
@@ -989,12 +1219,44 @@ class ScoresClient(object):
         client.fetch_scores(scorable_locations)
         return client
 
+    @classmethod
+    def create_for_users(cls, course_id, user_ids, scorable_locations):
+        """
+        Create ScoresClients, keyed by user id, with pre-fetched data for the
+        given users and locations, using a single query for all the users.
+        """
+        clients = {user_id: cls(course_id, user_id) for user_id in user_ids}
+        scores_qset = StudentModule.objects.filter(
+            student_id__in=user_ids,
+            course_id=course_id,
+            module_state_key__in=set(scorable_locations),
+        )
+        for user_id, location, correct, total in scores_qset.values_list(
+                'student_id', 'module_state_key', 'grade', 'max_grade'
+        ):
+            clients[user_id]._locations_to_scores[  # pylint: disable=protected-access
+                UsageKey.from_string(location).map_into_course(course_id)
+            ] = cls.Score(correct, total)
+        for client in clients.itervalues():
+            client._has_fetched = True  # pylint: disable=protected-access
+        return clients
+
 
 # @contract(user_id=int, usage_key=UsageKey, score="number|None", max_score="number|None")
-def set_score(user_id, usage_key, score, max_score):
+def set_score(user_id, usage_key, score, max_score, on_written=None):
     """
     Set the score and max_score for the specified user and xblock usage.
+
+    Returns the time the StudentModule was modified, and passes it to
+    `on_written`, if given. Within FieldDataCache.deferred_writes, the score
+    is only written, and `on_written` called, at the end of the context, and
+    None is returned.
     """
+    deferred_scores = RequestCache.get_request_cache(DEFERRED_WRITES_CACHE_NAME).get('scores')
+    if deferred_scores is not None:
+        deferred_scores[(user_id, usage_key)] = (score, max_score, on_written)
+        return None
+
     student_module, created = StudentModule.objects.get_or_create(
         student_id=user_id,
         module_state_key=usage_key,
@@ -1008,6 +1270,8 @@ def set_score(user_id, usage_key, score, max_score):
         student_module.grade = score
         student_module.max_grade = max_score
         student_module.save()
+    if on_written is not None:
+        on_written(student_module.modified)
     return student_module.modified
 
 
@@ -38,6 +38,22 @@ def chunks(items, chunk_size):
     return (items[i:i + chunk_size] for i in xrange(0, len(items), chunk_size))
 
 
+def iter_chunks(items, chunk_size):
+    """
+    Yields lists of up to chunk_size of the values from items, reading them
+    lazily so that only a single chunk is held in memory at a time. The
+    results of QuerySets are not cached as a whole either.
+    """
+    if isinstance(items, models.QuerySet):
+        items = items.iterator()
+    items = iter(items)
+    while True:
+        chunk = list(itertools.islice(items, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
 class ChunkingManager(models.Manager):
     """
     :class:`~Manager` that adds an additional method :meth:`chunked_filter` to provide
@@ -43,6 +43,7 @@ from courseware.masquerade import (
 )
 from courseware.model_data import DjangoKeyValueStore, FieldDataCache
 from edxmako.shortcuts import render_to_string
+from edxnotes.plugins import EdxNotesTab
 from lms.djangoapps.grades.signals.signals import SCORE_PUBLISHED
 from lms.djangoapps.lms_xblock.field_data import LmsFieldData
 from lms.djangoapps.lms_xblock.models import XBlockAsidesConfig
@@ -52,9 +53,7 @@ from openedx.core.djangoapps.bookmarks.services import BookmarksService
 from openedx.core.djangoapps.credit.services import CreditService
 from openedx.core.djangoapps.util.user_utils import SystemUser
 from openedx.core.lib.xblock_utils import (
-    replace_course_urls,
-    replace_jump_to_id_urls,
-    replace_static_urls,
+    replace_urls,
     add_staff_markup,
     wrap_xblock,
     request_token as xblock_request_token,
@@ -548,8 +547,12 @@ def get_module_system_for_user(user, student_data,  # TODO  # pylint: disable=to
     # to the Fragment content coming out of the xblocks that are about to be rendered.
     block_wrappers = []
 
+    # The fragments wrapped the same way for all the users may be cached, see LmsModuleSystem.render
+    cache_fragments = settings.FEATURES.get('ENABLE_XBLOCK_FRAGMENT_CACHE', False) and wrap_xmodule_display is True
+
     if is_masquerading_as_specific_student(user, course_id):
         block_wrappers.append(filter_displayed_blocks)
+        cache_fragments = False
 
     if settings.FEATURES.get("LICENSING", False):
         block_wrappers.append(wrap_with_license)
@@ -569,27 +572,20 @@ def get_module_system_for_user(user, student_data,  # TODO  # pylint: disable=to
     # prefix is going to have to be specific to the module, not the directory
     # that the xml was loaded from
 
-    # Rewrite urls beginning in /static to point to course-specific content
-    block_wrappers.append(partial(
-        replace_static_urls,
-        getattr(descriptor, 'data_dir', None),
-        course_id=course_id,
-        static_asset_path=static_asset_path or descriptor.static_asset_path
-    ))
-
-    # Allow URLs of the form '/course/' refer to the root of multicourse directory
-    #   hierarchy of this course
-    block_wrappers.append(partial(replace_course_urls, course_id))
-
-    # this will rewrite intra-courseware links (/jump_to_id/<id>). This format
-    # is an improvement over the /course/... format for studio authored courses,
+    # Rewrite urls beginning in /static to point to course-specific content,
+    # allow URLs of the form '/course/' to refer to the root of multicourse
+    # directory hierarchy of this course, and rewrite intra-courseware links
+    # (/jump_to_id/<id>), all in a single pass.  The jump_to_id format is an
+    # improvement over the /course/... format for studio authored courses,
     # because it is agnostic to course-hierarchy.
     # NOTE: module_id is empty string here. The 'module_id' will get assigned in the replacement
     # function, we just need to specify something to get the reverse() to work.
     block_wrappers.append(partial(
-        replace_jump_to_id_urls,
+        replace_urls,
         course_id,
         reverse('jump_to_id', kwargs={'course_id': course_id.to_deprecated_string(), 'module_id': ''}),
+        getattr(descriptor, 'data_dir', None),
+        static_asset_path=static_asset_path or descriptor.static_asset_path
     ))
 
     if settings.FEATURES.get('DISPLAY_DEBUG_INFO_TO_STAFF'):
@@ -610,6 +606,11 @@ def get_module_system_for_user(user, student_data,  # TODO  # pylint: disable=to
             instructor_access = bool(has_access(user, 'instructor', descriptor, course_id))
         if staff_access:
             block_wrappers.append(partial(add_staff_markup, user, instructor_access, disable_staff_debug_info))
+            cache_fragments = False
+
+    # The notes of edxnotes are wrapped around the html of the blocks for each user
+    if cache_fragments and EdxNotesTab.is_enabled(course or modulestore().get_course(course_id)):
+        cache_fragments = False
 
     # These modules store data using the anonymous_student_id as a key.
     # To prevent loss of data, we will continue to provide old modules with
@@ -685,6 +686,7 @@ def get_module_system_for_user(user, student_data,  # TODO  # pylint: disable=to
         rebind_noauth_module_to_user=rebind_noauth_module_to_user,
         user_location=user_location,
         request_token=request_token,
+        cache_fragments=cache_fragments,
     )
 
     # pass position specified in URL to module through ModuleSystem
@@ -876,10 +878,15 @@ def handle_xblock_callback(request, course_id, usage_id, handler, suffix=None):
         return _invoke_xblock_handler(request, course_id, usage_id, handler, suffix, course=course)
 
 
-def get_module_by_usage_id(request, course_id, usage_id, disable_staff_debug_info=False, course=None):
+def get_module_by_usage_id(request, course_id, usage_id, disable_staff_debug_info=False, course=None,
+                           prefetch_definitions=None):
     """
     Gets a module instance based on its `usage_id` in a course, for a given request/user
 
+    If `prefetch_definitions` is a collection of block types, all the descendants of
+    the module are loaded along with it, and the definitions of the descendants of
+    those types are fetched in batches rather than one at a time while rendering.
+
     Returns (instance, tracking_context)
     """
     user = request.user
@@ -891,7 +898,10 @@ def get_module_by_usage_id(request, course_id, usage_id, disable_staff_debug_inf
         raise Http404("Invalid location")
 
     try:
-        descriptor = modulestore().get_item(usage_key)
+        if prefetch_definitions:
+            descriptor = modulestore().get_item(usage_key, depth=None, prefetch_definitions=prefetch_definitions)
+        else:
+            descriptor = modulestore().get_item(usage_key)
         descriptor_orig_usage_key, descriptor_orig_version = modulestore().get_block_original_usage(usage_key)
     except ItemNotFoundError:
         log.warn(
@@ -4,7 +4,7 @@ by the individual due dates feature.
 """
 import json
 
-from .field_overrides import FieldOverrideProvider
+from .field_overrides import FieldOverrideProvider, clear_override_resolution_tables
 from .models import StudentFieldOverride
 
 
@@ -22,6 +22,21 @@ class IndividualStudentOverrideProvider(FieldOverrideProvider):
         """This simple override provider is always enabled"""
         return True
 
+    def get_overridden_fields(self, course_key):
+        """
+        Looks up the overridden fields of the user in the course in a single query.
+        """
+        overridden_fields = {}
+        query = StudentFieldOverride.objects.filter(
+            course_id=course_key,
+            student_id=self.user.id,
+        ).only('location', 'field')
+        for override in query:
+            # The locations of old Mongo courses are stored without their run.
+            location = override.location.map_into_course(course_key)
+            overridden_fields.setdefault(location, set()).add(override.field)
+        return overridden_fields
+
 
 def get_override_for_user(user, block, name, default=None):
     """
@@ -70,6 +85,7 @@ def override_field_for_user(user, block, name, value):
     field = block.fields[name]
     override.value = json.dumps(field.to_json(value))
     override.save()
+    clear_override_resolution_tables()
 
 
 def clear_override_for_user(user, block, name):
@@ -87,3 +103,4 @@ def clear_override_for_user(user, block, name):
             field=name).delete()
     except StudentFieldOverride.DoesNotExist:
         pass
+    clear_override_resolution_tables()
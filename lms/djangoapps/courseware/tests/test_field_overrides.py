@@ -3,20 +3,32 @@ Tests for `field_overrides` module.
 """
 # pylint: disable=missing-docstring
 import unittest
+from datetime import datetime
+
+import ddt
+from mock import Mock
 from nose.plugins.attrib import attr
 
 from django.test.utils import override_settings
+from opaque_keys.edx.locator import CourseLocator
+from pytz import UTC
+from request_cache.middleware import RequestCache
+from student.tests.factories import UserFactory
 from xblock.field_data import DictFieldData
-from xmodule.modulestore.tests.factories import CourseFactory
-from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase, SharedModuleStoreTestCase
 
 from ..field_overrides import (
     resolve_dotted,
+    clear_override_resolution_tables,
+    NOTSET,
     disable_overrides,
     FieldOverrideProvider,
     OverrideFieldData,
     OverrideModulestoreFieldData,
 )
+from ..student_field_overrides import override_field_for_user
 from ..testutils import FieldOverrideTestMixin
 
 
@@ -142,6 +154,132 @@ class OverrideModulestoreFieldDataTests(FieldOverrideTestMixin, OverrideFieldDat
         self.assertIsInstance(data, DictFieldData)
 
 
+class CountingOverrideProvider(FieldOverrideProvider):
+    """
+    An override provider of the due dates of the blocks in `OVERRIDES`, which
+    counts its lookups.
+    """
+    OVERRIDES = {}
+    LISTS_OVERRIDDEN_FIELDS = False
+    lookups = []
+
+    def get(self, block, name, default):
+        self.lookups.append((block.location, name))
+        return self.OVERRIDES.get((block.location, name), default)
+
+    def get_overridden_fields(self, course_key):
+        if not self.LISTS_OVERRIDDEN_FIELDS:
+            return None
+        overridden_fields = {}
+        for location, name in self.OVERRIDES:
+            overridden_fields.setdefault(location, set()).add(name)
+        return overridden_fields
+
+    @classmethod
+    def enabled_for(cls, course):
+        return True
+
+
+@attr(shard=1)
+class OverrideResolutionTableTests(unittest.TestCase):
+    """
+    Tests of the resolution of the overrides of `OverrideFieldData` in the
+    tables shared by a request.
+    """
+    def setUp(self):
+        super(OverrideResolutionTableTests, self).setUp()
+        RequestCache.clear_request_cache()
+        self.addCleanup(RequestCache.clear_request_cache)
+
+        self.course_key = CourseLocator('edX', 'test', 'run')
+        self.chapter = self.make_block('chapter', None)
+        self.sequential = self.make_block('sequential', self.chapter)
+        self.problem = self.make_block('problem', self.sequential)
+
+        CountingOverrideProvider.OVERRIDES = {(self.sequential.location, 'due'): 'tomorrow'}
+        CountingOverrideProvider.LISTS_OVERRIDDEN_FIELDS = False
+        CountingOverrideProvider.lookups = []
+
+    def make_block(self, block_type, parent):
+        """
+        Returns a block of the course, child of `parent`.
+        """
+        location = self.course_key.make_usage_key(block_type, block_type)
+        return Mock(location=location, scope_ids=Mock(usage_id=location), get_parent=Mock(return_value=parent))
+
+    def make_one(self, user=TESTUSER):
+        """
+        Returns an `OverrideFieldData` with the counting provider.
+        """
+        fallback = Mock(has=Mock(return_value=False), default=Mock(return_value=None))
+        return OverrideFieldData(user, fallback, [CountingOverrideProvider], course_key=self.course_key)
+
+    def test_shared_by_request(self):
+        for data in (self.make_one(), self.make_one()):
+            self.assertEqual(data.get_override(self.sequential, 'due'), 'tomorrow')
+            self.assertEqual(data.default(self.problem, 'due'), 'tomorrow')
+            self.assertFalse(data.has(self.problem, 'due'))
+        self.assertEqual(
+            sorted(CountingOverrideProvider.lookups),
+            sorted([(self.sequential.location, 'due'), (self.problem.location, 'due')]),
+        )
+
+        # Another user has its own table.
+        self.make_one(user='otheruser').get_override(self.sequential, 'due')
+        self.assertEqual(len(CountingOverrideProvider.lookups), 3)
+
+    def test_listed_overridden_fields(self):
+        CountingOverrideProvider.LISTS_OVERRIDDEN_FIELDS = True
+        data = self.make_one()
+        self.assertEqual(data.default(self.problem, 'due'), 'tomorrow')
+        self.assertEqual(data.default(self.problem, 'start'), None)
+        self.assertEqual(CountingOverrideProvider.lookups, [(self.sequential.location, 'due')])
+
+    def test_clear_override_resolution_tables(self):
+        data = self.make_one()
+        self.assertEqual(data.get_override(self.sequential, 'due'), 'tomorrow')
+
+        CountingOverrideProvider.OVERRIDES = {}
+        self.assertEqual(data.get_override(self.sequential, 'due'), 'tomorrow')
+        clear_override_resolution_tables()
+        self.assertIs(data.get_override(self.sequential, 'due'), NOTSET)
+        self.assertEqual(data.default(self.problem, 'due'), None)
+
+    def test_disable_overrides(self):
+        data = self.make_one()
+        with disable_overrides():
+            self.assertEqual(data.default(self.problem, 'due'), None)
+        self.assertEqual(CountingOverrideProvider.lookups, [])
+
+
+@attr(shard=1)
+@ddt.ddt
+@override_settings(FIELD_OVERRIDE_PROVIDERS=(
+    'courseware.student_field_overrides.IndividualStudentOverrideProvider',))
+class IndividualStudentOverrideResolutionTests(ModuleStoreTestCase):
+    """
+    Tests of the resolution of the individual due dates stored for a student.
+    """
+    def setUp(self):
+        super(IndividualStudentOverrideResolutionTests, self).setUp()
+        RequestCache.clear_request_cache()
+        self.addCleanup(RequestCache.clear_request_cache)
+        OverrideFieldData.provider_classes = None
+        self.addCleanup(setattr, OverrideFieldData, 'provider_classes', None)
+        self.user = UserFactory.create()
+
+    @ddt.data(ModuleStoreEnum.Type.mongo, ModuleStoreEnum.Type.split)
+    def test_stored_override(self, default_store):
+        course = CourseFactory.create(default_store=default_store)
+        chapter = ItemFactory.create(parent=course, category='chapter')
+        chapter = self.store.get_item(chapter.location)
+        due = datetime(2016, 1, 1, tzinfo=UTC)
+        override_field_for_user(self.user, chapter, 'due', due)
+
+        data = OverrideFieldData.wrap(self.user, course, chapter._field_data)  # pylint: disable=protected-access
+        self.assertEqual(data.get(chapter, 'due'), due)
+
+
 @attr(shard=1)
 class ResolveDottedTests(unittest.TestCase):
     """
@@ -6,7 +6,7 @@ from mock import Mock, patch
 from nose.plugins.attrib import attr
 from functools import partial
 
-from courseware.model_data import DjangoKeyValueStore, FieldDataCache, InvalidScopeError
+from courseware.model_data import DjangoKeyValueStore, FieldDataCache, InvalidScopeError, set_score
 from courseware.models import StudentModule, XModuleUserStateSummaryField
 from courseware.models import XModuleStudentInfoField, XModuleStudentPrefsField
 
@@ -18,8 +18,10 @@ from courseware.tests.factories import StudentPrefsFactory, StudentInfoFactory
 from xblock.fields import Scope, BlockScope, ScopeIds
 from xblock.exceptions import KeyValueMultiSaveError
 from xblock.core import XBlock
+from django.contrib.auth.models import User
 from django.test import TestCase
-from django.db import DatabaseError
+from django.db import DatabaseError, connection
+from django.test.utils import CaptureQueriesContext
 
 
 def mock_field(scope, name):
@@ -283,6 +285,134 @@ class TestMissingStudentModule(TestCase):
             self.assertFalse(self.kvs.has(user_state_key('a_field')))
 
 
+@attr(shard=1)
+class TestFieldDataCacheForUsers(TestCase):
+    """
+    Tests for loading the FieldDataCaches of many users at once.
+    """
+    num_users = 1000
+
+    def setUp(self):
+        super(TestFieldDataCacheForUsers, self).setUp()
+        User.objects.bulk_create([
+            User(username='user{}'.format(index), email='user{}@example.com'.format(index))
+            for index in xrange(self.num_users)
+        ])
+        self.users = list(User.objects.order_by('id'))
+        # Leave the last user without any state.
+        StudentModule.objects.bulk_create([
+            StudentModule(
+                student=user,
+                course_id=course_id,
+                module_state_key=location('usage_id'),
+                module_type='problem',
+                state=json.dumps({'a_field': user.username}),
+            )
+            for user in self.users[:-1]
+        ])
+        self.mock_descriptor = mock_descriptor([
+            mock_field(Scope.user_state, 'a_field'),
+            mock_field(Scope.preferences, 'a_pref'),
+            mock_field(Scope.user_info, 'an_info'),
+            mock_field(Scope.user_state_summary, 'a_summary'),
+        ])
+
+    def test_cache_for_users(self):
+        # 3 queries for the user state and preferences of 400 users at a time,
+        # 2 for the user info of 500 users at a time, and 1 for the user state summary.
+        with self.assertNumQueries(9):
+            field_data_caches = FieldDataCache.cache_for_users([self.mock_descriptor], course_id, self.users)
+        self.assertEqual(len(field_data_caches), self.num_users)
+
+        with self.assertNumQueries(0):
+            for user in self.users[:-1]:
+                kvs = DjangoKeyValueStore(field_data_caches[user.id])
+                key = DjangoKeyValueStore.Key(Scope.user_state, user.id, location('usage_id'), 'a_field')
+                self.assertEqual(kvs.get(key), user.username)
+                self.assertFalse(kvs.has(DjangoKeyValueStore.Key(Scope.preferences, user.id, 'mock_problem', 'a_pref')))
+
+            last_user = self.users[-1]
+            kvs = DjangoKeyValueStore(field_data_caches[last_user.id])
+            key = DjangoKeyValueStore.Key(Scope.user_state, last_user.id, location('usage_id'), 'a_field')
+            self.assertRaises(KeyError, kvs.get, key)
+
+    def test_cache_matches_single_user_cache(self):
+        user = self.users[0]
+        StudentPrefsFactory.create(student=user, field_name='a_pref', value=json.dumps('pref_value'))
+        StudentInfoFactory.create(student=user, field_name='an_info', value=json.dumps('info_value'))
+        single_user_cache = FieldDataCache([self.mock_descriptor], course_id, user)
+        multi_user_cache = FieldDataCache.cache_for_users([self.mock_descriptor], course_id, self.users[:2])[user.id]
+
+        for key in (
+                DjangoKeyValueStore.Key(Scope.user_state, user.id, location('usage_id'), 'a_field'),
+                DjangoKeyValueStore.Key(Scope.preferences, user.id, 'mock_problem', 'a_pref'),
+                DjangoKeyValueStore.Key(Scope.user_info, user.id, None, 'an_info'),
+        ):
+            self.assertEqual(multi_user_cache.get(key), single_user_cache.get(key))
+
+    def test_cache_for_no_users(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(FieldDataCache.cache_for_users([self.mock_descriptor], course_id, []), {})
+
+    def set_states_and_scores(self, field_data_caches, on_written=None):
+        """
+        Sets the state and score of the problem of every user.
+        """
+        for index, user in enumerate(self.users):
+            kvs = DjangoKeyValueStore(field_data_caches[user.id])
+            key = DjangoKeyValueStore.Key(Scope.user_state, user.id, location('usage_id'), 'a_field')
+            kvs.set(key, 'new_' + user.username)
+            self.assertEqual(kvs.get(key), 'new_' + user.username)
+            set_score(user.id, location('usage_id'), index % 4, 4, on_written=on_written)
+
+    def test_deferred_writes(self):
+        field_data_caches = FieldDataCache.cache_for_users([self.mock_descriptor], course_id, self.users)
+        on_written = Mock()
+
+        with CaptureQueriesContext(connection) as captured_queries:
+            with FieldDataCache.deferred_writes(field_data_caches.values()):
+                with self.assertNumQueries(0):
+                    self.set_states_and_scores(field_data_caches, on_written)
+                self.assertFalse(on_written.called)
+
+        # The states and scores of the 999 existing StudentModules are written
+        # by UPDATEs of up to 200 StudentModules each.
+        updates = [query for query in captured_queries if 'UPDATE' in query['sql']]
+        self.assertEqual(len(updates), 5)
+
+        student_modules = StudentModule.objects.filter(module_state_key=location('usage_id')).select_related('student')
+        self.assertEqual(len(student_modules), self.num_users)
+        for student_module in student_modules:
+            self.assertEqual(json.loads(student_module.state), {'a_field': 'new_' + student_module.student.username})
+            self.assertEqual(student_module.grade, self.users.index(student_module.student) % 4)
+            self.assertEqual(student_module.max_grade, 4)
+
+        # The score callbacks get the time their StudentModules were modified.
+        self.assertEqual(
+            sorted(call[0][0] for call in on_written.call_args_list),
+            sorted(student_module.modified for student_module in student_modules),
+        )
+
+    def test_deferred_writes_failure(self):
+        field_data_caches = FieldDataCache.cache_for_users([self.mock_descriptor], course_id, self.users)
+
+        with self.assertRaisesRegexp(ValueError, 'rescoring failed'):
+            with FieldDataCache.deferred_writes(field_data_caches.values()):
+                self.set_states_and_scores(field_data_caches)
+                raise ValueError('rescoring failed')
+
+        # Neither the states nor the scores were written.
+        student_modules = StudentModule.objects.filter(module_state_key=location('usage_id'))
+        self.assertEqual(len(student_modules), self.num_users - 1)
+        for student_module in student_modules:
+            self.assertFalse(json.loads(student_module.state)['a_field'].startswith('new_'))
+            self.assertIsNone(student_module.grade)
+
+        # The writes are no longer deferred.
+        set_score(self.users[0].id, location('usage_id'), 1, 4)
+        self.assertEqual(StudentModule.objects.get(student=self.users[0]).grade, 1)
+
+
 @attr(shard=1)
 class StorageTestBase(object):
     """
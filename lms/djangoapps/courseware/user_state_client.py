@@ -16,9 +16,12 @@ import newrelic_custom_metrics
 import dogstats_wrapper as dog_stats_api
 from django.contrib.auth.models import User
 from django.db import transaction
+from django.db.models import Case, F, FloatField, TextField, Value, When
+from django.db.models.signals import post_save
 from django.db.utils import IntegrityError
+from django.utils import timezone
 from xblock.fields import Scope
-from courseware.models import StudentModule, BaseStudentModuleHistory
+from courseware.models import StudentModule, BaseStudentModuleHistory, chunks
 from edx_user_state_client.interface import XBlockUserStateClient, XBlockUserState
 
 log = logging.getLogger(__name__)
@@ -47,6 +50,15 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
     # Use this sample rate for DataDog events.
     API_DATADOG_SAMPLE_RATE = 0.1
 
+    # Maximum number of users whose state is loaded by a single query. Together
+    # with the 500 block keys of a chunked_filter, this stays below sqlite's
+    # limit of 999 parameters per query.
+    USERS_PER_QUERY = 400
+
+    # Maximum number of StudentModules whose state is written by a single UPDATE
+    # in set_many_for_users, which takes two parameters per StudentModule.
+    MODULES_PER_UPDATE = 200
+
     class ServiceUnavailable(XBlockUserStateClient.ServiceUnavailable):
         """
         This error is raised if the service backing this client is currently unavailable.
@@ -100,6 +112,35 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
                 usage_key = student_module.module_state_key.map_into_course(student_module.course_id)
                 yield (student_module, usage_key)
 
+    def _get_student_modules_for_users(self, users, block_keys):
+        """
+        Retrieve the :class:`~StudentModule`s for the supplied ``users`` and ``block_keys``,
+        loading those of up to USERS_PER_QUERY users with each query.
+
+        Arguments:
+            users (list of :class:`~User`): The users to load `StudentModule`s for.
+            block_keys (list of :class:`~UsageKey`): The set of XBlocks to load data for.
+        """
+        course_key_func = attrgetter('course_key')
+        by_course = itertools.groupby(
+            sorted(block_keys, key=course_key_func),
+            course_key_func,
+        )
+
+        for course_key, usage_keys in by_course:
+            usage_keys = list(usage_keys)
+            for user_ids in chunks([user.id for user in users], self.USERS_PER_QUERY):
+                query = StudentModule.objects.chunked_filter(
+                    'module_state_key__in',
+                    usage_keys,
+                    student_id__in=user_ids,
+                    course_id=course_key,
+                )
+
+                for student_module in query:
+                    usage_key = student_module.module_state_key.map_into_course(student_module.course_id)
+                    yield (student_module, usage_key)
+
     def _ddog_increment(self, evt_time, evt_name):
         """
         DataDog increment method.
@@ -183,20 +224,66 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         if scope != Scope.user_state:
             raise ValueError("Only Scope.user_state is supported, not {}".format(scope))
 
+        modules = (
+            (module, usage_key, username)
+            for module, usage_key in self._get_student_modules(username, block_keys)
+        )
+        for user_state in self._get_user_states('get_many', modules, len(block_keys), scope, fields):
+            yield user_state
+
+    def get_many_for_users(self, users, block_keys, scope=Scope.user_state, fields=None):
+        """
+        Retrieve the stored XBlock state of several users for the specified XBlock
+        usages, with queries that each load the state of many users.
+
+        Arguments:
+            users ([User]): The users whose state should be retrieved
+            block_keys ([UsageKey]): A list of UsageKeys identifying which xblock states to load.
+            scope (Scope): The scope to load data from
+            fields: A list of field values to retrieve. If None, retrieve all stored fields.
+
+        Yields:
+            XBlockUserState tuples for each of the users and each specified UsageKey
+            in block_keys. field_state is a dict mapping field names to values.
+        """
+        if scope != Scope.user_state:
+            raise ValueError("Only Scope.user_state is supported, not {}".format(scope))
+
+        usernames = {user.id: user.username for user in users}
+        modules = (
+            (module, usage_key, usernames[module.student_id])
+            for module, usage_key in self._get_student_modules_for_users(users, block_keys)
+        )
+        for user_state in self._get_user_states(
+                'get_many_for_users', modules, len(block_keys) * len(users), scope, fields
+        ):
+            yield user_state
+
+    def _get_user_states(self, function_name, modules, num_blocks_requested, scope, fields):
+        """
+        Yields the XBlockUserState tuples of the given StudentModules, while
+        recording metrics for the calls of the named function.
+
+        Arguments:
+            function_name (str): The name of the calling function, for metrics.
+            modules: An iterable of (StudentModule, UsageKey, username) tuples.
+            num_blocks_requested (int): The number of requested xblock states.
+            scope (Scope): The scope the data is loaded from
+            fields: A list of field values to retrieve. If None, retrieve all stored fields.
+        """
         total_block_count = 0
         evt_time = time()
 
         # count how many times this function gets called
-        self._nr_stat_increment('get_many', 'calls')
+        self._nr_stat_increment(function_name, 'calls')
 
         # keep track of blocks requested
-        self._ddog_histogram(evt_time, 'get_many.blks_requested', len(block_keys))
-        self._nr_stat_accumulate('get_many', 'blocks_requested', len(block_keys))
+        self._ddog_histogram(evt_time, function_name + '.blks_requested', num_blocks_requested)
+        self._nr_stat_accumulate(function_name, 'blocks_requested', num_blocks_requested)
 
-        modules = self._get_student_modules(username, block_keys)
-        for module, usage_key in modules:
+        for module, usage_key, username in modules:
             if module.state is None:
-                self._ddog_increment(evt_time, 'get_many.empty_state')
+                self._ddog_increment(evt_time, function_name + '.empty_state')
                 continue
 
             state = json.loads(module.state)
@@ -204,7 +291,7 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
 
             # record this metric before the check for empty state, so that we
             # have some visibility into empty blocks.
-            self._ddog_histogram(evt_time, 'get_many.block_size', state_length)
+            self._ddog_histogram(evt_time, function_name + '.block_size', state_length)
 
             # If the state is the empty dict, then it has been deleted, and so
             # conformant UserStateClients should treat it as if it doesn't exist.
@@ -212,8 +299,8 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
                 continue
 
             # collect statistics for metric reporting
-            self._nr_block_stat_increment('get_many', usage_key.block_type, 'blocks_out')
-            self._nr_block_stat_accumulate('get_many', usage_key.block_type, 'size', state_length)
+            self._nr_block_stat_increment(function_name, usage_key.block_type, 'blocks_out')
+            self._nr_block_stat_accumulate(function_name, usage_key.block_type, 'size', state_length)
             total_block_count += 1
 
             # filter state on fields
@@ -229,9 +316,9 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         finish_time = time()
         duration = (finish_time - evt_time) * 1000  # milliseconds
 
-        self._ddog_histogram(evt_time, 'get_many.blks_out', total_block_count)
-        self._ddog_histogram(evt_time, 'get_many.response_time', duration)
-        self._nr_stat_accumulate('get_many', 'duration', duration)
+        self._ddog_histogram(evt_time, function_name + '.blks_out', total_block_count)
+        self._ddog_histogram(evt_time, function_name + '.response_time', duration)
+        self._nr_stat_accumulate(function_name, 'duration', duration)
 
     def set_many(self, username, block_keys_to_state, scope=Scope.user_state):
         """
@@ -334,6 +421,124 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         self._ddog_histogram(evt_time, 'set_many.response_time', duration)
         self._nr_stat_accumulate('set_many', 'duration', duration)
 
+    def set_many_for_users(self, users_block_keys_to_state, scores=None, scope=Scope.user_state):
+        """
+        Set fields for the XBlocks of several users, writing the state of all
+        of them back in one pass, within a single transaction, along with
+        the scores of their StudentModules.
+
+        The stored states are loaded with the queries of get_many_for_users,
+        and those of up to MODULES_PER_UPDATE StudentModules are written with
+        each UPDATE.
+
+        Arguments:
+            users_block_keys_to_state (dict): A dict mapping Users to dicts
+                mapping UsageKeys to state dicts. Each state dict maps field
+                names to values, and is overlaid over the stored state, as
+                with :meth:`set_many`.
+            scores (dict): A dict mapping (user id, UsageKey) tuples to the
+                (score, max score) tuples to write to their StudentModules.
+            scope (Scope): The scope to load data from
+
+        Returns:
+            A dict mapping the (user id, UsageKey) tuples of the written
+            StudentModules to the time they were modified.
+        """
+        if scope != Scope.user_state:
+            raise ValueError("Only Scope.user_state is supported")
+
+        # count how many times this function gets called
+        self._nr_stat_increment('set_many_for_users', 'calls')
+
+        evt_time = time()
+        scores = scores or {}
+        users_by_id = {user.id: user for user in users_block_keys_to_state if not user.is_anonymous()}
+        pending_states = {
+            (user_id, block_key): state
+            for user_id, user in users_by_id.iteritems()
+            for block_key, state in users_block_keys_to_state[user].iteritems()
+        }
+        pending_keys = set(pending_states) | set(scores)
+        block_keys = {block_key for __, block_key in pending_keys}
+
+        def update_module(student_module, key):
+            """
+            Overlays the pending state and score of `key` over the StudentModule.
+            """
+            if key in pending_states:
+                current_state = json.loads(student_module.state) if student_module.state else {}
+                current_state.update(pending_states[key])
+                student_module.state = json.dumps(current_state)
+            if key in scores:
+                student_module.grade, student_module.max_grade = scores[key]
+
+        with transaction.atomic():
+            updated_modules = {}
+            for student_module, usage_key in self._get_student_modules_for_users(users_by_id.values(), block_keys):
+                key = (student_module.student_id, usage_key)
+                if key in pending_keys:
+                    pending_keys.remove(key)
+                    update_module(student_module, key)
+                    updated_modules[key] = student_module
+
+            modified_times = {}
+            for key in pending_keys:
+                user_id, usage_key = key
+                defaults = {'module_type': usage_key.block_type}
+                if key in pending_states:
+                    defaults['state'] = json.dumps(pending_states[key])
+                if key in scores:
+                    defaults['grade'], defaults['max_grade'] = scores[key]
+                student_module, created = StudentModule.objects.get_or_create(
+                    student_id=user_id,
+                    course_id=usage_key.course_key,
+                    module_state_key=usage_key,
+                    defaults=defaults,
+                )
+                if created:
+                    modified_times[key] = student_module.modified
+                else:
+                    update_module(student_module, key)
+                    updated_modules[key] = student_module
+
+            modified = timezone.now()
+            for module_batch in chunks(updated_modules.items(), self.MODULES_PER_UPDATE):
+                fields = {'modified': modified}
+                for name, output_field, keys in (
+                        ('state', TextField(), pending_states),
+                        ('grade', FloatField(), scores),
+                        ('max_grade', FloatField(), scores),
+                ):
+                    whens = [
+                        When(pk=student_module.pk, then=Value(getattr(student_module, name)))
+                        for key, student_module in module_batch if key in keys
+                    ]
+                    if whens:
+                        fields[name] = Case(*whens, default=F(name), output_field=output_field)
+                StudentModule.objects.filter(
+                    pk__in=[student_module.pk for __, student_module in module_batch]
+                ).update(**fields)
+
+            # The history of the StudentModules is recorded by receivers of
+            # post_save, which QuerySet.update doesn't send.
+            for key, student_module in updated_modules.iteritems():
+                student_module.modified = modified_times[key] = modified
+                post_save.send(
+                    sender=StudentModule,
+                    instance=student_module,
+                    created=False,
+                    update_fields=None,
+                    raw=False,
+                    using=student_module._state.db,  # pylint: disable=protected-access
+                )
+
+        # Events for the entire set_many_for_users call.
+        duration = (time() - evt_time) * 1000  # milliseconds
+        self._ddog_histogram(evt_time, 'set_many_for_users.blks_updated', len(modified_times))
+        self._ddog_histogram(evt_time, 'set_many_for_users.response_time', duration)
+        self._nr_stat_accumulate('set_many_for_users', 'duration', duration)
+        return modified_times
+
     def delete_many(self, username, block_keys, scope=Scope.user_state, fields=None):
         """
         Delete the stored XBlock state for a many xblock usages.
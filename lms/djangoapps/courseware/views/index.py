@@ -347,8 +347,13 @@ class CoursewareIndex(View):
         Prefetches all descendant data for the requested section and
         sets up the runtime, which binds the request user to the section.
         """
-        # Pre-fetch all descendant data
-        self.section = modulestore().get_item(self.section.location, depth=None, lazy=False)
+        # Pre-fetch all descendant data, with the definitions of the blocks of the
+        # prefetched types loaded in batches rather than one at a time while rendering
+        self.section = modulestore().get_item(
+            self.section.location,
+            depth=None,
+            prefetch_definitions=settings.RENDER_XBLOCK_PREFETCH_DEFINITION_TYPES,
+        )
         self.field_data_cache.add_descriptor_descendents(self.section, depth=None)
 
         # Bind section to user
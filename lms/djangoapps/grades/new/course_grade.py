@@ -10,12 +10,14 @@ from django.core.exceptions import PermissionDenied
 import dogstats_wrapper as dog_stats_api
 from lazy import lazy
 
+from courseware.models import iter_chunks
 from lms.djangoapps.course_blocks.api import get_course_blocks
 from lms.djangoapps.grades.config.models import PersistentGradesEnabledFlag
 from openedx.core.djangoapps.signals.signals import COURSE_GRADE_CHANGED
 from xmodule import block_metadata_utils
 
 from ..models import PersistentCourseGrade
+from .course_grade_batch import CourseGradeBatch
 from .subsection_grade import SubsectionGradeFactory
 from ..transformer import GradesTransformer
 
@@ -27,7 +29,7 @@ class CourseGrade(object):
     """
     Course Grade class
     """
-    def __init__(self, student, course, course_structure):
+    def __init__(self, student, course, course_structure, batch=None):
         self.student = student
         self.course = course
         self.course_version = getattr(course, 'course_version', None)
@@ -35,7 +37,9 @@ class CourseGrade(object):
         self.course_structure = course_structure
         self._percent = None
         self._letter_grade = None
-        self._subsection_grade_factory = SubsectionGradeFactory(self.student, self.course, self.course_structure)
+        self._subsection_grade_factory = SubsectionGradeFactory(
+            self.student, self.course, self.course_structure, batch,
+        )
 
     @lazy
     def graded_subsections_by_format(self):
@@ -215,19 +219,26 @@ class CourseGrade(object):
         )
 
     @classmethod
-    def load_persisted_grade(cls, user, course, course_structure):
+    def load_persisted_grade(cls, user, course, course_structure, batch=None):
         """
         Initializes a CourseGrade object, filling its members with persisted values from the database.
 
         If the grading policy is out of date, recomputes the grade.
 
         If no persisted values are found, returns None.
+
+        If a CourseGradeBatch is given, the persisted values are read from it.
         """
-        try:
-            persistent_grade = PersistentCourseGrade.read_course_grade(user.id, course.id)
-        except PersistentCourseGrade.DoesNotExist:
-            return None
-        course_grade = CourseGrade(user, course, course_structure)
+        if batch:
+            persistent_grade = batch.get_persisted_course_grade(user)
+            if persistent_grade is None:
+                return None
+        else:
+            try:
+                persistent_grade = PersistentCourseGrade.read_course_grade(user.id, course.id)
+            except PersistentCourseGrade.DoesNotExist:
+                return None
+        course_grade = CourseGrade(user, course, course_structure, batch)
 
         current_grading_policy_hash = course_grade.get_grading_policy_hash(course.location, course_structure)
         if current_grading_policy_hash != persistent_grade.grading_policy_hash:
@@ -323,20 +334,27 @@ class CourseGradeFactory(object):
     """
     Factory class to create Course Grade objects
     """
-    def create(self, student, course, read_only=True):
+    def create(self, student, course, read_only=True, batch=None):
         """
         Returns the CourseGrade object for the given student and course.
 
         If read_only is True, doesn't save any updates to the grades.
         Raises a PermissionDenied if the user does not have course access.
+
+        If a CourseGradeBatch that includes the student is given, the
+        grade is computed from the batch's prefetched data.
         """
-        course_structure = get_course_blocks(student, course.location)
+        course_structure = get_course_blocks(
+            student,
+            course.location,
+            collected_block_structure=batch.collected_block_structure if batch else None,
+        )
         # if user does not have access to this course, throw an exception
         if not self._user_has_access_to_course(course_structure):
             raise PermissionDenied("User does not have access to this course")
         return (
-            self._get_saved_grade(student, course, course_structure) or
-            self._compute_and_update_grade(student, course, course_structure, read_only)
+            self._get_saved_grade(student, course, course_structure, batch) or
+            self._compute_and_update_grade(student, course, course_structure, read_only, batch)
         )
 
     GradeResult = namedtuple('GradeResult', ['student', 'course_grade', 'err_msg'])
@@ -350,25 +368,32 @@ class CourseGradeFactory(object):
 
         If an error occurred, course_grade will be None and err_msg will be an
         exception message. If there was no error, err_msg is an empty string.
-        """
-        for student in students:
-            with dog_stats_api.timer('lms.grades.CourseGradeFactory.iter', tags=[u'action:{}'.format(course.id)]):
-
-                try:
-                    course_grade = CourseGradeFactory().create(student, course)
-                    yield self.GradeResult(student, course_grade, "")
-
-                except Exception as exc:  # pylint: disable=broad-except
-                    # Keep marching on even if this student couldn't be graded for
-                    # some reason, but log it for future reference.
-                    log.exception(
-                        'Cannot grade student %s (%s) in course %s because of exception: %s',
-                        student.username,
-                        student.id,
-                        course.id,
-                        exc.message
-                    )
-                    yield self.GradeResult(student, None, exc.message)
+
+        Students are graded in batches of settings.COURSE_GRADES_BATCH_SIZE,
+        sharing the course's collected block structure and the scores and
+        persisted grades that are fetched for each batch as a whole. The
+        students are read lazily, one batch at a time.
+        """
+        for students_batch in iter_chunks(students, settings.COURSE_GRADES_BATCH_SIZE):
+            batch = CourseGradeBatch(course, students_batch)
+            for student in students_batch:
+                with dog_stats_api.timer('lms.grades.CourseGradeFactory.iter', tags=[u'action:{}'.format(course.id)]):
+
+                    try:
+                        course_grade = self.create(student, course, batch=batch)
+                        yield self.GradeResult(student, course_grade, "")
+
+                    except Exception as exc:  # pylint: disable=broad-except
+                        # Keep marching on even if this student couldn't be graded for
+                        # some reason, but log it for future reference.
+                        log.exception(
+                            'Cannot grade student %s (%s) in course %s because of exception: %s',
+                            student.username,
+                            student.id,
+                            course.id,
+                            exc.message
+                        )
+                        yield self.GradeResult(student, None, exc.message)
 
     def update(self, student, course, course_structure):
         """
@@ -386,7 +411,7 @@ class CourseGradeFactory(object):
 
         return CourseGrade.get_persisted_grade(student, course)
 
-    def _get_saved_grade(self, student, course, course_structure):
+    def _get_saved_grade(self, student, course, course_structure, batch=None):
         """
         Returns the saved grade for the given course and student.
         """
@@ -396,16 +421,17 @@ class CourseGradeFactory(object):
         return CourseGrade.load_persisted_grade(
             student,
             course,
-            course_structure
+            course_structure,
+            batch,
         )
 
-    def _compute_and_update_grade(self, student, course, course_structure, read_only=False):
+    def _compute_and_update_grade(self, student, course, course_structure, read_only=False, batch=None):
         """
         Freshly computes and updates the grade for the student and course.
 
         If read_only is True, doesn't save any updates to the grades.
         """
-        course_grade = CourseGrade(student, course, course_structure)
+        course_grade = CourseGrade(student, course, course_structure, batch)
         course_grade.compute_and_update(read_only)
         return course_grade
 
@@ -0,0 +1,167 @@
+"""
+CourseGradeBatch Class
+"""
+from collections import defaultdict
+from logging import getLogger
+
+from django.db import IntegrityError, transaction
+from lazy import lazy
+
+from courseware.model_data import ScoresClient
+from lms.djangoapps.grades.config.models import PersistentGradesEnabledFlag
+from lms.djangoapps.grades.models import PersistentCourseGrade, PersistentSubsectionGrade
+from lms.djangoapps.grades.scores import possibly_scored
+from openedx.core.djangoapps.content.block_structure.api import get_course_in_cache
+from student.models import AnonymousUserId, anonymous_id_for_user
+from submissions.models import ScoreSummary
+
+
+log = getLogger(__name__)
+
+
+class CourseGradeBatch(object):
+    """
+    Grading data for a batch of students in a course.
+
+    The data that is otherwise queried separately for each student -
+    the collected course structure, the CSM and Submissions API scores,
+    and the persisted course and subsection grades - is fetched lazily
+    for all the students in the batch at once, using a fixed number of
+    queries per batch rather than per student.
+    """
+    def __init__(self, course, students):
+        self.course = course
+        self.students = students
+        self._student_ids = [student.id for student in students]
+
+    @lazy
+    def collected_block_structure(self):
+        """
+        The collected block structure of the course, shared by all the
+        students in the batch.
+        """
+        return get_course_in_cache(self.course.id)
+
+    def get_persisted_course_grade(self, student):
+        """
+        Returns the student's PersistentCourseGrade, or None if not found.
+        """
+        return self._persisted_course_grades.get(student.id)
+
+    def get_persisted_subsection_grades(self, student):
+        """
+        Returns a dict of the student's PersistentSubsectionGrades keyed
+        by the subsections' usage keys.
+        """
+        return self._persisted_subsection_grades[student.id]
+
+    def get_csm_scores(self, student):
+        """
+        Returns the ScoresClient with the student's scores stored in the
+        user state (in CSM).
+        """
+        return self._csm_scores[student.id]
+
+    def get_submissions_scores(self, student):
+        """
+        Returns the student's scores stored by the Submissions API, in the
+        same format as submissions.api.get_scores.
+        """
+        return self._submissions_scores[student.id]
+
+    @lazy
+    def _persisted_course_grades(self):
+        """
+        Returns a dict of the PersistentCourseGrades of all the students,
+        keyed by user id.
+        """
+        if not PersistentGradesEnabledFlag.feature_enabled(self.course.id):
+            return {}
+        return {
+            grade.user_id: grade
+            for grade in PersistentCourseGrade.bulk_read_course_grades(self._student_ids, self.course.id)
+        }
+
+    @lazy
+    def _persisted_subsection_grades(self):
+        """
+        Returns a dict, keyed by user id, of dicts of the
+        PersistentSubsectionGrades of all the students.
+        """
+        subsection_grades = defaultdict(dict)
+        for record in PersistentSubsectionGrade.bulk_read_grades_for_users(self._student_ids, self.course.id):
+            subsection_grades[record.user_id][record.full_usage_key] = record
+        return subsection_grades
+
+    @lazy
+    def _csm_scores(self):
+        """
+        Returns a dict of the ScoresClients of all the students, keyed by
+        user id.
+        """
+        scorable_locations = [
+            block_key for block_key in self.collected_block_structure if possibly_scored(block_key)
+        ]
+        return ScoresClient.create_for_users(self.course.id, self._student_ids, scorable_locations)
+
+    @lazy
+    def _submissions_scores(self):
+        """
+        Returns a dict, keyed by user id, of the scores of all the
+        students stored by the Submissions API.
+        """
+        anonymous_user_ids = self._get_anonymous_user_ids()
+        user_ids = {anonymous_user_id: user_id for user_id, anonymous_user_id in anonymous_user_ids.iteritems()}
+
+        # Equivalent to calling submissions.api.get_scores for each student.
+        submissions_scores = defaultdict(dict)
+        score_summaries = ScoreSummary.objects.filter(
+            student_item__course_id=unicode(self.course.id),
+            student_item__student_id__in=anonymous_user_ids.values(),
+        ).select_related('latest', 'student_item')
+        for summary in score_summaries:
+            if not summary.latest.is_hidden():
+                submissions_scores[user_ids[summary.student_item.student_id]][summary.student_item.item_id] = (
+                    summary.latest.points_earned,
+                    summary.latest.points_possible,
+                )
+        return submissions_scores
+
+    def _get_anonymous_user_ids(self):
+        """
+        Returns a dict of the anonymous ids of all the students for the
+        course, keyed by user id, while saving any that don't yet exist.
+        """
+        anonymous_user_ids = {
+            student.id: anonymous_id_for_user(student, self.course.id, save=False)
+            for student in self.students
+        }
+        existing_anonymous_user_ids = set(
+            AnonymousUserId.objects.filter(
+                anonymous_user_id__in=anonymous_user_ids.values(),
+            ).values_list('anonymous_user_id', flat=True)
+        )
+        new_records = [
+            AnonymousUserId(user_id=user_id, course_id=self.course.id, anonymous_user_id=anonymous_user_id)
+            for user_id, anonymous_user_id in anonymous_user_ids.iteritems()
+            if anonymous_user_id not in existing_anonymous_user_ids
+        ]
+        if new_records:
+            try:
+                with transaction.atomic():
+                    AnonymousUserId.objects.bulk_create(new_records)
+            except IntegrityError:
+                # Another thread has already created some of these
+                # entries, so create the remaining ones individually.
+                log.info(u"Grades: creating anonymous ids individually for course %s", self.course.id)
+                for record in new_records:
+                    try:
+                        with transaction.atomic():
+                            AnonymousUserId.objects.get_or_create(
+                                user_id=record.user_id,
+                                course_id=record.course_id,
+                                anonymous_user_id=record.anonymous_user_id,
+                            )
+                    except IntegrityError:
+                        pass
+        return anonymous_user_ids
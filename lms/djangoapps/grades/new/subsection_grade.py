@@ -203,10 +203,11 @@ class SubsectionGradeFactory(object):
     """
     Factory for Subsection Grades.
     """
-    def __init__(self, student, course, course_structure):
+    def __init__(self, student, course, course_structure, batch=None):
         self.student = student
         self.course = course
         self.course_structure = course_structure
+        self._batch = batch
 
         self._cached_subsection_grades = None
         self._unsaved_subsection_grades = []
@@ -283,6 +284,8 @@ class SubsectionGradeFactory(object):
         Lazily queries and returns all the scores stored in the user
         state (in CSM) for the course, while caching the result.
         """
+        if self._batch:
+            return self._batch.get_csm_scores(self.student)
         scorable_locations = [block_key for block_key in self.course_structure if possibly_scored(block_key)]
         return ScoresClient.create_for_locations(self.course.id, self.student.id, scorable_locations)
 
@@ -292,6 +295,8 @@ class SubsectionGradeFactory(object):
         Lazily queries and returns the scores stored by the
         Submissions API for the course, while caching the result.
         """
+        if self._batch:
+            return self._batch.get_submissions_scores(self.student)
         anonymous_user_id = anonymous_id_for_user(self.student, self.course.id)
         return submissions_api.get_scores(unicode(self.course.id), anonymous_user_id)
 
@@ -317,7 +322,9 @@ class SubsectionGradeFactory(object):
         Returns and caches (for future access) the results of
         a bulk retrieval of all subsection grades in the course.
         """
-        if self._cached_subsection_grades is None:
+        if self._cached_subsection_grades is None and self._batch:
+            self._cached_subsection_grades = self._batch.get_persisted_subsection_grades(self.student)
+        elif self._cached_subsection_grades is None:
             self._cached_subsection_grades = {
                 record.full_usage_key: record
                 for record in PersistentSubsectionGrade.bulk_read_grades(self.student.id, self.course.id)
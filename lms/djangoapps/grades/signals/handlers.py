@@ -123,18 +123,24 @@ def score_published_handler(sender, block, user, raw_earned, raw_possible, only_
                 )
 
     if update_score:
-        score_modified_time = set_score(user.id, block.location, raw_earned, raw_possible)
-        PROBLEM_RAW_SCORE_CHANGED.send(
-            sender=None,
-            raw_earned=raw_earned,
-            raw_possible=raw_possible,
-            weight=getattr(block, 'weight', None),
-            user_id=user.id,
-            course_id=unicode(block.location.course_key),
-            usage_id=unicode(block.location),
-            only_if_higher=only_if_higher,
-            modified=score_modified_time,
-        )
+        def score_written(score_modified_time):
+            """
+            Signals the change of the score once it has been written, which
+            may be deferred to the end of a batch of rescored problems.
+            """
+            PROBLEM_RAW_SCORE_CHANGED.send(
+                sender=None,
+                raw_earned=raw_earned,
+                raw_possible=raw_possible,
+                weight=getattr(block, 'weight', None),
+                user_id=user.id,
+                course_id=unicode(block.location.course_key),
+                usage_id=unicode(block.location),
+                only_if_higher=only_if_higher,
+                modified=score_modified_time,
+            )
+
+        set_score(user.id, block.location, raw_earned, raw_possible, on_written=score_written)
     return update_score
 
 
@@ -4,11 +4,13 @@ Test grade calculation.
 
 import ddt
 import itertools
+from django.contrib.auth.models import User
+from django.test.utils import override_settings
 from mock import patch
 from nose.plugins.attrib import attr
 
 from capa.tests.response_xml_factory import MultipleChoiceResponseXMLFactory
-from courseware.model_data import set_score
+from courseware.model_data import ScoresClient, set_score
 from courseware.tests.helpers import LoginEnrollmentTestCase
 
 from lms.djangoapps.course_blocks.api import get_course_blocks
@@ -21,6 +23,7 @@ from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
 
 from .utils import answer_problem
+from ..models import PersistentSubsectionGrade
 from ..module_grades import get_module_score
 from ..new.course_grade import CourseGradeFactory
 from ..new.subsection_grade import SubsectionGradeFactory
@@ -131,6 +134,89 @@ class TestGradeIteration(SharedModuleStoreTestCase):
         return students_to_course_grades, students_to_errors
 
 
+@attr(shard=1)
+@ddt.ddt
+class TestGradeIterationBatches(SharedModuleStoreTestCase):
+    """
+    Test iteration through student course grades in batches.
+    """
+    NUM_STUDENTS = 5
+
+    @classmethod
+    def setUpClass(cls):
+        super(TestGradeIterationBatches, cls).setUpClass()
+        cls.course = CourseFactory.create()
+        chapter = ItemFactory.create(parent=cls.course, category="chapter", display_name="chapter")
+        sequential = ItemFactory.create(
+            parent=chapter, category="sequential", display_name="sequential", graded=True, format="Homework",
+        )
+        vertical = ItemFactory.create(parent=sequential, category="vertical", display_name="vertical")
+        cls.problem = ItemFactory.create(parent=vertical, category="problem", display_name="problem")
+
+    def setUp(self):
+        super(TestGradeIterationBatches, self).setUp()
+        self.students = [UserFactory.create() for _ in range(self.NUM_STUDENTS)]
+        for index, student in enumerate(self.students[1:]):
+            set_score(student.id, self.problem.location, index, 4)
+
+    def _assert_grades_match(self, grade_results):
+        """
+        Verifies the given grade results match grades created
+        individually for each student.
+        """
+        self.assertEqual([result.student for result in grade_results], self.students)
+        for student, course_grade, err_msg in grade_results:
+            self.assertEqual(err_msg, "")
+            expected_grade = CourseGradeFactory().create(student, self.course)
+            self.assertEqual(course_grade.percent, expected_grade.percent)
+            self.assertEqual(course_grade.locations_to_scores, expected_grade.locations_to_scores)
+
+    @ddt.data(1, 2, 5, 10)
+    def test_batches(self, batch_size):
+        with override_settings(COURSE_GRADES_BATCH_SIZE=batch_size):
+            with patch.object(
+                ScoresClient, 'create_for_users', wraps=ScoresClient.create_for_users
+            ) as mock_create_for_users:
+                with patch.object(
+                    PersistentSubsectionGrade, 'bulk_read_grades', wraps=PersistentSubsectionGrade.bulk_read_grades
+                ) as mock_bulk_read_grades:
+                    grade_results = list(CourseGradeFactory().iter(self.course, self.students))
+
+        num_batches = (self.NUM_STUDENTS + batch_size - 1) // batch_size
+        self.assertEqual(mock_create_for_users.call_count, num_batches)
+        self.assertFalse(mock_bulk_read_grades.called)
+        self._assert_grades_match(grade_results)
+
+    def test_students_read_lazily(self):
+        students_read = []
+
+        def students():
+            """Yields the students, recording which were read."""
+            for student in self.students:
+                students_read.append(student)
+                yield student
+
+        with override_settings(COURSE_GRADES_BATCH_SIZE=2):
+            grade_results = CourseGradeFactory().iter(self.course, students())
+            first_result = next(grade_results)
+            self.assertEqual(students_read, self.students[:2])
+            grade_results = [first_result] + list(grade_results)
+        self._assert_grades_match(grade_results)
+
+    def test_students_queryset(self):
+        students = User.objects.filter(id__in=[student.id for student in self.students]).order_by('id')
+        with override_settings(COURSE_GRADES_BATCH_SIZE=2):
+            grade_results = list(CourseGradeFactory().iter(self.course, students))
+        self._assert_grades_match(grade_results)
+
+    def test_persisted_grades(self):
+        for student in self.students[:3]:
+            CourseGradeFactory().create(student, self.course, read_only=False)
+        with override_settings(COURSE_GRADES_BATCH_SIZE=2):
+            grade_results = list(CourseGradeFactory().iter(self.course, self.students))
+        self._assert_grades_match(grade_results)
+
+
 @ddt.ddt
 class TestWeightedProblems(SharedModuleStoreTestCase):
     """
@@ -46,6 +46,9 @@ SALE_ORDER_FEATURES = ('id', 'company_name', 'company_contact_name', 'company_co
 AVAILABLE_FEATURES = STUDENT_FEATURES + PROFILE_FEATURES
 COURSE_REGISTRATION_FEATURES = ('code', 'course_id', 'created_by', 'created_at', 'is_valid')
 COUPON_FEATURES = ('code', 'course_id', 'percentage_discount', 'description', 'expiration_date', 'is_active')
+# number of rows fetched by each query of the iter_* functions
+QUERY_CHUNK_SIZE = 1000
+
 CERTIFICATE_FEATURES = ('course_id', 'mode', 'status', 'grade', 'created_date', 'is_active', 'error_reason')
 
 UNAVAILABLE = "[unavailable]"
@@ -212,6 +215,15 @@ def enrolled_students_features(course_key, features):
         {'username': 'username3', 'first_name': 'firstname3'}
     ]
     """
+    return list(iter_enrolled_students_features(course_key, features, chunk_size=None))
+
+
+def iter_enrolled_students_features(course_key, features, chunk_size=QUERY_CHUNK_SIZE):
+    """
+    Like enrolled_students_features, but returns a generator of the
+    student features, which queries the students `chunk_size` at a time
+    (or all at once if `chunk_size` is None) to keep memory use bounded.
+    """
     include_cohort_column = 'cohort' in features
     include_team_column = 'team' in features
     include_enrollment_mode = 'enrollment_mode' in features
@@ -292,7 +304,20 @@ def enrolled_students_features(course_key, features):
 
         return student_dict
 
-    return [extract_student(student, features) for student in students]
+    if chunk_size is None:
+        for student in students:
+            yield extract_student(student, features)
+        return
+
+    last_username = None
+    while True:
+        chunk_students = students if last_username is None else students.filter(username__gt=last_username)
+        chunk_students = list(chunk_students[:chunk_size])
+        for student in chunk_students:
+            yield extract_student(student, features)
+        if len(chunk_students) < chunk_size:
+            break
+        last_username = chunk_students[-1].username
 
 
 def list_may_enroll(course_key, features):
@@ -408,24 +433,38 @@ def list_problem_responses(course_key, problem_location):
     where `state` represents a student's response to the problem
     identified by `problem_location`.
     """
+    return list(iter_problem_responses(course_key, problem_location, chunk_size=None))
+
+
+def iter_problem_responses(course_key, problem_location, chunk_size=QUERY_CHUNK_SIZE):
+    """
+    Like list_problem_responses, but returns a generator of the responses,
+    which queries them `chunk_size` at a time (or all at once if
+    `chunk_size` is None) to keep memory use bounded.
+    """
     problem_key = UsageKey.from_string(problem_location)
     # Are we dealing with an "old-style" problem location?
     run = problem_key.run
     if not run:
         problem_key = course_key.make_usage_key_from_deprecated_string(problem_location)
     if problem_key.course_key != course_key:
-        return []
+        return
 
     smdat = StudentModule.objects.filter(
         course_id=course_key,
         module_state_key=problem_key
     )
-    smdat = smdat.order_by('student')
-
-    return [
-        {'username': response.student.username, 'state': response.state}
-        for response in smdat
-    ]
+    smdat = smdat.order_by('student').values_list('student_id', 'student__username', 'state')
+
+    last_student_id = None
+    while True:
+        chunk = smdat if last_student_id is None else smdat.filter(student_id__gt=last_student_id)
+        chunk = list(chunk if chunk_size is None else chunk[:chunk_size])
+        for __, username, state in chunk:
+            yield {'username': username, 'state': state}
+        if chunk_size is None or len(chunk) < chunk_size:
+            break
+        last_student_id = chunk[-1][0]
 
 
 def course_registration_features(features, registration_codes, csv_type):
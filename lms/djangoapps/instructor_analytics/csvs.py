@@ -5,6 +5,8 @@ Format and create csv responses
 """
 
 import csv
+from itertools import imap
+
 from django.http import HttpResponse
 
 
@@ -37,13 +39,15 @@ def create_csv_response(filename, header, datarows):
     return response
 
 
-def format_dictlist(dictlist, features):
+def format_dictlist(dictlist, features, as_generator=False):
     """
     Convert a list of dictionaries to be compatible with create_csv_response
 
     `dictlist` is a list of dictionaries
         all dictionaries should have keys from features
     `features` is a list of features
+    `as_generator` makes `datarows` a generator, which lazily converts
+        the dictionaries of `dictlist` (which can then be a generator too)
 
     example code:
     dictlist = [
@@ -78,7 +82,7 @@ def format_dictlist(dictlist, features):
         return vals
 
     header = features
-    datarows = map(dict_to_entry, dictlist)
+    datarows = (imap if as_generator else map)(dict_to_entry, dictlist)
 
     return header, datarows
 
@@ -12,6 +12,9 @@ file and check it in at the same time as your model changes. To do that,
 ASSUMPTIONS: modules have unique IDs, even across different module_types
 
 """
+from contextlib import contextmanager
+from gzip import GzipFile
+from tempfile import SpooledTemporaryFile
 from uuid import uuid4
 import csv
 import json
@@ -20,12 +23,15 @@ import os.path
 
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.core.files.base import ContentFile
+from django.core.files.base import File
 from django.db import models, transaction
 
 from openedx.core.storage import get_storage
 from openedx.core.djangoapps.xmodule_django.models import CourseKeyField
 
+# maximum size, in bytes, of reports kept in memory while they are written
+REPORT_SPOOL_MAX_SIZE = 4 * 1024 * 1024
+
 # define custom states used by InstructorTask
 QUEUING = 'QUEUING'
 PROGRESS = 'PROGRESS'
@@ -267,16 +273,53 @@ class DjangoStorageReportStore(ReportStore):
         path = self.path_to(course_id, filename)
         self.storage.save(path, buff)
 
-    def store_rows(self, course_id, filename, rows):
+    def store_rows(self, course_id, filename, rows, compress=False):
         """
         Given a course_id, filename, and rows (each row is an iterable of
         strings), write the rows to the storage backend in csv format.
+
+        `rows` may be any iterable, such as a generator. The rows are written
+        one at a time to a temporary file that only stays in memory while it
+        is small, so that large reports don't need to fit in memory. If
+        `compress` is True, the file is gzipped.
+        """
+        with SpooledTemporaryFile(max_size=REPORT_SPOOL_MAX_SIZE) as output_file:
+            if compress:
+                with GzipFile(filename=filename, mode='wb', fileobj=output_file) as gzip_file:
+                    csv.writer(gzip_file).writerows(self._get_utf8_encoded_rows(rows))
+            else:
+                csv.writer(output_file).writerows(self._get_utf8_encoded_rows(rows))
+            output_file.seek(0)
+            self.store(course_id, filename, File(output_file))
+
+    @contextmanager
+    def rows_writer(self, course_id, filename):
+        """
+        Returns a context manager yielding a function that writes a row (an
+        iterable of strings) to the CSV file `filename` of the given
+        `course_id`, which is stored when the context exits without an error.
+
+        As with `store_rows`, the rows are written to a temporary file that
+        only stays in memory while it is small.
+        """
+        with SpooledTemporaryFile(max_size=REPORT_SPOOL_MAX_SIZE) as output_file:
+            writer = csv.writer(output_file)
+            yield lambda row: writer.writerows(self._get_utf8_encoded_rows([row]))
+            output_file.seek(0)
+            self.store(course_id, filename, File(output_file))
+
+    def open(self, course_id, filename):
+        """
+        Return the file named `filename` stored for the given `course_id`,
+        opened for reading.
+        """
+        return self.storage.open(self.path_to(course_id, filename))
+
+    def delete(self, course_id, filename):
+        """
+        Delete the file named `filename` stored for the given `course_id`.
         """
-        output_buffer = ContentFile('')
-        csvwriter = csv.writer(output_buffer)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
-        output_buffer.seek(0)
-        self.store(course_id, filename, output_buffer)
+        self.storage.delete(self.path_to(course_id, filename))
 
     def links_for(self, course_id):
         """
@@ -31,11 +31,13 @@ from lms.djangoapps.instructor_task.tasks_helper import (
     run_main_task,
     BaseInstructorTask,
     perform_module_state_update,
+    perform_module_state_update_chunk,
     rescore_problem_module_state,
     reset_attempts_module_state,
     delete_problem_module_state,
     upload_problem_responses_csv,
     upload_grades_csv,
+    upload_grades_csv_chunk,
     upload_problem_grade_report,
     upload_students_csv,
     cohort_students_and_upload,
@@ -79,10 +81,37 @@ def rescore_problem(entry_id, xmodule_instance_args):
         """Filter that matches problems which are marked as being done"""
         return modules_to_update.filter(state__contains='"done": true')
 
-    visit_fcn = partial(perform_module_state_update, update_fcn, filter_fcn)
+    def create_subtask_fcn(student_module_ids, subtask_status):
+        """Creates a subtask rescoring the given StudentModules."""
+        return rescore_problem_chunk.subtask(
+            (entry_id, xmodule_instance_args, student_module_ids, subtask_status.to_dict()),
+            task_id=subtask_status.task_id,
+        )
+
+    visit_fcn = partial(
+        perform_module_state_update,
+        update_fcn,
+        filter_fcn,
+        prefetch_field_data=True,
+        create_subtask_fcn=create_subtask_fcn,
+    )
     return run_main_task(entry_id, visit_fcn, action_name)
 
 
+@task  # pylint: disable=not-callable
+def rescore_problem_chunk(entry_id, xmodule_instance_args, student_module_ids, subtask_status_dict):
+    """
+    Rescores a chunk of the StudentModules of a problem, as a subtask of rescore_problem.
+
+    The InstructorTask entry of rescore_problem tracks the progress of
+    the subtask, and is marked as completed once all its subtasks are.
+    """
+    update_fcn = partial(rescore_problem_module_state, xmodule_instance_args)
+    return perform_module_state_update_chunk(
+        update_fcn, entry_id, student_module_ids, subtask_status_dict, prefetch_field_data=True
+    )
+
+
 @task(base=BaseInstructorTask)  # pylint: disable=not-callable
 def reset_problem_attempts(entry_id, xmodule_instance_args):
     """Resets problem attempts to zero for a particular problem for all students in a course.
@@ -176,6 +205,20 @@ def calculate_grades_csv(entry_id, xmodule_instance_args):
     return run_main_task(entry_id, task_fn, action_name)
 
 
+@task(routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
+def calculate_grades_csv_chunk(entry_id, xmodule_instance_args, action_name, chunk_index, student_ids,
+                               subtask_status_dict):
+    """
+    Grade a chunk of a course's students, as a subtask of calculate_grades_csv.
+
+    The InstructorTask entry of calculate_grades_csv tracks the progress of
+    the subtask, and is marked as completed once all its subtasks are.
+    """
+    return upload_grades_csv_chunk(
+        entry_id, xmodule_instance_args, action_name, chunk_index, student_ids, subtask_status_dict
+    )
+
+
 @task(base=BaseInstructorTask, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
 def calculate_problem_grade_report(entry_id, xmodule_instance_args):
     """
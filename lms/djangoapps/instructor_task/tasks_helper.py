@@ -5,10 +5,13 @@ running state of a course.
 """
 import json
 import logging
+import shutil
+import traceback
 from StringIO import StringIO
-from collections import OrderedDict
+from collections import OrderedDict, defaultdict
 from datetime import datetime
-from itertools import chain
+from itertools import chain, count
+from tempfile import TemporaryFile
 from time import time
 
 import dogstats_wrapper as dog_stats_api
@@ -43,14 +46,14 @@ from courseware.courses import get_course_by_id, get_problems_in_section
 from lms.djangoapps.grades.context import grading_context_for_course
 from lms.djangoapps.grades.new.course_grade import CourseGradeFactory
 from courseware.model_data import DjangoKeyValueStore, FieldDataCache
-from courseware.models import StudentModule
+from courseware.models import StudentModule, iter_chunks
 from courseware.module_render import get_module_for_descriptor_internal
 from edxmako.shortcuts import render_to_string
 from instructor_analytics.basic import (
-    enrolled_students_features,
     get_proctored_exam_results,
+    iter_enrolled_students_features,
+    iter_problem_responses,
     list_may_enroll,
-    list_problem_responses
 )
 from instructor_analytics.csvs import format_dictlist
 from shoppingcart.models import (
@@ -59,6 +62,12 @@ from shoppingcart.models import (
 )
 from openassessment.data import OraAggregateData
 from lms.djangoapps.instructor_task.models import ReportStore, InstructorTask, PROGRESS
+from lms.djangoapps.instructor_task.subtasks import (
+    SubtaskStatus,
+    check_subtask_is_valid,
+    queue_subtasks_for_query,
+    update_subtask_status,
+)
 from lms.djangoapps.lms_xblock.runtime import LmsPartitionService
 from openedx.core.djangoapps.course_groups.cohorts import get_cohort
 from openedx.core.djangoapps.course_groups.models import CourseUserGroup
@@ -83,12 +92,18 @@ UPDATE_STATUS_SUCCEEDED = 'succeeded'
 UPDATE_STATUS_FAILED = 'failed'
 UPDATE_STATUS_SKIPPED = 'skipped'
 
+# number of StudentModules whose field data perform_module_state_update loads at once
+FIELD_DATA_PREFETCH_BATCH_SIZE = 100
+
 # define value to be used in grading events
 GRADES_RESCORE_EVENT_TYPE = 'edx.grades.problem.rescored'
 
 # The setting name used for events when "settings" (account settings, preferences, profile information) change.
 REPORT_REQUESTED_EVENT_NAME = u'edx.instructor.report.requested'
 
+# header of the report listing the students that could not be graded
+GRADE_REPORT_ERR_HEADER = ["id", "username", "error_msg"]
+
 
 class BaseInstructorTask(Task):
     """
@@ -185,6 +200,14 @@ class UpdateProblemModuleStateError(Exception):
     pass
 
 
+class GradeReportSubtaskError(Exception):
+    """
+    Error signaling that some of the subtasks generating a grade report
+    failed, so the report cannot be assembled.
+    """
+    pass
+
+
 def _get_current_task():
     """
     Stub to make it easier to test without actually running Celery.
@@ -304,7 +327,8 @@ def run_main_task(entry_id, task_fcn, action_name):
     return task_progress
 
 
-def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, task_input, action_name):
+def perform_module_state_update(update_fcn, filter_fcn, entry_id, course_id, task_input, action_name,
+                                prefetch_field_data=False, create_subtask_fcn=None):
     """
     Performs generic update by visiting StudentModule instances with the update_fcn provided.
 
@@ -322,6 +346,17 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
     the update is successful; False indicates the update on the particular student module failed.
     A raised exception indicates a fatal condition -- that no other student modules should be considered.
 
+    If `prefetch_field_data` is True, the StudentModules are visited in batches, and the field data
+    of all the students of a batch is loaded at once with `FieldDataCache.cache_for_users`. The
+    FieldDataCache of each student is then passed to the `update_fcn` as a `field_data_cache`
+    keyword argument.
+
+    If `create_subtask_fcn` is not None and there are more StudentModules than the
+    INSTRUCTOR_TASK_MODULES_PER_SUBTASK setting, the StudentModules are instead split into
+    chunks that are updated in parallel by subtasks (see `perform_module_state_update_chunk`).
+    `create_subtask_fcn` is called with the list of ids of the StudentModules of each chunk and
+    the initial SubtaskStatus of its subtask, and returns the subtask to queue.
+
     The return value is a dict containing the task's results, with the following keys:
 
           'attempted': number of attempts made
@@ -339,25 +374,8 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
 
     """
     start_time = time()
-    usage_keys = []
-    problem_url = task_input.get('problem_url')
-    entrance_exam_url = task_input.get('entrance_exam_url')
+    usage_keys, problems = _get_problems_to_update(course_id, task_input)
     student_identifier = task_input.get('student')
-    problems = {}
-
-    # if problem_url is present make a usage key from it
-    if problem_url:
-        usage_key = course_id.make_usage_key_from_deprecated_string(problem_url)
-        usage_keys.append(usage_key)
-
-        # find the problem descriptor:
-        problem_descriptor = modulestore().get_item(usage_key)
-        problems[unicode(usage_key)] = problem_descriptor
-
-    # if entrance_exam is present grab all problems in it
-    if entrance_exam_url:
-        problems = get_problems_in_section(entrance_exam_url)
-        usage_keys = [UsageKey.from_string(location) for location in problems.keys()]
 
     # find the modules in question
     modules_to_update = StudentModule.objects.filter(course_id=course_id, module_state_key__in=usage_keys)
@@ -380,15 +398,91 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
         modules_to_update = filter_fcn(modules_to_update)
 
     task_progress = TaskProgress(action_name, modules_to_update.count(), start_time)
+
+    modules_per_subtask = settings.INSTRUCTOR_TASK_MODULES_PER_SUBTASK
+    if create_subtask_fcn is not None and 0 < modules_per_subtask < task_progress.total:
+        return _queue_module_state_update_subtasks(
+            entry_id, action_name, modules_to_update, task_progress.total, create_subtask_fcn
+        )
+
     task_progress.update_task_state()
+    _update_modules(update_fcn, modules_to_update, problems, course_id, task_input, task_progress, prefetch_field_data)
+    return task_progress.update_task_state()
+
+
+def _get_problems_to_update(course_id, task_input):
+    """
+    Returns the usage keys of the problems to update for the given
+    `task_input`, and a dict of their descriptors keyed by location.
+    """
+    usage_keys = []
+    problem_url = task_input.get('problem_url')
+    entrance_exam_url = task_input.get('entrance_exam_url')
+    problems = {}
+
+    # if problem_url is present make a usage key from it
+    if problem_url:
+        usage_key = course_id.make_usage_key_from_deprecated_string(problem_url)
+        usage_keys.append(usage_key)
+
+        # find the problem descriptor:
+        problem_descriptor = modulestore().get_item(usage_key)
+        problems[unicode(usage_key)] = problem_descriptor
 
-    for module_to_update in modules_to_update:
+    # if entrance_exam is present grab all problems in it
+    if entrance_exam_url:
+        problems = get_problems_in_section(entrance_exam_url)
+        usage_keys = [UsageKey.from_string(location) for location in problems.keys()]
+
+    return usage_keys, problems
+
+
+def _update_modules(update_fcn, modules_to_update, problems, course_id, task_input, task_progress,
+                    prefetch_field_data):
+    """
+    Visits the given StudentModules with the `update_fcn`, counting the
+    results in `task_progress`. See perform_module_state_update.
+    """
+    if prefetch_field_data:
+        modules_to_update = modules_to_update.select_related('student')
+        module_batches = iter_chunks(modules_to_update, FIELD_DATA_PREFETCH_BATCH_SIZE)
+    else:
+        module_batches = [modules_to_update]
+
+    for module_batch in module_batches:
+        if prefetch_field_data:
+            field_data_caches = _prefetch_field_data_caches(course_id, module_batch, problems)
+            # The states and scores written by the `update_fcn` are written
+            # back together once the whole batch has been visited, in a single
+            # pass, and not at all if visiting the batch fails.
+            with FieldDataCache.deferred_writes(field_data_caches.values()):
+                _update_module_batch(
+                    update_fcn, module_batch, problems, task_input, task_progress, field_data_caches
+                )
+        else:
+            _update_module_batch(update_fcn, module_batch, problems, task_input, task_progress, None)
+
+
+def _update_module_batch(update_fcn, module_batch, problems, task_input, task_progress, field_data_caches):
+    """
+    Visits the StudentModules of a single batch with the `update_fcn`,
+    passing them the prefetched `field_data_caches`, if any.
+    """
+    action_name = task_progress.action_name
+    for module_to_update in module_batch:
         task_progress.attempted += 1
         module_descriptor = problems[unicode(module_to_update.module_state_key)]
+        update_kwargs = {}
+        if field_data_caches is not None:
+            update_kwargs['field_data_cache'] = field_data_caches[
+                (unicode(module_to_update.module_state_key), module_to_update.student_id)
+            ]
         # There is no try here:  if there's an error, we let it throw, and the task will
         # be marked as FAILED, with a stack trace.
-        with dog_stats_api.timer('instructor_tasks.module.time.step', tags=[u'action:{name}'.format(name=action_name)]):
-            update_status = update_fcn(module_descriptor, module_to_update, task_input)
+        with dog_stats_api.timer(
+            'instructor_tasks.module.time.step', tags=[u'action:{name}'.format(name=action_name)]
+        ):
+            update_status = update_fcn(module_descriptor, module_to_update, task_input, **update_kwargs)
             if update_status == UPDATE_STATUS_SUCCEEDED:
                 # If the update_fcn returns true, then it performed some kind of work.
                 # Logging of failures is left to the update_fcn itself.
@@ -400,7 +494,115 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
             else:
                 raise UpdateProblemModuleStateError("Unexpected update_status returned: {}".format(update_status))
 
-    return task_progress.update_task_state()
+
+def _queue_module_state_update_subtasks(entry_id, action_name, modules_to_update, total_num_modules,
+                                        create_subtask_fcn):
+    """
+    Splits the StudentModules to update into chunks of INSTRUCTOR_TASK_MODULES_PER_SUBTASK
+    modules, and queues a subtask created by `create_subtask_fcn` to update each chunk.
+
+    Returns the progress of the InstructorTask entry.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+
+    # If the subtasks have already been queued (for instance, when the
+    # parent task is retried), don't queue them again.
+    if entry.subtasks and json.loads(entry.subtasks).get('total', 0) > 0:
+        TASK_LOG.warning(u"Task %s: module update subtasks already queued for entry %s", entry.task_id, entry_id)
+        return json.loads(entry.task_output)
+
+    def _create_module_state_update_subtask(module_list, initial_subtask_status):
+        """Creates the subtask updating the given StudentModules."""
+        return create_subtask_fcn([module['pk'] for module in module_list], initial_subtask_status)
+
+    return queue_subtasks_for_query(
+        entry,
+        action_name,
+        _create_module_state_update_subtask,
+        [modules_to_update],
+        [],
+        settings.INSTRUCTOR_TASK_MODULES_PER_SUBTASK,
+        total_num_modules,
+    )
+
+
+def perform_module_state_update_chunk(update_fcn, entry_id, student_module_ids, subtask_status_dict,
+                                      prefetch_field_data=False):
+    """
+    Visits the given StudentModules with the `update_fcn`, as a subtask of
+    `perform_module_state_update`, and adds the succeeded, failed and skipped
+    counts of the chunk to the progress of the parent InstructorTask entry
+    once the whole chunk is done.
+
+    Arguments:
+        update_fcn: the update function of the parent task.
+        entry_id: primary key of the parent InstructorTask entry.
+        student_module_ids: ids of the StudentModules of the chunk.
+        subtask_status_dict: the initial SubtaskStatus of the subtask, as a dict.
+        prefetch_field_data: see perform_module_state_update.
+
+    Returns:
+        The final SubtaskStatus of the subtask, as a dict.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    entry = InstructorTask.objects.get(pk=entry_id)
+    course_id = entry.course_id
+    task_input = json.loads(entry.task_input)
+    action_name = json.loads(entry.task_output)['action_name']
+    task_progress = TaskProgress(action_name, len(student_module_ids), time())
+
+    try:
+        __, problems = _get_problems_to_update(course_id, task_input)
+        modules_to_update = StudentModule.objects.filter(pk__in=student_module_ids)
+        _update_modules(
+            update_fcn, modules_to_update, problems, course_id, task_input, task_progress, prefetch_field_data
+        )
+    except Exception:
+        TASK_LOG.exception(
+            u"Task %s: subtask %s failed to update student modules of instructor task %s",
+            entry.task_id, current_task_id, entry_id,
+        )
+        subtask_status.increment(
+            succeeded=task_progress.succeeded,
+            skipped=task_progress.skipped,
+            failed=task_progress.total - task_progress.succeeded - task_progress.skipped,
+            state=FAILURE,
+        )
+        update_subtask_status(entry_id, current_task_id, subtask_status)
+        raise
+
+    # StudentModules deleted since the subtask was queued count as skipped.
+    subtask_status.increment(
+        succeeded=task_progress.succeeded,
+        failed=task_progress.failed,
+        skipped=task_progress.skipped + task_progress.total - task_progress.attempted,
+        state=SUCCESS,
+    )
+    update_subtask_status(entry_id, current_task_id, subtask_status)
+    return subtask_status.to_dict()
+
+
+def _prefetch_field_data_caches(course_id, student_modules, problems):
+    """
+    Returns a dict, keyed by (problem location, student id) tuples, of the
+    FieldDataCaches of the problems of the given StudentModules, each loaded
+    with the field data of all the students of the problem at once.
+    """
+    students_by_problem = defaultdict(list)
+    for student_module in student_modules:
+        students_by_problem[unicode(student_module.module_state_key)].append(student_module.student)
+
+    field_data_caches = {}
+    for problem_location, students in students_by_problem.iteritems():
+        problem_caches = FieldDataCache.cache_for_descriptor_descendents_for_users(
+            course_id, students, problems[problem_location]
+        )
+        for student_id, field_data_cache in problem_caches.iteritems():
+            field_data_caches[(problem_location, student_id)] = field_data_cache
+    return field_data_caches
 
 
 def _get_task_id_from_xmodule_args(xmodule_instance_args):
@@ -430,16 +632,19 @@ def _get_track_function_for_task(student, xmodule_instance_args=None, source_pag
 
 
 def _get_module_instance_for_task(course_id, student, module_descriptor, xmodule_instance_args=None,
-                                  grade_bucket_type=None, course=None):
+                                  grade_bucket_type=None, course=None, field_data_cache=None):
     """
     Fetches a StudentModule instance for a given `course_id`, `student` object, and `module_descriptor`.
 
     `xmodule_instance_args` is used to provide information for creating a track function and an XQueue callback.
     These are passed, along with `grade_bucket_type`, to get_module_for_descriptor_internal, which sidesteps
     the need for a Request object when instantiating an xmodule instance.
+
+    `field_data_cache` is the student's already loaded FieldDataCache of the module, if any.
     """
     # reconstitute the problem's corresponding XModule:
-    field_data_cache = FieldDataCache.cache_for_descriptor_descendents(course_id, student, module_descriptor)
+    if field_data_cache is None:
+        field_data_cache = FieldDataCache.cache_for_descriptor_descendents(course_id, student, module_descriptor)
     student_data = KvsFieldData(DjangoKeyValueStore(field_data_cache))
 
     # get request-related tracking information from args passthrough, and supplement with task-specific
@@ -476,11 +681,15 @@ def _get_module_instance_for_task(course_id, student, module_descriptor, xmodule
 
 
 @outer_atomic
-def rescore_problem_module_state(xmodule_instance_args, module_descriptor, student_module, task_input):
+def rescore_problem_module_state(xmodule_instance_args, module_descriptor, student_module, task_input,
+                                 field_data_cache=None):
     '''
     Takes an XModule descriptor and a corresponding StudentModule object, and
     performs rescoring on the student's problem submission.
 
+    `field_data_cache` is the student's already loaded FieldDataCache of the
+    problem, if any.
+
     Throws exceptions if the rescoring is fatal and should be aborted if in a loop.
     In particular, raises UpdateProblemModuleStateError if module fails to instantiate,
     or if the module doesn't support rescoring.
@@ -504,7 +713,8 @@ def rescore_problem_module_state(xmodule_instance_args, module_descriptor, stude
             module_descriptor,
             xmodule_instance_args,
             grade_bucket_type='rescore',
-            course=course
+            course=course,
+            field_data_cache=field_data_cache,
         )
 
         if instance is None:
@@ -638,7 +848,19 @@ def delete_problem_module_state(xmodule_instance_args, _module_descriptor, stude
     return UPDATE_STATUS_SUCCEEDED
 
 
-def upload_csv_to_report_store(rows, csv_name, course_id, timestamp, config_name='GRADES_DOWNLOAD'):
+def _report_csv_filename(csv_name, course_id, timestamp):
+    """
+    Returns the name of the CSV file in which the report with the given
+    name, generated for the course at the given time, is stored.
+    """
+    return u"{course_prefix}_{csv_name}_{timestamp_str}.csv".format(
+        course_prefix=course_filename_prefix_generator(course_id),
+        csv_name=csv_name,
+        timestamp_str=timestamp.strftime("%Y-%m-%d-%H%M")
+    )
+
+
+def upload_csv_to_report_store(rows, csv_name, course_id, timestamp, config_name='GRADES_DOWNLOAD', compress=False):
     """
     Upload data as a CSV using ReportStore.
 
@@ -649,19 +871,18 @@ def upload_csv_to_report_store(rows, csv_name, course_id, timestamp, config_name
                 [row1_colum1, row1_colum2, ...],
                 ...
             ]
+            or a generator of such rows, which are then written to the
+            ReportStore as they are generated.
         csv_name: Name of the resulting CSV
         course_id: ID of the course
+        compress: Whether to gzip the CSV, in a file with a ".csv.gz"
+            extension.
     """
+    filename = _report_csv_filename(csv_name, course_id, timestamp)
+    if compress:
+        filename += u".gz"
     report_store = ReportStore.from_config(config_name)
-    report_store.store_rows(
-        course_id,
-        u"{course_prefix}_{csv_name}_{timestamp_str}.csv".format(
-            course_prefix=course_filename_prefix_generator(course_id),
-            csv_name=csv_name,
-            timestamp_str=timestamp.strftime("%Y-%m-%d-%H%M")
-        ),
-        rows
-    )
+    report_store.store_rows(course_id, filename, rows, compress=compress)
     tracker.emit(REPORT_REQUESTED_EVENT_NAME, {"report_type": csv_name, })
 
 
@@ -691,7 +912,147 @@ def upload_exec_summary_to_store(data_dict, report_name, course_id, generated_at
     tracker.emit(REPORT_REQUESTED_EVENT_NAME, {"report_type": report_name})
 
 
-def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):  # pylint: disable=too-many-statements
+class _GradeReportContext(object):
+    """
+    Course-wide data needed to compute the rows of a course's grade
+    report, shared by the rows of all its students.
+    """
+    def __init__(self, course_id):
+        self.course_id = course_id
+        self.course = get_course_by_id(course_id)
+        self.course_is_cohorted = is_course_cohorted(self.course.id)
+        self.teams_enabled = self.course.teams_enabled
+        self.experiment_partitions = get_split_user_partitions(self.course.user_partitions)
+        certificate_whitelist = CertificateWhitelist.objects.filter(course_id=course_id, whitelist=True)
+        self.whitelisted_user_ids = [entry.user_id for entry in certificate_whitelist]
+        self.graded_assignments = _graded_assignments(course_id)
+
+    @property
+    def header(self):
+        """
+        Returns the header row of the grade report.
+        """
+        cohorts_header = ['Cohort Name'] if self.course_is_cohorted else []
+        teams_header = ['Team Name'] if self.teams_enabled else []
+        group_configs_header = [
+            u'Experiment Group ({})'.format(partition.name) for partition in self.experiment_partitions
+        ]
+        certificate_info_header = ['Certificate Eligible', 'Certificate Delivered', 'Certificate Type']
+
+        grade_header = []
+        for assignment_info in self.graded_assignments.itervalues():
+            if assignment_info['use_subsection_headers']:
+                grade_header.extend(assignment_info['subsection_headers'].itervalues())
+            grade_header.append(assignment_info['average_header'])
+
+        return (
+            ["Student ID", "Email", "Username", "Grade"] +
+            grade_header +
+            cohorts_header +
+            group_configs_header +
+            teams_header +
+            ['Enrollment Track', 'Verification Status'] +
+            certificate_info_header
+        )
+
+    def iter_rows(self, students, task_progress, task_info_string, current_step):
+        """
+        Grades the given students, yielding a (row, err_row) tuple for each
+        of them, where exactly one of row and err_row is not None.
+
+        Arguments:
+            students: iterable of the users to grade.
+            task_progress (TaskProgress): counts the attempted, succeeded
+                and failed students.
+            task_info_string: prefix of the log messages.
+            current_step: dict describing the current step of the task.
+        """
+        course_id = self.course_id
+        for student, course_grade, err_msg in CourseGradeFactory().iter(self.course, students):
+            task_progress.attempted += 1
+
+            # Now add a log entry after each student is graded to get a sense
+            # of the task's progress
+            TASK_LOG.info(
+                u'%s, Task type: %s, Current step: %s, Grade calculation in-progress for students: %s/%s',
+                task_info_string,
+                task_progress.action_name,
+                current_step,
+                task_progress.attempted,
+                task_progress.total
+            )
+
+            if not course_grade:
+                # An empty gradeset means we failed to grade a student.
+                task_progress.failed += 1
+                yield None, [student.id, student.username, err_msg]
+                continue
+
+            # We were able to successfully grade this student for this course.
+            task_progress.succeeded += 1
+
+            cohorts_group_name = []
+            if self.course_is_cohorted:
+                group = get_cohort(student, course_id, assign=False)
+                cohorts_group_name.append(group.name if group else '')
+
+            group_configs_group_names = []
+            for partition in self.experiment_partitions:
+                group = LmsPartitionService(student, course_id).get_group(partition, assign=False)
+                group_configs_group_names.append(group.name if group else '')
+
+            team_name = []
+            if self.teams_enabled:
+                try:
+                    membership = CourseTeamMembership.objects.get(user=student, team__course_id=course_id)
+                    team_name.append(membership.team.name)
+                except CourseTeamMembership.DoesNotExist:
+                    team_name.append('')
+
+            enrollment_mode = CourseEnrollment.enrollment_mode_for_user(student, course_id)[0]
+            verification_status = SoftwareSecurePhotoVerification.verification_status_for_user(
+                student,
+                course_id,
+                enrollment_mode
+            )
+            certificate_info = certificate_info_for_user(
+                student,
+                course_id,
+                course_grade.letter_grade,
+                student.id in self.whitelisted_user_ids
+            )
+
+            grade_results = []
+            for assignment_type, assignment_info in self.graded_assignments.iteritems():
+                for subsection_location in assignment_info['subsection_headers']:
+                    try:
+                        subsections_by_location = course_grade.graded_subsections_by_format[assignment_type]
+                        subsection_grade = subsections_by_location[subsection_location]
+                    except KeyError:
+                        grade_results.append([u'Not Available'])
+                    else:
+                        if subsection_grade.graded_total.attempted:
+                            grade_results.append(
+                                [subsection_grade.graded_total.earned / subsection_grade.graded_total.possible]
+                            )
+                        else:
+                            grade_results.append([u'Not Attempted'])
+                if assignment_info['use_subsection_headers']:
+                    assignment_average = course_grade.grade_value['grade_breakdown'].get(
+                        assignment_type, {}
+                    ).get('percent')
+                    grade_results.append([assignment_average])
+
+            grade_results = list(chain.from_iterable(grade_results))
+
+            yield (
+                [student.id, student.email, student.username, course_grade.percent] +
+                grade_results + cohorts_group_name + group_configs_group_names + team_name +
+                [enrollment_mode] + [verification_status] + certificate_info
+            ), None
+
+
+def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
     """
     For a given `course_id`, generate a grades CSV file for all students that
     are enrolled, and store using a `ReportStore`. Once created, the files can
@@ -700,6 +1061,12 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     buffered, so we'll never write part of a CSV file to S3 -- i.e. any files
     that are visible in ReportStore will be complete ones.
 
+    If the course has more enrolled students than the
+    GRADE_REPORT_STUDENTS_PER_TASK setting, the students are instead split
+    into chunks that are graded in parallel by subtasks (see
+    `upload_grades_csv_chunk`), so that the memory used by any one task is
+    bounded regardless of the size of the course.
+
     As we start to add more CSV downloads, it will probably be worthwhile to
     make a more general CSVDoc class instead of building out the rows like we
     do here.
@@ -720,25 +1087,25 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     )
     TASK_LOG.info(u'%s, Task type: %s, Starting task execution', task_info_string, action_name)
 
-    course = get_course_by_id(course_id)
-    course_is_cohorted = is_course_cohorted(course.id)
-    teams_enabled = course.teams_enabled
-    cohorts_header = ['Cohort Name'] if course_is_cohorted else []
-    teams_header = ['Team Name'] if teams_enabled else []
-
-    experiment_partitions = get_split_user_partitions(course.user_partitions)
-    group_configs_header = [u'Experiment Group ({})'.format(partition.name) for partition in experiment_partitions]
+    students_per_task = settings.GRADE_REPORT_STUDENTS_PER_TASK
+    if _entry_id is not None and 0 < students_per_task < total_enrolled_students:
+        TASK_LOG.info(
+            u'%s, Task type: %s, Queueing grade calculation subtasks for total students: %s',
+            task_info_string,
+            action_name,
+            total_enrolled_students,
+        )
+        return _queue_grade_report_subtasks(
+            _entry_id, _xmodule_instance_args, action_name, enrolled_students, total_enrolled_students,
+        )
 
-    certificate_info_header = ['Certificate Eligible', 'Certificate Delivered', 'Certificate Type']
-    certificate_whitelist = CertificateWhitelist.objects.filter(course_id=course_id, whitelist=True)
-    whitelisted_user_ids = [entry.user_id for entry in certificate_whitelist]
+    report_context = _GradeReportContext(course_id)
 
     # Loop over all our students and build our CSV lists in memory
-    rows = []
-    err_rows = [["id", "username", "error_msg"]]
+    rows = [report_context.header]
+    err_rows = [GRADE_REPORT_ERR_HEADER]
     current_step = {'step': 'Calculating Grades'}
 
-    student_counter = 0
     TASK_LOG.info(
         u'%s, Task type: %s, Current step: %s, Starting grade calculation for total students: %s',
         task_info_string,
@@ -747,113 +1114,23 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
         total_enrolled_students,
     )
 
-    graded_assignments = _graded_assignments(course_id)
-    grade_header = []
-    for assignment_info in graded_assignments.itervalues():
-        if assignment_info['use_subsection_headers']:
-            grade_header.extend(assignment_info['subsection_headers'].itervalues())
-        grade_header.append(assignment_info['average_header'])
-
-    rows.append(
-        ["Student ID", "Email", "Username", "Grade"] +
-        grade_header +
-        cohorts_header +
-        group_configs_header +
-        teams_header +
-        ['Enrollment Track', 'Verification Status'] +
-        certificate_info_header
-    )
+    task_progress.update_task_state(extra_meta=current_step)
+    for row, err_row in report_context.iter_rows(enrolled_students, task_progress, task_info_string, current_step):
+        if row is not None:
+            rows.append(row)
+        else:
+            err_rows.append(err_row)
 
-    for student, course_grade, err_msg in CourseGradeFactory().iter(course, enrolled_students):
         # Periodically update task status (this is a cache write)
         if task_progress.attempted % status_interval == 0:
             task_progress.update_task_state(extra_meta=current_step)
-        task_progress.attempted += 1
-
-        # Now add a log entry after each student is graded to get a sense
-        # of the task's progress
-        student_counter += 1
-        TASK_LOG.info(
-            u'%s, Task type: %s, Current step: %s, Grade calculation in-progress for students: %s/%s',
-            task_info_string,
-            action_name,
-            current_step,
-            student_counter,
-            total_enrolled_students
-        )
-
-        if not course_grade:
-            # An empty gradeset means we failed to grade a student.
-            task_progress.failed += 1
-            err_rows.append([student.id, student.username, err_msg])
-            continue
-
-        # We were able to successfully grade this student for this course.
-        task_progress.succeeded += 1
-
-        cohorts_group_name = []
-        if course_is_cohorted:
-            group = get_cohort(student, course_id, assign=False)
-            cohorts_group_name.append(group.name if group else '')
-
-        group_configs_group_names = []
-        for partition in experiment_partitions:
-            group = LmsPartitionService(student, course_id).get_group(partition, assign=False)
-            group_configs_group_names.append(group.name if group else '')
-
-        team_name = []
-        if teams_enabled:
-            try:
-                membership = CourseTeamMembership.objects.get(user=student, team__course_id=course_id)
-                team_name.append(membership.team.name)
-            except CourseTeamMembership.DoesNotExist:
-                team_name.append('')
-
-        enrollment_mode = CourseEnrollment.enrollment_mode_for_user(student, course_id)[0]
-        verification_status = SoftwareSecurePhotoVerification.verification_status_for_user(
-            student,
-            course_id,
-            enrollment_mode
-        )
-        certificate_info = certificate_info_for_user(
-            student,
-            course_id,
-            course_grade.letter_grade,
-            student.id in whitelisted_user_ids
-        )
-
-        grade_results = []
-        for assignment_type, assignment_info in graded_assignments.iteritems():
-            for subsection_location in assignment_info['subsection_headers']:
-                try:
-                    subsection_grade = course_grade.graded_subsections_by_format[assignment_type][subsection_location]
-                except KeyError:
-                    grade_results.append([u'Not Available'])
-                else:
-                    if subsection_grade.graded_total.attempted:
-                        grade_results.append(
-                            [subsection_grade.graded_total.earned / subsection_grade.graded_total.possible]
-                        )
-                    else:
-                        grade_results.append([u'Not Attempted'])
-            if assignment_info['use_subsection_headers']:
-                assignment_average = course_grade.grade_value['grade_breakdown'].get(assignment_type, {}).get('percent')
-                grade_results.append([assignment_average])
-
-        grade_results = list(chain.from_iterable(grade_results))
-
-        rows.append(
-            [student.id, student.email, student.username, course_grade.percent] +
-            grade_results + cohorts_group_name + group_configs_group_names + team_name +
-            [enrollment_mode] + [verification_status] + certificate_info
-        )
 
     TASK_LOG.info(
         u'%s, Task type: %s, Current step: %s, Grade calculation completed for students: %s/%s',
         task_info_string,
         action_name,
         current_step,
-        student_counter,
+        task_progress.attempted,
         total_enrolled_students
     )
 
@@ -874,6 +1151,200 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     return task_progress.update_task_state(extra_meta=current_step)
 
 
+def _queue_grade_report_subtasks(entry_id, xmodule_instance_args, action_name, enrolled_students, total_num_students):
+    """
+    Splits the enrolled students into chunks of GRADE_REPORT_STUDENTS_PER_TASK
+    students, and queues a subtask to grade each chunk.
+
+    Returns the progress of the InstructorTask entry.
+    """
+    # Imported here since the tasks module itself imports this one.
+    from lms.djangoapps.instructor_task.tasks import calculate_grades_csv_chunk
+
+    entry = InstructorTask.objects.get(pk=entry_id)
+
+    # If the subtasks have already been queued (for instance, when the
+    # parent task is retried), don't queue them again.
+    if entry.subtasks and json.loads(entry.subtasks).get('total', 0) > 0:
+        TASK_LOG.warning(u"Task %s: grade report subtasks already queued for entry %s", entry.task_id, entry_id)
+        return json.loads(entry.task_output)
+
+    chunk_indices = count()
+
+    def _create_grade_report_subtask(student_list, initial_subtask_status):
+        """Creates the subtask grading the given students."""
+        return calculate_grades_csv_chunk.subtask(
+            (
+                entry_id,
+                xmodule_instance_args,
+                action_name,
+                next(chunk_indices),
+                [student['pk'] for student in student_list],
+                initial_subtask_status.to_dict(),
+            ),
+            task_id=initial_subtask_status.task_id,
+            routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+        )
+
+    return queue_subtasks_for_query(
+        entry,
+        action_name,
+        _create_grade_report_subtask,
+        [enrolled_students],
+        [],
+        settings.GRADE_REPORT_STUDENTS_PER_TASK,
+        total_num_students,
+    )
+
+
+def _grade_report_part_filename(task_id, csv_name, chunk_index):
+    """
+    Returns the name of the partial CSV file in which the given chunk of
+    the report of the given task is stored. The partial files live in a
+    subdirectory of the course, so they aren't listed with its reports.
+    """
+    return u"parts/{task_id}/{csv_name}_{chunk_index:05d}.csv".format(
+        task_id=task_id,
+        csv_name=csv_name,
+        chunk_index=chunk_index,
+    )
+
+
+def upload_grades_csv_chunk(entry_id, xmodule_instance_args, action_name, chunk_index, student_ids,
+                            subtask_status_dict):
+    """
+    Grades a chunk of the students enrolled in a course, as a subtask of
+    `upload_grades_csv`, and stores their rows as partial CSV files. The
+    subtask that completes the last chunk merges all the partial files
+    into the final reports.
+
+    Arguments:
+        entry_id: primary key of the parent InstructorTask entry.
+        xmodule_instance_args: the parent task's xmodule_instance_args.
+        action_name: the parent task's action name.
+        chunk_index: position of the chunk in the report.
+        student_ids: ids of the students of the chunk, in report order.
+        subtask_status_dict: the initial SubtaskStatus of the subtask,
+            as a dict.
+
+    Returns:
+        The final SubtaskStatus of the subtask, as a dict.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    entry = InstructorTask.objects.get(pk=entry_id)
+    course_id = entry.course_id
+    task_progress = TaskProgress(action_name, len(student_ids), time())
+    current_step = {'step': 'Calculating Grades'}
+
+    fmt = u'Task: {task_id}, InstructorTask ID: {entry_id}, Course: {course_id}, Chunk: {chunk_index}'
+    task_info_string = fmt.format(
+        task_id=current_task_id,
+        entry_id=entry_id,
+        course_id=course_id,
+        chunk_index=chunk_index,
+    )
+    TASK_LOG.info(u'%s, Task type: %s, Starting subtask execution', task_info_string, action_name)
+
+    try:
+        students_by_id = User.objects.in_bulk(student_ids)
+        students = [students_by_id[student_id] for student_id in student_ids if student_id in students_by_id]
+        report_context = _GradeReportContext(course_id)
+
+        # The rows are written to the partial files as they are produced.
+        report_store = ReportStore.from_config('GRADES_DOWNLOAD')
+        rows_filename = _grade_report_part_filename(entry.task_id, 'grade_report', chunk_index)
+        err_rows_filename = _grade_report_part_filename(entry.task_id, 'grade_report_err', chunk_index)
+        with report_store.rows_writer(course_id, rows_filename) as write_row:
+            with report_store.rows_writer(course_id, err_rows_filename) as write_err_row:
+                # Only the first chunk carries the headers of the reports.
+                if chunk_index == 0:
+                    write_row(report_context.header)
+                    write_err_row(GRADE_REPORT_ERR_HEADER)
+                rows = report_context.iter_rows(students, task_progress, task_info_string, current_step)
+                for row, err_row in rows:
+                    if row is not None:
+                        write_row(row)
+                    else:
+                        write_err_row(err_row)
+    except Exception:
+        TASK_LOG.exception(u'%s, Task type: %s, Subtask failed', task_info_string, action_name)
+        subtask_status.increment(failed=len(student_ids), state=FAILURE)
+        if update_subtask_status(entry_id, current_task_id, subtask_status, mark_succeeded=False):
+            _merge_grade_report_parts(entry_id)
+        raise
+
+    subtask_status.increment(
+        succeeded=task_progress.succeeded,
+        failed=task_progress.failed,
+        skipped=len(student_ids) - len(students),
+        state=SUCCESS,
+    )
+    TASK_LOG.info(
+        u'%s, Task type: %s, Subtask completed for students: %s/%s',
+        task_info_string,
+        action_name,
+        task_progress.attempted,
+        task_progress.total,
+    )
+    if update_subtask_status(entry_id, current_task_id, subtask_status, mark_succeeded=False):
+        _merge_grade_report_parts(entry_id)
+    return subtask_status.to_dict()
+
+
+def _merge_grade_report_parts(entry_id):
+    """
+    Assembles the final grade reports of the given InstructorTask entry
+    from the partial CSV files stored by its subtasks, once they have all
+    completed, and then deletes the partial files.
+
+    The entry is marked as succeeded once the reports are stored. If any
+    of the subtasks failed, or the reports can't be assembled, no report
+    is stored and the entry is marked as failed.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+    course_id = entry.course_id
+    subtask_dict = json.loads(entry.subtasks)
+    task_output = json.loads(entry.task_output)
+    num_parts = subtask_dict['total']
+    report_store = ReportStore.from_config('GRADES_DOWNLOAD')
+
+    try:
+        if subtask_dict['failed']:
+            raise GradeReportSubtaskError(
+                u"{failed} of {total} grade report subtasks failed".format(**subtask_dict)
+            )
+
+        csv_names = ['grade_report']
+        # If any students failed to be graded, write out their errors as well.
+        if task_output.get('failed'):
+            csv_names.append('grade_report_err')
+
+        for csv_name in csv_names:
+            with TemporaryFile() as report_file:
+                for chunk_index in xrange(num_parts):
+                    part_filename = _grade_report_part_filename(entry.task_id, csv_name, chunk_index)
+                    with report_store.open(course_id, part_filename) as part_file:
+                        shutil.copyfileobj(part_file, report_file)
+                report_file.seek(0)
+                report_store.store(course_id, _report_csv_filename(csv_name, course_id, entry.created), report_file)
+            tracker.emit(REPORT_REQUESTED_EVENT_NAME, {"report_type": csv_name, })
+        TASK_LOG.info(u'Task %s: merged %s grade report parts', entry.task_id, num_parts)
+        entry.task_state = SUCCESS
+        entry.save_now()
+    except Exception as exc:
+        TASK_LOG.exception(u'Task %s: failed to assemble the grade reports', entry.task_id)
+        entry.task_output = InstructorTask.create_output_for_failure(exc, traceback.format_exc())
+        entry.task_state = FAILURE
+        entry.save_now()
+    finally:
+        for chunk_index in xrange(num_parts):
+            for csv_name in ('grade_report', 'grade_report_err'):
+                report_store.delete(course_id, _grade_report_part_filename(entry.task_id, csv_name, chunk_index))
+
+
 def _graded_assignments(course_key):
     """
     Returns an OrderedDict that maps an assignment type to a dict of subsection-headers and average-header.
@@ -935,6 +1406,7 @@ def upload_problem_responses_csv(_xmodule_instance_args, _entry_id, course_id, t
     """
     For a given `course_id`, generate a CSV file containing
     all student answers to a given problem, and store using a `ReportStore`.
+    The rows are streamed to the `ReportStore` as they are queried.
     """
     start_time = time()
     start_date = datetime.now(UTC)
@@ -945,14 +1417,9 @@ def upload_problem_responses_csv(_xmodule_instance_args, _entry_id, course_id, t
 
     # Compute result table and format it
     problem_location = task_input.get('problem_location')
-    student_data = list_problem_responses(course_id, problem_location)
+    student_data = iter_problem_responses(course_id, problem_location)
     features = ['username', 'state']
-    header, rows = format_dictlist(student_data, features)
-
-    task_progress.attempted = task_progress.succeeded = len(rows)
-    task_progress.skipped = task_progress.total - task_progress.attempted
-
-    rows.insert(0, header)
+    header, rows = format_dictlist(student_data, features, as_generator=True)
 
     current_step = {'step': 'Uploading CSV'}
     task_progress.update_task_state(extra_meta=current_step)
@@ -960,11 +1427,23 @@ def upload_problem_responses_csv(_xmodule_instance_args, _entry_id, course_id, t
     # Perform the upload
     problem_location = re.sub(r'[:/]', '_', problem_location)
     csv_name = 'student_state_from_{}'.format(problem_location)
-    upload_csv_to_report_store(rows, csv_name, course_id, start_date)
+    upload_csv_to_report_store(chain([header], _count_rows(rows, task_progress)), csv_name, course_id, start_date)
 
+    task_progress.skipped = task_progress.total - task_progress.attempted
     return task_progress.update_task_state(extra_meta=current_step)
 
 
+def _count_rows(rows, task_progress):
+    """
+    Yields the given rows, counting them as attempted and succeeded in
+    `task_progress`.
+    """
+    for row in rows:
+        task_progress.attempted += 1
+        task_progress.succeeded += 1
+        yield row
+
+
 def upload_problem_grade_report(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
     """
     Generate a CSV containing all students' problem grades within a given
@@ -1033,7 +1512,8 @@ def upload_students_csv(_xmodule_instance_args, _entry_id, course_id, task_input
     """
     For a given `course_id`, generate a CSV file containing profile
     information for all students that are enrolled, and store using a
-    `ReportStore`.
+    `ReportStore`. The rows are streamed to the `ReportStore` as they are
+    computed.
     """
     start_time = time()
     start_date = datetime.now(UTC)
@@ -1045,20 +1525,18 @@ def upload_students_csv(_xmodule_instance_args, _entry_id, course_id, task_input
 
     # compute the student features table and format it
     query_features = task_input
-    student_data = enrolled_students_features(course_id, query_features)
-    header, rows = format_dictlist(student_data, query_features)
-
-    task_progress.attempted = task_progress.succeeded = len(rows)
-    task_progress.skipped = task_progress.total - task_progress.attempted
-
-    rows.insert(0, header)
+    student_data = iter_enrolled_students_features(course_id, query_features)
+    header, rows = format_dictlist(student_data, query_features, as_generator=True)
 
     current_step = {'step': 'Uploading CSV'}
     task_progress.update_task_state(extra_meta=current_step)
 
     # Perform the upload
-    upload_csv_to_report_store(rows, 'student_profile_info', course_id, start_date)
+    upload_csv_to_report_store(
+        chain([header], _count_rows(rows, task_progress)), 'student_profile_info', course_id, start_date
+    )
 
+    task_progress.skipped = task_progress.total - task_progress.attempted
     return task_progress.update_task_state(extra_meta=current_step)
 
 
@@ -1066,13 +1544,14 @@ def upload_enrollment_report(_xmodule_instance_args, _entry_id, course_id, _task
     """
     For a given `course_id`, generate a CSV file containing profile
     information for all students that are enrolled, and store using a
-    `ReportStore`.
+    `ReportStore`. The rows are streamed to the `ReportStore` as they are
+    computed.
     """
     start_time = time()
     start_date = datetime.now(UTC)
-    status_interval = 100
     students_in_course = CourseEnrollment.objects.enrolled_and_dropped_out_users(course_id)
-    task_progress = TaskProgress(action_name, students_in_course.count(), start_time)
+    total_students = students_in_course.count()
+    task_progress = TaskProgress(action_name, total_students, start_time)
 
     fmt = u'Task: {task_id}, InstructorTask ID: {entry_id}, Course: {course_id}, Input: {task_input}'
     task_info_string = fmt.format(
@@ -1083,13 +1562,7 @@ def upload_enrollment_report(_xmodule_instance_args, _entry_id, course_id, _task
     )
     TASK_LOG.info(u'%s, Task type: %s, Starting task execution', task_info_string, action_name)
 
-    # Loop over all our students and build our CSV lists in memory
-    rows = []
-    header = None
     current_step = {'step': 'Gathering Profile Information'}
-    enrollment_report_provider = PaidCourseEnrollmentReportProvider()
-    total_students = students_in_course.count()
-    student_counter = 0
     TASK_LOG.info(
         u'%s, Task type: %s, Current step: %s, generating detailed enrollment report for total students: %s',
         task_info_string,
@@ -1098,90 +1571,98 @@ def upload_enrollment_report(_xmodule_instance_args, _entry_id, course_id, _task
         total_students
     )
 
-    for student in students_in_course:
+    # Gather the profile of each student while the rows are uploaded
+    rows = _enrollment_report_rows(
+        students_in_course.iterator(), course_id, task_progress, task_info_string, current_step
+    )
+    upload_csv_to_report_store(rows, 'enrollment_report', course_id, start_date, config_name='FINANCIAL_REPORTS')
+
+    TASK_LOG.info(
+        u'%s, Task type: %s, Current step: %s, Detailed enrollment report generated for students: %s/%s',
+        task_info_string,
+        action_name,
+        current_step,
+        task_progress.attempted,
+        total_students
+    )
+
+    # One last update before we close out...
+    current_step = {'step': 'Uploading CSVs'}
+    TASK_LOG.info(u'%s, Task type: %s, Finalizing detailed enrollment task', task_info_string, action_name)
+    return task_progress.update_task_state(extra_meta=current_step)
+
+
+def _enrollment_report_rows(students, course_id, task_progress, task_info_string, current_step):
+    """
+    Yields the header and then the rows of the detailed enrollment report
+    of the given students, updating `task_progress` along the way.
+    """
+    status_interval = 100
+    enrollment_report_provider = PaidCourseEnrollmentReportProvider()
+
+    # display name map for the column headers
+    enrollment_report_headers = {
+        'User ID': _('User ID'),
+        'Username': _('Username'),
+        'Full Name': _('Full Name'),
+        'First Name': _('First Name'),
+        'Last Name': _('Last Name'),
+        'Company Name': _('Company Name'),
+        'Title': _('Title'),
+        'Language': _('Language'),
+        'Year of Birth': _('Year of Birth'),
+        'Gender': _('Gender'),
+        'Level of Education': _('Level of Education'),
+        'Mailing Address': _('Mailing Address'),
+        'Goals': _('Goals'),
+        'City': _('City'),
+        'Country': _('Country'),
+        'Enrollment Date': _('Enrollment Date'),
+        'Currently Enrolled': _('Currently Enrolled'),
+        'Enrollment Source': _('Enrollment Source'),
+        'Manual (Un)Enrollment Reason': _('Manual (Un)Enrollment Reason'),
+        'Enrollment Role': _('Enrollment Role'),
+        'List Price': _('List Price'),
+        'Payment Amount': _('Payment Amount'),
+        'Coupon Codes Used': _('Coupon Codes Used'),
+        'Registration Code Used': _('Registration Code Used'),
+        'Payment Status': _('Payment Status'),
+        'Transaction Reference Number': _('Transaction Reference Number')
+    }
+
+    header = None
+    for student in students:
         # Periodically update task status (this is a cache write)
         if task_progress.attempted % status_interval == 0:
             task_progress.update_task_state(extra_meta=current_step)
         task_progress.attempted += 1
 
         # Now add a log entry after certain intervals to get a hint that task is in progress
-        student_counter += 1
-        if student_counter % 100 == 0:
+        if task_progress.attempted % 100 == 0:
             TASK_LOG.info(
                 u'%s, Task type: %s, Current step: %s, gathering enrollment profile for students in progress: %s/%s',
                 task_info_string,
-                action_name,
+                task_progress.action_name,
                 current_step,
-                student_counter,
-                total_students
+                task_progress.attempted,
+                task_progress.total
             )
 
         user_data = enrollment_report_provider.get_user_profile(student.id)
         course_enrollment_data = enrollment_report_provider.get_enrollment_info(student, course_id)
         payment_data = enrollment_report_provider.get_payment_info(student, course_id)
 
-        # display name map for the column headers
-        enrollment_report_headers = {
-            'User ID': _('User ID'),
-            'Username': _('Username'),
-            'Full Name': _('Full Name'),
-            'First Name': _('First Name'),
-            'Last Name': _('Last Name'),
-            'Company Name': _('Company Name'),
-            'Title': _('Title'),
-            'Language': _('Language'),
-            'Year of Birth': _('Year of Birth'),
-            'Gender': _('Gender'),
-            'Level of Education': _('Level of Education'),
-            'Mailing Address': _('Mailing Address'),
-            'Goals': _('Goals'),
-            'City': _('City'),
-            'Country': _('Country'),
-            'Enrollment Date': _('Enrollment Date'),
-            'Currently Enrolled': _('Currently Enrolled'),
-            'Enrollment Source': _('Enrollment Source'),
-            'Manual (Un)Enrollment Reason': _('Manual (Un)Enrollment Reason'),
-            'Enrollment Role': _('Enrollment Role'),
-            'List Price': _('List Price'),
-            'Payment Amount': _('Payment Amount'),
-            'Coupon Codes Used': _('Coupon Codes Used'),
-            'Registration Code Used': _('Registration Code Used'),
-            'Payment Status': _('Payment Status'),
-            'Transaction Reference Number': _('Transaction Reference Number')
-        }
-
         if not header:
             header = user_data.keys() + course_enrollment_data.keys() + payment_data.keys()
             display_headers = []
             for header_element in header:
                 # translate header into a localizable display string
                 display_headers.append(enrollment_report_headers.get(header_element, header_element))
-            rows.append(display_headers)
+            yield display_headers
 
-        rows.append(user_data.values() + course_enrollment_data.values() + payment_data.values())
+        yield user_data.values() + course_enrollment_data.values() + payment_data.values()
         task_progress.succeeded += 1
 
-    TASK_LOG.info(
-        u'%s, Task type: %s, Current step: %s, Detailed enrollment report generated for students: %s/%s',
-        task_info_string,
-        action_name,
-        current_step,
-        student_counter,
-        total_students
-    )
-
-    # By this point, we've got the rows we're going to stuff into our CSV files.
-    current_step = {'step': 'Uploading CSVs'}
-    task_progress.update_task_state(extra_meta=current_step)
-    TASK_LOG.info(u'%s, Task type: %s, Current step: %s', task_info_string, action_name, current_step)
-
-    # Perform the actual upload
-    upload_csv_to_report_store(rows, 'enrollment_report', course_id, start_date, config_name='FINANCIAL_REPORTS')
-
-    # One last update before we close out...
-    TASK_LOG.info(u'%s, Task type: %s, Finalizing detailed enrollment task', task_info_string, action_name)
-    return task_progress.update_task_state(extra_meta=current_step)
-
 
 def upload_may_enroll_csv(_xmodule_instance_args, _entry_id, course_id, task_input, action_name):
     """
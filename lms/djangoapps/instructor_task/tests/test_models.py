@@ -3,6 +3,7 @@ Tests for instructor_task/models.py.
 """
 import copy
 from cStringIO import StringIO
+from gzip import GzipFile
 import time
 
 import boto
@@ -49,6 +50,32 @@ class ReportStoreTestMixin(object):
             ['new_file', 'middle_file', 'old_file']
         )
 
+    @patch('lms.djangoapps.instructor_task.models.REPORT_SPOOL_MAX_SIZE', 10)
+    def test_store_rows_from_generator(self):
+        """
+        Test that ReportStore.store_rows() writes the rows produced by a
+        generator, even when they don't fit in its in-memory buffer.
+        """
+        report_store = self.create_report_store()
+        rows = ([unicode(index), u'caf\xe9'] for index in range(100))
+        report_store.store_rows(self.course_id, 'report.csv', rows)
+
+        with report_store.storage.open(report_store.path_to(self.course_id, 'report.csv')) as report_file:
+            lines = report_file.read().splitlines()
+        self.assertEqual(len(lines), 100)
+        self.assertEqual(lines[-1], u'99,caf\xe9'.encode('utf-8'))
+
+    def test_store_rows_compressed(self):
+        """
+        Test that ReportStore.store_rows() gzips the rows when asked to.
+        """
+        report_store = self.create_report_store()
+        report_store.store_rows(self.course_id, 'report.csv.gz', [['a', 'b'], ['c', 'd']], compress=True)
+
+        with report_store.storage.open(report_store.path_to(self.course_id, 'report.csv.gz')) as report_file:
+            content = GzipFile(fileobj=StringIO(report_file.read())).read()
+        self.assertEqual(content, 'a,b\r\nc,d\r\n')
+
 
 class LocalFSReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, SimpleTestCase):
     """
@@ -12,6 +12,9 @@ from mock import Mock, MagicMock, patch
 from nose.plugins.attrib import attr
 
 from celery.states import SUCCESS, FAILURE
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.utils.translation import ugettext_noop
 from functools import partial
 
@@ -33,6 +36,7 @@ from lms.djangoapps.instructor_task.tasks import (
     export_ora2_data,
 )
 from lms.djangoapps.instructor_task.tasks_helper import (
+    FIELD_DATA_PREFETCH_BATCH_SIZE,
     UpdateProblemModuleStateError,
     upload_ora2_data,
 )
@@ -330,6 +334,100 @@ class TestRescoreInstructorTask(TestInstructorTasks):
             action_name='rescored'
         )
 
+    def test_rescoring_field_data_queries(self):
+        """
+        Tests that the field data of the students is loaded in batches when
+        rescoring a problem for many students.
+        """
+        num_students = 1000
+        self.define_option_problem(PROBLEM_URL_NAME)
+        User.objects.bulk_create([
+            User(username='robot%d' % i, email='robot+test+%d@edx.org' % i)
+            for i in xrange(num_students)
+        ])
+        StudentModule.objects.bulk_create([
+            StudentModule(
+                course_id=self.course.id,
+                module_state_key=self.location,
+                module_type='problem',
+                student=student,
+                state=json.dumps({'done': True}),
+            )
+            for student in User.objects.filter(username__startswith='robot')
+        ])
+        task_entry = self._create_input_entry()
+        mock_instance = Mock()
+        mock_instance.rescore_problem = Mock(
+            return_value={
+                'success': 'correct',
+                'new_raw_earned': 1,
+                'new_raw_possible': 1,
+            }
+        )
+        with patch('lms.djangoapps.instructor_task.tasks_helper.get_module_for_descriptor_internal') as mock_get_module:
+            mock_get_module.return_value = mock_instance
+            with CaptureQueriesContext(connection) as captured_queries:
+                self._run_task_with_mock_celery(rescore_problem, task_entry.id, task_entry.task_id)
+
+        self.assert_task_output(
+            output=self.get_task_output(task_entry.id),
+            total=num_students,
+            attempted=num_students,
+            succeeded=num_students,
+            skipped=0,
+            failed=0,
+            action_name='rescored'
+        )
+        # The modules to rescore are counted, and then loaded along with their
+        # students, and the field data of each batch of students is loaded by a
+        # single query, rather than one query per student.
+        student_module_queries = [
+            query for query in captured_queries.captured_queries
+            if query['sql'].startswith('SELECT') and 'courseware_studentmodule' in query['sql']
+        ]
+        self.assertEqual(len(student_module_queries), 2 + num_students / FIELD_DATA_PREFETCH_BATCH_SIZE)
+
+    @override_settings(INSTRUCTOR_TASK_MODULES_PER_SUBTASK=3)
+    def test_rescoring_in_subtasks(self):
+        """
+        Tests that a problem is rescored by subtasks when there are more
+        student modules than INSTRUCTOR_TASK_MODULES_PER_SUBTASK, and that
+        their results are added up in the progress of the task.
+        """
+        num_students = 10
+        self.define_option_problem(PROBLEM_URL_NAME)
+        for _ in xrange(num_students):
+            StudentModuleFactory.create(
+                course_id=self.course.id,
+                module_state_key=self.location,
+                student=UserFactory.create(),
+                state=json.dumps({'done': True}),
+            )
+        task_entry = self._create_input_entry()
+        mock_instance = Mock()
+        mock_instance.rescore_problem = Mock(
+            return_value={
+                'success': 'correct',
+                'new_raw_earned': 1,
+                'new_raw_possible': 1,
+            }
+        )
+        with patch('lms.djangoapps.instructor_task.tasks_helper.get_module_for_descriptor_internal') as mock_get_module:
+            mock_get_module.return_value = mock_instance
+            self._run_task_with_mock_celery(rescore_problem, task_entry.id, task_entry.task_id)
+
+        self.assertEqual(mock_instance.rescore_problem.call_count, num_students)
+        entry = InstructorTask.objects.get(id=task_entry.id)
+        self.assertEqual(entry.task_state, SUCCESS)
+        subtasks = json.loads(entry.subtasks)
+        self.assertEqual(subtasks['total'], 4)
+        self.assertEqual(subtasks['succeeded'], 4)
+        output = json.loads(entry.task_output)
+        self.assertEqual(output['attempted'], num_students)
+        self.assertEqual(output['succeeded'], num_students)
+        self.assertEqual(output['failed'], 0)
+        self.assertEqual(output['skipped'], 0)
+
     def test_rescoring_bad_result(self):
         """
         Tests and confirm that rescoring does not succeed if "success" key is not an expected value.
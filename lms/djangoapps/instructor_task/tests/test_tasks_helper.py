@@ -8,12 +8,16 @@ Unit tests for LMS instructor-initiated background tasks helper functions.
 
 """
 
+import json
 import os
 import shutil
 from datetime import datetime
 import urllib
 
+from uuid import uuid4
+
 import ddt
+from celery.states import FAILURE, SUCCESS
 from freezegun import freeze_time
 from mock import Mock, patch, MagicMock
 from nose.plugins.attrib import attr
@@ -48,7 +52,8 @@ from student.models import CourseEnrollment, CourseEnrollmentAllowed, ManualEnro
 from lms.djangoapps.verify_student.tests.factories import SoftwareSecurePhotoVerificationFactory
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.partitions.partitions import Group, UserPartition
-from lms.djangoapps.instructor_task.models import ReportStore
+from lms.djangoapps.instructor_task.models import InstructorTask, ReportStore, PROGRESS
+from lms.djangoapps.instructor_task.tests.factories import InstructorTaskFactory
 from survey.models import SurveyForm, SurveyAnswer
 from lms.djangoapps.instructor_task.tasks_helper import (
     cohort_students_and_upload,
@@ -130,6 +135,97 @@ class TestInstructorGradeReport(InstructorGradeReportTestCase):
         report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
         self.assertTrue(any('grade_report_err' in item[0] for item in report_store.links_for(self.course.id)))
 
+    def _create_grade_report_entry(self):
+        """
+        Returns an InstructorTask entry for a grade report of the course.
+        """
+        return InstructorTaskFactory.create(
+            task_type='grade_course',
+            course_id=self.course.id,
+            task_id=str(uuid4()),
+            task_state=PROGRESS,
+        )
+
+    @override_settings(GRADE_REPORT_STUDENTS_PER_TASK=2)
+    @patch('lms.djangoapps.instructor_task.tasks_helper._get_current_task')
+    def test_grade_report_subtasks(self, _mock_current_task):
+        """
+        Test that the grade report of a course with more students than
+        GRADE_REPORT_STUDENTS_PER_TASK is assembled from its subtasks.
+        """
+        usernames = [u'student{}'.format(index) for index in range(5)]
+        for username in usernames:
+            self.create_student(username)
+        entry = self._create_grade_report_entry()
+
+        upload_grades_csv(None, entry.id, self.course.id, None, 'graded')
+
+        entry = InstructorTask.objects.get(pk=entry.id)
+        self.assertEqual(entry.task_state, SUCCESS)
+        self.assertDictContainsSubset({'attempted': 5, 'succeeded': 5, 'failed': 0}, json.loads(entry.task_output))
+        self.assertDictContainsSubset({'total': 3, 'succeeded': 3, 'failed': 0}, json.loads(entry.subtasks))
+
+        # Only the merged report is left, without any of the partial files.
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        links = report_store.links_for(self.course.id)
+        self.assertEqual(len(links), 1)
+        self.assertIn('grade_report', links[0][0])
+        part_filename = u'parts/{}/grade_report_00000.csv'.format(entry.task_id)
+        self.assertFalse(report_store.storage.exists(report_store.path_to(self.course.id, part_filename)))
+
+        with report_store.storage.open(report_store.path_to(self.course.id, links[0][0])) as csv_file:
+            rows = list(unicodecsv.DictReader(csv_file))
+        self.assertItemsEqual([row['Username'] for row in rows], usernames)
+
+    @override_settings(GRADE_REPORT_STUDENTS_PER_TASK=2)
+    @patch('lms.djangoapps.instructor_task.tasks_helper._get_current_task')
+    @patch('lms.djangoapps.instructor_task.tasks_helper.shutil.copyfileobj')
+    def test_grade_report_merge_failure(self, mock_copyfileobj, _mock_current_task):
+        """
+        Test that the grade report is only marked as succeeded once it has
+        been assembled from the partial files of its subtasks.
+        """
+        entry_states = []
+
+        def copyfileobj(*args):
+            """Records the state of the entry, and fails to merge the parts."""
+            entry_states.append(InstructorTask.objects.get(pk=entry.id).task_state)
+            raise IOError('Cannot merge the parts')
+
+        mock_copyfileobj.side_effect = copyfileobj
+        for index in range(3):
+            self.create_student(u'student{}'.format(index))
+        entry = self._create_grade_report_entry()
+
+        upload_grades_csv(None, entry.id, self.course.id, None, 'graded')
+
+        self.assertEqual(entry_states, [PROGRESS])
+        entry = InstructorTask.objects.get(pk=entry.id)
+        self.assertEqual(entry.task_state, FAILURE)
+        self.assertDictContainsSubset({'total': 2, 'succeeded': 2, 'failed': 0}, json.loads(entry.subtasks))
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        self.assertEqual(report_store.links_for(self.course.id), [])
+
+    @override_settings(GRADE_REPORT_STUDENTS_PER_TASK=2)
+    @patch('lms.djangoapps.instructor_task.tasks_helper._get_current_task')
+    @patch('lms.djangoapps.grades.new.course_grade.CourseGradeFactory.iter')
+    def test_grade_report_subtask_failure(self, mock_grades_iter, _mock_current_task):
+        """
+        Test that no grade report is stored if one of its subtasks fails.
+        """
+        mock_grades_iter.side_effect = Exception('Cannot grade students')
+        for index in range(3):
+            self.create_student(u'student{}'.format(index))
+        entry = self._create_grade_report_entry()
+
+        upload_grades_csv(None, entry.id, self.course.id, None, 'graded')
+
+        entry = InstructorTask.objects.get(pk=entry.id)
+        self.assertEqual(entry.task_state, FAILURE)
+        self.assertDictContainsSubset({'total': 2, 'succeeded': 0, 'failed': 2}, json.loads(entry.subtasks))
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        self.assertEqual(report_store.links_for(self.course.id), [])
+
     def test_cohort_data_in_grading(self):
         """
         Test that cohort data is included in grades csv if cohort configuration is enabled for course.
@@ -361,7 +457,7 @@ class TestProblemResponsesReport(TestReportMixin, InstructorTaskCourseTestCase):
     def test_success(self):
         task_input = {'problem_location': ''}
         with patch('lms.djangoapps.instructor_task.tasks_helper._get_current_task'):
-            with patch('lms.djangoapps.instructor_task.tasks_helper.list_problem_responses') as patched_data_source:
+            with patch('lms.djangoapps.instructor_task.tasks_helper.iter_problem_responses') as patched_data_source:
                 patched_data_source.return_value = [
                     {'username': 'user0', 'state': u'state0'},
                     {'username': 'user1', 'state': u'state1'},
@@ -1,21 +1,27 @@
 """
 Module implementing `xblock.runtime.Runtime` functionality for the LMS
 """
+import hashlib
+
 from django.conf import settings
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
+from django.utils.translation import get_language
 
 from badges.service import BadgingService
 from badges.utils import badges_enabled
+from openedx.core.djangoapps.theming.helpers import get_current_site_theme
 from openedx.core.djangoapps.user_api.course_tag import api as user_course_tag_api
 from openedx.core.lib.xblock_utils import xblock_local_resource_url
 from openedx.core.lib.url_utils import quote_slashes
 from request_cache.middleware import RequestCache
 import xblock.reference.plugins
+from xblock.fragment import Fragment
 from xmodule.library_tools import LibraryToolsService
 from xmodule.modulestore.django import modulestore, ModuleI18nService
 from xmodule.partitions.partitions_service import PartitionService
 from xmodule.services import SettingsService
-from xmodule.x_module import ModuleSystem
+from xmodule.x_module import ModuleSystem, STUDENT_VIEW
 
 from lms.djangoapps.lms_xblock.models import XBlockAsidesConfig
 
@@ -144,6 +150,30 @@ class UserTagsService(object):
         )
 
 
+def fragment_cache_key(block):
+    """
+    Returns the key of the cached student_view fragment of the block, or None
+    if the block doesn't render the same fragment for all the users, or its
+    course version isn't known.
+
+    The fragment varies with the course version, and with the language and
+    the theme of the request.
+    """
+    # XModules are rendered in place of their descriptor, which knows the course version
+    course_version = getattr(getattr(block, 'descriptor', block), 'course_version', None)
+    if course_version is None or not getattr(block, 'has_user_independent_student_view', False):
+        return None
+
+    site_theme = get_current_site_theme()
+    key = u'|'.join([
+        unicode(block.scope_ids.usage_id),
+        unicode(course_version),
+        get_language() or u'',
+        site_theme.theme_dir_name if site_theme else u'',
+    ])
+    return u'lms_xblock.fragment.{}'.format(hashlib.md5(key.encode('utf-8')).hexdigest())
+
+
 class LmsModuleSystem(ModuleSystem):  # pylint: disable=abstract-method
     """
     ModuleSystem specialized to the LMS
@@ -166,8 +196,42 @@ class LmsModuleSystem(ModuleSystem):  # pylint: disable=abstract-method
         if badges_enabled():
             services['badging'] = BadgingService(course_id=kwargs.get('course_id'), modulestore=store)
         self.request_token = kwargs.pop('request_token', None)
+        self.cache_fragments = kwargs.pop('cache_fragments', False)
         super(LmsModuleSystem, self).__init__(**kwargs)
 
+    def render(self, block, view_name, context=None):
+        """
+        Render a block by invoking its view.
+
+        If this runtime caches fragments, the student_view fragments of the
+        blocks which render the same one for all the users are rendered, and
+        wrapped, once per course version, and then read from the cache for
+        XBLOCK_FRAGMENT_CACHE_TIMEOUT seconds.
+
+        See :method:`xblock.runtime:Runtime.render`
+        """
+        cache_key = None
+        if self.cache_fragments and view_name == STUDENT_VIEW and not self.applicable_aside_types(block):
+            cache_key = fragment_cache_key(block)
+        if cache_key is None:
+            return super(LmsModuleSystem, self).render(block, view_name, context)
+
+        cached = cache.get(cache_key)
+        if cached is not None:
+            frag = Fragment.from_dict(cached['fragment'])
+            # The wrapper of the block identifies the request whose xblocks are initialized
+            if cached['request_token'] and self.request_token:
+                frag.content = frag.content.replace(cached['request_token'], self.request_token)
+            return frag
+
+        frag = super(LmsModuleSystem, self).render(block, view_name, context)
+        cache.set(
+            cache_key,
+            {'fragment': frag.to_dict(), 'request_token': self.request_token},
+            settings.XBLOCK_FRAGMENT_CACHE_TIMEOUT
+        )
+        return frag
+
     def handler_url(self, *args, **kwargs):
         """
         Implement the XBlock runtime handler_url interface.
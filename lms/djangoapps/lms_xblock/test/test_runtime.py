@@ -3,8 +3,10 @@ Tests of the LMS XBlock Runtime and associated utilities
 """
 
 from django.conf import settings
-from ddt import ddt, data
+from ddt import ddt, data, unpack
 from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import translation
 from mock import Mock, patch
 from urlparse import urlparse
 
@@ -15,6 +17,7 @@ from badges.tests.factories import BadgeClassFactory
 from badges.tests.test_models import get_image
 from lms.djangoapps.lms_xblock.runtime import LmsModuleSystem
 from xblock.fields import ScopeIds
+from xblock.fragment import Fragment
 from xmodule.modulestore.django import ModuleI18nService
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xblock.exceptions import NoSuchServiceError
@@ -287,3 +290,79 @@ class TestI18nService(ModuleStoreTestCase):
         Test: i18n service should not be callable in LMS after initialization.
         """
         self.assertFalse(callable(self.runtime.service(self.mock_block, 'i18n')))
+
+
+@ddt
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class TestFragmentCache(TestCase):
+    """
+    Test the cache of the student_view fragments of the blocks rendering the same one for all the users
+    """
+    def setUp(self):
+        super(TestFragmentCache, self).setUp()
+        course_key = CourseLocator(org="mockx", course="100", run="2015")
+        usage_key = BlockUsageLocator(course_key, block_type='html', block_id="html_id")
+        self.block = Mock(
+            scope_ids=ScopeIds(None, 'html', usage_key, usage_key),
+            descriptor=Mock(course_version='version'),
+            has_user_independent_student_view=True,
+        )
+        render_patcher = patch(
+            'xmodule.x_module.MetricsMixin.render',
+            autospec=True,
+            side_effect=lambda runtime, block, view_name, context: Fragment(
+                u'<div data-request-token="{}">Hi!</div>'.format(runtime.request_token)
+            ),
+        )
+        self.mock_render = render_patcher.start()
+        self.addCleanup(render_patcher.stop)
+
+    def create_runtime(self, request_token, cache_fragments=True):
+        """
+        Returns a runtime rendering the fragments of a request.
+        """
+        return LmsModuleSystem(
+            static_url='/static',
+            track_function=Mock(),
+            get_module=Mock(),
+            render_template=Mock(),
+            replace_urls=str,
+            course_id=self.block.scope_ids.usage_id.course_key,
+            descriptor_runtime=Mock(),
+            request_token=request_token,
+            cache_fragments=cache_fragments,
+        )
+
+    def test_cached_fragment(self):
+        for request_token in ('request1', 'request2'):
+            frag = self.create_runtime(request_token).render(self.block, 'student_view', {})
+            self.assertEqual(frag.content, u'<div data-request-token="{}">Hi!</div>'.format(request_token))
+        self.assertEqual(self.mock_render.call_count, 1)
+
+        # The fragments of other course versions and languages are rendered anew
+        self.block.descriptor.course_version = 'other_version'
+        self.create_runtime('request3').render(self.block, 'student_view', {})
+        with translation.override('eo'):
+            self.create_runtime('request4').render(self.block, 'student_view', {})
+        self.assertEqual(self.mock_render.call_count, 3)
+
+    @data(
+        ('cache_fragments', False),
+        ('view_name', 'author_view'),
+        ('has_user_independent_student_view', False),
+        ('course_version', None),
+    )
+    @unpack
+    def test_uncached_fragment(self, name, value):
+        kwargs = {'cache_fragments': True, 'view_name': 'student_view'}
+        if name in kwargs:
+            kwargs[name] = value
+        elif name == 'course_version':
+            self.block.descriptor.course_version = value
+        else:
+            setattr(self.block, name, value)
+
+        for request_token in ('request1', 'request2'):
+            runtime = self.create_runtime(request_token, cache_fragments=kwargs['cache_fragments'])
+            runtime.render(self.block, kwargs['view_name'], {})
+        self.assertEqual(self.mock_render.call_count, 2)
@@ -264,6 +264,7 @@ BULK_EMAIL_ROUTING_KEY_SMALL_JOBS = ENV_TOKENS.get('BULK_EMAIL_ROUTING_KEY_SMALL
 
 # Queue to use for updating persistent grades
 RECALCULATE_GRADES_ROUTING_KEY = ENV_TOKENS.get('RECALCULATE_GRADES_ROUTING_KEY', LOW_PRIORITY_QUEUE)
+COURSE_GRADES_BATCH_SIZE = ENV_TOKENS.get('COURSE_GRADES_BATCH_SIZE', COURSE_GRADES_BATCH_SIZE)
 
 # Allow CELERY_QUEUES to be overwritten by ENV_TOKENS,
 ENV_CELERY_QUEUES = ENV_TOKENS.get('CELERY_QUEUES', None)
@@ -486,6 +487,33 @@ XBLOCK_FIELD_DATA_WRAPPERS = ENV_TOKENS.get(
     XBLOCK_FIELD_DATA_WRAPPERS
 )
 
+RENDER_XBLOCK_PREFETCH_DEFINITION_TYPES = ENV_TOKENS.get(
+    'RENDER_XBLOCK_PREFETCH_DEFINITION_TYPES',
+    RENDER_XBLOCK_PREFETCH_DEFINITION_TYPES
+)
+
+SPLIT_SHARED_STRUCTURE_CACHE_MAX_BYTES = ENV_TOKENS.get(
+    'SPLIT_SHARED_STRUCTURE_CACHE_MAX_BYTES',
+    SPLIT_SHARED_STRUCTURE_CACHE_MAX_BYTES
+)
+
+STATIC_REPLACE_REWRITE_CACHE_MAX_SIZE = ENV_TOKENS.get(
+    'STATIC_REPLACE_REWRITE_CACHE_MAX_SIZE', STATIC_REPLACE_REWRITE_CACHE_MAX_SIZE
+)
+STATIC_REPLACE_REWRITE_CACHE_TIMEOUT = ENV_TOKENS.get(
+    'STATIC_REPLACE_REWRITE_CACHE_TIMEOUT', STATIC_REPLACE_REWRITE_CACHE_TIMEOUT
+)
+
+XBLOCK_FRAGMENT_CACHE_TIMEOUT = ENV_TOKENS.get('XBLOCK_FRAGMENT_CACHE_TIMEOUT', XBLOCK_FRAGMENT_CACHE_TIMEOUT)
+
+CONTENTSERVER_SPOOL_ROOT = ENV_TOKENS.get('CONTENTSERVER_SPOOL_ROOT', CONTENTSERVER_SPOOL_ROOT)
+CONTENTSERVER_SPOOL_SENDFILE_HEADER = ENV_TOKENS.get(
+    'CONTENTSERVER_SPOOL_SENDFILE_HEADER', CONTENTSERVER_SPOOL_SENDFILE_HEADER
+)
+CONTENTSERVER_SPOOL_ACCEL_REDIRECT_LOCATION = ENV_TOKENS.get(
+    'CONTENTSERVER_SPOOL_ACCEL_REDIRECT_LOCATION', CONTENTSERVER_SPOOL_ACCEL_REDIRECT_LOCATION
+)
+
 ############### Mixed Related(Secure/Not-Secure) Items ##########
 LMS_SEGMENT_KEY = AUTH_TOKENS.get('SEGMENT_KEY')
 
@@ -629,6 +657,10 @@ VERIFY_STUDENT = AUTH_TOKENS.get("VERIFY_STUDENT", VERIFY_STUDENT)
 GRADES_DOWNLOAD_ROUTING_KEY = ENV_TOKENS.get('GRADES_DOWNLOAD_ROUTING_KEY', HIGH_MEM_QUEUE)
 
 GRADES_DOWNLOAD = ENV_TOKENS.get("GRADES_DOWNLOAD", GRADES_DOWNLOAD)
+GRADE_REPORT_STUDENTS_PER_TASK = ENV_TOKENS.get('GRADE_REPORT_STUDENTS_PER_TASK', GRADE_REPORT_STUDENTS_PER_TASK)
+INSTRUCTOR_TASK_MODULES_PER_SUBTASK = ENV_TOKENS.get(
+    'INSTRUCTOR_TASK_MODULES_PER_SUBTASK', INSTRUCTOR_TASK_MODULES_PER_SUBTASK
+)
 
 # financial reports
 FINANCIAL_REPORTS = ENV_TOKENS.get("FINANCIAL_REPORTS", FINANCIAL_REPORTS)
@@ -284,6 +284,10 @@ FEATURES = {
     # Let students save and manage their annotations
     'ENABLE_EDXNOTES': False,
 
+    # Cache the student_view fragments of the blocks which render the same one for all
+    # the users, such as html blocks, per course version (see XBLOCK_FRAGMENT_CACHE_TIMEOUT)
+    'ENABLE_XBLOCK_FRAGMENT_CACHE': False,
+
     # Milestones application flag
     'MILESTONES_APP': False,
 
@@ -727,6 +731,40 @@ XBLOCK_FIELD_DATA_WRAPPERS = ()
 ############# ModuleStore Configuration ##########
 
 MODULESTORE_BRANCH = 'published-only'
+
+# The block types whose definitions are fetched in batches along with the rendered
+# block when rendering a section of the courseware (courseware.views.index) or an
+# xblock on its own (courseware.views.render_xblock), rather than one query at a time
+# while rendering each descendant. Set to an empty list to load all definitions lazily.
+RENDER_XBLOCK_PREFETCH_DEFINITION_TYPES = ['html', 'problem', 'video']
+
+# The maximum size in bytes of the per-process cache of the (immutable) course structures
+# of the Split modulestore, which are shared read-only between requests and threads.
+# Set to 0 to disable the cache.
+SPLIT_SHARED_STRUCTURE_CACHE_MAX_BYTES = 128 * 1024 * 1024
+
+# The maximum total length of the fragments, and of their rewritten texts, whose static, course
+# and jump_to_id urls are memoized per course version by the per-process cache of static_replace.
+# Set to 0 to disable the cache.
+STATIC_REPLACE_REWRITE_CACHE_MAX_SIZE = 16 * 1024 * 1024
+# The number of seconds a rewritten fragment is memoized: the urls of the course assets include
+# their digest, which may change without a new course version.
+STATIC_REPLACE_REWRITE_CACHE_TIMEOUT = 300
+
+# The number of seconds the cached student_view fragments of blocks are kept, when
+# FEATURES['ENABLE_XBLOCK_FRAGMENT_CACHE'] is set.
+XBLOCK_FRAGMENT_CACHE_TIMEOUT = 60 * 60
+
+# The directory of the on-disk spool of the course assets served by the contentserver,
+# from which they are sent by the OS rather than through Python. None disables the spool.
+CONTENTSERVER_SPOOL_ROOT = None
+# The header having the front end server send the spooled assets: 'X-Accel-Redirect' (nginx,
+# with an internal location aliasing CONTENTSERVER_SPOOL_ROOT at
+# CONTENTSERVER_SPOOL_ACCEL_REDIRECT_LOCATION) or 'X-Sendfile' (Apache); None sends them
+# with a FileResponse, which the WSGI server may send with sendfile.
+CONTENTSERVER_SPOOL_SENDFILE_HEADER = None
+CONTENTSERVER_SPOOL_ACCEL_REDIRECT_LOCATION = '/spooled_assets/'
+
 CONTENTSTORE = None
 DOC_STORE_CONFIG = {
     'host': 'localhost',
@@ -1823,6 +1861,23 @@ BLOCK_STRUCTURES_SETTINGS = dict(
 
     # Maximum number of retries per task.
     BLOCK_STRUCTURES_TASK_MAX_RETRIES=5,
+
+    # Format used for serializing block structures into the cache:
+    # 'zpickle' stores each structure as a single compressed pickle,
+    # 'columnar' stores relations as integer arrays and block data in
+    # per-field columns that are only deserialized when read.
+    BLOCK_STRUCTURES_CACHE_FORMAT='zpickle',
+
+    # Maximum total size, in bytes, of the serialized block structures
+    # kept in each process's local LRU cache in front of the shared
+    # cache. Entries are invalidated when a course is published.
+    # Set to 0 to disable the local cache.
+    BLOCK_STRUCTURES_LOCAL_CACHE_MAX_SIZE=0,
+
+    # Whether to recollect only the changed blocks (with their
+    # descendants and ancestors) when a course is published. This only
+    # takes effect if all registered transformers are subtree-local.
+    BLOCK_STRUCTURES_INCREMENTAL_UPDATE=False,
 )
 
 ################################ Bulk Email ###################################
@@ -1874,6 +1929,10 @@ BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS = 0.02
 # Queue to use for updating persistent grades
 RECALCULATE_GRADES_ROUTING_KEY = LOW_PRIORITY_QUEUE
 
+# Number of students whose scores and persisted grades are fetched together
+# when iterating through the course grades of many students, as for grade reports
+COURSE_GRADES_BATCH_SIZE = 100
+
 ############################# Email Opt In ####################################
 
 # Minimum age for organization-wide email opt in
@@ -2426,6 +2485,14 @@ GRADES_DOWNLOAD = {
     'ROOT_PATH': '/tmp/edx-s3/grades',
 }
 
+# If greater than 0, grade reports of courses with more enrolled students than
+# this are generated in parallel by subtasks, each grading this many students.
+GRADE_REPORT_STUDENTS_PER_TASK = 0
+
+# If greater than 0, problems with more student modules than this are
+# rescored in parallel by subtasks, each rescoring this many modules.
+INSTRUCTOR_TASK_MODULES_PER_SUBTASK = 0
+
 FINANCIAL_REPORTS = {
     'STORAGE_TYPE': 'localfs',
     'BUCKET': 'edx-financial-reports',
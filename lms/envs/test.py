@@ -230,6 +230,11 @@ CACHES = {
     },
 }
 
+# Keep the number of mongo calls made by each test independent of the other tests
+SPLIT_SHARED_STRUCTURE_CACHE_MAX_BYTES = 0
+# Keep rendered fragments from reusing the urls rewritten in other tests
+STATIC_REPLACE_REWRITE_CACHE_MAX_SIZE = 0
+
 # Dummy secret key for dev
 SECRET_KEY = '85920908f28904ed733fe576320db18cabd7b6cd'
 
@@ -1,8 +1,11 @@
 """
 Higher order functions built on the BlockStructureManager to interact with a django cache.
 """
+from django.conf import settings
 from django.core.cache import cache
+from openedx.core.lib.block_structure.cache import BlockStructureLocalCache
 from openedx.core.lib.block_structure.manager import BlockStructureManager
+from openedx.core.lib.block_structure.serializers import ColumnarSerializer, ZPickleSerializer
 from xmodule.modulestore.django import modulestore
 
 
@@ -24,22 +27,28 @@ def update_course_in_cache(course_key):
     A higher order function implemented on top of the
     block_structure.updated_collected function that updates the block
     structure in the cache for the given course_key.
+
+    The update is incremental if the BLOCK_STRUCTURES_INCREMENTAL_UPDATE
+    setting is enabled.
     """
-    return get_block_structure_manager(course_key).update_collected()
+    return get_block_structure_manager(course_key).update_collected(incremental=is_incremental_update_enabled())
 
 
-def clear_course_from_cache(course_key):
+def clear_course_from_cache(course_key, retain=False):
     """
     A higher order function implemented on top of the
     block_structure.clear_block_cache function that clears the block
     structure from the cache for the given course_key.
 
+    If retain is True and incremental updates are enabled, the cleared
+    data is retained for use by the next update_course_in_cache.
+
     Note: See Note in get_course_blocks. Even after MA-1604 is
     implemented, this implementation should still be valid since the
     entire block structure of the course is cached, even though
     arbitrary access to an intermediate block will be supported.
     """
-    get_block_structure_manager(course_key).clear()
+    get_block_structure_manager(course_key).clear(retain=retain and is_incremental_update_enabled())
 
 
 def get_block_structure_manager(course_key):
@@ -48,7 +57,13 @@ def get_block_structure_manager(course_key):
     """
     store = modulestore()
     course_usage_key = store.make_course_usage_key(course_key)
-    return BlockStructureManager(course_usage_key, store, get_cache())
+    return BlockStructureManager(
+        course_usage_key,
+        store,
+        get_cache(),
+        get_cache_serializer(),
+        get_local_cache(),
+    )
 
 
 def get_cache():
@@ -56,3 +71,44 @@ def get_cache():
     Returns the storage for caching Block Structures.
     """
     return cache
+
+
+_LOCAL_CACHE = {}
+
+
+def get_local_cache():
+    """
+    Returns the process-local cache that is checked before the storage
+    for caching Block Structures, or None if it is disabled by setting
+    BLOCK_STRUCTURES_LOCAL_CACHE_MAX_SIZE to 0.
+    """
+    max_size = settings.BLOCK_STRUCTURES_SETTINGS.get('BLOCK_STRUCTURES_LOCAL_CACHE_MAX_SIZE', 0)
+    if not max_size:
+        return None
+    if max_size not in _LOCAL_CACHE:
+        _LOCAL_CACHE[max_size] = BlockStructureLocalCache(max_size)
+    return _LOCAL_CACHE[max_size]
+
+
+CACHE_SERIALIZERS = {
+    'zpickle': ZPickleSerializer,
+    'columnar': ColumnarSerializer,
+}
+
+
+def get_cache_serializer():
+    """
+    Returns the serializer for caching Block Structures, as configured
+    by the BLOCK_STRUCTURES_CACHE_FORMAT setting.
+    """
+    cache_format = settings.BLOCK_STRUCTURES_SETTINGS.get('BLOCK_STRUCTURES_CACHE_FORMAT', 'zpickle')
+    return CACHE_SERIALIZERS[cache_format]()
+
+
+def is_incremental_update_enabled():
+    """
+    Returns whether block structures are updated incrementally when
+    a course is published, as configured by the
+    BLOCK_STRUCTURES_INCREMENTAL_UPDATE setting.
+    """
+    return settings.BLOCK_STRUCTURES_SETTINGS.get('BLOCK_STRUCTURES_INCREMENTAL_UPDATE', False)
@@ -16,7 +16,7 @@ def _listen_for_course_publish(sender, course_key, **kwargs):  # pylint: disable
     Catches the signal that a course has been published in the module
     store and creates/updates the corresponding cache entry.
     """
-    clear_course_from_cache(course_key)
+    clear_course_from_cache(course_key, retain=True)
 
     # The countdown=0 kwarg ensures the call occurs after the signal emitter
     # has finished all operations.
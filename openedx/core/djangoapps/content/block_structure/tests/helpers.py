@@ -3,7 +3,7 @@ Helpers for Course Blocks tests.
 """
 
 from openedx.core.lib.block_structure.cache import BlockStructureCache
-from ..api import get_cache
+from ..api import get_cache, get_cache_serializer, get_local_cache
 
 
 def is_course_in_block_structure_cache(course_key, store):
@@ -11,4 +11,4 @@ def is_course_in_block_structure_cache(course_key, store):
     Returns whether the given course is in the Block Structure cache.
     """
     course_usage_key = store.make_course_usage_key(course_key)
-    return BlockStructureCache(get_cache()).get(course_usage_key) is not None
+    return BlockStructureCache(get_cache(), get_cache_serializer(), get_local_cache()).get(course_usage_key) is not None
@@ -1,10 +1,15 @@
 """
 Unit tests for the Course Blocks signals
 """
+from django.conf import settings
+from django.test.utils import override_settings
+from mock import patch
 
+from openedx.core.lib.block_structure.transformers import BlockStructureTransformers
+from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
-from xmodule.modulestore.tests.factories import CourseFactory
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 
 from ..api import get_block_structure_manager
 from .helpers import is_course_in_block_structure_cache
@@ -51,3 +56,33 @@ class CourseBlocksSignalTest(ModuleStoreTestCase):
             bs_manager.get_collected()
 
         self.assertFalse(is_course_in_block_structure_cache(self.course.id, self.store))
+
+    @override_settings(
+        BLOCK_STRUCTURES_SETTINGS=dict(settings.BLOCK_STRUCTURES_SETTINGS, BLOCK_STRUCTURES_INCREMENTAL_UPDATE=True)
+    )
+    def test_incremental_course_update(self):
+        # All the transformers registered by the platform are subtree-local.
+        self.assertTrue(BlockStructureTransformers.supports_incremental_collect())
+
+        with self.store.default_store(ModuleStoreEnum.Type.split):
+            course = CourseFactory.create()
+            chapter = ItemFactory.create(parent=course, category='chapter', display_name='Chapter')
+            ItemFactory.create(parent=chapter, category='sequential')
+            ItemFactory.create(parent=course, category='chapter')
+
+        bs_manager = get_block_structure_manager(course.id)
+        bs_manager.get_collected()
+
+        chapter.display_name = 'Updated Chapter'
+        with patch.object(
+            BlockStructureTransformers,
+            'collect_incrementally',
+            wraps=BlockStructureTransformers.collect_incrementally,
+        ) as mock_collect_incrementally:
+            self.store.update_item(chapter, self.user.id)
+        self.assertTrue(mock_collect_incrementally.called)
+
+        updated_block_structure = bs_manager.get_collected()
+        chapter_key = chapter.location.for_branch(None).version_agnostic()
+        self.assertEqual(updated_block_structure.get_xblock_field(chapter_key, 'display_name'), 'Updated Chapter')
+        self.assertEqual(len(updated_block_structure), 4)
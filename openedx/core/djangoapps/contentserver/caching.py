@@ -1,6 +1,8 @@
 """
 Helper functions for caching course assets.
 """
+from collections import namedtuple
+
 from django.core.cache import caches
 from django.core.cache.backends.base import InvalidCacheBackendError
 from opaque_keys import InvalidKeyError
@@ -13,37 +15,111 @@ try:
 except InvalidCacheBackendError:
     pass
 
+# The prefix of the cache keys of the metadata of the assets
+METADATA_KEY_PREFIX = 'metadata:'
+
+# The number of seconds the contentserver remembers the metadata of an asset.  The
+# contentstore forgets it when the asset is saved or deleted; the timeout bounds how long
+# a change made around the contentstore, such as a deleted course, can go unnoticed.
+METADATA_CACHE_TIMEOUT = 60 * 60
+
+# The number of seconds the contentserver remembers that an asset doesn't exist.
+NOT_FOUND_CACHE_TIMEOUT = 60
+
+# The cached metadata of an asset missing from the contentstore
+ASSET_NOT_FOUND = 'not_found'
+
+
+class CachedAssetMetadata(namedtuple(
+        'CachedAssetMetadata', 'locked content_digest length last_modified_at content_type'
+)):
+    """
+    The metadata of an asset needed to check whether a request can be served,
+    and whether it has to be served at all, without loading the asset.
+    """
+    @classmethod
+    def from_content(cls, content):
+        """
+        Returns the metadata of the given piece of content.
+        """
+        return cls(
+            locked=getattr(content, 'locked', False),
+            content_digest=getattr(content, 'content_digest', None),
+            length=content.length,
+            last_modified_at=content.last_modified_at,
+            content_type=content.content_type,
+        )
+
+
+def _location_key(location):
+    """
+    Force the location to a Unicode string.
+    """
+    return unicode(location).encode("utf-8")
+
 
 def set_cached_content(content):
     """
     Stores the given piece of content in the cache, using its location as the key.
     """
-    CONTENT_CACHE.set(unicode(content.location).encode("utf-8"), content, version=STATIC_CONTENT_VERSION)
+    CONTENT_CACHE.set(_location_key(content.location), content, version=STATIC_CONTENT_VERSION)
 
 
 def get_cached_content(location):
     """
     Retrieves the given piece of content by its location if cached.
     """
-    return CONTENT_CACHE.get(unicode(location).encode("utf-8"), version=STATIC_CONTENT_VERSION)
+    return CONTENT_CACHE.get(_location_key(location), version=STATIC_CONTENT_VERSION)
+
+
+def set_cached_metadata(content):
+    """
+    Stores the metadata of the given piece of content in the cache, for METADATA_CACHE_TIMEOUT seconds,
+    using its location as the key.
+    """
+    CONTENT_CACHE.set(
+        METADATA_KEY_PREFIX + _location_key(content.location),
+        CachedAssetMetadata.from_content(content),
+        timeout=METADATA_CACHE_TIMEOUT,
+        version=STATIC_CONTENT_VERSION,
+    )
+
+
+def set_cached_metadata_not_found(location):
+    """
+    Stores in the cache, for NOT_FOUND_CACHE_TIMEOUT seconds, that there is no content at the given location.
+    """
+    CONTENT_CACHE.set(
+        METADATA_KEY_PREFIX + _location_key(location),
+        ASSET_NOT_FOUND,
+        timeout=NOT_FOUND_CACHE_TIMEOUT,
+        version=STATIC_CONTENT_VERSION,
+    )
+
+
+def get_cached_metadata(location):
+    """
+    Retrieves the CachedAssetMetadata of the content at the given location if cached,
+    or ASSET_NOT_FOUND if the content is known not to exist.
+    """
+    return CONTENT_CACHE.get(METADATA_KEY_PREFIX + _location_key(location), version=STATIC_CONTENT_VERSION)
 
 
 def del_cached_content(location):
     """
-    Delete content for the given location, as well versions of the content without a run.
+    Delete content and its metadata for the given location, as well versions of the content without a run.
 
     It's possible that the content could have been cached without knowing the course_key,
     and so without having the run.
     """
-    def location_str(loc):
-        """Force the location to a Unicode string."""
-        return unicode(loc).encode("utf-8")
-
-    locations = [location_str(location)]
+    locations = [_location_key(location)]
     try:
-        locations.append(location_str(location.replace(run=None)))
+        locations.append(_location_key(location.replace(run=None)))
     except InvalidKeyError:
         # although deprecated keys allowed run=None, new keys don't if there is no version.
         pass
 
-    CONTENT_CACHE.delete_many(locations, version=STATIC_CONTENT_VERSION)
+    CONTENT_CACHE.delete_many(
+        locations + [METADATA_KEY_PREFIX + location_key for location_key in locations],
+        version=STATIC_CONTENT_VERSION,
+    )
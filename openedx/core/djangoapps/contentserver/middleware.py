@@ -11,12 +11,16 @@ from django.http import (
 from student.models import CourseEnrollment
 
 from xmodule.assetstore.assetmgr import AssetManager
-from xmodule.contentstore.content import StaticContent, XASSET_LOCATION_TAG
+from xmodule.contentstore.content import StaticContent, StaticContentStream, XASSET_LOCATION_TAG
 from xmodule.modulestore import InvalidLocationError
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.locator import AssetLocator
 from openedx.core.djangoapps.header_control import force_header_for_response
-from .caching import get_cached_content, set_cached_content
+from .caching import (
+    ASSET_NOT_FOUND, CachedAssetMetadata, get_cached_content, get_cached_metadata, set_cached_content,
+    set_cached_metadata, set_cached_metadata_not_found
+)
+from .spool import get_asset_spool
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.exceptions import NotFoundError
 
@@ -64,15 +68,27 @@ class StaticContentServer(object):
             except (InvalidLocationError, InvalidKeyError):
                 return HttpResponseBadRequest()
 
-            # Attempt to load the asset to make sure it exists, and grab the asset digest
-            # if we're able to load it.
-            actual_digest = None
-            try:
-                content = self.load_asset_from_location(loc)
-                actual_digest = getattr(content, "content_digest", None)
-            except (ItemNotFoundError, NotFoundError):
+            # Look up the cached metadata of the asset, which is all that's needed to answer
+            # the requests for missing, unauthorized or unmodified assets.
+            content = None
+            asset_metadata = get_cached_metadata(loc)
+            newrelic.agent.add_custom_parameter('contentserver.metadata_cached', asset_metadata is not None)
+            if asset_metadata == ASSET_NOT_FOUND:
                 return HttpResponseNotFound()
 
+            if asset_metadata is None:
+                # Attempt to load the asset to make sure it exists, and grab its metadata
+                # if we're able to load it.
+                try:
+                    content = self.load_asset_from_location(loc)
+                except (ItemNotFoundError, NotFoundError):
+                    set_cached_metadata_not_found(loc)
+                    return HttpResponseNotFound()
+                asset_metadata = CachedAssetMetadata.from_content(content)
+                set_cached_metadata(content)
+
+            actual_digest = asset_metadata.content_digest
+
             # If this was a versioned asset, and the digest doesn't match, redirect
             # them to the actual version.
             if requested_digest is not None and actual_digest is not None and (actual_digest != requested_digest):
@@ -95,21 +111,46 @@ class StaticContentServer(object):
             newrelic.agent.add_custom_parameter('contentserver.from_cdn', is_from_cdn)
 
             # Check if this content is locked or not.
-            locked = self.is_content_locked(content)
+            locked = self.is_content_locked(asset_metadata)
             newrelic.agent.add_custom_parameter('contentserver.locked', locked)
 
             # Check that user has access to the content.
-            if not self.is_user_authorized(request, content, loc):
+            if not self.is_user_authorized(request, asset_metadata, loc):
                 return HttpResponseForbidden('Unauthorized')
 
             # Figure out if the client sent us a conditional request, and let them know
             # if this asset has changed since then.
-            last_modified_at_str = content.last_modified_at.strftime(HTTP_DATE_FORMAT)
+            last_modified_at_str = asset_metadata.last_modified_at.strftime(HTTP_DATE_FORMAT)
             if 'HTTP_IF_MODIFIED_SINCE' in request.META:
                 if_modified_since = request.META['HTTP_IF_MODIFIED_SINCE']
                 if if_modified_since == last_modified_at_str:
                     return HttpResponseNotModified()
 
+            # Send the asset from its file in the spool, if enabled, rather than through Python.
+            # The file is looked up by the digest of the asset's metadata, so that an already
+            # spooled asset isn't loaded at all.
+            spool = get_asset_spool()
+            spooled_path = spool.find(asset_metadata) if spool is not None else None
+            if spooled_path is None:
+                # Only now load the asset, if its metadata was cached.
+                if content is None:
+                    try:
+                        content = self.load_asset_from_location(loc)
+                    except (ItemNotFoundError, NotFoundError):
+                        # The asset was deleted since its metadata was cached.
+                        return HttpResponseNotFound()
+
+                if spool is not None and spool.relative_path(content) is not None:
+                    spooled_path = spool.get(content)
+                    if spooled_path is None and isinstance(content, StaticContentStream):
+                        # Spooling consumed the stream of the asset, so get it anew.
+                        content = AssetManager.find(loc, as_stream=True)
+            if spool is not None:
+                newrelic.agent.add_custom_parameter('contentserver.spooled', spooled_path is not None)
+            if content is None:
+                # The asset is sent from the spool, for which its metadata is all that's needed.
+                content = asset_metadata
+
             # *** File streaming within a byte range ***
             # If a Range is provided, parse Range attribute of the request
             # Add Content-Range in the response if Range is structurally correct
@@ -117,9 +158,12 @@ class StaticContentServer(object):
             # Response -> Content-Range attribute structure: "Content-Range: bytes first-last/totalLength"
             # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.35
             response = None
-            if request.META.get('HTTP_RANGE'):
+            if spooled_path is not None and spool.handles_ranges:
+                # The front end server sends the file, and handles any Range itself.
+                response = spool.get_response(spooled_path)
+            elif request.META.get('HTTP_RANGE'):
                 # If we have a StaticContent, get a StaticContentStream.  Can't manipulate the bytes otherwise.
-                if isinstance(content, StaticContent):
+                if isinstance(content, StaticContent) and spooled_path is None:
                     content = AssetManager.find(loc, as_stream=True)
 
                 header_value = request.META['HTTP_RANGE']
@@ -146,7 +190,10 @@ class StaticContentServer(object):
 
                         if 0 <= first <= last < content.length:
                             # If the byte range is satisfiable
-                            response = HttpResponse(content.stream_data_in_range(first, last))
+                            if spooled_path is not None:
+                                response = spool.get_response(spooled_path, (first, last))
+                            else:
+                                response = HttpResponse(content.stream_data_in_range(first, last))
                             response['Content-Range'] = 'bytes {first}-{last}/{length}'.format(
                                 first=first, last=last, length=content.length
                             )
@@ -162,8 +209,11 @@ class StaticContentServer(object):
 
             # If Range header is absent or syntactically invalid return a full content response.
             if response is None:
-                response = HttpResponse(content.stream_data())
-                response['Content-Length'] = content.length
+                if spooled_path is not None:
+                    response = spool.get_response(spooled_path)
+                else:
+                    response = HttpResponse(content.stream_data())
+                    response['Content-Length'] = content.length
 
             newrelic.agent.add_custom_parameter('contentserver.content_len', content.length)
             newrelic.agent.add_custom_parameter('contentserver.content_type', content.content_type)
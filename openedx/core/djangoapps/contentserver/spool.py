@@ -0,0 +1,199 @@
+"""
+On-disk spool of course assets, so that they are sent by the OS rather than by Python.
+
+Assets are spooled under their content digest (the md5 of their data), so a
+spooled file never goes stale: a changed asset has a new digest, and so is
+spooled anew on its first request.  Old files have to be removed by an
+external job, e.g. one removing the files not accessed for some days.
+"""
+import hashlib
+import logging
+import os
+import re
+import tempfile
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+
+log = logging.getLogger(__name__)
+
+# The digest of an asset is the hex md5 of its data; anything else isn't spooled.
+DIGEST_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+X_ACCEL_REDIRECT = 'X-Accel-Redirect'
+X_SENDFILE = 'X-Sendfile'
+
+
+def get_asset_spool():
+    """
+    Returns the AssetSpool configured by the CONTENTSERVER_SPOOL_* settings,
+    or None if spooling is disabled.
+    """
+    root = getattr(settings, 'CONTENTSERVER_SPOOL_ROOT', None)
+    if not root:
+        return None
+    return AssetSpool(
+        root,
+        sendfile_header=getattr(settings, 'CONTENTSERVER_SPOOL_SENDFILE_HEADER', None),
+        accel_redirect_location=getattr(settings, 'CONTENTSERVER_SPOOL_ACCEL_REDIRECT_LOCATION', '/spooled_assets/'),
+    )
+
+
+class FileRange(object):
+    """
+    A read-only file object over a byte range of a file.
+
+    Its fileno lets the WSGI server send the range with sendfile from the
+    current offset of the file, for the Content-Length of the response.
+    """
+    def __init__(self, file_obj, first_byte, last_byte):
+        self._file = file_obj
+        self._file.seek(first_byte)
+        self._remaining = last_byte - first_byte + 1
+
+    def read(self, size=-1):
+        """
+        Reads at most size bytes, up to the end of the range.
+        """
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._file.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def fileno(self):
+        """
+        Returns the file descriptor of the file.
+        """
+        return self._file.fileno()
+
+    def close(self):
+        """
+        Closes the file.
+        """
+        self._file.close()
+
+
+class AssetSpool(object):
+    """
+    A directory of spooled assets, named after their digest.
+    """
+    def __init__(self, root, sendfile_header=None, accel_redirect_location='/spooled_assets/'):
+        """
+        Arguments:
+            root (str): The directory of the spool.
+            sendfile_header (str): X_ACCEL_REDIRECT or X_SENDFILE to have the front end
+                server send the spooled assets, or None to send them with FileResponse.
+            accel_redirect_location (str): The internal nginx location serving the root
+                of the spool, for X_ACCEL_REDIRECT.
+        """
+        if sendfile_header not in (None, X_ACCEL_REDIRECT, X_SENDFILE):
+            raise ValueError(u"Unknown sendfile header: {}".format(sendfile_header))
+        self.root = root
+        self.sendfile_header = sendfile_header
+        self.accel_redirect_location = accel_redirect_location.rstrip('/') + '/'
+
+    @staticmethod
+    def relative_path(content):
+        """
+        Returns the path of the content relative to the root of the spool, or
+        None if the content can't be spooled.
+        """
+        digest = getattr(content, 'content_digest', None)
+        if not isinstance(digest, basestring) or not DIGEST_PATTERN.match(digest):
+            return None
+        return os.path.join(digest[:2], digest)
+
+    def find(self, asset):
+        """
+        Returns the path of the spooled file of the asset, which may be a piece of
+        content or just its metadata, or None if the asset isn't spooled.
+        """
+        relative_path = self.relative_path(asset)
+        if relative_path is None:
+            return None
+        path = os.path.join(self.root, relative_path)
+        return path if os.path.isfile(path) else None
+
+    def get(self, content):
+        """
+        Returns the path of the spooled file of the content, spooling it if it
+        isn't yet, or None if the content can't be spooled.
+
+        Spooling reads all the data of the content, so if it fails, a content
+        streamed from the contentstore has to be found again to be sent.
+        """
+        relative_path = self.relative_path(content)
+        if relative_path is None:
+            return None
+        path = os.path.join(self.root, relative_path)
+        if os.path.isfile(path):
+            return path
+
+        try:
+            directory = os.path.dirname(path)
+            if not os.path.isdir(directory):
+                try:
+                    os.makedirs(directory)
+                except OSError:
+                    # Another worker may have created it.
+                    if not os.path.isdir(directory):
+                        raise
+
+            # Concurrent workers each write their own temporary file, and the
+            # rename makes one of them the spooled file as a whole.
+            md5 = hashlib.md5()
+            spool_file = tempfile.NamedTemporaryFile(dir=directory, prefix='.spool-', delete=False)
+            try:
+                with spool_file:
+                    for chunk in content.stream_data():
+                        md5.update(chunk)
+                        spool_file.write(chunk)
+                digest_matches = md5.hexdigest() == content.content_digest
+                if digest_matches:
+                    os.chmod(spool_file.name, 0o644)
+                    os.rename(spool_file.name, path)
+            finally:
+                if os.path.exists(spool_file.name):
+                    os.remove(spool_file.name)
+        except (IOError, OSError):
+            log.exception(u"Failed to spool %s", unicode(content.location))
+            return None
+
+        if not digest_matches:
+            log.warning(u"Not spooling %s, whose data doesn't match its digest", unicode(content.location))
+            return None
+        return path
+
+    def get_response(self, path, byte_range=None):
+        """
+        Returns the response sending the spooled file, or the byte range
+        (first, last) of it, without any content headers when the front end
+        server sends it.
+        """
+        if self.sendfile_header == X_ACCEL_REDIRECT:
+            response = HttpResponse()
+            response[X_ACCEL_REDIRECT] = self.accel_redirect_location + os.path.relpath(path, self.root)
+            return response
+        if self.sendfile_header == X_SENDFILE:
+            response = HttpResponse()
+            response[X_SENDFILE] = os.path.abspath(path)
+            return response
+
+        spooled_file = open(path, 'rb')
+        if byte_range is None:
+            response = FileResponse(spooled_file)
+            response['Content-Length'] = os.fstat(spooled_file.fileno()).st_size
+        else:
+            first, last = byte_range
+            response = FileResponse(FileRange(spooled_file, first, last))
+            response['Content-Length'] = str(last - first + 1)
+        return response
+
+    @property
+    def handles_ranges(self):
+        """
+        Whether the front end server sends the spooled files, and so handles
+        the Range headers of their requests.
+        """
+        return self.sendfile_header is not None
@@ -6,10 +6,13 @@ import copy
 import datetime
 import ddt
 import logging
+import shutil
+import tempfile
 import unittest
 from uuid import uuid4
 
 from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
 from django.test import RequestFactory
 from django.test.client import Client
 from django.test.utils import override_settings
@@ -27,6 +30,7 @@ from xmodule.modulestore.exceptions import ItemNotFoundError
 from student.models import CourseEnrollment
 from student.tests.factories import UserFactory, AdminFactory
 
+from ..caching import ASSET_NOT_FOUND, CachedAssetMetadata, get_cached_metadata
 from ..middleware import parse_range_header, HTTP_DATE_FORMAT, StaticContentServer
 
 log = logging.getLogger(__name__)
@@ -285,6 +289,160 @@ class ContentStoreToyCourseTest(SharedModuleStoreTestCase):
             first=(self.length_unlocked), last=(self.length_unlocked)))
         self.assertEqual(resp.status_code, 416)
 
+    def spool_settings(self, **kwargs):
+        """
+        Returns the settings enabling the asset spool in a temporary directory.
+        """
+        spool_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spool_root)
+        return override_settings(CONTENTSERVER_SPOOL_ROOT=spool_root, **kwargs)
+
+    def test_spooled_asset(self):
+        """
+        Test that a spooled asset is sent from its file, both when spooled and afterwards.
+        """
+        expected_data = self.contentstore.find(self.unlocked_asset).data
+        with self.spool_settings():
+            for __ in xrange(2):
+                resp = self.client.get(self.url_unlocked)
+                self.assertEqual(resp.status_code, 200)
+                self.assertEqual(resp['Content-Length'], str(self.length_unlocked))
+                self.assertEqual(''.join(resp.streaming_content), expected_data)
+
+    def test_spooled_asset_range(self):
+        """
+        Test that a range request for a spooled asset sends the range from its file.
+        """
+        expected_data = self.contentstore.find(self.unlocked_asset).data
+        first_byte = self.length_unlocked / 4
+        last_byte = self.length_unlocked / 2
+        with self.spool_settings():
+            resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes={first}-{last}'.format(
+                first=first_byte, last=last_byte))
+
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(resp['Content-Range'], 'bytes {first}-{last}/{length}'.format(
+            first=first_byte, last=last_byte, length=self.length_unlocked))
+        self.assertEqual(resp['Content-Length'], str(last_byte - first_byte + 1))
+        self.assertEqual(''.join(resp.streaming_content), expected_data[first_byte:last_byte + 1])
+
+    def test_spooled_asset_x_accel_redirect(self):
+        """
+        Test that a spooled asset is sent by nginx, which handles the Range itself.
+        """
+        digest = self.contentstore.find(self.unlocked_asset).content_digest
+        with self.spool_settings(CONTENTSERVER_SPOOL_SENDFILE_HEADER='X-Accel-Redirect'):
+            resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=0-10')
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp['X-Accel-Redirect'], '/spooled_assets/{}/{}'.format(digest[:2], digest))
+        self.assertEqual(resp['Content-Type'], 'text/plain')
+        self.assertEqual(resp.content, '')
+
+    def test_locked_asset_not_spooled_for_unauthorized_user(self):
+        """
+        Test that a locked asset isn't sent from the spool to a user who can't access it.
+        """
+        with self.spool_settings(CONTENTSERVER_SPOOL_SENDFILE_HEADER='X-Sendfile'):
+            self.client.logout()
+            resp = self.client.get(self.url_locked)
+        self.assertEqual(resp.status_code, 403)
+        self.assertNotIn('X-Sendfile', resp)
+
+    @patch('openedx.core.djangoapps.contentserver.middleware.set_cached_metadata_not_found')
+    def test_missing_asset_cached_as_not_found(self, mock_set_not_found):
+        """
+        Test that a missing asset is remembered as such.
+        """
+        missing_asset = self.course_key.make_asset_key('asset', 'missing.txt')
+        resp = self.client.get(unicode(missing_asset))
+        self.assertEqual(resp.status_code, 404)
+        mock_set_not_found.assert_called_once_with(missing_asset)
+
+    @patch('openedx.core.djangoapps.contentserver.middleware.StaticContentServer.load_asset_from_location')
+    @patch('openedx.core.djangoapps.contentserver.middleware.get_cached_metadata', return_value=ASSET_NOT_FOUND)
+    def test_cached_not_found(self, __, mock_load_asset):
+        """
+        Test that an asset remembered as missing is not loaded.
+        """
+        resp = self.client.get(self.url_unlocked)
+        self.assertEqual(resp.status_code, 404)
+        self.assertFalse(mock_load_asset.called)
+
+    def cached_metadata(self, asset_key, **kwargs):
+        """
+        Returns a patch of the cached metadata of the asset, with the given values.
+        """
+        metadata = CachedAssetMetadata.from_content(self.contentstore.find(asset_key))._replace(**kwargs)
+        return patch('openedx.core.djangoapps.contentserver.middleware.get_cached_metadata', return_value=metadata)
+
+    @patch('openedx.core.djangoapps.contentserver.middleware.StaticContentServer.load_asset_from_location')
+    def test_not_modified_from_cached_metadata(self, mock_load_asset):
+        """
+        Test that a conditional request for an unmodified asset is answered from its cached metadata.
+        """
+        last_modified_at = self.contentstore.find(self.unlocked_asset).last_modified_at
+        with self.cached_metadata(self.unlocked_asset):
+            resp = self.client.get(
+                self.url_unlocked, HTTP_IF_MODIFIED_SINCE=last_modified_at.strftime(HTTP_DATE_FORMAT)
+            )
+        self.assertEqual(resp.status_code, 304)
+        self.assertFalse(mock_load_asset.called)
+
+    @patch('openedx.core.djangoapps.contentserver.middleware.StaticContentServer.load_asset_from_location')
+    def test_locked_from_cached_metadata(self, mock_load_asset):
+        """
+        Test that the lock of an asset is checked on its cached metadata.
+        """
+        self.client.logout()
+        with self.cached_metadata(self.unlocked_asset, locked=True):
+            resp = self.client.get(self.url_unlocked)
+        self.assertEqual(resp.status_code, 403)
+        self.assertFalse(mock_load_asset.called)
+
+    def test_asset_from_cached_metadata(self):
+        """
+        Test that an asset whose metadata is cached is loaded and served.
+        """
+        with self.cached_metadata(self.unlocked_asset):
+            resp = self.client.get(self.url_unlocked)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp['Content-Length'], str(self.length_unlocked))
+
+    def test_spooled_asset_from_cached_metadata(self):
+        """
+        Test that an asset already spooled is sent from its file without being loaded.
+        """
+        expected_data = self.contentstore.find(self.unlocked_asset).data
+        with self.spool_settings():
+            self.client.get(self.url_unlocked)
+            with self.cached_metadata(self.unlocked_asset):
+                with patch(
+                    'openedx.core.djangoapps.contentserver.middleware.StaticContentServer.load_asset_from_location'
+                ) as mock_load_asset:
+                    resp = self.client.get(self.url_unlocked)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp['Content-Length'], str(self.length_unlocked))
+        self.assertEqual(''.join(resp.streaming_content), expected_data)
+        self.assertFalse(mock_load_asset.called)
+
+    @patch('openedx.core.djangoapps.contentserver.caching.CONTENT_CACHE', LocMemCache('contentserver-test', {}))
+    def test_resaved_asset(self):
+        """
+        Test that an asset saved again, as by a course import, is served anew.
+        """
+        asset_key = self.course_key.make_asset_key('asset', 'resaved.txt')
+        self.addCleanup(self.contentstore.delete, asset_key)
+        self.contentstore.save(StaticContent(asset_key, 'resaved.txt', 'text/plain', 'original'))
+        resp = self.client.get(unicode(asset_key))
+        self.assertEqual(resp['Content-Length'], '8')
+        self.assertIsNotNone(get_cached_metadata(asset_key))
+
+        self.contentstore.save(StaticContent(asset_key, 'resaved.txt', 'text/plain', 'updated data'))
+        self.assertIsNone(get_cached_metadata(asset_key))
+        resp = self.client.get(unicode(asset_key))
+        self.assertEqual(resp['Content-Length'], '12')
+
     def test_vary_header_sent(self):
         """
         Tests that we're properly setting the Vary header to ensure browser requests don't get
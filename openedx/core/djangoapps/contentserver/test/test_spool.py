@@ -0,0 +1,126 @@
+"""
+Tests for the on-disk spool of course assets.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import unittest
+
+import ddt
+from django.test.utils import override_settings
+from mock import Mock
+
+from ..spool import AssetSpool, X_ACCEL_REDIRECT, X_SENDFILE, get_asset_spool
+
+ASSET_DATA = ''.join(chr(index % 256) for index in xrange(10000))
+ASSET_DIGEST = hashlib.md5(ASSET_DATA).hexdigest()
+
+
+def make_content(data=ASSET_DATA, content_digest=ASSET_DIGEST):
+    """
+    Returns a mock content streaming the data in chunks.
+    """
+    return Mock(
+        location='/c4x/edX/toy/asset/video.mp4',
+        content_digest=content_digest,
+        stream_data=Mock(side_effect=lambda: (data[index:index + 1000] for index in xrange(0, len(data), 1000))),
+    )
+
+
+@ddt.ddt
+class AssetSpoolTest(unittest.TestCase):
+    """
+    Tests of AssetSpool.
+    """
+    def setUp(self):
+        super(AssetSpoolTest, self).setUp()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.spool = AssetSpool(self.root)
+
+    def spooled_files(self):
+        """
+        Returns the paths of the files in the spool, relative to its root.
+        """
+        return [
+            os.path.relpath(os.path.join(directory, name), self.root)
+            for directory, __, names in os.walk(self.root)
+            for name in names
+        ]
+
+    def test_spool(self):
+        content = make_content()
+        path = self.spool.get(content)
+        self.assertEqual(path, os.path.join(self.root, ASSET_DIGEST[:2], ASSET_DIGEST))
+        with open(path, 'rb') as spooled_file:
+            self.assertEqual(spooled_file.read(), ASSET_DATA)
+
+        # Spooled once, on the first miss.
+        self.assertEqual(self.spool.get(make_content()), path)
+        self.assertEqual(self.spooled_files(), [os.path.join(ASSET_DIGEST[:2], ASSET_DIGEST)])
+
+    def test_find(self):
+        metadata = Mock(content_digest=ASSET_DIGEST)
+        self.assertIsNone(self.spool.find(metadata))
+        path = self.spool.get(make_content())
+        self.assertEqual(self.spool.find(metadata), path)
+        self.assertIsNone(self.spool.find(Mock(content_digest=None)))
+
+    @ddt.data(None, '', '../../etc/passwd', ASSET_DIGEST.upper())
+    def test_invalid_digest(self, content_digest):
+        content = make_content(content_digest=content_digest)
+        self.assertIsNone(self.spool.get(content))
+        self.assertFalse(content.stream_data.called)
+        self.assertEqual(self.spooled_files(), [])
+
+    def test_digest_mismatch(self):
+        self.assertIsNone(self.spool.get(make_content(data='other data')))
+        self.assertEqual(self.spooled_files(), [])
+
+    def test_stream_error(self):
+        content = make_content()
+        content.stream_data.side_effect = IOError
+        self.assertIsNone(self.spool.get(content))
+        self.assertEqual(self.spooled_files(), [])
+
+    def test_file_response(self):
+        response = self.spool.get_response(self.spool.get(make_content()))
+        self.assertEqual(response['Content-Length'], str(len(ASSET_DATA)))
+        self.assertEqual(''.join(response.streaming_content), ASSET_DATA)
+        response.close()
+
+    def test_file_response_range(self):
+        response = self.spool.get_response(self.spool.get(make_content()), (4090, 8200))
+        self.assertEqual(response['Content-Length'], '4111')
+        self.assertEqual(''.join(response.streaming_content), ASSET_DATA[4090:8201])
+        response.close()
+
+    @ddt.data(
+        (X_ACCEL_REDIRECT, lambda root: '/spooled_assets/{}/{}'.format(ASSET_DIGEST[:2], ASSET_DIGEST)),
+        (X_SENDFILE, lambda root: os.path.join(root, ASSET_DIGEST[:2], ASSET_DIGEST)),
+    )
+    @ddt.unpack
+    def test_sendfile_response(self, sendfile_header, expected_value):
+        spool = AssetSpool(self.root, sendfile_header=sendfile_header)
+        self.assertTrue(spool.handles_ranges)
+        response = spool.get_response(spool.get(make_content()))
+        self.assertEqual(response[sendfile_header], expected_value(self.root))
+        self.assertEqual(response.content, '')
+
+    def test_unknown_sendfile_header(self):
+        with self.assertRaises(ValueError):
+            AssetSpool(self.root, sendfile_header='X-Lighttpd-Send-File')
+
+    def test_spool_settings(self):
+        with override_settings(CONTENTSERVER_SPOOL_ROOT=None):
+            self.assertIsNone(get_asset_spool())
+        with override_settings(
+            CONTENTSERVER_SPOOL_ROOT=self.root,
+            CONTENTSERVER_SPOOL_SENDFILE_HEADER=X_ACCEL_REDIRECT,
+            CONTENTSERVER_SPOOL_ACCEL_REDIRECT_LOCATION='/protected',
+        ):
+            spool = get_asset_spool()
+            self.assertEqual(spool.root, self.root)
+            self.assertEqual(spool.sendfile_header, X_ACCEL_REDIRECT)
+            self.assertEqual(spool.accel_redirect_location, '/protected/')
@@ -6,8 +6,11 @@ Module with family of classes for block structures.
 
 The following internal data structures are implemented:
     _BlockRelations - Data structure for a single block's relations.
+    _BlockRelationsIndex - Array-backed index of all blocks' relations,
+        using integer ids for blocks.
     _BlockData - Data structure for a single block's data.
 """
+from array import array
 from copy import deepcopy
 from functools import partial
 from logging import getLogger
@@ -40,6 +43,221 @@ class _BlockRelations(object):
         self.children = []
 
 
+class _BlockRelationsIndex(object):
+    """
+    Array-backed index of the relations of all the blocks in a block
+    structure.  Each block's usage key is interned to an integer id,
+    and the parents and children of all blocks are stored in CSR-style
+    arrays: an array of offsets into a single array of concatenated
+    block ids.
+
+    Traversals of a block structure run over this index, so that only
+    integers, rather than usage keys, are hashed and compared at each
+    step of a traversal.
+
+    The arrays are immutable.  Relations of blocks that are updated
+    after the index is built (when blocks are removed) are recorded
+    in separate override maps that take precedence over the arrays.
+    """
+    # Typecode of the arrays used for block ids and offsets.
+    ARRAY_TYPECODE = 'i'
+
+    def __init__(self, block_keys, children, parents, block_ids=None):
+        """
+        Arguments:
+            block_keys ([UsageKey]) - List of the usage keys of the
+                blocks, whose position in the list is the block's id.
+
+            children ((array, array)) - Pair of the offsets array and
+                the concatenated block ids array of the children of
+                all the blocks.
+
+            parents ((array, array)) - Pair of the offsets array and
+                the concatenated block ids array of the parents of
+                all the blocks.
+
+            block_ids (dict({UsageKey: int})) - Optional map of a
+                block's usage key to its position in block_keys, if
+                already computed by the caller.
+        """
+        # List of usage keys, indexed by block id.
+        # list [UsageKey]
+        self.block_keys = block_keys
+
+        # Map of a block's usage key to its block id.
+        # dict {UsageKey: int}
+        if block_ids is None:
+            block_ids = {block_key: block_id for block_id, block_key in enumerate(block_keys)}
+        self.block_ids = block_ids
+
+        self._children_offsets, self._children_ids = children
+        self._parents_offsets, self._parents_ids = parents
+
+        # Maps of a block id to the ids of its updated relations.
+        # dict {int: [int]}
+        self._children_overrides = {}
+        self._parents_overrides = {}
+
+    @classmethod
+    def from_block_relations(cls, block_relations):
+        """
+        Returns a new index built from the given block relations map.
+
+        Arguments:
+            block_relations (dict({UsageKey: _BlockRelations})) -
+                Internal map of a block's usage key to its
+                parents/children relations.
+        """
+        block_keys = list(block_relations)
+        block_ids = {block_key: block_id for block_id, block_key in enumerate(block_keys)}
+        relations = [block_relations[block_key] for block_key in block_keys]
+        return cls(
+            block_keys,
+            cls._build_arrays(block_ids, [block_relation.children for block_relation in relations]),
+            cls._build_arrays(block_ids, [block_relation.parents for block_relation in relations]),
+            block_ids,
+        )
+
+    @classmethod
+    def _build_arrays(cls, block_ids, related_keys_list):
+        """
+        Returns the offsets array and concatenated block ids array for
+        the given list, indexed by block id, of related usage keys.
+        """
+        offsets = array(cls.ARRAY_TYPECODE, [0])
+        ids = array(cls.ARRAY_TYPECODE)
+        for related_keys in related_keys_list:
+            ids.extend(block_ids[related_key] for related_key in related_keys)
+            offsets.append(len(ids))
+        return offsets, ids
+
+    def __len__(self):
+        return len(self.block_keys)
+
+    def copy(self):
+        """
+        Returns a copy of this index, sharing its immutable arrays.
+        """
+        index = _BlockRelationsIndex.__new__(_BlockRelationsIndex)
+        index.block_keys = self.block_keys
+        index.block_ids = self.block_ids
+        index._children_offsets, index._children_ids = self._children_offsets, self._children_ids
+        index._parents_offsets, index._parents_ids = self._parents_offsets, self._parents_ids
+        index._children_overrides = dict(self._children_overrides)
+        index._parents_overrides = dict(self._parents_overrides)
+        return index
+
+    def get_children(self, block_id):
+        """
+        Returns the ids of the children of the given block.
+        """
+        children = self._children_overrides.get(block_id)
+        if children is None:
+            children = self._children_ids[self._children_offsets[block_id]:self._children_offsets[block_id + 1]]
+        return children
+
+    def get_parents(self, block_id):
+        """
+        Returns the ids of the parents of the given block.
+        """
+        parents = self._parents_overrides.get(block_id)
+        if parents is None:
+            parents = self._parents_ids[self._parents_offsets[block_id]:self._parents_offsets[block_id + 1]]
+        return parents
+
+    def update_relations(self, usage_key, block_relations):
+        """
+        Updates the index with the current relations of the block with
+        the given usage key.
+
+        Arguments:
+            usage_key (UsageKey) - Usage key of the block whose
+                relations were updated.
+
+            block_relations (_BlockRelations or None) - The block's
+                updated relations, or None if the block was removed.
+        """
+        block_id = self.block_ids[usage_key]
+        if block_relations is None:
+            self._children_overrides[block_id] = []
+            self._parents_overrides[block_id] = []
+        else:
+            self._children_overrides[block_id] = [self.block_ids[key] for key in block_relations.children]
+            self._parents_overrides[block_id] = [self.block_ids[key] for key in block_relations.parents]
+
+    def traverse_topologically(self, start_id, filter_func, yield_descendants_of_unyielded):
+        """
+        Generator for yielding the usage keys of the blocks in a
+        topological sort, starting at the given block id.
+
+        This is equivalent to
+        openedx.core.lib.graph_traversals.traverse_topologically,
+        but runs over the block ids of this index.
+        """
+        block_keys = self.block_keys
+        get_parents, get_children = self.get_parents, self.get_children
+
+        # Visit state of each block, indexed by block id.
+        unvisited, unyielded, yielded = 0, 1, 2
+        visit_states = bytearray(len(block_keys))
+
+        stack = [start_id]
+        while stack:
+            block_id = stack.pop()
+
+            # Make sure all the block's parents have been visited and
+            # that at least one of them was yielded.
+            if block_id != start_id:
+                parent_states = [visit_states[parent_id] for parent_id in get_parents(block_id)]
+                if unvisited in parent_states:
+                    continue
+                elif not yield_descendants_of_unyielded and yielded not in parent_states:
+                    continue
+
+            if visit_states[block_id] == unvisited:
+                # Add the children to the stack before checking the
+                # filter, in case a child has multiple parents.
+                children = list(get_children(block_id))
+                children.reverse()
+                stack.extend(children)
+
+                block_key = block_keys[block_id]
+                should_yield_block = filter_func(block_key)
+                if should_yield_block:
+                    yield block_key
+                visit_states[block_id] = yielded if should_yield_block else unyielded
+
+    def traverse_post_order(self, start_id, filter_func):
+        """
+        Generator for yielding the usage keys of the blocks in a
+        post-order sort, starting at the given block id.
+
+        This is equivalent to
+        openedx.core.lib.graph_traversals.traverse_post_order,
+        but runs over the block ids of this index.
+        """
+        block_keys = self.block_keys
+        get_children = self.get_children
+        visited = bytearray(len(block_keys))
+
+        # Stack of (block id, iterator of the block's children).
+        stack = [(start_id, iter(get_children(start_id)))]
+        while stack:
+            block_id, children = stack[-1]
+
+            if visited[block_id] or not filter_func(block_keys[block_id]):
+                stack.pop()
+                continue
+
+            for child_id in children:
+                stack.append((child_id, iter(get_children(child_id))))
+                break
+            else:
+                yield block_keys[block_id]
+                visited[block_id] = 1
+                stack.pop()
+
+
 class BlockStructure(object):
     """
     Base class for a block structure.  BlockStructures are constructed
@@ -62,6 +280,12 @@ class BlockStructure(object):
         # dict {UsageKey: _BlockRelations}
         self._block_relations = {}
 
+        # Array-backed index of the block relations used for
+        # traversals.  It is built lazily and reset whenever the
+        # block relations are replaced or blocks are added.
+        # _BlockRelationsIndex
+        self._relations_index = None
+
         # Add the root block.
         self._add_block(self._block_relations, root_block_usage_key)
 
@@ -76,6 +300,18 @@ class BlockStructure(object):
     def __len__(self):
         return len(self._block_relations)
 
+    @property
+    def _block_relations(self):
+        """
+        Map of a block's usage key to its block relations.
+        """
+        return self.__dict__['_block_relations']
+
+    @_block_relations.setter
+    def _block_relations(self, block_relations):
+        self.__dict__['_block_relations'] = block_relations
+        self._relations_index = None
+
     #--- Block structure relation methods ---#
 
     def get_parents(self, usage_key):
@@ -121,6 +357,8 @@ class BlockStructure(object):
         """
         self.root_block_usage_key = usage_key
         self._block_relations[usage_key].parents = []
+        if self._relations_index is not None:
+            self._relations_index.update_relations(usage_key, self._block_relations[usage_key])
 
     def __contains__(self, usage_key):
         """
@@ -167,11 +405,19 @@ class BlockStructure(object):
             generator - A generator object created from the
                 traverse_topologically method.
         """
-        return traverse_topologically(
-            start_node=start_node or self.root_block_usage_key,
-            get_parents=self.get_parents,
-            get_children=self.get_children,
-            filter_func=filter_func,
+        start_node = start_node or self.root_block_usage_key
+        if start_node not in self:
+            return traverse_topologically(
+                start_node=start_node,
+                get_parents=self.get_parents,
+                get_children=self.get_children,
+                filter_func=filter_func,
+                yield_descendants_of_unyielded=yield_descendants_of_unyielded,
+            )
+        relations_index = self._get_relations_index()
+        return relations_index.traverse_topologically(
+            relations_index.block_ids[start_node],
+            filter_func=filter_func or (lambda __: True),
             yield_descendants_of_unyielded=yield_descendants_of_unyielded,
         )
 
@@ -192,15 +438,31 @@ class BlockStructure(object):
             generator - A generator object created from the
                 traverse_post_order method.
         """
-        return traverse_post_order(
-            start_node=start_node or self.root_block_usage_key,
-            get_children=self.get_children,
-            filter_func=filter_func,
+        start_node = start_node or self.root_block_usage_key
+        if start_node not in self:
+            return traverse_post_order(
+                start_node=start_node,
+                get_children=self.get_children,
+                filter_func=filter_func,
+            )
+        relations_index = self._get_relations_index()
+        return relations_index.traverse_post_order(
+            relations_index.block_ids[start_node],
+            filter_func=filter_func or (lambda __: True),
         )
 
     #--- Internal methods ---#
     # To be used within the block_structure framework or by tests.
 
+    def _get_relations_index(self):
+        """
+        Returns the array-backed index of this structure's block
+        relations, building it if not yet done.
+        """
+        if self._relations_index is None:
+            self._relations_index = _BlockRelationsIndex.from_block_relations(self._block_relations)
+        return self._relations_index
+
     def _prune_unreachable(self):
         """
         Mutates this block structure by removing any unreachable blocks.
@@ -238,6 +500,7 @@ class BlockStructure(object):
             child_key (UsageKey) - Usage key of the child block.
         """
         self._add_to_relations(self._block_relations, parent_key, child_key)
+        self._relations_index = None
 
     @staticmethod
     def _add_to_relations(block_relations, parent_key, child_key):
@@ -420,12 +683,15 @@ class BlockStructureBlockData(BlockStructure):
         deep-copy of this instance's contents.
         """
         from .factory import BlockStructureFactory
-        return BlockStructureFactory.create_new(
+        block_structure = BlockStructureFactory.create_new(
             self.root_block_usage_key,
             deepcopy(self._block_relations),
             deepcopy(self.transformer_data),
             deepcopy(self._block_data_map),
         )
+        if self._relations_index is not None:
+            block_structure._relations_index = self._relations_index.copy()
+        return block_structure
 
     def iteritems(self):
         """
@@ -621,7 +887,15 @@ class BlockStructureBlockData(BlockStructure):
         if keep_descendants:
             for child in children:
                 for parent in parents:
-                    self._add_relation(parent, child)
+                    self._add_to_relations(self._block_relations, parent, child)
+
+        # Update the relations index, which may be in use by an ongoing
+        # traversal, with the updated relations.
+        relations_index = self._relations_index
+        if relations_index is not None and usage_key in relations_index.block_ids:
+            relations_index.update_relations(usage_key, None)
+            for related_key in children + parents:
+                relations_index.update_relations(related_key, self._block_relations[related_key])
 
     def create_universal_filter(self):
         """
@@ -1,13 +1,13 @@
 """
-Module for the Cache class for BlockStructure objects.
+Module for the Cache classes for BlockStructure objects.
 """
-# pylint: disable=protected-access
+from collections import OrderedDict
 from logging import getLogger
-
-from openedx.core.lib.cache_utils import zpickle, zunpickle
+from threading import RLock
+from uuid import uuid4
 
 from .block_structure import BlockStructureBlockData
-from .factory import BlockStructureFactory
+from .serializers import ZPickleSerializer
 
 
 logger = getLogger(__name__)  # pylint: disable=C0103
@@ -17,48 +17,65 @@ class BlockStructureCache(object):
     """
     Cache for BlockStructure objects.
     """
-    def __init__(self, cache):
+    def __init__(self, cache, serializer=None, local_cache=None):
         """
         Arguments:
             cache (django.core.cache.backends.base.BaseCache) - The
                 cache into which cacheable data of the block structure
                 is to be serialized.
+
+            serializer (ZPickleSerializer|ColumnarSerializer) - The
+                serializer to use for the cached data. If None, the
+                block structure is stored as a single compressed pickle.
+
+            local_cache (BlockStructureLocalCache) - An optional
+                process-local cache that is checked before the given
+                cache.
         """
         self._cache = cache
+        self._serializer = serializer or ZPickleSerializer()
+        self._local_cache = local_cache
 
     def add(self, block_structure):
         """
-        Store a compressed and pickled serialization of the given
-        block structure into the given cache.
+        Store a serialization of the given block structure into the
+        given cache, as produced by this cache's serializer.
 
         The key in the cache is 'root.key.<root_block_usage_key>'.
         The data stored in the cache includes the structure's
         block relations, transformer data, and block data.
 
+        A new version identifier is also stored under the key
+        'root.version.<root_block_usage_key>', which process-local
+        caches use to detect that their copy is outdated.
+
         Arguments:
             block_structure (BlockStructure) - The block structure
                 that is to be serialized to the given cache.
         """
-        data_to_cache = (
-            block_structure._block_relations,
-            block_structure.transformer_data,
-            block_structure._block_data_map,
-        )
-        zp_data_to_cache = zpickle(data_to_cache)
+        data_to_cache = self._serializer.serialize(block_structure)
 
         # Set the timeout value for the cache to 1 day as a fail-safe
         # in case the signal to invalidate the cache doesn't come through.
         timeout_in_seconds = 60 * 60 * 24
         self._cache.set(
             self._encode_root_cache_key(block_structure.root_block_usage_key),
-            zp_data_to_cache,
+            data_to_cache,
+            timeout=timeout_in_seconds,
+        )
+
+        # The version is written after the data so that a reader never
+        # associates a new version with older data.
+        self._cache.set(
+            self._encode_root_version_cache_key(block_structure.root_block_usage_key),
+            uuid4().hex,
             timeout=timeout_in_seconds,
         )
 
         logger.info(
             "Wrote BlockStructure %s to cache, size: %s",
             block_structure.root_block_usage_key,
-            len(zp_data_to_cache),
+            len(data_to_cache),
         )
 
     def get(self, root_block_usage_key):
@@ -82,8 +99,8 @@ class BlockStructureCache(object):
         """
 
         # Find root_block_usage_key in the cache.
-        zp_data_from_cache = self._cache.get(self._encode_root_cache_key(root_block_usage_key))
-        if not zp_data_from_cache:
+        data_from_cache = self._get_data(root_block_usage_key)
+        if not data_from_cache:
             logger.info(
                 "Did not find BlockStructure %r in the cache.",
                 root_block_usage_key,
@@ -93,19 +110,35 @@ class BlockStructureCache(object):
             logger.info(
                 "Read BlockStructure %r from cache, size: %s",
                 root_block_usage_key,
-                len(zp_data_from_cache),
+                len(data_from_cache),
             )
 
         # Deserialize and construct the block structure.
-        block_relations, transformer_data, block_data_map = zunpickle(zp_data_from_cache)
-        return BlockStructureFactory.create_new(
-            root_block_usage_key,
-            block_relations,
-            transformer_data,
-            block_data_map,
-        )
+        return self._serializer.deserialize(root_block_usage_key, data_from_cache)
 
-    def delete(self, root_block_usage_key):
+    def get_retained(self, root_block_usage_key):
+        """
+        Deserializes and returns the block structure starting at
+        root_block_usage_key that was retained in the given cache when
+        it was last deleted, if found.
+
+        Arguments:
+            root_block_usage_key (UsageKey) - The usage_key for the root
+                of the block structure that is to be deserialized from
+                the given cache.
+
+        Returns:
+            BlockStructure - The deserialized block structure starting
+            at root_block_usage_key, if retained in the cache.
+
+            NoneType - If no block structure was retained.
+        """
+        data_from_cache = self._cache.get(self._encode_root_retained_cache_key(root_block_usage_key))
+        if not data_from_cache:
+            return None
+        return self._serializer.deserialize(root_block_usage_key, data_from_cache)
+
+    def delete(self, root_block_usage_key, retain=False):
         """
         Deletes the block structure for the given root_block_usage_key
         from the given cache.
@@ -114,20 +147,183 @@ class BlockStructureCache(object):
             root_block_usage_key (UsageKey) - The usage_key for the root
                 of the block structure that is to be removed from
                 the cache.
+
+            retain (bool) - If True, the deleted block structure is kept
+                in the cache under a separate key, where only
+                get_retained can access it.  This allows the next update
+                of the block structure to reuse its collected data.
         """
-        self._cache.delete(self._encode_root_cache_key(root_block_usage_key))
+        root_cache_key = self._encode_root_cache_key(root_block_usage_key)
+        if retain:
+            data_to_retain = self._cache.get(root_cache_key)
+            if data_to_retain:
+                self._cache.set(
+                    self._encode_root_retained_cache_key(root_block_usage_key),
+                    data_to_retain,
+                    timeout=60 * 60 * 24,
+                )
+
+        # The version is deleted first so that process-local caches
+        # stop serving their copies before the data is gone.
+        self._cache.delete(self._encode_root_version_cache_key(root_block_usage_key))
+        self._cache.delete(root_cache_key)
+        if self._local_cache:
+            self._local_cache.delete(root_block_usage_key)
         logger.info(
             "Deleted BlockStructure %r from the cache.",
             root_block_usage_key,
         )
 
-    @classmethod
-    def _encode_root_cache_key(cls, root_block_usage_key):
+    def _get_data(self, root_block_usage_key):
+        """
+        Returns the serialized block structure for the given
+        root_block_usage_key, from the local cache if it has the latest
+        version, or else from the given cache.
+        """
+        root_cache_key = self._encode_root_cache_key(root_block_usage_key)
+        if not self._local_cache:
+            return self._cache.get(root_cache_key)
+
+        version = self._cache.get(self._encode_root_version_cache_key(root_block_usage_key))
+        data = self._local_cache.get(root_block_usage_key, version) if version else None
+        if data is None:
+            data = self._cache.get(root_cache_key)
+            if data and version:
+                self._local_cache.set(root_block_usage_key, version, data)
+        return data
+
+    def _encode_root_cache_key(self, root_block_usage_key):
         """
         Returns the cache key to use for storing the block structure
         for the given root_block_usage_key.
         """
-        return "v{version}.root.key.{root_usage_key}".format(
+        key_tag = self._serializer.CACHE_KEY_TAG
+        return "v{version}.{tag}root.key.{root_usage_key}".format(
+            version=unicode(BlockStructureBlockData.VERSION),
+            tag=u'{}.'.format(key_tag) if key_tag else u'',
+            root_usage_key=unicode(root_block_usage_key),
+        )
+
+    def _encode_root_retained_cache_key(self, root_block_usage_key):
+        """
+        Returns the cache key to use for retaining the deleted block
+        structure for the given root_block_usage_key.
+        """
+        return u"retained.{root_cache_key}".format(
+            root_cache_key=self._encode_root_cache_key(root_block_usage_key),
+        )
+
+    def _encode_root_version_cache_key(self, root_block_usage_key):
+        """
+        Returns the cache key to use for storing the version of the
+        block structure for the given root_block_usage_key.
+        """
+        return u"v{version}.root.version.{root_usage_key}".format(
             version=unicode(BlockStructureBlockData.VERSION),
             root_usage_key=unicode(root_block_usage_key),
         )
+
+
+class BlockStructureLocalCache(object):
+    """
+    A process-local, size-bounded LRU cache of serialized block
+    structures, keyed by root usage key and version.
+
+    Only the most recent version of a block structure is kept for each
+    root usage key; an entry is returned only for the exact version that
+    is requested, so callers never see an outdated block structure as
+    long as they request the latest version.
+    """
+    def __init__(self, max_size):
+        """
+        Arguments:
+            max_size (int) - The maximum total size, in bytes, of the
+                serialized block structures held by this cache.
+        """
+        self.max_size = max_size
+
+        # Map of root usage key to a (version, serialized data) pair,
+        # ordered from least to most recently used.
+        # OrderedDict {UsageKey: (string, string)}
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, root_block_usage_key, version):
+        """
+        Returns the serialized block structure for the given
+        root_block_usage_key if it is cached for the given version;
+        otherwise, returns None.
+        """
+        with self._lock:
+            entry = self._entries.pop(root_block_usage_key, None)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                if entry is not None:
+                    self._size -= len(entry[1])
+                return None
+
+            self._entries[root_block_usage_key] = entry
+            self.hits += 1
+            return entry[1]
+
+    def set(self, root_block_usage_key, version, data):
+        """
+        Caches the serialized block structure for the given
+        root_block_usage_key and version, evicting the least recently
+        used entries as needed.  Data larger than the cache's maximum
+        size is not cached.
+        """
+        if len(data) > self.max_size:
+            return
+        with self._lock:
+            self._remove(root_block_usage_key)
+            while self._entries and self._size + len(data) > self.max_size:
+                _, (_, evicted_data) = self._entries.popitem(last=False)
+                self._size -= len(evicted_data)
+                self.evictions += 1
+            self._entries[root_block_usage_key] = (version, data)
+            self._size += len(data)
+
+    def delete(self, root_block_usage_key):
+        """
+        Removes any entry for the given root_block_usage_key.
+        """
+        with self._lock:
+            self._remove(root_block_usage_key)
+
+    def clear(self):
+        """
+        Removes all entries and resets the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """
+        Returns a dict of the cache's hit, miss and eviction counters,
+        along with its current number of entries and size in bytes.
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'size': self._size,
+            }
+
+    def _remove(self, root_block_usage_key):
+        """
+        Removes any entry for the given root_block_usage_key.  Must be
+        called with the lock held.
+        """
+        entry = self._entries.pop(root_block_usage_key, None)
+        if entry is not None:
+            self._size -= len(entry[1])
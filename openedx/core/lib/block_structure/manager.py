@@ -15,7 +15,7 @@ class BlockStructureManager(object):
     Top-level class for managing Block Structures.
     """
 
-    def __init__(self, root_block_usage_key, modulestore, cache):
+    def __init__(self, root_block_usage_key, modulestore, cache, cache_serializer=None, local_cache=None):
         """
         Arguments:
             root_block_usage_key (UsageKey) - The usage_key for the root
@@ -28,10 +28,17 @@ class BlockStructureManager(object):
             cache (django.core.cache.backends.base.BaseCache) - The
                 cache to use for storing/retrieving the block structure's
                 collected data.
+
+            cache_serializer (ZPickleSerializer|ColumnarSerializer) -
+                The serializer to use for the cached data. See
+                BlockStructureCache.
+
+            local_cache (BlockStructureLocalCache) - An optional
+                process-local cache to check before the given cache.
         """
         self.root_block_usage_key = root_block_usage_key
         self.modulestore = modulestore
-        self.block_structure_cache = BlockStructureCache(cache)
+        self.block_structure_cache = BlockStructureCache(cache, cache_serializer, local_cache)
 
     def get_transformed(self, transformers, starting_block_usage_key=None, collected_block_structure=None):
         """
@@ -104,22 +111,65 @@ class BlockStructureManager(object):
                 self.block_structure_cache.add(block_structure)
         return block_structure
 
-    def update_collected(self):
+    def update_collected(self, incremental=False):
         """
         Updates the collected Block Structure for the root_block_usage_key.
 
         Details: The cache is cleared and updated by collecting transformers
         data from the modulestore.
+
+        Arguments:
+            incremental (bool) - If True, and a previously collected
+                block structure is available in the cache, only the
+                blocks that changed since then are recollected, along
+                with their descendants and ancestors.  This requires all
+                registered transformers to be subtree-local; otherwise,
+                the entire block structure is recollected.
         """
+        previous_block_structure = self._get_previous_collected() if incremental else None
         self.clear()
-        self.get_collected()
-
-    def clear(self):
+        if previous_block_structure is None:
+            self.get_collected()
+            return
+
+        with self._bulk_operations():
+            block_structure = BlockStructureFactory.create_from_modulestore(
+                self.root_block_usage_key,
+                self.modulestore,
+                lazy=True,
+            )
+            block_structure = BlockStructureTransformers.collect_incrementally(
+                block_structure,
+                previous_block_structure,
+            )
+            self.block_structure_cache.add(block_structure)
+
+    def clear(self, retain=False):
         """
         Removes cached data for the block structure associated with the given
         root block key.
+
+        Arguments:
+            retain (bool) - If True, the removed data is retained for
+                use by a later incremental update_collected.
+        """
+        self.block_structure_cache.delete(self.root_block_usage_key, retain=retain)
+
+    def _get_previous_collected(self):
         """
-        self.block_structure_cache.delete(self.root_block_usage_key)
+        Returns the most recently collected Block Structure for the
+        root_block_usage_key that can be used for an incremental update,
+        or None if there is none.
+        """
+        if not BlockStructureTransformers.supports_incremental_collect():
+            return None
+        block_structure = (
+            self.block_structure_cache.get(self.root_block_usage_key) or
+            self.block_structure_cache.get_retained(self.root_block_usage_key)
+        )
+        if block_structure is None or BlockStructureTransformers.is_collected_outdated(block_structure):
+            return None
+        return block_structure
 
     @contextmanager
     def _bulk_operations(self):
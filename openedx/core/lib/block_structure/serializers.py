@@ -0,0 +1,351 @@
+"""
+Module with serializers used by the BlockStructureCache for storing
+BlockStructure objects.
+    ZPickleSerializer - the default serializer, which pickles and
+        compresses the entire block structure as a single blob.
+    ColumnarSerializer - a serializer that stores block relations
+        as compact integer-indexed arrays and block data in
+        per-field columns that are deserialized lazily.
+
+The following internal data structures are implemented:
+    _ColumnStore - Holder of the still-serialized columns of a block
+        structure.
+    _ColumnarBlockData - BlockData that lazily loads its fields from
+        a _ColumnStore.
+    _ColumnarTransformerDataMap - TransformerDataMap that lazily loads
+        its block-specific transformer data from a _ColumnStore.
+"""
+# pylint: disable=protected-access
+from array import array
+import cPickle as pickle
+
+from openedx.core.lib.cache_utils import zpickle, zunpickle
+
+from .block_structure import BlockData, TransformerData, TransformerDataMap, _BlockRelations, _BlockRelationsIndex
+from .factory import BlockStructureFactory
+
+
+class ZPickleSerializer(object):
+    """
+    Serializes the block relations, transformer data and block data
+    of a block structure as a single compressed pickle.
+    """
+    # Tag to add to cache keys of structures serialized in this format.
+    # The default format is untagged so existing cache entries stay valid.
+    CACHE_KEY_TAG = None
+
+    def serialize(self, block_structure):
+        """
+        Returns a compressed and pickled serialization of the given
+        block structure.
+        """
+        return zpickle((
+            block_structure._block_relations,
+            block_structure.transformer_data,
+            block_structure._block_data_map,
+        ))
+
+    def deserialize(self, root_block_usage_key, serialized_data):
+        """
+        Returns the block structure starting at root_block_usage_key,
+        deserialized from the given data.
+        """
+        block_relations, transformer_data, block_data_map = zunpickle(serialized_data)
+        return BlockStructureFactory.create_new(
+            root_block_usage_key,
+            block_relations,
+            transformer_data,
+            block_data_map,
+        )
+
+
+class ColumnarSerializer(object):
+    """
+    Serializes a block structure into the following independently
+    compressed segments:
+
+        * the list of block usage keys, whose position in the list is
+          used as the block's integer id in all other segments,
+        * parent and child relations as CSR-style integer arrays,
+        * the non-block-specific transformer data,
+        * one column per collected xBlock field, and
+        * one column per transformer's block-specific data.
+
+    On deserialization, only the keys, relations and transformer data
+    are decoded.  A column is decompressed only when one of its fields
+    is first read, so a request that needs a handful of fields does not
+    pay for unpickling every field of every block.
+    """
+    CACHE_KEY_TAG = 'columnar'
+
+    # Version of the serialization format. Update this value whenever
+    # the format changes.
+    FORMAT_VERSION = 1
+
+    # Typecode of the arrays used for integer ids and offsets.
+    ARRAY_TYPECODE = 'i'
+
+    def serialize(self, block_structure):
+        """
+        Returns a columnar serialization of the given block structure.
+        """
+        block_relations = block_structure._block_relations
+        block_data_map = block_structure._block_data_map
+
+        block_keys = list(block_relations)
+        block_keys.extend(key for key in block_data_map if key not in block_relations)
+        block_index = {block_key: index for index, block_key in enumerate(block_keys)}
+
+        field_columns = {}
+        transformer_columns = {}
+        data_indices = array(self.ARRAY_TYPECODE)
+        for block_key, block_data in block_data_map.iteritems():
+            index = block_index[block_key]
+            data_indices.append(index)
+            if isinstance(block_data, _ColumnarBlockData):
+                block_data._load_all()
+            for field_name, value in block_data.fields.iteritems():
+                field_columns.setdefault(field_name, {})[index] = value
+            for transformer_name, transformer_data in block_data.transformer_data.iteritems():
+                transformer_columns.setdefault(transformer_name, {})[index] = transformer_data.fields
+
+        return pickle.dumps(
+            {
+                'version': self.FORMAT_VERSION,
+                'keys': zpickle(block_keys),
+                'num_related_blocks': len(block_relations),
+                'children': self._encode_relations(block_keys, block_index, block_relations, 'children'),
+                'parents': self._encode_relations(block_keys, block_index, block_relations, 'parents'),
+                'data_indices': data_indices.tostring(),
+                'transformer_data': zpickle(block_structure.transformer_data),
+                'field_columns': {name: zpickle(column) for name, column in field_columns.iteritems()},
+                'transformer_columns': {name: zpickle(column) for name, column in transformer_columns.iteritems()},
+            },
+            pickle.HIGHEST_PROTOCOL,
+        )
+
+    def deserialize(self, root_block_usage_key, serialized_data):
+        """
+        Returns the block structure starting at root_block_usage_key,
+        deserialized from the given data.  The block data of the
+        returned structure is loaded lazily from its columns.
+
+        Returns None if the data was serialized with a different
+        version of this format.
+        """
+        segments = pickle.loads(serialized_data)
+        if segments.get('version') != self.FORMAT_VERSION:
+            return None
+
+        block_keys = zunpickle(segments['keys'])
+        num_related_blocks = segments['num_related_blocks']
+        children_arrays = self._decode_arrays(segments['children'])
+        parents_arrays = self._decode_arrays(segments['parents'])
+        children = self._decode_relations(block_keys, num_related_blocks, children_arrays)
+        parents = self._decode_relations(block_keys, num_related_blocks, parents_arrays)
+
+        block_relations = {}
+        for index in xrange(num_related_blocks):
+            relations = _BlockRelations()
+            relations.children = children[index]
+            relations.parents = parents[index]
+            block_relations[block_keys[index]] = relations
+
+        column_store = _ColumnStore(segments['field_columns'], segments['transformer_columns'])
+        data_indices = array(self.ARRAY_TYPECODE)
+        data_indices.fromstring(segments['data_indices'])
+        block_data_map = {
+            block_keys[index]: _ColumnarBlockData(block_keys[index], column_store, index)
+            for index in data_indices
+        }
+
+        block_structure = BlockStructureFactory.create_new(
+            root_block_usage_key,
+            block_relations,
+            zunpickle(segments['transformer_data']),
+            block_data_map,
+        )
+
+        # The serialized arrays use the same block ids as the relations
+        # index, so it can be created without rebuilding them.
+        block_structure._relations_index = _BlockRelationsIndex(
+            block_keys[:num_related_blocks],
+            children_arrays,
+            parents_arrays,
+        )
+        return block_structure
+
+    @classmethod
+    def _encode_relations(cls, block_keys, block_index, block_relations, relation_name):
+        """
+        Returns the given relation (either 'children' or 'parents') of
+        all related blocks as a pair of serialized arrays: the offsets
+        of each block's entries and the concatenated block ids.
+        """
+        offsets = array(cls.ARRAY_TYPECODE, [0])
+        ids = array(cls.ARRAY_TYPECODE)
+        for block_key in block_keys[:len(block_relations)]:
+            ids.extend(block_index[related_key] for related_key in getattr(block_relations[block_key], relation_name))
+            offsets.append(len(ids))
+        return offsets.tostring(), ids.tostring()
+
+    @classmethod
+    def _decode_arrays(cls, encoded_relations):
+        """
+        Returns the offsets and block ids arrays deserialized from the
+        given pair of serialized arrays.
+        """
+        offsets, ids = array(cls.ARRAY_TYPECODE), array(cls.ARRAY_TYPECODE)
+        offsets.fromstring(encoded_relations[0])
+        ids.fromstring(encoded_relations[1])
+        return offsets, ids
+
+    @classmethod
+    def _decode_relations(cls, block_keys, num_related_blocks, relation_arrays):
+        """
+        Returns a list, indexed by block id, of lists of related usage
+        keys for the given offsets and block ids arrays.
+        """
+        offsets, ids = relation_arrays
+        return [
+            [block_keys[related_id] for related_id in ids[offsets[index]:offsets[index + 1]]]
+            for index in xrange(num_related_blocks)
+        ]
+
+
+class _ColumnStore(object):
+    """
+    Data structure holding the compressed columns of a deserialized
+    block structure, decompressing each column on first access.
+    """
+    def __init__(self, field_columns, transformer_columns):
+        # Map of an xBlock field name to its compressed column.
+        # dict {string: zpickled dict {int: any picklable type}}
+        self._field_columns = field_columns
+
+        # Map of a transformer name to its compressed column of
+        # block-specific data.
+        # dict {string: zpickled dict {int: dict}}
+        self._transformer_columns = transformer_columns
+
+        # Decompressed columns, keyed by (column type, name).
+        self._loaded_columns = {}
+
+    def __deepcopy__(self, memo):
+        """
+        Copies share the immutable compressed columns, but decompress
+        their own values so that copies can be mutated independently.
+        """
+        return _ColumnStore(self._field_columns, self._transformer_columns)
+
+    def field_names(self):
+        """
+        Returns the names of all the xBlock fields stored in columns.
+        """
+        return self._field_columns.keys()
+
+    def transformer_names(self):
+        """
+        Returns the names of all the transformers with block-specific
+        data stored in columns.
+        """
+        return self._transformer_columns.keys()
+
+    def get_field_column(self, field_name):
+        """
+        Returns the decompressed column for the given xBlock field,
+        or an empty dict if the field was not collected.
+        """
+        return self._get_column('field', field_name, self._field_columns)
+
+    def get_transformer_column(self, transformer_name):
+        """
+        Returns the decompressed column of block-specific data for the
+        given transformer, or an empty dict if there is none.
+        """
+        return self._get_column('transformer', transformer_name, self._transformer_columns)
+
+    def _get_column(self, column_type, name, columns):
+        """
+        Returns the requested column, decompressing it if not yet done.
+        """
+        cache_key = (column_type, name)
+        try:
+            return self._loaded_columns[cache_key]
+        except KeyError:
+            compressed_column = columns.get(name)
+            column = zunpickle(compressed_column) if compressed_column is not None else {}
+            self._loaded_columns[cache_key] = column
+            return column
+
+
+class _ColumnarTransformerDataMap(TransformerDataMap):
+    """
+    A TransformerDataMap for a single block that loads the block's
+    data for a transformer from a _ColumnStore on first access.
+    """
+    def __init__(self, column_store, index):
+        super(_ColumnarTransformerDataMap, self).__init__()
+        self._column_store = column_store
+        self._index = index
+
+    def __missing__(self, transformer_name):
+        try:
+            fields = self._column_store.get_transformer_column(transformer_name)[self._index]
+        except KeyError:
+            raise KeyError(transformer_name)
+        transformer_data = TransformerData()
+        transformer_data.fields = fields
+        self[transformer_name] = transformer_data
+        return transformer_data
+
+    def _load_all(self):
+        """
+        Loads the block's data for all transformers from the column store.
+        """
+        for transformer_name in self._column_store.transformer_names():
+            if transformer_name not in self:
+                try:
+                    self[transformer_name]  # pylint: disable=pointless-statement
+                except KeyError:
+                    pass
+
+
+class _ColumnarBlockData(BlockData):
+    """
+    BlockData that loads the values of its xBlock fields from a
+    _ColumnStore on first access.
+    """
+    # Names of the fields defined directly on this class, precomputed
+    # since a large number of these objects are created on each read.
+    _CLASS_FIELD_NAMES = frozenset(['fields', 'location', 'transformer_data', '_column_store', '_index'])
+
+    def class_field_names(self):
+        return list(self._CLASS_FIELD_NAMES)
+
+    def __init__(self, usage_key, column_store, index):  # pylint: disable=super-init-not-called
+        # Bypass the overridden __setattr__ for faster construction.
+        object.__setattr__(self, 'fields', {})
+        object.__setattr__(self, 'location', usage_key)
+        object.__setattr__(self, 'transformer_data', _ColumnarTransformerDataMap(column_store, index))
+        object.__setattr__(self, '_column_store', column_store)
+        object.__setattr__(self, '_index', index)
+
+    def __getattr__(self, field_name):
+        if not (self._is_own_field(field_name) or field_name.startswith('__') or field_name in self.fields):
+            column = self._column_store.get_field_column(field_name)
+            if self._index in column:
+                self.fields[field_name] = column[self._index]
+        return super(_ColumnarBlockData, self).__getattr__(field_name)
+
+    def _is_own_field(self, field_name):
+        return field_name in self._CLASS_FIELD_NAMES
+
+    def _load_all(self):
+        """
+        Loads all of the block's fields and transformer data from the
+        column store.
+        """
+        for field_name in self._column_store.field_names():
+            getattr(self, field_name, None)
+        self.transformer_data._load_all()
@@ -104,9 +104,9 @@ class MockCache(object):
 
     def delete(self, key):
         """
-        Deletes the given key from the cache.
+        Deletes the given key from the cache, if present.
         """
-        del self.map[key]
+        self.map.pop(key, None)
 
 
 class MockModulestoreFactory(object):
@@ -9,7 +9,7 @@ import itertools
 from nose.plugins.attrib import attr
 from unittest import TestCase
 
-from openedx.core.lib.graph_traversals import traverse_post_order
+from openedx.core.lib.graph_traversals import traverse_post_order, traverse_topologically
 
 from ..block_structure import BlockStructure, BlockStructureModulestoreData
 from ..exceptions import TransformerException
@@ -44,6 +44,57 @@ class TestBlockStructure(TestCase, ChildrenMapTestMixin):
             self.assertIn(node, block_structure)
         self.assertNotIn(len(children_map) + 1, block_structure)
 
+    @ddt.data(
+        *itertools.product(
+            [
+                ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP,
+                ChildrenMapTestMixin.LINEAR_CHILDREN_MAP,
+                ChildrenMapTestMixin.DAG_CHILDREN_MAP,
+            ],
+            [None, lambda block: block != 1, lambda block: block % 2 == 0],
+            [True, False],
+        )
+    )
+    @ddt.unpack
+    def test_traversals(self, children_map, filter_func, yield_descendants_of_unyielded):
+        block_structure = self.create_block_structure(children_map, BlockStructure)
+        self.assertEquals(
+            list(block_structure.topological_traversal(filter_func, yield_descendants_of_unyielded)),
+            list(traverse_topologically(
+                0,
+                block_structure.get_parents,
+                block_structure.get_children,
+                filter_func,
+                yield_descendants_of_unyielded,
+            )),
+        )
+        self.assertEquals(
+            list(block_structure.post_order_traversal(filter_func)),
+            list(traverse_post_order(0, block_structure.get_children, filter_func)),
+        )
+        self.assertEquals(
+            list(block_structure.post_order_traversal(filter_func, start_node=2)),
+            list(traverse_post_order(2, block_structure.get_children, filter_func)),
+        )
+
+    def test_traversal_of_missing_start_node(self):
+        block_structure = self.create_block_structure(ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP, BlockStructure)
+        self.assertEquals(list(block_structure.topological_traversal(start_node=10)), [10])
+        self.assertEquals(list(block_structure.post_order_traversal(start_node=10)), [10])
+
+    def test_traversal_after_relations_update(self):
+        block_structure = self.create_block_structure(ChildrenMapTestMixin.LINEAR_CHILDREN_MAP, BlockStructure)
+        self.assertEquals(list(block_structure.topological_traversal()), [0, 1, 2, 3])
+
+        block_structure._add_relation(1, 4)
+        self.assertEquals(list(block_structure.topological_traversal()), [0, 1, 2, 3, 4])
+
+        block_structure.set_root_block(2)
+        self.assertEquals(list(block_structure.topological_traversal()), [2, 3])
+
+        block_structure._prune_unreachable()
+        self.assertEquals(list(block_structure.post_order_traversal()), [3, 2])
+
 
 @attr(shard=2)
 @ddt.ddt
@@ -223,6 +274,43 @@ class TestBlockStructureData(TestCase, ChildrenMapTestMixin):
         block_structure.remove_block_traversal(lambda block: block == 2)
         self.assert_block_structure(block_structure, [[1], [], [], []], missing_blocks=[2])
 
+    @ddt.data(
+        *itertools.product(
+            [True, False],
+            [[1], [2], [3], [1, 3], [2, 4], [3, 5, 6]],
+        )
+    )
+    @ddt.unpack
+    def test_remove_block_traversal_dag(self, keep_descendants, blocks_to_remove):
+        def removal_condition(block):
+            """
+            Returns whether the given block is to be removed.
+            """
+            return block in blocks_to_remove
+
+        block_structure = self.create_block_structure(ChildrenMapTestMixin.DAG_CHILDREN_MAP)
+        block_structure.remove_block_traversal(removal_condition, keep_descendants)
+
+        # Remove the same blocks using the generic graph traversal over
+        # the block structure's relations, as the expected result.
+        expected_structure = self.create_block_structure(ChildrenMapTestMixin.DAG_CHILDREN_MAP)
+        for _ in traverse_topologically(
+                0,
+                expected_structure.get_parents,
+                expected_structure.get_children,
+                expected_structure.create_removal_filter(removal_condition, keep_descendants),
+        ):
+            pass
+
+        self.assertSetEqual(set(block_structure), set(expected_structure))
+        for block in expected_structure:
+            self.assertEquals(block_structure.get_children(block), expected_structure.get_children(block))
+            self.assertEquals(block_structure.get_parents(block), expected_structure.get_parents(block))
+        self.assertEquals(
+            list(block_structure.topological_traversal()),
+            list(traverse_topologically(0, expected_structure.get_parents, expected_structure.get_children)),
+        )
+
     def test_copy(self):
         def _set_value(structure, value):
             """
@@ -4,7 +4,8 @@ Tests for block_structure/cache.py
 from nose.plugins.attrib import attr
 from unittest import TestCase
 
-from ..cache import BlockStructureCache
+from ..cache import BlockStructureCache, BlockStructureLocalCache
+from ..serializers import ColumnarSerializer
 from .helpers import ChildrenMapTestMixin, MockCache, MockTransformer
 
 
@@ -13,12 +14,14 @@ class TestBlockStructureCache(ChildrenMapTestMixin, TestCase):
     """
     Tests for BlockStructureCache
     """
+    serializer = None
+
     def setUp(self):
         super(TestBlockStructureCache, self).setUp()
         self.children_map = self.SIMPLE_CHILDREN_MAP
         self.block_structure = self.create_block_structure(self.children_map)
         self.mock_cache = MockCache()
-        self.block_structure_cache = BlockStructureCache(self.mock_cache)
+        self.block_structure_cache = BlockStructureCache(self.mock_cache, self.serializer)
 
     def add_transformers(self):
         """
@@ -54,3 +57,169 @@ class TestBlockStructureCache(ChildrenMapTestMixin, TestCase):
         self.assertIsNone(
             self.block_structure_cache.get(self.block_structure.root_block_usage_key)
         )
+
+
+@attr(shard=2)
+class TestBlockStructureCacheColumnar(TestBlockStructureCache):
+    """
+    Tests for BlockStructureCache with the columnar serializer
+    """
+    serializer = ColumnarSerializer()
+
+    def add_block_fields(self):
+        """
+        Mimic collection by setting xBlock fields on every block.
+        """
+        for block_key in self.block_structure:
+            block_data = self.block_structure._get_or_create_block(block_key)  # pylint: disable=protected-access
+            block_data.display_name = 'Block {}'.format(block_key)
+            block_data.graded = block_key % 2 == 0
+
+    def test_fields_round_trip(self):
+        self.add_transformers()
+        self.add_block_fields()
+        self.block_structure_cache.add(self.block_structure)
+        cached_value = self.block_structure_cache.get(self.block_structure.root_block_usage_key)
+
+        for block_key in self.block_structure:
+            self.assertEquals(cached_value.get_xblock_field(block_key, 'display_name'), 'Block {}'.format(block_key))
+            self.assertEquals(cached_value.get_xblock_field(block_key, 'graded'), block_key % 2 == 0)
+            self.assertIsNone(cached_value.get_xblock_field(block_key, 'not_collected'))
+        self.assertEquals(
+            cached_value.get_transformer_block_field(0, MockTransformer, 'test'),
+            '{} val'.format(MockTransformer.name()),
+        )
+        self.assertIsNone(cached_value.get_transformer_block_field(1, MockTransformer, 'test'))
+        self.assertEquals(
+            cached_value._get_transformer_data_version(MockTransformer), 1  # pylint: disable=protected-access
+        )
+
+    def test_traversals_use_serialized_relations(self):
+        self.block_structure_cache.add(self.block_structure)
+        cached_value = self.block_structure_cache.get(self.block_structure.root_block_usage_key)
+
+        self.assertIsNotNone(cached_value._relations_index)  # pylint: disable=protected-access
+        self.assertEquals(
+            list(cached_value.topological_traversal()),
+            list(self.block_structure.topological_traversal()),
+        )
+        self.assertEquals(
+            list(cached_value.post_order_traversal()),
+            list(self.block_structure.post_order_traversal()),
+        )
+
+        cached_value.remove_block_traversal(lambda block: block == 1)
+        self.assertNotIn(1, list(cached_value.topological_traversal()))
+
+    def test_fields_loaded_lazily(self):
+        self.add_block_fields()
+        self.block_structure_cache.add(self.block_structure)
+        cached_value = self.block_structure_cache.get(self.block_structure.root_block_usage_key)
+
+        self.assertEquals(cached_value[1].fields, {})
+        self.assertEquals(cached_value.get_xblock_field(1, 'graded'), False)
+        self.assertEquals(cached_value[1].fields, {'graded': False})
+
+    def test_copies_are_independent(self):
+        self.add_block_fields()
+        self.block_structure_cache.add(self.block_structure)
+        cached_value = self.block_structure_cache.get(self.block_structure.root_block_usage_key)
+
+        copied_value = cached_value.copy()
+        copied_value[1].display_name = 'Changed'
+        copied_value.remove_block(2, keep_descendants=False)
+        self.assertEquals(cached_value.get_xblock_field(1, 'display_name'), 'Block 1')
+        self.assertEquals(copied_value.get_xblock_field(3, 'display_name'), 'Block 3')
+        self.assert_block_structure(cached_value, self.children_map)
+
+    def test_round_trip_of_deserialized_structure(self):
+        self.add_transformers()
+        self.add_block_fields()
+        self.block_structure_cache.add(self.block_structure)
+        cached_value = self.block_structure_cache.get(self.block_structure.root_block_usage_key)
+
+        self.block_structure_cache.add(cached_value)
+        cached_value = self.block_structure_cache.get(self.block_structure.root_block_usage_key)
+        self.assert_block_structure(cached_value, self.children_map)
+        self.assertEquals(cached_value.get_xblock_field(4, 'display_name'), 'Block 4')
+        self.assertEquals(
+            cached_value.get_transformer_block_field(0, MockTransformer, 'test'),
+            '{} val'.format(MockTransformer.name()),
+        )
+
+    def test_cache_key_is_tagged(self):
+        self.block_structure_cache.add(self.block_structure)
+        self.assertIn('v1.columnar.root.key.0', self.mock_cache.map)
+
+
+@attr(shard=2)
+class TestBlockStructureCacheWithLocalCache(TestBlockStructureCache):
+    """
+    Tests for BlockStructureCache with a process-local cache
+    """
+    def setUp(self):
+        super(TestBlockStructureCacheWithLocalCache, self).setUp()
+        self.local_cache = BlockStructureLocalCache(max_size=1024 * 1024)
+        self.block_structure_cache = BlockStructureCache(self.mock_cache, local_cache=self.local_cache)
+
+    def test_hit(self):
+        self.block_structure_cache.add(self.block_structure)
+        self.block_structure_cache.get(self.block_structure.root_block_usage_key)
+        self.assertEquals(self.local_cache.stats()['misses'], 1)
+
+        root_cache_key = 'v1.root.key.0'
+        shared_data = self.mock_cache.map.pop(root_cache_key)
+        cached_value = self.block_structure_cache.get(self.block_structure.root_block_usage_key)
+        self.assert_block_structure(cached_value, self.children_map)
+        self.assertEquals(self.local_cache.stats()['hits'], 1)
+
+        # A new version in the shared cache replaces the local copy.
+        self.mock_cache.map[root_cache_key] = shared_data
+        self.block_structure_cache.add(self.create_block_structure(self.LINEAR_CHILDREN_MAP))
+        cached_value = self.block_structure_cache.get(self.block_structure.root_block_usage_key)
+        self.assert_block_structure(cached_value, self.LINEAR_CHILDREN_MAP)
+        self.assertEquals(self.local_cache.stats()['misses'], 2)
+        self.assertEquals(self.local_cache.stats()['entries'], 1)
+
+    def test_delete_invalidates_local_cache(self):
+        self.block_structure_cache.add(self.block_structure)
+        self.block_structure_cache.get(self.block_structure.root_block_usage_key)
+        self.assertEquals(self.local_cache.stats()['entries'], 1)
+
+        self.block_structure_cache.delete(self.block_structure.root_block_usage_key)
+        self.assertEquals(self.local_cache.stats()['entries'], 0)
+        self.assertIsNone(self.block_structure_cache.get(self.block_structure.root_block_usage_key))
+
+
+@attr(shard=2)
+class TestBlockStructureLocalCache(TestCase):
+    """
+    Tests for BlockStructureLocalCache
+    """
+    def setUp(self):
+        super(TestBlockStructureLocalCache, self).setUp()
+        self.local_cache = BlockStructureLocalCache(max_size=10)
+
+    def test_version_mismatch(self):
+        self.local_cache.set('root', 'v1', 'data')
+        self.assertIsNone(self.local_cache.get('root', 'v2'))
+        self.assertIsNone(self.local_cache.get('root', 'v1'))
+        self.assertEquals(self.local_cache.stats()['size'], 0)
+
+    def test_lru_eviction(self):
+        self.local_cache.set('a', 'v1', 'aaaa')
+        self.local_cache.set('b', 'v1', 'bbbb')
+        self.assertEquals(self.local_cache.get('a', 'v1'), 'aaaa')
+        self.local_cache.set('c', 'v1', 'cccc')
+
+        self.assertIsNone(self.local_cache.get('b', 'v1'))
+        self.assertEquals(self.local_cache.get('a', 'v1'), 'aaaa')
+        self.assertEquals(self.local_cache.get('c', 'v1'), 'cccc')
+        self.assertEquals(
+            self.local_cache.stats(),
+            {'hits': 3, 'misses': 1, 'evictions': 1, 'entries': 2, 'size': 8},
+        )
+
+    def test_too_large(self):
+        self.local_cache.set('a', 'v1', 'a' * 11)
+        self.assertIsNone(self.local_cache.get('a', 'v1'))
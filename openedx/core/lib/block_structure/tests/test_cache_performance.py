@@ -0,0 +1,113 @@
+"""
+Performance comparison of the BlockStructureCache serializers on
+large generated courses.
+
+These tests are not run as part of the regular unit tests.  To run them:
+
+    RUN_PERF_TESTS=1 nosetests -s openedx/core/lib/block_structure/tests/test_cache_performance.py
+"""
+import os
+from timeit import default_timer
+from unittest import TestCase, skipUnless
+
+import ddt
+
+from ..block_structure import BlockStructureBlockData
+from ..cache import BlockStructureCache
+from ..serializers import ColumnarSerializer, ZPickleSerializer
+from .helpers import MockCache, MockTransformer
+
+# Number of times each operation is repeated when timing it.
+NUM_REPETITIONS = 5
+
+
+@ddt.ddt
+@skipUnless(os.environ.get('RUN_PERF_TESTS'), 'Performance tests are only run when RUN_PERF_TESTS is set.')
+class BlockStructureCacheSerializerPerformance(TestCase):
+    """
+    Times writing to and reading from the cache with each serializer.
+    """
+    perf_test = True
+
+    def create_course(self, num_chapters, num_sequentials, num_verticals, num_problems):
+        """
+        Returns a collected block structure for a generated course with
+        the given number of blocks at each level, and the fields that
+        the standard transformers typically collect.
+        """
+        block_structure = BlockStructureBlockData(root_block_usage_key='course')
+        block_structure._add_transformer(MockTransformer)  # pylint: disable=protected-access
+        parents = ['course']
+        for category, count in (
+                ('chapter', num_chapters),
+                ('sequential', num_sequentials),
+                ('vertical', num_verticals),
+                ('problem', num_problems),
+        ):
+            children = []
+            for parent in parents:
+                for index in xrange(count):
+                    child = '{}.{}.{}'.format(parent, category, index)
+                    block_structure._add_relation(parent, child)  # pylint: disable=protected-access
+                    children.append(child)
+            parents = children
+
+        for block_key in block_structure:
+            block_data = block_structure._get_or_create_block(block_key)  # pylint: disable=protected-access
+            block_data.category = block_key.rsplit('.', 2)[-2] if '.' in block_key else 'course'
+            block_data.display_name = u'Display name of {}'.format(block_key)
+            block_data.graded = True
+            block_data.format = 'Homework'
+            block_data.due = None
+            block_data.visible_to_staff_only = False
+            block_data.group_access = {}
+            block_data.weight = 1.0
+            block_structure.set_transformer_block_field(block_key, MockTransformer, 'max_score', 10)
+            block_structure.set_transformer_block_field(block_key, MockTransformer, 'explicit_graded', None)
+        return block_structure
+
+    def time_it(self, func):
+        """
+        Returns the best wall time, in seconds, of calling func.
+        """
+        best = None
+        for _ in xrange(NUM_REPETITIONS):
+            start = default_timer()
+            func()
+            elapsed = default_timer() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    @ddt.data(
+        (5, 5, 5, 5),
+        (20, 10, 5, 5),
+        (20, 10, 10, 10),
+    )
+    @ddt.unpack
+    def test_serializers(self, num_chapters, num_sequentials, num_verticals, num_problems):
+        block_structure = self.create_course(num_chapters, num_sequentials, num_verticals, num_problems)
+        print '\n{} blocks'.format(len(block_structure))
+        print '{:>12} {:>12} {:>12} {:>12} {:>16}'.format(
+            'serializer', 'size', 'add (s)', 'get (s)', 'get+2 fields (s)'
+        )
+
+        for serializer in (ZPickleSerializer(), ColumnarSerializer()):
+            cache = BlockStructureCache(MockCache(), serializer)
+            root_key = block_structure.root_block_usage_key
+
+            def read_two_fields(cache=cache, root_key=root_key):
+                """
+                Reads from the cache and accesses two fields of every block.
+                """
+                from_cache = cache.get(root_key)
+                for block_key in from_cache:
+                    from_cache.get_xblock_field(block_key, 'display_name')
+                    from_cache.get_transformer_block_field(block_key, MockTransformer, 'max_score')
+
+            add_time = self.time_it(lambda cache=cache: cache.add(block_structure))
+            get_time = self.time_it(lambda cache=cache, root_key=root_key: cache.get(root_key))
+            read_time = self.time_it(read_two_fields)
+            size = len(cache._cache.map.values()[0])  # pylint: disable=protected-access
+            print '{:>12} {:>12} {:>12.4f} {:>12.4f} {:>16.4f}'.format(
+                serializer.__class__.__name__.replace('Serializer', ''), size, add_time, get_time, read_time,
+            )
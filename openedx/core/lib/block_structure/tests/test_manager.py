@@ -9,7 +9,7 @@ from ..exceptions import UsageKeyNotInBlockStructure
 from ..manager import BlockStructureManager
 from ..transformers import BlockStructureTransformers
 from .helpers import (
-    MockModulestoreFactory, MockCache, MockTransformer, ChildrenMapTestMixin, mock_registered_transformers
+    MockModulestoreFactory, MockCache, MockTransformer, MockXBlock, ChildrenMapTestMixin, mock_registered_transformers
 )
 
 
@@ -122,7 +122,8 @@ class TestBlockStructureManager(TestCase, ChildrenMapTestMixin):
             self.assertGreater(self.modulestore.get_items_call_count, 0)
         else:
             self.assertEquals(self.modulestore.get_items_call_count, 0)
-        self.assertEquals(self.cache.set_call_count, 1 if expect_cache_updated else 0)
+        # The structure's data and its version are both written to the cache.
+        self.assertEquals(self.cache.set_call_count, 2 if expect_cache_updated else 0)
 
     def test_get_transformed(self):
         with mock_registered_transformers(self.registered_transformers):
@@ -184,3 +185,97 @@ class TestBlockStructureManager(TestCase, ChildrenMapTestMixin):
         self.bs_manager.clear()
         self.collect_and_verify(expect_modulestore_called=True, expect_cache_updated=True)
         self.assertEquals(TestTransformer1.collect_call_count, 2)
+
+
+class TestSubtreeLocalTransformer(TestTransformer1):
+    """
+    Test Transformer class with a subtree-local collect method, which
+    records the blocks it collected.
+    """
+    COLLECT_IS_SUBTREE_LOCAL = True
+    collected_blocks = set()
+
+    @classmethod
+    def collect(cls, block_structure):
+        """
+        Collects block data for the block structure.
+        """
+        super(TestSubtreeLocalTransformer, cls).collect(block_structure)
+        cls.collected_blocks.update(block_structure.get_block_keys())
+
+
+@attr(shard=2)
+class TestBlockStructureManagerIncrementalUpdate(TestCase, ChildrenMapTestMixin):
+    """
+    Test class for incremental updates with BlockStructureManager.
+    """
+    def setUp(self):
+        super(TestBlockStructureManagerIncrementalUpdate, self).setUp()
+        self.registered_transformers = [TestSubtreeLocalTransformer()]
+        self.children_map = [list(children) for children in self.SIMPLE_CHILDREN_MAP]
+        self.modulestore = MockModulestoreFactory.create([list(children) for children in self.children_map])
+        for block_key in range(len(self.children_map)):
+            self.set_block_version(block_key, 'version1')
+        self.bs_manager = BlockStructureManager(root_block_usage_key=0, modulestore=self.modulestore, cache=MockCache())
+
+        with mock_registered_transformers(self.registered_transformers):
+            self.bs_manager.get_collected()
+
+    def set_block_version(self, block_key, version):
+        """
+        Sets the modulestore version of the given block.
+        """
+        self.modulestore.blocks[block_key].field_map['update_version'] = version
+
+    def update_and_verify(self, expected_collected_blocks, incremental=True, missing_blocks=None):
+        """
+        Incrementally updates the collected block structure and verifies
+        the result and the blocks that were recollected.
+        """
+        TestSubtreeLocalTransformer.collected_blocks = set()
+        with mock_registered_transformers(self.registered_transformers):
+            self.bs_manager.update_collected(incremental=incremental)
+            block_structure = self.bs_manager.get_collected()
+        self.assertEquals(TestSubtreeLocalTransformer.collected_blocks, expected_collected_blocks)
+        self.assert_block_structure(block_structure, self.children_map, missing_blocks)
+        TestSubtreeLocalTransformer.assert_collected(block_structure)
+        for block_key in block_structure:
+            self.assertIsNotNone(block_structure.get_xblock_field(block_key, 'update_version'))
+
+    def test_unchanged(self):
+        self.update_and_verify(expected_collected_blocks=set())
+
+    def test_changed_leaf(self):
+        self.set_block_version(3, 'version2')
+        self.update_and_verify(expected_collected_blocks={0, 1, 3})
+
+    def test_changed_subtree(self):
+        self.set_block_version(1, 'version2')
+        self.update_and_verify(expected_collected_blocks={0, 1, 3, 4})
+
+    def test_added_block(self):
+        self.children_map[2].append(5)
+        self.children_map.append([])
+        self.modulestore.blocks[5] = MockXBlock(5, children=[], modulestore=self.modulestore)
+        self.modulestore.blocks[2].children.append(5)
+        self.set_block_version(5, 'version2')
+        self.set_block_version(2, 'version2')
+        self.update_and_verify(expected_collected_blocks={0, 2, 5})
+
+    def test_removed_block(self):
+        self.children_map[1].remove(4)
+        self.modulestore.blocks[1].children.remove(4)
+        self.set_block_version(1, 'version2')
+        self.update_and_verify(expected_collected_blocks={0, 1, 3}, missing_blocks=[4])
+
+    def test_retained_after_clear(self):
+        self.bs_manager.clear(retain=True)
+        self.set_block_version(4, 'version2')
+        self.update_and_verify(expected_collected_blocks={0, 1, 4})
+
+    def test_not_incremental(self):
+        self.update_and_verify(expected_collected_blocks={0, 1, 2, 3, 4}, incremental=False)
+
+    def test_not_subtree_local(self):
+        self.registered_transformers.append(TestTransformer1())
+        self.update_and_verify(expected_collected_blocks={0, 1, 2, 3, 4})
@@ -28,6 +28,20 @@ class BlockStructureTransformer(object):
     #
     VERSION = 0
 
+    # Transformers may set this class attribute to True to declare that
+    # their collect method is subtree-local: the data collected for a
+    # block depends only on that block and its ancestors (for example,
+    # values that are percolated down the tree), and the transformer
+    # does not access xBlocks other than those in the block structure.
+    #
+    # When a course is updated and all registered transformers are
+    # subtree-local, the block_structure framework recollects only the
+    # changed blocks' subtrees and their ancestors, using a partial
+    # block structure of just those blocks, rather than recollecting
+    # the entire block structure.
+    #
+    COLLECT_IS_SUBTREE_LOCAL = False
+
     @classmethod
     def name(cls):
         """
@@ -4,7 +4,9 @@ Module for a collection of BlockStructureTransformers.
 import functools
 from logging import getLogger
 
+from .block_structure import BlockStructureModulestoreData
 from .exceptions import TransformerException
+from .factory import BlockStructureFactory
 from .transformer import FilteringTransformerMixin
 from .transformer_registry import TransformerRegistry
 
@@ -12,6 +14,12 @@ from .transformer_registry import TransformerRegistry
 logger = getLogger(__name__)  # pylint: disable=C0103
 
 
+# Name of the xBlock attribute that identifies the modulestore version
+# in which the block was last changed.  Its value is collected for
+# each block so that changed blocks can be detected on later updates.
+BLOCK_VERSION_FIELD = 'update_version'
+
+
 class BlockStructureTransformers(object):
     """
     The BlockStructureTransformers class encapsulates an ordered list of block
@@ -79,9 +87,96 @@ class BlockStructureTransformers(object):
             block_structure._add_transformer(transformer)  # pylint: disable=protected-access
             transformer.collect(block_structure)
 
-        # Collect all fields that were requested by the transformers.
+        # Collect all fields that were requested by the transformers,
+        # along with the blocks' versions for incremental collection.
+        block_structure.request_xblock_fields(BLOCK_VERSION_FIELD)
         block_structure._collect_requested_xblock_fields()  # pylint: disable=protected-access
 
+    @classmethod
+    def supports_incremental_collect(cls):
+        """
+        Returns whether the collect methods of all registered
+        transformers are subtree-local, so collect_incrementally can
+        be used.
+        """
+        return all(
+            transformer.COLLECT_IS_SUBTREE_LOCAL
+            for transformer in TransformerRegistry.get_registered_transformers()
+        )
+
+    @classmethod
+    def collect_incrementally(cls, block_structure, previous_block_structure):
+        """
+        Collects data for each registered transformer for only those
+        blocks in the given block structure that changed since the
+        previous block structure was collected, along with their
+        descendants and ancestors.  The data of all other blocks is
+        reused from the previous block structure.
+
+        All registered transformers must be subtree-local.  See
+        supports_incremental_collect.
+
+        Arguments:
+            block_structure (BlockStructureModulestoreData) - The
+                updated block structure, with instantiated xBlocks,
+                whose data is to be collected.
+
+            previous_block_structure (BlockStructureBlockData) - A
+                previously collected block structure for the same root,
+                whose data is not outdated.
+
+        Returns:
+            BlockStructureBlockData - The collected block structure,
+                with the relations of the given block structure.
+        """
+        # pylint: disable=protected-access
+        changed_blocks = cls._get_changed_blocks(block_structure, previous_block_structure)
+        affected_blocks = cls._get_affected_blocks(block_structure, changed_blocks)
+        logger.info(
+            "Incrementally collecting BlockStructure %s: %d changed and %d affected of %d blocks.",
+            block_structure.root_block_usage_key,
+            len(changed_blocks),
+            len(affected_blocks),
+            len(block_structure),
+        )
+
+        # Collect the affected blocks in a partial block structure.
+        partial_block_structure = BlockStructureModulestoreData(block_structure.root_block_usage_key)
+        if affected_blocks:
+            for block_key in block_structure.topological_traversal():
+                if block_key in affected_blocks:
+                    partial_block_structure._add_xblock(block_key, block_structure.get_xblock(block_key))
+                    for child_key in block_structure.get_children(block_key):
+                        if child_key in affected_blocks:
+                            partial_block_structure._add_relation(block_key, child_key)
+            cls.collect(partial_block_structure)
+            transformer_data = partial_block_structure.transformer_data
+        else:
+            transformer_data = previous_block_structure.transformer_data
+
+        # Merge the newly collected data with the previous data.
+        collected_block_structure = BlockStructureFactory.create_new(
+            block_structure.root_block_usage_key,
+            block_structure._block_relations,
+            transformer_data,
+            {},
+        )
+        for block_key in block_structure:
+            partial_block_data = partial_block_structure._block_data_map.get(block_key)
+            if block_key in affected_blocks:
+                block_data = partial_block_data
+            else:
+                block_data = previous_block_structure._block_data_map.get(block_key)
+                if block_data is None:
+                    block_data = partial_block_data
+                elif partial_block_data is not None:
+                    # Transformers may have set data on unaffected blocks
+                    # from one of their affected ancestors.
+                    cls._update_block_data(block_data, partial_block_data)
+            if block_data is not None:
+                collected_block_structure._block_data_map[block_key] = block_data
+        return collected_block_structure
+
     @classmethod
     def is_collected_outdated(cls, block_structure):
         """
@@ -101,6 +196,54 @@ class BlockStructureTransformers(object):
 
         return bool(outdated_transformers)
 
+    @classmethod
+    def _get_changed_blocks(cls, block_structure, previous_block_structure):
+        """
+        Returns the set of keys of the blocks in the given block
+        structure that are new, or whose version differs from that of
+        the previous block structure.  Blocks without a version are
+        always considered changed.
+        """
+        changed_blocks = set()
+        for block_key in block_structure:
+            version = getattr(block_structure.get_xblock(block_key), BLOCK_VERSION_FIELD, None)
+            if version is None or version != previous_block_structure.get_xblock_field(block_key, BLOCK_VERSION_FIELD):
+                changed_blocks.add(block_key)
+        return changed_blocks
+
+    @classmethod
+    def _get_affected_blocks(cls, block_structure, changed_blocks):
+        """
+        Returns the set of keys of the given changed blocks together
+        with all of their descendants and ancestors.  In DAGs, the
+        ancestors of the descendants are included as well, so that all
+        parents of each affected block are in the set.
+        """
+        descendants = set()
+        for block_key in changed_blocks:
+            if block_key not in descendants:
+                descendants.update(block_structure.post_order_traversal(start_node=block_key))
+
+        affected_blocks = set()
+        blocks_to_visit = list(descendants)
+        while blocks_to_visit:
+            block_key = blocks_to_visit.pop()
+            if block_key not in affected_blocks:
+                affected_blocks.add(block_key)
+                blocks_to_visit.extend(block_structure.get_parents(block_key))
+        return affected_blocks
+
+    @classmethod
+    def _update_block_data(cls, block_data, new_block_data):
+        """
+        Updates the given BlockData with the fields and transformer
+        data of new_block_data.
+        """
+        for field_name, value in new_block_data.fields.iteritems():
+            setattr(block_data, field_name, value)
+        for transformer_name, transformer_data in new_block_data.transformer_data.iteritems():
+            block_data.transformer_data.get_or_create(transformer_name).fields.update(transformer_data.fields)
+
     def transform(self, block_structure):
         """
         The given block structure is transformed by each transformer in the
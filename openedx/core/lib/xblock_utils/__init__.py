@@ -251,6 +251,34 @@ def replace_static_urls(data_dir, block, view, frag, context, course_id=None, st
     ))
 
 
+def replace_urls(
+        course_id,
+        jump_to_id_base_url,
+        data_dir,
+        block,
+        view,                           # pylint: disable=unused-argument
+        frag,
+        context,                        # pylint: disable=unused-argument
+        static_asset_path=''
+):
+    """
+    Substitutes the /static/..., /course/... and /jump_to_id/... urls of the
+    fragment in a single pass, as replace_static_urls, replace_course_urls and
+    replace_jump_to_id_urls do in turn.  The rewrites are memoized per course
+    version, for the blocks which know it.
+    """
+    # XModules are rendered in place of their descriptor, which knows the course version
+    descriptor = getattr(block, 'descriptor', block)
+    return wrap_fragment(frag, static_replace.replace_urls(
+        frag.content,
+        course_id,
+        jump_to_id_base_url,
+        data_directory=data_dir,
+        static_asset_path=static_asset_path,
+        course_version=getattr(descriptor, 'course_version', None),
+    ))
+
+
 def grade_histogram(module_id):
     '''
     Print out a histogram of grades on a given problem in staff member debug info.